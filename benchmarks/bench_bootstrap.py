@@ -0,0 +1,58 @@
+"""
+CLTV bootstrap güven aralıkları - müşteri sayısına göre süre
+
+Kullanım:
+    python -m benchmarks.bench_bootstrap --customers 20000,200000,1000000 --replicates 20
+
+Her müşteri sayısı için işlem modeli ve Gamma-Gamma örüntü tablolarının
+sıkıştırma oranını (örüntü / müşteri), tekrar başına süreyi ve bu süreyle
+--target tekrarın tahmini toplam süresini yazdırır.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic import make_flo_frame
+from src.btyd_models import fit_cltv_models
+from src.cltv_bootstrap import _pattern_table, bootstrap_cltv
+from src.cltv_core import prepare_cltv_data, build_cltv_summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--customers", default="20000,200000",
+                        help="Müşteri sayıları (virgülle)")
+    parser.add_argument("--replicates", type=int, default=20,
+                        help="Ölçülen tekrar sayısı")
+    parser.add_argument("--target", type=int, default=200,
+                        help="Süresi tahmin edilecek tekrar sayısı")
+    parser.add_argument("--n-jobs", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    target = args.target
+
+    print(f"İşçi: {args.n_jobs}, ölçülen tekrar: {args.replicates}, hedef: {target}")
+    print(f"{'müşteri':>10} {'bgf örüntü':>11} {'ggf örüntü':>11} {'sn/tekrar':>10} "
+          f"{f'{target} tekrar (sn)':>18}")
+    for n_customers in (int(n) for n in args.customers.split(",")):
+        cltv_df = build_cltv_summary(prepare_cltv_data(make_flo_frame(n_customers)))
+        arrays = _pattern_table(cltv_df)
+        n_bgf, n_ggf = len(arrays["bgf_frequency"]), len(arrays["ggf_frequency"])
+        # Tam veri kurulumu ölçüme girmez (pipeline fit aşamasından verir)
+        fit = fit_cltv_models(cltv_df)
+
+        started = time.perf_counter()
+        bootstrap_cltv(cltv_df, n_replicates=args.replicates, n_jobs=args.n_jobs,
+                       transaction_model=fit["transaction_model"],
+                       bgf_params=fit["bgf"], ggf_params=fit["ggf"])
+        per_replicate = (time.perf_counter() - started) / args.replicates
+        print(f"{len(cltv_df):>10,} {n_bgf / len(cltv_df):>11.1%} {n_ggf / len(cltv_df):>11.1%} "
+              f"{per_replicate:>10.3f} {per_replicate * target:>18,.0f}")
+
+
+if __name__ == "__main__":
+    main()
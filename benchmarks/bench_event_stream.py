@@ -0,0 +1,114 @@
+"""
+Canlı sipariş olayları - sürekli işleme hızı (olay/sn)
+
+Kullanım:
+    python -m benchmarks.bench_event_stream --customers 200000,1000000 --events 50000
+
+Her müşteri sayısı için sentetik veriden geçici bir özellik deposu
+kurulur; topluluk başına iş depo büyüklüğünden bağımsız olmalıdır
+(büyük N satırı bunu gösterir). Olaylar analiz
+tarihinden önceki güne düşer (tarih ilerletme ölçüme girmez); --new-share
+kadarı depoda olmayan müşterilerdendir. Her topluluk boyutu için depo
+kopyasına aynı olaylar uygulanır:
+
+- file: olaylar CSV'ye yazılır, tail_batches ile okunur (parse dahil)
+- queue: olaylar sözlük olarak queue.Queue'ya konur (queue_batches)
+
+Olay/sn tüm olayların uygulanma süresinden (duvar saati), topluluk
+gecikmesi run_stream'in uygulama süresinden hesaplanır. Kayma eşiği
+aşılan topluluklar (yeniden bölme / yeniden kurulum) ayrıca sayılır.
+"""
+
+import argparse
+import queue
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic import CHANNELS, make_feature_store
+from src.event_stream import queue_batches, run_stream, tail_batches
+from src.feature_store import FeatureStore
+
+
+def _make_events(ids, n_events, new_share, analysis_date, seed=0):
+    rng = np.random.default_rng(seed)
+    known = ids[rng.integers(len(ids), size=n_events)]
+    new = np.asarray([f"new-{i:08d}" for i in rng.integers(n_events, size=n_events)])
+    day = pd.Timestamp(analysis_date) - pd.Timedelta(days=1)
+    seconds = np.sort(rng.integers(86_400, size=n_events))
+    return pd.DataFrame({
+        "master_id": np.where(rng.random(n_events) < new_share, new, known),
+        "timestamp": (day + pd.to_timedelta(seconds, unit="s")).strftime("%Y-%m-%d %H:%M:%S"),
+        "channel": np.asarray(CHANNELS)[rng.integers(len(CHANNELS), size=n_events)],
+        "amount": rng.gamma(3.0, 60.0, n_events).round(2),
+    })
+
+
+def _run(batches, store_path):
+    reports = []
+    started = time.perf_counter()
+    stats = run_stream(batches, FeatureStore(store_path, mode="r+"),
+                       emit=lambda changes, report: reports.append(report))
+    stats["wall"] = time.perf_counter() - started
+    stats["drift"] = sum(report["rfm"] == "rebin" or report["cltv"] != "frozen"
+                         for report in reports)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--customers", default="200000,1000000",
+                        help="Depo müşteri sayıları (virgülle)")
+    parser.add_argument("--events", type=int, default=20_000)
+    parser.add_argument("--batches", default="100,1000,5000",
+                        help="Topluluk boyutları (virgülle)")
+    parser.add_argument("--new-share", type=float, default=0.05)
+    parser.add_argument("--source", choices=("file", "queue"), default="file")
+    args = parser.parse_args()
+
+    print(f"Olay: {args.events:,}, yeni müşteri payı: {args.new_share:.0%}, "
+          f"kaynak: {args.source}")
+    print(f"{'müşteri':>10} {'topluluk':>9} {'olay/sn':>9} {'gecikme (ms)':>13} "
+          f"{'değişim':>9} {'kayma':>6}")
+    for n_customers in (int(n) for n in args.customers.split(",")):
+        _bench_store(n_customers, args)
+
+
+def _bench_store(n_customers, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path, events_path = Path(tmp) / "feature_store", Path(tmp) / "events.csv"
+        raw = make_feature_store(n_customers, base_path)
+        analysis_date = FeatureStore(base_path).attrs["analysis_date"]
+        events = _make_events(raw["master_id"].to_numpy(), args.events, args.new_share,
+                              analysis_date)
+        events.to_csv(events_path, index=False)
+        records = events.to_dict(orient="records")
+
+        for max_batch in (int(b) for b in args.batches.split(",")):
+            store_path = Path(tmp) / f"store_{max_batch}"
+            shutil.copytree(base_path, store_path)
+            if args.source == "file":
+                batches = tail_batches(events_path, max_batch=max_batch, follow=False)
+            else:
+                events_queue = queue.Queue()
+                for record in records:
+                    events_queue.put(record)
+                events_queue.put(None)
+                batches = queue_batches(events_queue, max_batch=max_batch, max_delay_ms=0)
+            stats = _run(batches, store_path)
+            shutil.rmtree(store_path)
+            print(f"{n_customers:>10,} {max_batch:>9,} "
+                  f"{stats['n_events'] / stats['wall']:>9,.0f} "
+                  f"{stats['seconds'] / stats['n_batches'] * 1000:>13.1f} "
+                  f"{stats['n_changes']:>9,} {stats['drift']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Gruplu CLTV model kurulumu - çekirdek sayısına göre ölçeklenme
+
+Kullanım:
+    python -m benchmarks.bench_grouped_fit --customers 2000000 --by cohort
+
+Her işçi sayısı için grup modellerinin kurulum süresini, 1 işçiye göre
+hızlanmayı ve verimliliği (hızlanma / işçi) yazdırır. Global yedek
+model (örneklemle kurulan ayrı bir görev) ölçüme katılmaz. Grup sayısı
+işçi sayısından az ise ölçeklenme grup sayısıyla sınırlanır; kohort
+gruplaması ("--by cohort --cohort-freq Q") daha çok grup üretir.
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic import make_flo_frame
+from src.cltv_core import prepare_cltv_data, build_cltv_summary
+from src.cltv_grouped import group_labels, fit_grouped_models
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--customers", type=int, default=500_000)
+    parser.add_argument("--by", default="cohort")
+    parser.add_argument("--cohort-freq", default="Q")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    df = prepare_cltv_data(make_flo_frame(args.customers))
+    cltv_df = build_cltv_summary(df)
+    groups = group_labels(df, by=args.by, cohort_freq=args.cohort_freq)
+    print(f"Müşteri: {len(cltv_df):,}  Grup: {groups.nunique()}")
+
+    workers = [1]
+    while workers[-1] * 2 <= args.max_workers:
+        workers.append(workers[-1] * 2)
+
+    baseline = None
+    print(f"{'işçi':>5} {'süre (s)':>10} {'hızlanma':>9} {'verimlilik':>11}")
+    for n_jobs in workers:
+        started = time.perf_counter()
+        fit_grouped_models(cltv_df, groups, n_jobs=n_jobs, min_group_size=1_000,
+                           fit_global=False)
+        elapsed = time.perf_counter() - started
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(f"{n_jobs:>5} {elapsed:>10.2f} {speedup:>9.2f} {speedup / n_jobs:>11.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+CLTV çekirdekleri - Numba ve NumPy yollarının karşılaştırması
+
+Kullanım:
+    python -m benchmarks.bench_kernels --customers 5000000
+
+BG-NBD amaç fonksiyonu + gradyan, 3/6 aylık koşullu beklenen alışveriş
+ve Gamma-Gamma beklenen ortalama değer için her iki yolun süresini,
+hızlanmayı ve sonuçlar arasındaki en büyük farkı yazdırır. Numba'nın
+derleme süresi ölçüme katılmaz (önce küçük bir girdiyle ısıtılır).
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic import make_flo_frame
+from src.cltv_core import prepare_cltv_data, build_cltv_summary, fit_bgf, fit_ggf
+from src.cltv_numba import (NUMBA_AVAILABLE, bgnbd_nll_and_grad, bgnbd_expected_purchases,
+                            gamma_gamma_expected_average_profit)
+
+
+def _timed(func, repeat):
+    best, result = np.inf, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _max_diff(left, right):
+    if isinstance(left, tuple):
+        return max(_max_diff(l, r) for l, r in zip(left, right))
+    return float(np.max(np.abs(np.asarray(left) - np.asarray(right))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--customers", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not NUMBA_AVAILABLE:
+        print("Numba kurulu değil; yalnızca NumPy yolu ölçülecek (pip install numba)")
+
+    # Parametreler küçük bir örneklemde kurulur, çekirdekler tüm veride ölçülür
+    cltv_df = build_cltv_summary(prepare_cltv_data(make_flo_frame(args.customers)))
+    sample = cltv_df.sample(min(len(cltv_df), 50_000), random_state=0)
+    bgf_params, ggf_params = fit_bgf(sample).params_, fit_ggf(sample).params_
+    x, t_x, T, m = (cltv_df[col].to_numpy() for col in
+                    ("frequency", "recency_cltv_weekly", "T_weekly", "monetary_cltv"))
+    weights = np.ones_like(x)
+    log_params = np.log(bgf_params.to_numpy())
+    horizons = np.array([4 * 3, 4 * 6], dtype=float)
+
+    kernels = {
+        "bgnbd_nll_and_grad": lambda backend: bgnbd_nll_and_grad(
+            log_params, x, t_x, T, weights, 0.001, backend=backend),
+        "expected_purchases": lambda backend: bgnbd_expected_purchases(
+            bgf_params, horizons, x, t_x, T, backend=backend),
+        "expected_avg_profit": lambda backend: gamma_gamma_expected_average_profit(
+            ggf_params, x, m, backend=backend),
+    }
+    backends = ["numpy", "numba"] if NUMBA_AVAILABLE else ["numpy"]
+
+    if NUMBA_AVAILABLE:
+        # Isıtma: JIT derlemesi
+        bgnbd_nll_and_grad(log_params, x[:10], t_x[:10], T[:10], weights[:10], backend="numba")
+        bgnbd_expected_purchases(bgf_params, horizons, x[:10], t_x[:10], T[:10], backend="numba")
+        gamma_gamma_expected_average_profit(ggf_params, x[:10], m[:10], backend="numba")
+
+    print(f"Müşteri: {len(x):,}")
+    print(f"{'çekirdek':<22} {'numpy (s)':>10} {'numba (s)':>10} {'hızlanma':>9} {'maks. fark':>11}")
+    for name, func in kernels.items():
+        timings, results = {}, {}
+        for backend in backends:
+            timings[backend], results[backend] = _timed(lambda: func(backend), args.repeat)
+        if NUMBA_AVAILABLE:
+            print(f"{name:<22} {timings['numpy']:>10.3f} {timings['numba']:>10.3f} "
+                  f"{timings['numpy'] / timings['numba']:>9.2f} "
+                  f"{_max_diff(results['numpy'], results['numba']):>11.2e}")
+        else:
+            print(f"{name:<22} {timings['numpy']:>10.3f} {'-':>10} {'-':>9} {'-':>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Müşteri arama servisi yük testi - p50 / p99 gecikme
+
+Kullanım:
+    python -m benchmarks.bench_lookup_service --customers 1000000 --seconds 10
+
+Sentetik veriden geçici bir özellik deposu kurulur (attrs ile), servis
+ayrı bir süreçte UNIX soketi üzerinde başlatılır. --connections kadar
+keep-alive bağlantı aynı anda istek gönderir; istek türleri --mix
+ağırlıklarıyla seçilir. Her istek türü için istemcide ölçülen gecikmenin
+p50 / p99'u ve saniyedeki istek sayısı yazdırılır:
+
+- get: tek müşteri (GET /customers/<id>)
+- multi_get: --batch müşteri (POST /customers)
+- score: depoda olmayan tek müşteri satırı (POST /score, mikro-toplu)
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic import make_feature_store, make_flo_frame
+
+
+async def _request(reader, writer, method, target, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: bench\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while (line := await reader.readline()) != b"\r\n":
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def _client(sock, requests, weights, deadline, latencies):
+    reader, writer = await asyncio.open_unix_connection(sock)
+    rng = np.random.default_rng()
+    while time.perf_counter() < deadline:
+        kind, method, target, payload = requests[rng.choice(len(requests), p=weights)]()
+        started = time.perf_counter()
+        status = await _request(reader, writer, method, target, payload)
+        latencies[kind].append(time.perf_counter() - started)
+        if status != 200:
+            raise RuntimeError(f"{kind}: HTTP {status}")
+    writer.close()
+
+
+async def _run_load(sock, ids, unknown_rows, args):
+    rng = np.random.default_rng(1)
+    requests = [
+        lambda: ("get", "GET", f"/customers/{ids[rng.integers(len(ids))]}", None),
+        lambda: ("multi_get", "POST", "/customers",
+                 {"ids": ids[rng.integers(len(ids), size=args.batch)].tolist()}),
+        lambda: ("score", "POST", "/score",
+                 {"rows": [unknown_rows[rng.integers(len(unknown_rows))]]}),
+    ]
+    # Isınma: her istek türünden bir tane (ölçüme katılmaz)
+    reader, writer = await asyncio.open_unix_connection(sock)
+    for request in requests:
+        await _request(reader, writer, *request()[1:])
+    writer.close()
+
+    weights = np.asarray([float(w) for w in args.mix.split(",")])
+    latencies = {"get": [], "multi_get": [], "score": []}
+    deadline = time.perf_counter() + args.seconds
+    await asyncio.gather(*(_client(sock, requests, weights / weights.sum(), deadline, latencies)
+                           for _ in range(args.connections)))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--customers", type=int, default=200_000)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--mix", default="80,15,5",
+                        help="get, multi_get, score ağırlıkları (virgülle)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path, sock = Path(tmp) / "feature_store", str(Path(tmp) / "lookup.sock")
+        ids = make_feature_store(args.customers, store_path)["master_id"].to_numpy()
+        # Depoda olmayan müşteriler: aynı şema, başka tohum (tarihler analiz tarihinden önce)
+        unknown = make_flo_frame(1_000, seed=99)
+        unknown["master_id"] = "new-" + unknown["master_id"]
+        unknown_rows = unknown.to_dict(orient="records")
+
+        server = subprocess.Popen([sys.executable, "-m", "src.lookup_service",
+                                   "--store", str(store_path), "--unix", sock],
+                                  cwd=Path(__file__).parent.parent, stdout=subprocess.PIPE,
+                                  text=True)
+        try:
+            print(server.stdout.readline().strip())
+            latencies = asyncio.run(_run_load(sock, ids, unknown_rows, args))
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"Bağlantı: {args.connections}, süre: {args.seconds:.0f} sn, "
+          f"multi_get: {args.batch} müşteri, karışım: {args.mix}")
+    print(f"{'istek':<10} {'adet':>8} {'istek/sn':>9} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for kind, values in latencies.items():
+        values = np.asarray(values) * 1000
+        if not len(values):
+            continue
+        print(f"{kind:<10} {len(values):>8,} {len(values) / args.seconds:>9.0f} "
+              f"{np.percentile(values, 50):>9.3f} {np.percentile(values, 99):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,18 @@
 """
 CRM Analytics - Ana Çalıştırma Dosyası
 Bu dosyayı PyCharm'dan direkt çalıştırabilirsiniz!
+
+Akış src/pipeline.py aşamalarıyla çalışır; değişmeyen aşamalar
+önbellekten okunur. Aşama seçimi:
+    python main.py --from fit
+    python main.py --only rfm_scoring
+    python main.py --concurrent     # RFM ve CLTV dalları paralel
+    python main.py --delta delta.csv  # değişen müşterileri özellik deposunda güncelle
+    python main.py --advance 2021-06-15  # analiz tarihini ilerlet (recency yaşlandırma)
+    python main.py --watch [DIR]     # bırakma klasörünü izle (yeni veri / delta dosyaları)
 """
 
+import argparse
 import pandas as pd
 import sys
 from pathlib import Path
@@ -11,18 +21,100 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.flo_rfm_analysis import create_rfm_segments, data_preparation
-from src.flo_cltv_prediction import create_cltv_prediction
-from src.config import DATA_DIR, OUTPUT_DIR, DATA_FILES
+from src.pipeline import run_pipeline, STAGE_NAMES
+from src.summary_report import load_summary_report, segment_count, segment_table
+from src.config import DATA_DIR, DATA_FILES
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="CRM Analytics - RFM & CLTV pipeline")
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument("--only", nargs="+", choices=STAGE_NAMES, metavar="STAGE",
+                           help="Yalnızca bu aşamaları çalıştır (girdiler önbellekten)")
+    selection.add_argument("--from", dest="start", choices=STAGE_NAMES, metavar="STAGE",
+                           help="Bu aşamayı ve sonrasını yeniden çalıştır")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="RFM ve CLTV dallarını ayrı süreçlerde aynı anda çalıştır")
+    parser.add_argument("--delta", metavar="CSV",
+                        help="Değişen müşterilerin satırlarıyla özellik deposunu artımlı güncelle")
+    parser.add_argument("--advance", metavar="DATE",
+                        help="Özellik deposunun analiz tarihini ilerlet (--delta'dan önce uygulanır)")
+    parser.add_argument("--watch", nargs="?", const="", metavar="DIR",
+                        help="Klasörü izle; gelen veri ve delta dosyalarını işle "
+                             "(varsayılan WATCH_CONFIG['drop_dir'])")
+    return parser.parse_args(argv)
+
+
+def print_incremental_report(report):
+    """
+    apply_delta / advance_to raporunu yazdırır
+    """
+    for key, label in (("days", "İlerletilen gün"), ("n_crossed", "Recency sınırını geçen"),
+                       ("n_changed", "Güncellenen müşteri"), ("n_new", "Yeni müşteri")):
+        if key in report:
+            print(f"   - {label}: {report[key]:,}")
+    print(f"   - Log-olabilirlik kayması: {report['loglik_drift']:.4f}")
+    for key in ("rfm_drift", "cltv_drift"):
+        if key in report:
+            print(f"   - {key}: {report[key]:.4f}")
+    print(f"   - RFM: {report['rfm']}, CLTV: {report['cltv']}")
+
 
-def main():
+def run_advance(analysis_date):
+    """
+    Artımlı mod: özellik deposunun analiz tarihini ilerletir
+    """
+    from src.incremental import advance_to
+    
+    print(f"\n📅 Analiz tarihi: {analysis_date}")
+    print_incremental_report(advance_to(analysis_date))
+
+
+def run_delta(delta_path):
+    """
+    Artımlı mod: delta dosyasını mevcut özellik deposuna uygular
+    """
+    from src.incremental import apply_delta
+    
+    print(f"\n📂 Delta dosyası: {delta_path}")
+    print_incremental_report(apply_delta(pd.read_csv(delta_path)))
+
+
+def run_incremental(analysis_date=None, delta_path=None):
+    """
+    Artımlı mod: tarih ilerletme ve delta; segmenti değişen müşteriler
+    değişim akışına (segment_changes.csv) yazılır
+    """
+    from src.change_feed import snapshot_segments, store_changes, write_change_feed
+    from src.feature_store import FeatureStore
+    
+    snapshot = snapshot_segments(FeatureStore())
+    if analysis_date:
+        run_advance(analysis_date)
+    if delta_path:
+        run_delta(delta_path)
+    changes = store_changes(snapshot, FeatureStore())
+    print(f"\n🔁 Segmenti değişen müşteri: {len(changes):,} -> {write_change_feed(changes)}")
+
+
+def main(argv=None):
     """
     Ana çalıştırma fonksiyonu
     """
+    args = parse_args(argv)
     print("=" * 70)
     print("CRM ANALYTICS - RFM & CLTV PREDICTION")
     print("=" * 70)
     
+    if args.advance or args.delta:
+        run_incremental(args.advance, args.delta)
+        return
+    
+    if args.watch is not None:
+        from src.watch_folder import main as watch_main
+        watch_main(["--drop", args.watch] if args.watch else [])
+        return
+    
     # Veri yolunu belirle
     data_path = DATA_DIR / DATA_FILES["flo_data"]
     
@@ -53,103 +145,117 @@ def main():
     
     print(f"\n📂 Veri dosyası: {data_path}")
     
-    # Veriyi yükle
+    # Pipeline
     print("\n" + "-" * 70)
-    print("1️⃣  VERİYİ YÜKLEME")
+    print("1️⃣  PIPELINE ÇALIŞTIRILIYOR")
     print("-" * 70)
     
     try:
-        df = pd.read_csv(data_path)
-        print(f"✅ Veri başarıyla yüklendi!")
-        print(f"   Satır: {df.shape[0]:,}, Sütun: {df.shape[1]}")
+        result = run_pipeline(data_path, month=6, segment_count=4,
+                              only=args.only, start=args.start, concurrent=args.concurrent)
     except Exception as e:
-        print(f"❌ Veri yükleme hatası: {e}")
+        print(f"❌ Pipeline hatası: {e}")
+        print("   Başarılı aşamalar önbellekte; tekrar çalıştırma kaldığı yerden devam eder.")
+        import traceback
+        traceback.print_exc()
+        return
+    
+    # Yalnızca bu çalışmada çalışan veya önbellekte güncel olan aşamalar
+    # raporlanır; --only ile atlanan aşamaların eski çıktıları gösterilmez
+    current = {name for name, status in result.status.items() if status in ("run", "cached")}
+    if not {"reports", "exports"} <= current:
+        print("\n✅ Seçilen aşamalar tamamlandı.")
         return
     
+    # Raporlar yalnızca kaydedilmiş özet dosyasından okunur
+    report_paths, export_paths = result["reports"], result["exports"]
+    store_path = result["feature_store"]["feature_store"] if "feature_store" in current else None
+    feed_path = result["change_feed"]["change_feed"] if "change_feed" in current else None
+    report = load_summary_report(report_paths["summary_report"])
+    
     # RFM Analizi
     print("\n" + "=" * 70)
-    print("2️⃣  RFM ANALİZİ ÇALIŞTIRILIYOR")
+    print("2️⃣  RFM ANALİZİ")
     print("=" * 70)
     
-    try:
-        rfm = create_rfm_segments(df.copy(), csv=False)
-        print("\n✅ RFM analizi tamamlandı!")
-        print(f"\n📊 Segment Dağılımı:")
-        print(rfm['segment'].value_counts().to_string())
-        
-        # Segment ortalamalarını göster
-        print(f"\n📈 Segment Ortalamaları:")
-        segment_stats = rfm.groupby('segment').agg({
-            'recency': 'mean',
-            'frequency': 'mean',
-            'monetary': 'mean'
-        }).round(2)
-        print(segment_stats.to_string())
-        
-        # RFM sonuçlarını kaydet
-        rfm_output_path = OUTPUT_DIR / "rfm_segments.csv"
-        rfm.to_csv(rfm_output_path)
-        print(f"\n💾 RFM sonuçları kaydedildi: {rfm_output_path}")
-        
-    except Exception as e:
-        print(f"❌ RFM analizi hatası: {e}")
-        import traceback
-        traceback.print_exc()
-        return
+    rfm_table = segment_table(report, "rfm", stats=("count", "mean"))
+    print(f"\n📊 Segment Dağılımı:")
+    print(rfm_table['count'].sort_values(ascending=False, kind="stable").to_string())
+    
+    # Segment ortalamalarını göster
+    print(f"\n📈 Segment Ortalamaları:")
+    segment_stats = rfm_table.drop(columns='count').round(2)
+    segment_stats.columns = [col.removesuffix('_mean') for col in segment_stats.columns]
+    print(segment_stats.to_string())
     
     # CLTV Prediction
     print("\n" + "=" * 70)
-    print("3️⃣  CLTV PREDICTION ÇALIŞTIRILIYOR")
+    print("3️⃣  CLTV PREDICTION")
     print("=" * 70)
     
-    try:
-        cltv = create_cltv_prediction(df.copy(), month=6, segment_count=4)
-        print("\n✅ CLTV tahmini tamamlandı!")
-        
-        # CLTV segment dağılımı
-        print(f"\n📊 CLTV Segment Dağılımı:")
-        cltv_segment_stats = cltv.groupby('cltv_segment').agg({
-            'cltv': ['count', 'mean', 'sum']
-        }).round(2)
-        print(cltv_segment_stats.to_string())
-        
-        # En değerli 10 müşteri
-        print(f"\n🏆 En Değerli 10 Müşteri:")
-        top_10 = cltv.nlargest(10, 'cltv')[['cltv', 'frequency', 'monetary_cltv', 'cltv_segment']]
-        print(top_10.to_string())
-        
-        # CLTV sonuçlarını kaydet
-        cltv_output_path = OUTPUT_DIR / "cltv_prediction.csv"
-        cltv.to_csv(cltv_output_path)
-        print(f"\n💾 CLTV sonuçları kaydedildi: {cltv_output_path}")
-        
-    except Exception as e:
-        print(f"❌ CLTV tahmini hatası: {e}")
-        import traceback
-        traceback.print_exc()
-        return
+    # CLTV segment dağılımı
+    print(f"\n📊 CLTV Segment Dağılımı:")
+    cltv_segment_stats = segment_table(report, "cltv", stats=("count", "cltv_mean", "cltv_sum"))
+    print(cltv_segment_stats.round(2).to_string())
+    
+    # En değerli 10 müşteri
+    print(f"\n🏆 En Değerli 10 Müşteri:")
+    top_10 = pd.DataFrame.from_dict(report["top_customers"], orient="index")
+    top_10.index.name = "master_id"
+    print(top_10.to_string())
+    
+    # Toplam gelir ve segment sınırları için bootstrap güven aralıkları
+    revenue_ci = ""
+    if report.get("bootstrap"):
+        bootstrap = report["bootstrap"]
+        print(f"\n🎯 Bootstrap Güven Aralıkları ({bootstrap['n_replicates']} tekrar):")
+        ci_summary = pd.DataFrame.from_dict(bootstrap["quantities"], orient="index")
+        ci_summary.index.name = "quantity"
+        print(ci_summary.round(4).to_string())
+        lower, upper = ci_summary.loc["total_cltv", ["lower", "upper"]]
+        revenue_ci = (f" (%{bootstrap['confidence'] * 100:.0f} GA: "
+                      f"{lower:,.2f} - {upper:,.2f} TL)")
+    
+    # Örneklemli kurulum: tam veri kurulumuna göre doğruluk kaybı ve zaman kazancı
+    fit_report = report.get("fit") or {"strategy": "full", "transaction_model": "bgnbd"}
+    comparison = fit_report.get("full_fit_comparison")
+    if comparison:
+        print(f"\n🧪 Örneklemli Kurulum ({fit_report['sample_size']:,} / "
+              f"{fit_report['n_customers']:,} müşteri):")
+        print(f"   - Toplam CLTV farkı: %{comparison['total_cltv_rel_diff'] * 100:.2f}")
+        print(f"   - Müşteri bazlı CLTV hatası (MAPE): %{comparison['cltv_mape'] * 100:.2f}")
+        print(f"   - Segment uyumu: %{comparison['segment_agreement'] * 100:.1f}")
+        print(f"   - Kurulum süresi: {comparison['sample_fit_seconds']:.2f} sn "
+              f"(tam veri {comparison['full_fit_seconds']:.2f} sn, "
+              f"{comparison['speedup']:.1f}x hızlı)")
+    
+    rfm_total, cltv_total = report["rfm"]["total"], report["cltv"]["total"]
     
-    # Özet rapor
     print("\n" + "=" * 70)
     print("📋 ÖZET RAPOR")
     print("=" * 70)
     
     print(f"""
     ✅ RFM Analizi Tamamlandı
-       - Toplam Müşteri: {len(rfm):,}
-       - Champions: {len(rfm[rfm['segment'] == 'champions']):,}
-       - At Risk: {len(rfm[rfm['segment'] == 'at_risk']):,}
-       - Hibernating: {len(rfm[rfm['segment'] == 'hibernating']):,}
+       - Toplam Müşteri: {rfm_total['count']:,}
+       - Champions: {segment_count(report, 'rfm', 'champions'):,}
+       - At Risk: {segment_count(report, 'rfm', 'at_risk'):,}
+       - Hibernating: {segment_count(report, 'rfm', 'hibernating'):,}
     
     ✅ CLTV Prediction Tamamlandı
        - 6 Aylık Tahmin
-       - A Segment (Top 25%): {len(cltv[cltv['cltv_segment'] == 'A']):,} müşteri
-       - Toplam Tahmini Gelir: {cltv['cltv'].sum():,.2f} TL
-       - Ortalama CLTV: {cltv['cltv'].mean():,.2f} TL
+       - Model: {fit_report['transaction_model']} ({fit_report['strategy']} kurulum)
+       - A Segment (Top 25%): {segment_count(report, 'cltv', 'A'):,} müşteri
+       - Toplam Tahmini Gelir: {cltv_total['cltv_sum']:,.2f} TL{revenue_ci}
+       - Ortalama CLTV: {cltv_total['cltv_mean']:,.2f} TL
     
     📂 Çıktı Dosyaları:
-       - {rfm_output_path}
-       - {cltv_output_path}
+       - {export_paths['rfm_segments']}
+       - {export_paths['cltv_prediction']}
+       - {report_paths['summary_report']}
+       - {report_paths['segment_cube']}
+       - {store_path or 'feature_store aşaması çalıştırılmadı'}
+       - {feed_path or 'change_feed aşaması çalıştırılmadı'}
     """)
     
     print("=" * 70)
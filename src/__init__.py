@@ -6,9 +6,23 @@ RFM ve CLTV analizi için fonksiyonlar
 __version__ = "1.0.0"
 __author__ = "Your Name"
 
-# Ana fonksiyonları import et
-from .flo_rfm_analysis import create_rfm_segments, data_preparation
-from .flo_cltv_prediction import create_cltv_prediction
+# Ana fonksiyonlar ilk erişimde import edilir. flo_* modülleri import
+# edildiklerinde eğitim akışını çalıştırdığından, alt modüllerin
+# (örn. process pool işçilerinin) paketi import etmesi bu akışı
+# tetiklememelidir.
+_LAZY_EXPORTS = {
+    'create_rfm_segments': '.flo_rfm_analysis',
+    'data_preparation': '.flo_rfm_analysis',
+    'create_cltv_prediction': '.flo_cltv_prediction',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        from importlib import import_module
+        return getattr(import_module(_LAZY_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     'create_rfm_segments',
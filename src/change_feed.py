@@ -0,0 +1,187 @@
+"""
+Segment Değişim Akışı (change feed)
+Önceki çalışmaya göre RFM segmenti veya CLTV segmenti değişen müşteriler
+
+CRM'e her çalışmada tüm müşteriler yerine yalnızca değişenler aktarılır.
+Önceki atamalar özellik deposundadır: müşteriler intern edilmiş satır
+konumları, segmentler tamsayı kodlardır. Karşılaştırma kimlik metinleri
+üzerinden birleştirme yapılmadan kod dizileriyle yapılır:
+
+- Yeni çalışmanın müşterileri depo konumlarıyla hizalanır (sıralı
+  kimliklerde ikili arama; kimlikler aynıysa tek karşılaştırma)
+- İki tarafın kategori listeleri ortak bir listeye eşlenir (kategori
+  sayısı kadar iş) ve kodlar bu listeye çevrilir
+- Değişenler old != new maskesiyle seçilir
+
+Çıktıda change sütunu "changed", "new" (önceki çalışmada yok) veya
+"removed" (yeni çalışmada yok) değerini alır. Depo yoksa (ilk çalışma)
+tüm müşteriler "new" olarak yazılır.
+
+Artımlı güncellemelerde (store_changes) önceki atamalar kopyalanmaz:
+depo, update'in üzerine yazdığı kodları bir yazım günlüğünde tutar ve
+yalnızca yazılan konumlar ile eklenen müşteriler karşılaştırılır.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .config import CHANGE_FEED_PATH, FEATURE_STORE_DIR
+
+# Karşılaştırılan atamalar
+CHANGE_COLUMNS = ("segment", "cltv_segment")
+
+
+def _intern(values):
+    # Seri -> (kodlar, kategoriler); kategorik serilerin kodları doğrudan kullanılır
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), list(values.cat.categories)
+    codes, categories = pd.factorize(values.to_numpy(dtype=object))
+    return codes, list(categories)
+
+
+def _recode(codes, categories, union):
+    # Kodları ortak listeye çevirir; -1 (eksik) -1 kalır
+    remap = np.append(pd.Index(union).get_indexer(categories), -1)
+    return remap[codes]
+
+
+def _stored_codes(store, columns):
+    # Depodaki segment kodlarının kopyası: {sütun: (kodlar, kategoriler)}
+    return {name: (np.array(store[name]), list(store.meta["columns"][name]["categories"]))
+            for name in columns if name in store}
+
+
+def snapshot_segments(store, columns=CHANGE_COLUMNS):
+    """
+    Yerinde güncellemeden önce segment atamalarının anlık görüntüsü
+
+    Kodlar kopyalanmaz; depoda bir yazım günlüğü açılır ve update'in
+    bu sütunlarda üzerine yazdığı kodlar saklanır. Güncellemeler aynı
+    FeatureStore nesnesiyle yapılmalıdır.
+
+    Returns
+    -------
+    WriteJournal
+        store_changes'e verilir
+    """
+    return store.journal(columns)
+
+
+def _diff(ids, old, new, in_old, in_new):
+    # Hizalı kod dizilerinden değişen satırlar
+    changed = np.zeros(len(ids), dtype=bool)
+    recoded = {}
+    for name, (new_codes, new_categories) in new.items():
+        old_codes, old_categories = old.get(name, (np.full(len(ids), -1), []))
+        seen = set(old_categories)
+        union = old_categories + [c for c in new_categories if c not in seen]
+        old_codes = _recode(old_codes, old_categories, union)
+        new_codes = _recode(new_codes, new_categories, union)
+        changed |= old_codes != new_codes
+        recoded[name] = (old_codes, new_codes, union)
+
+    rows = np.flatnonzero(changed | (in_old != in_new))
+    change = np.where(~in_old[rows], "new", np.where(~in_new[rows], "removed", "changed"))
+    frame = pd.DataFrame({"change": change},
+                         index=pd.Index(np.asarray(ids)[rows], name="master_id"))
+    for name, (old_codes, new_codes, union) in recoded.items():
+        frame[f"{name}_old"] = pd.Categorical.from_codes(old_codes[rows], categories=union)
+        frame[f"{name}_new"] = pd.Categorical.from_codes(new_codes[rows], categories=union)
+    return frame
+
+
+def segment_changes(rfm, cltv, store=None, columns=CHANGE_COLUMNS, path=None):
+    """
+    Yeni çalışmanın atamalarını depodaki (önceki çalışma) atamalarla karşılaştırır
+
+    Parameters
+    ----------
+    rfm, cltv : DataFrame
+        score_rfm / score_cltv çıktıları (master_id indeksli, sıralı)
+    store : FeatureStore, optional
+        Önceki çalışmanın deposu (verilmezse path'teki depo açılır; yoksa
+        tüm müşteriler yeni sayılır)
+    columns : tuple
+        Karşılaştırılan sütunlar (rfm veya cltv'de)
+    path : str or Path, optional
+        store verilmediğinde açılacak depo (varsayılan FEATURE_STORE_DIR)
+
+    Returns
+    -------
+    DataFrame
+        master_id indeksli, yalnızca değişen müşteriler: change ve her
+        sütun için {sütun}_old, {sütun}_new
+    """
+    path = FEATURE_STORE_DIR if path is None else path
+    if store is None and os.path.exists(os.path.join(path, "meta.json")):
+        from .feature_store import FeatureStore
+
+        store = FeatureStore(path)
+    if not cltv.index.equals(rfm.index):
+        cltv = cltv.reindex(rfm.index)
+    new = {name: _intern((rfm if name in rfm else cltv)[name]) for name in columns}
+    ids = rfm.index.to_numpy(dtype=str)
+    in_new = np.ones(len(ids), dtype=bool)
+    if store is None:
+        return _diff(ids, {}, new, np.zeros(len(ids), dtype=bool), in_new)
+
+    if len(ids) == len(store) and np.array_equal(store.ids, ids):
+        positions = np.arange(len(ids))
+    else:
+        positions = store.positions(ids)
+    found = positions >= 0
+    kept = np.zeros(len(store), dtype=bool)
+    kept[positions[found]] = True
+    removed = np.flatnonzero(~kept)
+
+    # Yeni çalışmanın müşterileri + yalnızca depoda kalanlar
+    old = {}
+    for name, (codes, categories) in _stored_codes(store, columns).items():
+        aligned = np.where(found, codes[np.where(found, positions, 0)], -1)
+        old[name] = (np.concatenate([aligned, codes[removed]]), categories)
+    for name, (codes, categories) in new.items():
+        new[name] = (np.concatenate([codes, np.full(len(removed), -1, dtype=codes.dtype)]),
+                     categories)
+    return _diff(np.concatenate([ids, np.asarray(store.ids[removed], dtype=str)]), old, new,
+                 np.concatenate([found, np.ones(len(removed), dtype=bool)]),
+                 np.concatenate([in_new, np.zeros(len(removed), dtype=bool)]))
+
+
+def store_changes(snapshot, store):
+    """
+    snapshot_segments anındaki depo ile güncel depo arasındaki değişimler
+
+    Artımlı güncellemeler (apply_delta, advance_to) içindir: konumlar
+    değişmez, eklenen müşteriler snapshot'ın sonrasındadır. Yalnızca
+    günlükte yazılmış görünen konumlar ve eklenen müşteriler
+    karşılaştırılır; iş depo büyüklüğüne değil güncellenen müşteri
+    sayısına bağlıdır. Günlük kapatılır.
+    """
+    store.close_journal(snapshot)
+    n_old = snapshot.n_customers
+    written = {name: snapshot.written(name) for name in snapshot.columns}
+    rows = np.union1d(np.concatenate([np.empty(0, dtype=np.int64)]
+                                     + [positions for positions, _ in written.values()]),
+                      np.arange(n_old, len(store)))
+
+    old, new = {}, {}
+    for name, (positions, codes) in written.items():
+        current = np.asarray(store[name][rows])
+        # Yazılmamış konumların kodu değişmemiştir; eklenenlerin önceki kodu yok (-1)
+        before = np.where(rows < n_old, current, -1)
+        before[np.searchsorted(rows, positions)] = codes
+        old[name] = (before, snapshot.categories[name])
+        new[name] = (current, list(store.meta["columns"][name]["categories"]))
+    return _diff(np.asarray(store.ids[rows]), old, new, rows < n_old,
+                 np.ones(len(rows), dtype=bool))
+
+
+def write_change_feed(changes, path=CHANGE_FEED_PATH, append=False):
+    """Değişim akışını CSV olarak yazar (append=True: dosyanın sonuna, başlık bir kez)"""
+    if append and os.path.exists(path):
+        changes.to_csv(path, mode="a", header=False)
+    else:
+        changes.to_csv(path)
+    return path
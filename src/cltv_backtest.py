@@ -0,0 +1,242 @@
+"""
+CLTV Geriye Dönük Test (Calibration / Holdout Backtest)
+Geçmişi bir kalibrasyon kesim tarihinden böler, modelleri kalibrasyon
+penceresinde kurar ve holdout penceresindeki gerçek alışveriş ve
+harcamalarla karşılaştırır. Hatalar cltv_segment bazında raporlanır.
+
+FLO verisi sipariş kaydı değil, müşteri başına yaşam boyu toplamlar
+içerir. Bu yüzden anlık görüntüden bölmede siparişlerin ilk ve son
+alışveriş tarihleri arasına eşit aralıklarla dağıldığı varsayılır ve
+bölme kapalı formda, döngüsüz hesaplanır. Sipariş kaydı varsa
+summary_from_transactions aynı tabloyu kesin olarak üretir.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .config import CLTV_CONFIG
+from .cltv_core import (compress_sufficient_stats, fit_bgf, fit_ggf,
+                        predict_cltv, assign_cltv_segments)
+from .shared_arrays import SharedColumnStore
+
+_SHARED = {}
+
+WEEKS_PER_MONTH = 4.345
+
+
+def parse_order_days(dataframe):
+    """
+    Hazırlanmış veriyi bir kez tam sayı gün dizilerine çevirir
+
+    Returns
+    -------
+    dict
+        first_day, last_day (1970-01-01'den beri gün), orders ve value
+        dizileri; tüm kesim tarihleri bu dizileri paylaşır
+    """
+    return {
+        "first_day": dataframe["first_order_date"].to_numpy("datetime64[D]").astype(np.int64),
+        "last_day": dataframe["last_order_date"].to_numpy("datetime64[D]").astype(np.int64),
+        "orders": dataframe["order_num_total"].to_numpy(dtype=float),
+        "value": dataframe["customer_value_total"].to_numpy(dtype=float),
+    }
+
+
+def split_snapshot(first_day, last_day, orders, value, cutoff_day, end_day):
+    """
+    Anlık görüntüyü kesim gününde kalibrasyon ve holdout olarak böler
+
+    n sipariş ilk ve son alışveriş arasına eşit aralıklı kabul edilir:
+    t_k = first + k * (last - first) / (n - 1), k = 0..n-1.
+    Kesimden önceki sipariş sayısı ve son siparişin zamanı bu
+    diziden doğrudan (floor ile) bulunur.
+
+    Returns
+    -------
+    active : ndarray of bool
+        Kesim gününden önce ilk alışverişini yapmış müşteriler
+    calibration : DataFrame
+        Aktif müşteriler için recency_cltv_weekly, T_weekly, frequency,
+        monetary_cltv (build_cltv_summary ile aynı sütunlar)
+    holdout : DataFrame
+        Aktif müşteriler için holdout_purchases ve holdout_spend
+    """
+    active = first_day < cutoff_day  # T_weekly > 0 olmalı
+    first, last = first_day[active], last_day[active]
+    n, total = orders[active], value[active]
+
+    gap = (last - first) / np.maximum(n - 1, 1)
+    k = np.where(cutoff_day >= last, n - 1,
+                 np.floor((cutoff_day - first) / np.where(gap > 0, gap, 1)))
+    k = np.clip(k, 0, n - 1)
+
+    cal_orders = k + 1
+    cal_last = first + k * gap
+    avg_value = total / n
+
+    calibration = pd.DataFrame({
+        "recency_cltv_weekly": (cal_last - first) / 7,
+        "T_weekly": (cutoff_day - first) / 7,
+        "frequency": cal_orders,
+        "monetary_cltv": avg_value
+    })
+    holdout = pd.DataFrame({
+        "holdout_purchases": n - cal_orders,
+        "holdout_spend": (n - cal_orders) * avg_value,
+        "holdout_weeks": (end_day - cutoff_day) / 7
+    })
+    return active, calibration, holdout
+
+
+def summary_from_transactions(transactions, cutoff, end, customer_col="master_id",
+                              date_col="order_date", value_col="value"):
+    """
+    Sipariş kaydından kalibrasyon/holdout tablolarını üretir
+
+    Anlık görüntü varsayımı gerektirmeyen kesin yol; satırlar sipariş,
+    tarih sütunu datetime olmalıdır. Çıktı split_snapshot ile aynı
+    sütunlara sahiptir ve müşteri kimliğiyle indekslenir.
+    """
+    cal = transactions[transactions[date_col] <= cutoff]
+    hold = transactions[(transactions[date_col] > cutoff) & (transactions[date_col] <= end)]
+
+    cal_agg = cal.groupby(customer_col).agg(first=(date_col, "min"), last=(date_col, "max"),
+                                            frequency=(date_col, "size"), spend=(value_col, "sum"))
+    calibration = pd.DataFrame({
+        "recency_cltv_weekly": (cal_agg["last"] - cal_agg["first"]).dt.days / 7,
+        "T_weekly": (cutoff - cal_agg["first"]).dt.days / 7,
+        "frequency": cal_agg["frequency"].astype(float),
+        "monetary_cltv": cal_agg["spend"] / cal_agg["frequency"]
+    })
+
+    hold_agg = hold.groupby(customer_col).agg(holdout_purchases=(date_col, "size"),
+                                              holdout_spend=(value_col, "sum"))
+    holdout = hold_agg.reindex(calibration.index, fill_value=0).astype(float)
+    holdout["holdout_weeks"] = (end - cutoff).days / 7
+    return calibration, holdout
+
+
+def _error_rows(frame, target, actual, predicted):
+    rows = []
+    for segment, part in frame.groupby("cltv_segment", observed=True):
+        rows.append(_error_row(segment, target, part[actual], part[predicted]))
+    rows.append(_error_row("ALL", target, frame[actual], frame[predicted]))
+    return rows
+
+
+def _error_row(segment, target, actual, predicted):
+    error = predicted.to_numpy() - actual.to_numpy()
+    return {
+        "cltv_segment": segment,
+        "target": target,
+        "n_customers": len(error),
+        "actual_mean": float(actual.mean()),
+        "predicted_mean": float(predicted.mean()),
+        "mae": float(np.abs(error).mean()),
+        "rmse": float(np.sqrt((error ** 2).mean())),
+        "bias": float(predicted.sum() / actual.sum() - 1) if actual.sum() else np.nan
+    }
+
+
+def evaluate_backtest(calibration, holdout, segment_count=4,
+                      bgf_penalizer=None, ggf_penalizer=None):
+    """
+    Kalibrasyon tablosunda modelleri kurar, holdout ile karşılaştırır
+
+    Tahmin edilen alışveriş: bgf.predict(holdout_weeks); tahmin edilen
+    harcama: bu sayı × Gamma-Gamma beklenen ortalama değeri (iskontosuz).
+    cltv_segment, kalibrasyon anındaki holdout ufku kadar CLTV'ye göre
+    atanır.
+
+    Returns
+    -------
+    list of dict
+        Segment × hedef (purchases / spend) başına hata metrikleri
+    """
+    bgf_stats, ggf_stats = compress_sufficient_stats(calibration)
+    bgf = fit_bgf(bgf_stats, penalizer_coef=bgf_penalizer, weights=bgf_stats["weights"])
+    ggf = fit_ggf(ggf_stats, penalizer_coef=ggf_penalizer, weights=ggf_stats["weights"])
+
+    weeks = float(holdout["holdout_weeks"].iloc[0])
+    months = max(int(round(weeks / WEEKS_PER_MONTH)), 1)
+    scored = assign_cltv_segments(predict_cltv(calibration, bgf, ggf, month=months),
+                                  segment_count=segment_count)
+
+    scored["pred_purchases"] = bgf.predict(weeks, calibration["frequency"],
+                                           calibration["recency_cltv_weekly"],
+                                           calibration["T_weekly"])
+    scored["pred_spend"] = scored["pred_purchases"] * scored["exp_average_value"]
+    scored[["holdout_purchases", "holdout_spend"]] = \
+        holdout[["holdout_purchases", "holdout_spend"]].to_numpy()
+
+    return (_error_rows(scored, "purchases", "holdout_purchases", "pred_purchases")
+            + _error_rows(scored, "spend", "holdout_spend", "pred_spend"))
+
+
+def _init_worker(spec):
+    store = SharedColumnStore.attach(spec)
+    _SHARED["store"] = store  # görünümler yaşadıkça bağlantı açık kalmalı
+    _SHARED.update(store.arrays)
+
+
+def _run_cutoff(cutoff_day, end_day, segment_count, bgf_penalizer, ggf_penalizer):
+    _, calibration, holdout = split_snapshot(_SHARED["first_day"], _SHARED["last_day"],
+                                             _SHARED["orders"], _SHARED["value"],
+                                             cutoff_day, end_day)
+    rows = evaluate_backtest(calibration, holdout, segment_count=segment_count,
+                             bgf_penalizer=bgf_penalizer, ggf_penalizer=ggf_penalizer)
+    cutoff = np.datetime64(int(cutoff_day), "D")
+    for row in rows:
+        row["cutoff"] = str(cutoff)
+        row["holdout_weeks"] = (end_day - cutoff_day) / 7
+    return rows
+
+
+def run_backtest(dataframe, holdout_weeks=None, segment_count=4, n_jobs=None,
+                 bgf_penalizer=None, ggf_penalizer=None):
+    """
+    Birden çok kesim tarihi için backtest'i paralel çalıştırır
+
+    Parameters
+    ----------
+    dataframe : DataFrame
+        prepare_cltv_data ile hazırlanmış veri seti
+    holdout_weeks : sequence of int, optional
+        Her kesim için holdout penceresi uzunluğu (hafta); kesim tarihi
+        analiz tarihinden bu kadar önce seçilir
+        (varsayılan CLTV_CONFIG["backtest_holdout_weeks"])
+    segment_count : int, default 4
+        CLTV segment sayısı
+    n_jobs : int, optional
+        İşçi süreç sayısı
+
+    Returns
+    -------
+    DataFrame
+        cutoff, holdout_weeks, cltv_segment, target, n_customers,
+        actual_mean, predicted_mean, mae, rmse, bias
+
+    Not
+    ---
+    Tarihler bir kez gün sayılarına çevrilip paylaşımlı belleğe konur;
+    her kesim aynı dizileri kullanır, yeniden parse edilmez.
+    """
+    if holdout_weeks is None:
+        holdout_weeks = CLTV_CONFIG["backtest_holdout_weeks"]
+
+    arrays = parse_order_days(dataframe)
+    end_day = int(arrays["last_day"].max()) + 2  # analiz tarihi: son alışveriş + 2 gün
+    cutoffs = [end_day - 7 * int(weeks) for weeks in holdout_weeks]
+
+    with SharedColumnStore(arrays) as store:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(store.spec,)) as executor:
+            futures = [executor.submit(_run_cutoff, cutoff, end_day, segment_count,
+                                       bgf_penalizer, ggf_penalizer) for cutoff in cutoffs]
+            rows = [row for future in futures for row in future.result()]
+
+    columns = ["cutoff", "holdout_weeks", "cltv_segment", "target", "n_customers",
+               "actual_mean", "predicted_mean", "mae", "rmse", "bias"]
+    return pd.DataFrame(rows)[columns]
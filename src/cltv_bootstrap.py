@@ -0,0 +1,221 @@
+"""
+CLTV Bootstrap Güven Aralıkları
+İşlem modeli (BG-NBD, MBG-NBD veya Pareto/NBD) ve Gamma-Gamma
+parametreleri, toplam tahmini gelir ve CLTV segment sınırları için
+bootstrap güven aralıkları üretir.
+
+Müşteriler kopyalanarak yeniden örneklenmez. İşlem modelinin
+olabilirliği yalnızca (frequency, recency, T), Gamma-Gamma'nınki
+(frequency, monetary) örüntüsüne bağlıdır; iki örüntü tablosu ayrı
+kurulur ve her tekrar yeniden örneklenen müşterilerin sayılarını bu
+tablolara ağırlık olarak toplar. recency ve T gün sayısından geldiği
+için işlem örüntüleri müşterileri sıkıştırır; sürekli monetary yalnızca
+Gamma-Gamma tablosunu büyütür. Modeller ağırlıklı tablolar üzerinde, tam
+veri parametrelerinden warm start ile process pool'da yeniden kurulur.
+Toplam CLTV ve segment sınırları da örüntü başına hesaplanıp müşterilere
+dağıtılır (benchmarks/bench_bootstrap.py).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from lifetimes.utils import ConvergenceError
+from scipy.optimize import minimize
+
+from .btyd_models import BTYD_MODELS, fit_btyd, frozen_model, get_model
+from .config import CLTV_CONFIG
+from .cltv_core import fit_ggf, ggf_initial_params, frozen_ggf, discounted_cltv
+from .cltv_numba import gamma_gamma_expected_average_profit, gamma_gamma_nll_and_grad
+from .shared_arrays import SharedColumnStore
+
+_SHARED = {}
+
+GGF_PARAMS = ("p", "q", "v")
+
+# Örüntü tablolarının sütunları (paylaşımlı dizilerde bgf_ / ggf_ önekli)
+BGF_COLUMNS = ("frequency", "recency_cltv_weekly", "T_weekly")
+GGF_COLUMNS = ("frequency", "monetary_cltv")
+
+
+def _init_worker(spec):
+    store = SharedColumnStore.attach(spec)
+    _SHARED["store"] = store  # görünümler yaşadıkça bağlantı açık kalmalı
+    _SHARED.update(store.arrays)
+
+
+def _pattern_table(cltv_df):
+    """
+    İşlem modeli ve Gamma-Gamma örüntü tabloları ile müşteri başına
+    örüntü numaraları (bgf_id, ggf_id)
+    """
+    arrays = {}
+    for prefix, columns in (("bgf", BGF_COLUMNS), ("ggf", GGF_COLUMNS)):
+        ids = cltv_df.groupby(list(columns), sort=False).ngroup().to_numpy(dtype=np.int64)
+        # ngroup(sort=False) numaraları ilk görülme sırasındadır
+        first = np.unique(ids, return_index=True)[1]
+        arrays[f"{prefix}_id"] = ids
+        for column in columns:
+            arrays[f"{prefix}_{column}"] = cltv_df[column].to_numpy(dtype=float)[first]
+    return arrays
+
+
+def _weighted_stats(prefix, columns, weights):
+    # Ağırlığı sıfır kalan örüntüler atılır
+    used = weights > 0
+    stats = pd.DataFrame({column: _SHARED[f"{prefix}_{column}"][used] for column in columns})
+    stats["weights"] = weights[used].astype(float)
+    return stats
+
+
+def _fit_ggf(stats, penalizer_coef, start):
+    # fit_ggf ile aynı amaç fonksiyonu; analitik gradyanla ve lifetimes'ın
+    # her kurulumda hesapladığı Hessian olmadan
+    if penalizer_coef is None:
+        penalizer_coef = CLTV_CONFIG["ggf_penalizer_coef"]
+    with np.errstate(all="ignore"):
+        output = minimize(gamma_gamma_nll_and_grad, ggf_initial_params(start), method="L-BFGS-B",
+                          jac=True, args=(stats["frequency"], stats["monetary_cltv"],
+                                          stats["weights"], penalizer_coef))
+    if not output.success or not np.all(np.isfinite(output.x)):
+        raise ConvergenceError(f"Gamma-Gamma modeli yakınsamadı: {output.message}")
+    return frozen_ggf(dict(zip(GGF_PARAMS, np.exp(output.x))), penalizer_coef)
+
+
+def _score(arrays, bgf, ggf, month, segment_count):
+    # İskonto çarpanı işlem örüntüsü, ortalama değer Gamma-Gamma örüntüsü
+    # başına bir kez hesaplanır; (orijinal) müşteri tabanına numaralarla dağıtılır
+    discount = discounted_cltv(bgf, *(arrays[f"bgf_{column}"] for column in BGF_COLUMNS),
+                               1.0, month=month)
+    expected_value = gamma_gamma_expected_average_profit(
+        ggf.params_, *(arrays[f"ggf_{column}"] for column in GGF_COLUMNS))
+    cltv = expected_value[arrays["ggf_id"]] * discount[arrays["bgf_id"]]
+
+    # qcut sınırlarının alt kantil karşılığı (sıralama yerine seçim)
+    levels = np.arange(1, segment_count) / segment_count
+    return float(cltv.sum()), np.quantile(cltv, levels, method="inverted_cdf")
+
+
+def _bootstrap_replicate(seed, model, bgf_start, ggf_start, month, segment_count,
+                         bgf_penalizer, ggf_penalizer):
+    # İşçi süreçte çalışır; bir tekrarın parametre ve özetlerini döndürür
+    rng = np.random.default_rng(seed)
+    bgf_id, ggf_id = _SHARED["bgf_id"], _SHARED["ggf_id"]
+    draw = rng.integers(0, len(bgf_id), len(bgf_id))
+
+    bgf_stats = _weighted_stats("bgf", BGF_COLUMNS, np.bincount(
+        bgf_id[draw], minlength=len(_SHARED["bgf_frequency"])))
+    ggf_stats = _weighted_stats("ggf", GGF_COLUMNS, np.bincount(
+        ggf_id[draw], minlength=len(_SHARED["ggf_frequency"])))
+    fitter = get_model(model, bgf_penalizer)
+    try:
+        bgf = fitter.fit(bgf_stats["frequency"], bgf_stats["recency_cltv_weekly"],
+                         bgf_stats["T_weekly"], weights=bgf_stats["weights"],
+                         initial_params=fitter.initial_params(bgf_start, bgf_stats["T_weekly"]))
+        ggf = _fit_ggf(ggf_stats, ggf_penalizer, ggf_start)
+    except ConvergenceError:
+        return None
+
+    total, cuts = _score(_SHARED, bgf, ggf, month, segment_count)
+    row = {f"bgf_{name}": float(bgf.params_[name]) for name in bgf_start}
+    row.update({f"ggf_{name}": float(ggf.params_[name]) for name in GGF_PARAMS})
+    row["total_cltv"] = total
+    row.update({f"cut_{i + 1}": float(cut) for i, cut in enumerate(cuts)})
+    return row
+
+
+def bootstrap_cltv(cltv_df, n_replicates=200, confidence=None, month=6, segment_count=4,
+                   transaction_model="bgnbd", bgf_params=None, ggf_params=None,
+                   bgf_penalizer=None, ggf_penalizer=None, n_jobs=None, random_state=42):
+    """
+    Model parametreleri, toplam CLTV ve segment sınırları için
+    yüzdelik bootstrap güven aralıkları
+
+    Parameters
+    ----------
+    cltv_df : DataFrame
+        build_cltv_summary çıktısı
+    n_replicates : int, default 200
+        Bootstrap tekrar sayısı (pipeline CLTV_CONFIG["bootstrap_replicates"] verir)
+    confidence : float, optional
+        Güven düzeyi (varsayılan CLTV_CONFIG["bootstrap_confidence"])
+    month : int, default 6
+        CLTV ufku (ay)
+    segment_count : int, default 4
+        Segment sayısı; segment_count - 1 sınır raporlanır (cut_1 en düşük)
+    transaction_model : {"bgnbd", "mbgnbd", "pareto_nbd"}, default "bgnbd"
+        Her tekrarda yeniden kurulan işlem modeli; bgf_params bu modelin
+        parametreleridir (bgf_ önekiyle raporlanır)
+    bgf_params, ggf_params : dict, optional
+        Tam veri parametreleri; verilmezse burada kurulur. Nokta tahmini
+        ve tüm tekrarlar için warm start olarak kullanılır.
+    n_jobs : int, optional
+        İşçi süreç sayısı
+    random_state : int
+        Kök seed; her tekrar SeedSequence.spawn ile kendi akışını alır
+
+    Returns
+    -------
+    summary : DataFrame
+        quantity indeksli; estimate, lower, upper, std sütunları
+    replicates : DataFrame
+        Tekrar başına değerler (yakınsamayan tekrarlar atılır)
+
+    Not
+    ---
+    - Her tekrar n müşteri numarasını iadeli çeker; çekilenlerin örüntü
+      numaraları bincount ile iki tabloya ağırlık olarak toplanır (kopya
+      veri oluşmaz, işlem ve Gamma-Gamma örnekleri aynı müşterilerdir)
+    - Toplam CLTV ve segment sınırları her tekrarın parametreleriyle
+      orijinal müşteri tabanı üzerinden hesaplanır (parametre belirsizliği)
+    """
+    if confidence is None:
+        confidence = CLTV_CONFIG["bootstrap_confidence"]
+
+    if transaction_model not in BTYD_MODELS:
+        raise ValueError(f"Bilinmeyen işlem modeli: {transaction_model!r} "
+                         f"(seçenekler: {', '.join(BTYD_MODELS)})")
+    if bgf_params is None:
+        bgf_params = fit_btyd(cltv_df, transaction_model, bgf_penalizer).params_
+    if ggf_params is None:
+        ggf_params = fit_ggf(cltv_df, penalizer_coef=ggf_penalizer).params_
+    bgf_params = {name: float(bgf_params[name])
+                  for name in BTYD_MODELS[transaction_model].param_names}
+    ggf_params = {name: float(ggf_params[name]) for name in GGF_PARAMS}
+
+    arrays = _pattern_table(cltv_df)
+    seeds = np.random.SeedSequence(random_state).spawn(n_replicates)
+
+    # Nokta tahmini de aynı örüntü tablosundan hesaplanır
+    point = _score(arrays, frozen_model(transaction_model, bgf_params, bgf_penalizer),
+                   frozen_ggf(ggf_params, ggf_penalizer), month, segment_count)
+
+    with SharedColumnStore(arrays) as store:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(store.spec,)) as executor:
+            futures = [executor.submit(_bootstrap_replicate, seed, transaction_model, bgf_params,
+                                       ggf_params, month, segment_count, bgf_penalizer,
+                                       ggf_penalizer)
+                       for seed in seeds]
+            rows = [future.result() for future in futures]
+
+    replicates = pd.DataFrame([row for row in rows if row is not None])
+    if replicates.empty:
+        raise ValueError("Hiçbir bootstrap tekrarında model yakınsamadı")
+
+    estimate = {f"bgf_{name}": value for name, value in bgf_params.items()}
+    estimate.update({f"ggf_{name}": value for name, value in ggf_params.items()})
+    estimate["total_cltv"] = point[0]
+    estimate.update({f"cut_{i + 1}": float(cut) for i, cut in enumerate(point[1])})
+
+    tail = (1 - confidence) / 2 * 100
+    summary = pd.DataFrame({
+        "estimate": pd.Series(estimate),
+        "lower": replicates.quantile(tail / 100),
+        "upper": replicates.quantile(1 - tail / 100),
+        "std": replicates.std()
+    })
+    summary.index.name = "quantity"
+    summary.attrs["n_replicates"] = len(replicates)
+    summary.attrs["confidence"] = confidence
+    return summary, replicates
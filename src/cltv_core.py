@@ -0,0 +1,467 @@
+"""
+CLTV Çekirdek Fonksiyonları
+Veri hazırlama, CLTV veri yapısı, model kurma ve skorlama adımları
+
+Bu modül yan etkisizdir (import edildiğinde veri okumaz, çıktı basmaz);
+create_cltv_prediction ve paralel/örneklemeli özellikler buradaki
+adımları ortak kullanır.
+"""
+
+import datetime as dt
+import numpy as np
+import pandas as pd
+from lifetimes import BetaGeoFitter
+from lifetimes import GammaGammaFitter
+
+from .config import CLTV_CONFIG
+from .cltv_kernels import bgnbd_probability_alive
+from .cltv_numba import bgnbd_expected_purchases, gamma_gamma_expected_average_profit
+
+# Aykırı değer baskılaması yapılacak değişkenler
+OUTLIER_COLUMNS = [
+    "order_num_total_ever_online",
+    "order_num_total_ever_offline",
+    "customer_value_total_ever_offline",
+    "customer_value_total_ever_online"
+]
+
+# Model girdisi olan CLTV sütunları
+CLTV_COLUMNS = ["recency_cltv_weekly", "T_weekly", "frequency", "monetary_cltv"]
+
+# Bir ayın model zaman birimi cinsinden uzunluğu (lifetimes ile aynı)
+PERIOD_FACTORS = {"W": 4.345, "M": 1.0, "D": 30, "H": 30 * 24}
+
+
+def cap_outliers(dataframe, columns=None, quantiles=None, thresholds=None):
+    """
+    Aykırı değerleri üst eşikle baskılar (yerinde değiştirir)
+
+    Eşik: q_üst + 1.5 * (q_üst - q_alt), yuvarlanmış. Tüm sütunların
+    kantilleri tek np.nanquantile çağrısıyla 2-D dizi üzerinden bulunur,
+    baskılama np.minimum ile indeks hizalaması olmadan yapılır.
+
+    Parameters
+    ----------
+    dataframe : DataFrame
+        Ham FLO veri seti
+    columns : list, optional
+        Baskılanacak sütunlar (varsayılan OUTLIER_COLUMNS)
+    quantiles : tuple, optional
+        (alt, üst) kantiller (varsayılan CLTV_CONFIG["outlier_quantiles"])
+    thresholds : dict, optional
+        Daha önce hesaplanmış {sütun: üst eşik}; verilirse kantil
+        hesaplanmaz (yeni veriyi eğitimdeki eşiklerle skorlamak için)
+
+    Returns
+    -------
+    dict
+        Uygulanan {sütun: üst eşik}
+    """
+    if columns is None:
+        columns = list(thresholds) if thresholds is not None else OUTLIER_COLUMNS
+    values = dataframe[columns].to_numpy(dtype=float, copy=True)
+
+    if thresholds is None:
+        if quantiles is None:
+            quantiles = CLTV_CONFIG["outlier_quantiles"]
+        low_q, up_q = np.nanquantile(values, quantiles, axis=0)
+        up_limits = np.round(up_q + 1.5 * (up_q - low_q))
+        thresholds = dict(zip(columns, up_limits.tolist()))
+    else:
+        up_limits = np.array([thresholds[col] for col in columns], dtype=float)
+
+    np.minimum(values, up_limits, out=values)
+    dataframe[columns] = values
+    return thresholds
+
+
+def prepare_cltv_data(dataframe, thresholds=None):
+    """
+    Ham FLO verisini CLTV için hazırlar (yerinde değiştirir)
+
+    Parameters
+    ----------
+    dataframe : DataFrame
+        Ham FLO veri seti
+    thresholds : dict, optional
+        cap_outliers'a iletilecek hazır aykırı değer eşikleri
+
+    Returns
+    -------
+    DataFrame
+        Aykırı değerleri baskılanmış, omnichannel toplamları eklenmiş
+        ve tarih sütunları datetime'a çevrilmiş veri seti; uygulanan
+        eşikler dataframe.attrs["outlier_thresholds"] içindedir
+    """
+    dataframe.attrs["outlier_thresholds"] = cap_outliers(dataframe, thresholds=thresholds)
+    add_omnichannel_totals(dataframe)
+    parse_dates(dataframe)
+    return dataframe
+
+
+def add_omnichannel_totals(dataframe):
+    """order_num_total ve customer_value_total sütunlarını ekler (yerinde)"""
+    dataframe["order_num_total"] = (
+        dataframe["order_num_total_ever_online"] +
+        dataframe["order_num_total_ever_offline"]
+    )
+    dataframe["customer_value_total"] = (
+        dataframe["customer_value_total_ever_online"] +
+        dataframe["customer_value_total_ever_offline"]
+    )
+    return dataframe
+
+
+def parse_dates(dataframe):
+    """Adında "date" geçen sütunları datetime'a çevirir (yerinde)"""
+    date_cols = [col for col in dataframe.columns if "date" in col]
+    for col in date_cols:
+        dataframe[col] = pd.to_datetime(dataframe[col])
+    return dataframe
+
+
+def build_cltv_summary(dataframe, analysis_date=None):
+    """
+    Hazırlanmış veriden müşteri bazlı CLTV veri yapısını oluşturur
+
+    Parameters
+    ----------
+    dataframe : DataFrame
+        prepare_cltv_data ile hazırlanmış veri seti
+    analysis_date : datetime, optional
+        Analiz tarihi. Verilmezse en son alışveriş + 2 gün kullanılır.
+
+    Returns
+    -------
+    cltv_df : DataFrame
+        master_id indeksli; recency_cltv_weekly, T_weekly, frequency,
+        monetary_cltv sütunları
+
+    Not
+    ---
+    - recency_cltv: İlk ve son alışveriş arası süre (last - first)
+    - T: Müşteri yaşı (analysis_date - first_order_date)
+    """
+    if analysis_date is None:
+        analysis_date = dataframe["last_order_date"].max() + dt.timedelta(days=2)
+
+    cltv_df = dataframe.groupby('master_id').agg(
+        first_order_date=('first_order_date', 'min'),
+        last_order_date=('last_order_date', 'max'),
+        frequency=('order_num_total', 'sum'),
+        monetary_cltv=('customer_value_total', 'sum')
+    )
+
+    recency_days = (cltv_df["last_order_date"] - cltv_df["first_order_date"]).dt.days
+    t_days = (analysis_date - cltv_df["first_order_date"]).dt.days
+
+    # Monetary: İşlem başına ortalama, süreler haftalık
+    cltv_df["monetary_cltv"] = cltv_df["monetary_cltv"] / cltv_df["frequency"]
+    cltv_df["recency_cltv_weekly"] = recency_days / 7
+    cltv_df["T_weekly"] = t_days / 7
+
+    return cltv_df[CLTV_COLUMNS]
+
+
+def fit_bgf(cltv_df, penalizer_coef=None, **fit_kwargs):
+    """
+    BG-NBD modelini CLTV veri yapısı üzerinde kurar
+
+    penalizer_coef verilmezse CLTV_CONFIG["bgf_penalizer_coef"] kullanılır.
+    fit_kwargs lifetimes BetaGeoFitter.fit'e aynen iletilir
+    (weights, initial_params, tol ...).
+    """
+    if penalizer_coef is None:
+        penalizer_coef = CLTV_CONFIG["bgf_penalizer_coef"]
+    bgf = BetaGeoFitter(penalizer_coef=penalizer_coef)
+    bgf.fit(
+        cltv_df['frequency'],
+        cltv_df['recency_cltv_weekly'],
+        cltv_df['T_weekly'],
+        **fit_kwargs
+    )
+    return bgf
+
+
+def fit_ggf(cltv_df, penalizer_coef=None, **fit_kwargs):
+    """
+    Gamma-Gamma modelini CLTV veri yapısı üzerinde kurar
+
+    penalizer_coef verilmezse CLTV_CONFIG["ggf_penalizer_coef"] kullanılır.
+    fit_kwargs lifetimes GammaGammaFitter.fit'e aynen iletilir.
+    """
+    if penalizer_coef is None:
+        penalizer_coef = CLTV_CONFIG["ggf_penalizer_coef"]
+    ggf = GammaGammaFitter(penalizer_coef=penalizer_coef)
+    ggf.fit(cltv_df['frequency'], cltv_df['monetary_cltv'], **fit_kwargs)
+    return ggf
+
+
+def bgf_initial_params(params, T):
+    """
+    Daha önce bulunmuş BG-NBD parametrelerini lifetimes'ın
+    optimizasyon uzayına (log ölçek, ölçeklenmiş alpha) çevirir
+
+    Warm start için BetaGeoFitter.fit(initial_params=...) ile kullanılır.
+    """
+    scale = 10.0 / np.max(np.asarray(T))
+    r, alpha, a, b = (params[name] for name in ("r", "alpha", "a", "b"))
+    return np.log([r, alpha * scale, a, b])
+
+
+def ggf_initial_params(params):
+    """Gamma-Gamma parametrelerini log ölçekli başlangıç değerine çevirir"""
+    return np.log([params["p"], params["q"], params["v"]])
+
+
+def compress_sufficient_stats(cltv_df):
+    """
+    CLTV veri yapısını yeterli istatistiklere sıkıştırır
+
+    BG-NBD olabilirliği yalnızca (frequency, recency, T) üçlüsüne,
+    Gamma-Gamma olabilirliği (frequency, monetary) ikilisine bağlıdır.
+    Aynı örüntüye sahip müşteriler tek satırda toplanır ve sayıları
+    weights sütununa yazılır (Fader & Hardie'nin önerdiği yoğunlaştırma).
+
+    Returns
+    -------
+    bgf_stats, ggf_stats : DataFrame
+        fit_bgf / fit_ggf'e weights=...["weights"] ile verilebilecek tablolar
+    """
+    bgf_stats = (cltv_df.groupby(["frequency", "recency_cltv_weekly", "T_weekly"], sort=False)
+                 .size().rename("weights").reset_index())
+    ggf_stats = (cltv_df.groupby(["frequency", "monetary_cltv"], sort=False)
+                 .size().rename("weights").reset_index())
+    return bgf_stats, ggf_stats
+
+
+def frozen_bgf(params, penalizer_coef=None):
+    """
+    Parametreleri bilinen (örn. başka bir süreçte kurulmuş) BG-NBD modelini
+    yeniden kurmadan tahmin yapılabilir hale getirir
+    """
+    if penalizer_coef is None:
+        penalizer_coef = CLTV_CONFIG["bgf_penalizer_coef"]
+    bgf = BetaGeoFitter(penalizer_coef=penalizer_coef)
+    bgf.params_ = pd.Series(params, dtype=float)[["r", "alpha", "a", "b"]]
+    bgf.predict = bgf.conditional_expected_number_of_purchases_up_to_time
+    return bgf
+
+
+def frozen_ggf(params, penalizer_coef=None):
+    """Parametreleri bilinen Gamma-Gamma modelini tahmine hazırlar"""
+    if penalizer_coef is None:
+        penalizer_coef = CLTV_CONFIG["ggf_penalizer_coef"]
+    ggf = GammaGammaFitter(penalizer_coef=penalizer_coef)
+    ggf.params_ = pd.Series(params, dtype=float)[["p", "q", "v"]]
+    return ggf
+
+
+def expected_purchases_curve(bgf, horizons, frequency, recency, T):
+    """
+    Koşullu beklenen alışveriş sayısını tüm ufuklar için tek çağrıda
+    hesaplar; (müşteri, ufuk) matrisi döner
+
+    btyd_models modelleri ve lifetimes BetaGeoFitter ufuk dizisini
+    doğrudan alır; diğer lifetimes fitter'ları ufuk başına predict ile
+    hesaplanır.
+    """
+    horizons = np.asarray(horizons, dtype=float)
+    if hasattr(bgf, "expected_purchases_kernel"):
+        return bgf.predict(horizons, frequency, recency, T)
+    if isinstance(bgf, BetaGeoFitter):
+        return bgnbd_expected_purchases(bgf.params_, horizons, frequency, recency, T)
+    return np.column_stack([np.asarray(bgf.predict(t, frequency, recency, T)) for t in horizons])
+
+
+def discounted_cltv(bgf, frequency, recency, T, expected_value, month=6, freq=None,
+                    discount_rate=None, method="monthly", n_nodes=32):
+    """
+    İskontolu CLTV; ay başına predict döngüsü olmadan
+
+    Parameters
+    ----------
+    bgf : BetaGeoFitter veya btyd_models modeli
+        Kurulmuş işlem modeli
+    frequency, recency, T : array-like
+        Model girdileri (recency ve T freq biriminde)
+    expected_value : array-like
+        Beklenen ortalama işlem değeri (exp_average_value)
+    month : int, default 6
+        CLTV ufku (ay)
+    freq : str, optional
+        Zaman birimi (varsayılan CLTV_CONFIG["freq"])
+    discount_rate : float, optional
+        Aylık iskonto oranı (varsayılan CLTV_CONFIG["discount_rate"])
+    method : {"monthly", "continuous"}, default "monthly"
+        "monthly": ggf.customer_lifetime_value ile aynı; her ayın
+        alışveriş artışı ay sonunda (1 + d)^ay ile iskontolanır.
+        "continuous": alışverişler gerçekleştiği anda e^(-δt)
+        (δ = ln(1 + d) / ay uzunluğu) ile iskontolanır.
+    n_nodes : int, default 32
+        "continuous" için Gauss-Legendre düğüm sayısı
+
+    Returns
+    -------
+    ndarray
+        Müşteri başına CLTV
+
+    Not
+    ---
+    Her iki yöntemde de beklenen alışveriş eğrisi tüm ufuklar için tek
+    toplu çağrıda (expected_purchases_curve) hesaplanır; lifetimes ise
+    her ay için iki kez tüm müşteri tablosunu dolaşır. Sürekli yöntemde
+    kısmi integrasyon kullanılır:
+    ∫ e^(-δt) dE(t) = e^(-δH)·E(H) + δ ∫ e^(-δt)·E(t) dt
+
+    Maliyet: "monthly" ay başına bir ufuk hesaplar; süresi ay sayısıyla
+    doğrusal büyür (36 ay ≈ 6 ayın 10 katı, 200 bin müşteride 2.2 sn /
+    0.22 sn). lifetimes ile birebir eşitlik yalnızca bu yöntemdedir.
+    Ufuk sayısı aydan bağımsız olan yalnızca "continuous" yöntemdir
+    (n_nodes + 1 ufuk); uzun ufuklarda (36 ay) bunu seçin. Tek bir ufkun
+    hesabı da ufuk uzadıkça biraz pahalılaşır; 36 ayda n_nodes=16
+    "monthly"den yaklaşık 2 kat hızlıdır ve 32 düğümlü sonuçtan farkı
+    1e-10'un altındadır. İki yöntemin farkı iskonto zamanlamasından gelir
+    (~%0.5).
+    """
+    if freq is None:
+        freq = CLTV_CONFIG["freq"]
+    if discount_rate is None:
+        discount_rate = CLTV_CONFIG["discount_rate"]
+    if method not in ("monthly", "continuous"):
+        raise ValueError(f"Bilinmeyen iskonto yöntemi: {method!r} (seçenekler: monthly, continuous)")
+    factor = PERIOD_FACTORS[freq]
+    expected_value = np.asarray(expected_value, dtype=float)
+
+    if method == "monthly":
+        steps = np.arange(1, month + 1)
+        curve = expected_purchases_curve(bgf, steps * factor, frequency, recency, T)
+        increments = np.diff(curve, axis=1, prepend=0.0)
+        discounted = increments @ (1 + discount_rate) ** -steps.astype(float)
+        return expected_value * discounted
+
+    horizon = month * factor
+    delta = np.log1p(discount_rate) / factor
+    nodes, node_weights = np.polynomial.legendre.leggauss(n_nodes)
+    times = (nodes + 1) * horizon / 2
+    curve = expected_purchases_curve(bgf, np.append(times, horizon), frequency, recency, T)
+    integral = curve[:, :-1] @ (node_weights * np.exp(-delta * times)) * horizon / 2
+    discounted = np.exp(-delta * horizon) * curve[:, -1] + delta * integral
+    return expected_value * discounted
+
+
+def predict_cltv(cltv_df, bgf, ggf, month=6, churn_threshold=None):
+    """
+    Kurulmuş (dondurulmuş) modellerle beklenen satış, ortalama değer,
+    P(alive), churn riski ve CLTV sütunlarını ekler (segmentasyon hariç)
+
+    Gruplu skorlamada her grup kendi modeliyle tahmin edilir,
+    segmentler ise tüm müşteriler üzerinden birlikte belirlenir.
+    bgf, lifetimes BetaGeoFitter veya btyd_models'teki herhangi bir
+    işlem modeli olabilir. churn_threshold verilmezse
+    CLTV_CONFIG["churn_threshold"] kullanılır.
+    """
+    if churn_threshold is None:
+        churn_threshold = CLTV_CONFIG["churn_threshold"]
+    cltv_df = cltv_df.copy()
+
+    # 3 ve 6 aylık beklenen satışlar tek toplu çağrıda
+    exp_sales = expected_purchases_curve(
+        bgf, [4 * 3, 4 * 6], cltv_df['frequency'], cltv_df['recency_cltv_weekly'], cltv_df['T_weekly']
+    )
+    cltv_df["exp_sales_3_month"] = exp_sales[:, 0]
+    cltv_df["exp_sales_6_month"] = exp_sales[:, 1]
+
+    # btyd_models modelleri kendi P(alive) çekirdeğini taşır; lifetimes
+    # BetaGeoFitter için BG-NBD çekirdeği kullanılır
+    if hasattr(bgf, "probability_alive"):
+        alive = bgf.probability_alive(cltv_df['frequency'], cltv_df['recency_cltv_weekly'],
+                                      cltv_df['T_weekly'], threshold=churn_threshold)
+    else:
+        alive = bgnbd_probability_alive(bgf.params_, cltv_df['frequency'],
+                                        cltv_df['recency_cltv_weekly'], cltv_df['T_weekly'],
+                                        threshold=churn_threshold)
+    cltv_df["p_alive"], cltv_df["churn_risk"] = alive
+
+    cltv_df["exp_average_value"] = gamma_gamma_expected_average_profit(
+        ggf.params_, cltv_df['frequency'], cltv_df['monetary_cltv']
+    )
+
+    cltv_df["cltv"] = discounted_cltv(
+        bgf,
+        cltv_df['frequency'],
+        cltv_df['recency_cltv_weekly'],
+        cltv_df['T_weekly'],
+        cltv_df["exp_average_value"],
+        month=month
+    )
+    return cltv_df
+
+
+def assign_cltv_segments(cltv_df, segment_count=4, bins=None):
+    """
+    CLTV'ye göre eşit büyüklükte segmentler atar (A en değerli)
+
+    bins (cltv_bins çıktısı) verilirse kantiller yeniden hesaplanmaz;
+    müşteriler sabit sınırlarla bağımsız olarak segmentlenir.
+    """
+    # Segment labels oluşturma (A, B, C, D)
+    labels = [chr(68 - i) for i in range(segment_count)]  # D, C, B, A
+    if bins is None:
+        cltv_df["cltv_segment"] = pd.qcut(cltv_df["cltv"], segment_count, labels=labels)
+    else:
+        inner = np.asarray(bins, dtype=float)[1:-1]
+        codes = np.searchsorted(inner, cltv_df["cltv"].to_numpy(dtype=float), side="left")
+        # CLTV'si olmayan (skorlanmamış) müşteriler segmentsiz kalır
+        codes[np.isnan(cltv_df["cltv"].to_numpy(dtype=float))] = -1
+        cltv_df["cltv_segment"] = pd.Categorical.from_codes(
+            codes, dtype=pd.CategoricalDtype(labels, ordered=True))
+    return cltv_df
+
+
+def cltv_bins(cltv_df, segment_count=4):
+    """assign_cltv_segments'in kullandığı CLTV kantil sınırları (segment_count + 1)"""
+    return pd.qcut(cltv_df["cltv"], segment_count, retbins=True)[1].tolist()
+
+
+def score_cltv(cltv_df, bgf, ggf, month=6, segment_count=4, churn_threshold=None, bins=None,
+               min_frequency=None):
+    """
+    Kurulmuş (dondurulmuş) modellerle tüm müşterileri skorlar
+
+    Parameters
+    ----------
+    cltv_df : DataFrame
+        build_cltv_summary çıktısı
+    bgf : BetaGeoFitter
+        Kurulmuş BG-NBD modeli
+    ggf : GammaGammaFitter
+        Kurulmuş Gamma-Gamma modeli
+    month : int, default 6
+        CLTV ufku (ay)
+    segment_count : int, default 4
+        CLTV segment sayısı
+    churn_threshold : float, optional
+        P(alive) bu değerin altındaysa churn_risk=True
+        (varsayılan CLTV_CONFIG["churn_threshold"])
+    bins : list, optional
+        Sabit segment sınırları (cltv_bins); verilmezse kantiller bu
+        müşterilerden hesaplanır
+    min_frequency : int, optional
+        Bundan az siparişi olan müşteriler skorlanmaz: tahmin sütunları
+        NaN, cltv_segment boş, churn_risk False (CLTV_CONFIG["min_frequency"]);
+        verilmezse tüm müşteriler skorlanır
+
+    Returns
+    -------
+    cltv_df : DataFrame
+        exp_sales_3_month, exp_sales_6_month, p_alive, churn_risk,
+        exp_average_value, cltv ve cltv_segment sütunları eklenmiş kopya
+    """
+    cltv_df = predict_cltv(cltv_df, bgf, ggf, month=month, churn_threshold=churn_threshold)
+    if min_frequency is not None:
+        unscored = cltv_df["frequency"].to_numpy(dtype=float) < min_frequency
+        cltv_df.loc[unscored, ["exp_sales_3_month", "exp_sales_6_month", "p_alive",
+                               "exp_average_value", "cltv"]] = np.nan
+        cltv_df.loc[unscored, "churn_risk"] = False
+    return assign_cltv_segments(cltv_df, segment_count=segment_count, bins=bins)
@@ -0,0 +1,183 @@
+"""
+Gruplu CLTV Model Kurma
+order_channel veya ilk alışveriş kohortu bazında bağımsız
+BG-NBD + Gamma-Gamma modellerini process pool üzerinde paralel kurar.
+Küçük ve görülmemiş gruplar, tüm müşterilerden çekilen bir örneklemle
+kurulan global yedek modeli kullanır.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .btyd_models import fit_btyd
+from .config import CLTV_CONFIG
+from .cltv_core import (compress_sufficient_stats, fit_ggf, frozen_bgf, frozen_ggf,
+                        predict_cltv, assign_cltv_segments)
+from .shared_arrays import SharedColumnStore
+
+GLOBAL_GROUP = "global"
+
+# Model kurulumunda kullanılan cltv_df sütunları
+FIT_COLUMNS = ("frequency", "recency_cltv_weekly", "T_weekly", "monetary_cltv")
+
+_SHARED = {}
+
+
+def group_labels(dataframe, by="order_channel", cohort_freq=None):
+    """
+    Müşteri başına model grubu etiketini üretir
+
+    Parameters
+    ----------
+    dataframe : DataFrame
+        prepare_cltv_data ile hazırlanmış veri seti
+    by : {"order_channel", "cohort"} veya sütun adı
+        "cohort": first_order_date'in dönemi (yıl, çeyrek ...)
+    cohort_freq : str, optional
+        Kohort dönemi (varsayılan CLTV_CONFIG["cohort_freq"])
+
+    Returns
+    -------
+    Series
+        master_id indeksli grup etiketleri (build_cltv_summary ile hizalı)
+    """
+    if by == "cohort":
+        if cohort_freq is None:
+            cohort_freq = CLTV_CONFIG["cohort_freq"]
+        labels = dataframe["first_order_date"].dt.to_period(cohort_freq).astype(str)
+    else:
+        labels = dataframe[by].astype(str)
+    return pd.Series(labels.to_numpy(), index=dataframe["master_id"], name="model_group") \
+        .groupby(level=0).first()
+
+
+def _init_worker(spec):
+    store = SharedColumnStore.attach(spec)
+    _SHARED["store"] = store
+    _SHARED.update(store.arrays)
+
+
+def _fit_group(name, code, bgf_penalizer, ggf_penalizer):
+    # İşçi süreçte çalışır; grubun (global için örneklemin) satırları
+    # paylaşımlı sütunlardan seçilip yeterli istatistiklere sıkıştırılır.
+    # Model nesneleri değil parametreler döner
+    mask = _SHARED["global_sample"] if code is None else _SHARED["group"] == code
+    frame = pd.DataFrame({column: _SHARED[column][mask] for column in FIT_COLUMNS})
+    bgf = fit_btyd(frame, "bgnbd", penalizer_coef=bgf_penalizer)
+    _, ggf_stats = compress_sufficient_stats(frame)
+    ggf = fit_ggf(ggf_stats, penalizer_coef=ggf_penalizer, weights=ggf_stats["weights"])
+    return name, bgf.params_.to_dict(), ggf.params_.to_dict(), len(frame)
+
+
+def fit_grouped_models(cltv_df, groups, min_group_size=None, n_jobs=None,
+                       bgf_penalizer=None, ggf_penalizer=None, global_sample_size=None,
+                       fit_global=True, random_state=42):
+    """
+    Her grup için bağımsız BG-NBD + Gamma-Gamma modeli kurar
+
+    Parameters
+    ----------
+    cltv_df : DataFrame
+        build_cltv_summary çıktısı
+    groups : Series
+        group_labels çıktısı (cltv_df ile aynı master_id indeksi)
+    min_group_size : int, optional
+        Bu sayıdan az müşterisi olan gruplar için model kurulmaz,
+        global model kullanılır (varsayılan CLTV_CONFIG["min_group_size"])
+    n_jobs : int, optional
+        İşçi süreç sayısı (None: CPU sayısı)
+    global_sample_size : int, optional
+        Global yedek modelin kurulduğu rastgele örneklemin büyüklüğü
+        (varsayılan CLTV_CONFIG["global_sample_size"]); müşteri sayısı
+        bunu aşmıyorsa tüm müşteriler kullanılır
+    fit_global : bool, default True
+        False ise yalnızca grup modelleri kurulur (score_grouped küçük ve
+        görülmemiş gruplar için global modeli gerektirir)
+    random_state : int
+        Global örneklem seed'i
+
+    Returns
+    -------
+    models : dict
+        {grup: {"bgf": params, "ggf": params, "n_customers": int}};
+        "global" anahtarı küçük / görülmemiş grupların yedek modelidir
+
+    Not
+    ---
+    - Sütunlar ve grup kodları bir kez paylaşımlı belleğe konur
+      (SharedColumnStore); işçiye yalnızca grup kodu gider, grup seçimi
+      ve yeterli istatistiklere sıkıştırma işçilerde paralel yapılır
+    - Global model tüm müşterilerle kurulsaydı en büyük grubun toplamı
+      kadar süren, bölünemeyen tek görev olur ve duvar saatini belirlerdi;
+      örneklemle kurulduğunda bir grup modeli kadar sürer
+    """
+    if min_group_size is None:
+        min_group_size = CLTV_CONFIG["min_group_size"]
+    if global_sample_size is None:
+        global_sample_size = CLTV_CONFIG["global_sample_size"]
+
+    codes, names = pd.factorize(groups.reindex(cltv_df.index), sort=True)
+    sizes = np.bincount(codes[codes >= 0], minlength=len(names))
+    tasks = [(GLOBAL_GROUP, None)] if fit_global else []
+    tasks += [(name, code) for code, name in enumerate(names) if sizes[code] >= min_group_size]
+
+    arrays = {column: cltv_df[column].to_numpy() for column in FIT_COLUMNS}
+    arrays["group"] = codes.astype(np.int32)
+    arrays["global_sample"] = np.zeros(len(cltv_df), dtype=bool)
+    rng = np.random.default_rng(random_state)
+    arrays["global_sample"][rng.permutation(len(cltv_df))[:global_sample_size]] = True
+
+    models = {}
+    with SharedColumnStore(arrays) as store:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(store.spec,)) as executor:
+            futures = [executor.submit(_fit_group, name, code, bgf_penalizer, ggf_penalizer)
+                       for name, code in tasks]
+            for future in futures:
+                name, bgf_params, ggf_params, n_customers = future.result()
+                models[name] = {"bgf": bgf_params, "ggf": ggf_params,
+                                "n_customers": n_customers}
+
+    return models
+
+
+def score_grouped(cltv_df, groups, models, month=6, segment_count=4,
+                  bgf_penalizer=None, ggf_penalizer=None):
+    """
+    Her müşteriyi kendi grubunun modeliyle skorlar
+
+    Modeli olmayan (küçük veya görülmemiş) gruplar global modelle
+    skorlanır. CLTV segmentleri tüm müşteriler üzerinden birlikte
+    belirlenir; kullanılan model model_group sütunundadır.
+    """
+    groups = groups.reindex(cltv_df.index).fillna(GLOBAL_GROUP)
+    model_group = groups.where(groups.isin(list(models)), GLOBAL_GROUP)
+
+    parts = []
+    for name, index in model_group.groupby(model_group).groups.items():
+        bgf = frozen_bgf(models[name]["bgf"], penalizer_coef=bgf_penalizer)
+        ggf = frozen_ggf(models[name]["ggf"], penalizer_coef=ggf_penalizer)
+        parts.append(predict_cltv(cltv_df.loc[index], bgf, ggf, month=month))
+
+    scored = pd.concat(parts).reindex(cltv_df.index)
+    scored["model_group"] = model_group
+    return assign_cltv_segments(scored, segment_count=segment_count)
+
+
+def grouped_cltv_prediction(cltv_df, groups, month=6, segment_count=4,
+                            min_group_size=None, n_jobs=None):
+    """
+    fit_grouped_models + score_grouped kısayolu
+
+    Returns
+    -------
+    scored : DataFrame
+        score_cltv çıktısı + model_group sütunu
+    models : dict
+        Grup parametreleri
+    """
+    models = fit_grouped_models(cltv_df, groups, min_group_size=min_group_size, n_jobs=n_jobs)
+    scored = score_grouped(cltv_df, groups, models, month=month, segment_count=segment_count)
+    return scored, models
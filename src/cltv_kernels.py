@@ -0,0 +1,234 @@
+"""
+CLTV Vektörel Çekirdekler
+BG-NBD, MBG-NBD, Pareto/NBD ve Gamma-Gamma modelleri için NumPy
+tabanlı, döngüsüz olabilirlik ve tahmin fonksiyonları
+
+Parametreler lifetimes'ın params_ sözlüğü/Series'i ile aynı adları
+taşır (r, alpha, a, b / r, alpha, s, beta / p, q, v); böylece
+lifetimes ile kurulmuş veya model kaydından okunmuş parametrelerle
+doğrudan çalışır.
+"""
+
+import numpy as np
+from scipy.special import gammaln, expit, hyp2f1
+
+
+def bgnbd_log_likelihood(params, frequency, recency, T):
+    """
+    BG-NBD modelinin müşteri başına log-olabilirliği
+
+    Fader, Hardie & Lee (2005), bölüm 7; lifetimes'ın kullandığı
+    log-sum-exp biçimiyle aynıdır (penalizer hariç).
+
+    Returns
+    -------
+    ndarray
+        Müşteri başına log-olabilirlik
+    """
+    r, alpha, a, b = (params[name] for name in ("r", "alpha", "a", "b"))
+    x = np.asarray(frequency, dtype=float)
+    t_x = np.asarray(recency, dtype=float)
+    T = np.asarray(T, dtype=float)
+
+    a_1 = gammaln(r + x) - gammaln(r) + r * np.log(alpha)
+    a_2 = gammaln(a + b) + gammaln(b + x) - gammaln(b) - gammaln(a + b + x)
+    a_3 = -(r + x) * np.log(alpha + T)
+    a_4 = np.log(a) - np.log(b + np.maximum(x, 1) - 1) - (r + x) * np.log(t_x + alpha)
+
+    max_a = np.maximum(a_3, a_4)
+    return a_1 + a_2 + max_a + np.log(np.exp(a_3 - max_a) + np.exp(a_4 - max_a) * (x > 0))
+
+
+def gamma_gamma_log_likelihood(params, frequency, monetary):
+    """
+    Gamma-Gamma modelinin müşteri başına log-olabilirliği
+
+    Fader & Hardie, "The Gamma-Gamma Model of Monetary Value" (1a);
+    lifetimes'ın kullandığı ifadeyle aynıdır (penalizer hariç).
+    """
+    p, q, v = (params[name] for name in ("p", "q", "v"))
+    x = np.asarray(frequency, dtype=float)
+    m = np.asarray(monetary, dtype=float)
+
+    return (gammaln(p * x + q) - gammaln(p * x) - gammaln(q) + q * np.log(v)
+            + (p * x - 1) * np.log(m) + (p * x) * np.log(x) - (p * x + q) * np.log(x * m + v))
+
+
+def bgnbd_probability_alive(params, frequency, recency, T, threshold=None):
+    """
+    BG-NBD modeline göre müşterinin hâlâ aktif olma olasılığı, P(alive)
+
+    P(alive) = 1 / (1 + δ(x>0) · a / (b + x - 1) · ((α + T) / (α + t_x))^(r + x))
+
+    Oran log uzayında hesaplanır (üs büyüdüğünde taşma olmaz) ve
+    olasılık expit ile elde edilir; lifetimes'ın
+    conditional_probability_alive'ı ile aynı sonucu verir.
+
+    Parameters
+    ----------
+    params : dict or Series
+        r, alpha, a, b
+    frequency, recency, T : array_like
+        CLTV veri yapısındaki frequency, recency_cltv_weekly, T_weekly
+    threshold : float, optional
+        Verilirse P(alive) < threshold olan müşteriler churn riski
+        olarak işaretlenir; karşılaştırma aynı log oranı üzerinden
+        yapılır, veri üzerinden ikinci bir geçiş gerekmez
+
+    Returns
+    -------
+    p_alive : ndarray
+    churn : ndarray of bool
+        Yalnızca threshold verildiğinde (p_alive, churn) olarak döner
+    """
+    r, alpha, a, b = (params[name] for name in ("r", "alpha", "a", "b"))
+    x = np.asarray(frequency, dtype=float)
+    t_x = np.asarray(recency, dtype=float)
+    T = np.asarray(T, dtype=float)
+
+    # log oran = log a - log(b + x - 1) + (r + x) * (log(α + T) - log(α + t_x))
+    log_ratio = np.log(alpha + T)
+    log_ratio -= np.log(alpha + t_x)
+    log_ratio *= r + x
+    log_ratio += np.log(a)
+    log_ratio -= np.log(b + np.maximum(x, 1) - 1)
+    log_ratio[x == 0] = -np.inf  # hiç tekrar alışveriş yoksa P(alive) = 1
+
+    # p_alive < threshold  <=>  log oran > log((1 - threshold) / threshold)
+    return _alive_from_log_odds(log_ratio, threshold)
+
+
+def _with_horizons(t, *arrays):
+    # t skaler ise girdiler aynen, 1-D ufuk dizisi ise (müşteri, ufuk)
+    # matrisine yayınlanacak biçimde döner
+    t = np.asarray(t, dtype=float)
+    arrays = [np.asarray(values, dtype=float) for values in arrays]
+    if t.ndim == 1:
+        return t[None, :], [values[:, None] for values in arrays]
+    return t, arrays
+
+
+def bgnbd_expected_purchases(params, t, frequency, recency, T):
+    """
+    BG-NBD koşullu beklenen alışveriş sayısı (t dönem içinde)
+
+    Fader, Hardie & Lee (2005), denklem (10); lifetimes'ın
+    conditional_expected_number_of_purchases_up_to_time'ı ile aynıdır.
+    t bir ufuk dizisi ise sonuç (müşteri, ufuk) matrisidir; böylece
+    3 ve 6 aylık tahminler tek çağrıda hesaplanır.
+    """
+    r, alpha, a, b = (params[name] for name in ("r", "alpha", "a", "b"))
+    t, (x, t_x, T) = _with_horizons(t, frequency, recency, T)
+
+    _a, _b, _c = r + x, b + x, a + b + x - 1
+    _z = t / (alpha + T + t)
+    ln_hyp = np.log(hyp2f1(_a, _b, _c, _z))
+    # Büyük argümanlarda hyp2f1 taşarsa Euler dönüşümü kullanılır
+    ln_hyp_alt = np.log(hyp2f1(_c - _a, _c - _b, _c, _z)) + (_c - _a - _b) * np.log1p(-_z)
+    ln_hyp = np.where(np.isfinite(ln_hyp), ln_hyp, ln_hyp_alt)
+
+    numerator = (a + b + x - 1) / (a - 1) * -np.expm1(
+        ln_hyp + (r + x) * (np.log(alpha + T) - np.log(alpha + T + t)))
+    log_odds = (np.log(a) - np.log(b + np.maximum(x, 1) - 1)
+                + (r + x) * (np.log(alpha + T) - np.log(alpha + t_x)))
+    return numerator / (1 + (x > 0) * np.exp(log_odds))
+
+
+def mbgnbd_log_likelihood(params, frequency, recency, T):
+    """
+    MBG-NBD (Batislam, Denizel & Filiztekin, 2007) müşteri başına
+    log-olabilirliği; lifetimes ModifiedBetaGeoFitter ile aynıdır
+    """
+    r, alpha, a, b = (params[name] for name in ("r", "alpha", "a", "b"))
+    x = np.asarray(frequency, dtype=float)
+    t_x = np.asarray(recency, dtype=float)
+    T = np.asarray(T, dtype=float)
+
+    a_1 = gammaln(r + x) - gammaln(r) + r * np.log(alpha)
+    a_2 = gammaln(a + b) + gammaln(b + x + 1) - gammaln(b) - gammaln(a + b + x + 1)
+    a_3 = -(r + x) * np.log(alpha + T)
+    a_4 = np.log(a) - np.log(b + x) + (r + x) * (np.log(alpha + T) - np.log(alpha + t_x))
+    return a_1 + a_2 + a_3 + np.logaddexp(a_4, 0)
+
+
+def mbgnbd_expected_purchases(params, t, frequency, recency, T):
+    """MBG-NBD koşullu beklenen alışveriş sayısı (t tek ufuk veya ufuk dizisi)"""
+    r, alpha, a, b = (params[name] for name in ("r", "alpha", "a", "b"))
+    t, (x, t_x, T) = _with_horizons(t, frequency, recency, T)
+
+    ln_hyp = np.log(hyp2f1(r + x, b + x + 1, a + b + x, t / (alpha + T + t)))
+    numerator = (a + b + x) / (a - 1) * -np.expm1(
+        ln_hyp + (r + x) * (np.log(alpha + T) - np.log(alpha + t + T)))
+    log_odds = np.log(a) - np.log(b + x) + (r + x) * (np.log(alpha + T) - np.log(alpha + t_x))
+    return numerator / (1 + np.exp(log_odds))
+
+
+def mbgnbd_probability_alive(params, frequency, recency, T, threshold=None):
+    """MBG-NBD P(alive); threshold verilirse (p_alive, churn) döner"""
+    r, alpha, a, b = (params[name] for name in ("r", "alpha", "a", "b"))
+    x = np.asarray(frequency, dtype=float)
+    log_odds = (np.log(a) - np.log(b + x)
+                + (r + x) * (np.log(alpha + np.asarray(T, dtype=float))
+                             - np.log(alpha + np.asarray(recency, dtype=float))))
+    return _alive_from_log_odds(log_odds, threshold)
+
+
+def _pareto_log_a0(r, alpha, s, beta, x, t_x, T):
+    # Fader & Hardie (2005) Pareto/NBD notları, denklem (19)-(20)
+    if alpha < beta:
+        low, high, t = alpha, beta, r + x
+    else:
+        low, high, t = beta, alpha, s + 1
+    rsx = r + s + x
+    term_1 = np.log(hyp2f1(rsx, t, rsx + 1, (high - low) / (high + t_x))) - rsx * np.log(high + t_x)
+    term_2 = np.log(hyp2f1(rsx, t, rsx + 1, (high - low) / (high + T))) - rsx * np.log(high + T)
+    # log(exp(term_1) - exp(term_2)); recency <= T olduğundan term_1 >= term_2
+    with np.errstate(divide="ignore"):
+        return term_1 + np.log(-np.expm1(term_2 - term_1))
+
+
+def pareto_nbd_log_likelihood(params, frequency, recency, T):
+    """
+    Pareto/NBD müşteri başına log-olabilirliği (Fader & Hardie 2005,
+    denklem 18); lifetimes ParetoNBDFitter ile aynıdır
+    """
+    r, alpha, s, beta = (params[name] for name in ("r", "alpha", "s", "beta"))
+    x = np.asarray(frequency, dtype=float)
+    t_x = np.asarray(recency, dtype=float)
+    T = np.asarray(T, dtype=float)
+
+    a_1 = gammaln(r + x) - gammaln(r) + r * np.log(alpha) + s * np.log(beta)
+    log_a0 = _pareto_log_a0(r, alpha, s, beta, x, t_x, T)
+    return a_1 + np.logaddexp(-(r + x) * np.log(alpha + T) - s * np.log(beta + T),
+                              np.log(s) + log_a0 - np.log(r + s + x))
+
+
+def pareto_nbd_expected_purchases(params, t, frequency, recency, T):
+    """Pareto/NBD koşullu beklenen alışveriş sayısı (denklem 41)"""
+    r, alpha, s, beta = (params[name] for name in ("r", "alpha", "s", "beta"))
+    x, t_x, T_ = (np.asarray(values, dtype=float) for values in (frequency, recency, T))
+    log_lik = pareto_nbd_log_likelihood(params, x, t_x, T_)
+
+    t, (x, T, log_lik) = _with_horizons(t, x, T_, log_lik)
+    first = (gammaln(r + x) - gammaln(r) + r * np.log(alpha) + s * np.log(beta)
+             - (r + x) * np.log(alpha + T) - s * np.log(beta + T))
+    second = np.log(r + x) + np.log(beta + T) - np.log(alpha + T)
+    third = np.log(-np.expm1((s - 1) * (np.log(beta + T) - np.log(beta + T + t))) / (s - 1))
+    return np.exp(first + second + third - log_lik)
+
+
+def pareto_nbd_probability_alive(params, frequency, recency, T, threshold=None):
+    """Pareto/NBD P(alive) (denklem 36-37); threshold verilirse (p_alive, churn) döner"""
+    r, alpha, s, beta = (params[name] for name in ("r", "alpha", "s", "beta"))
+    x, t_x, T = (np.asarray(values, dtype=float) for values in (frequency, recency, T))
+    log_odds = (np.log(s) - np.log(r + s + x) + (r + x) * np.log(alpha + T)
+                + s * np.log(beta + T) + _pareto_log_a0(r, alpha, s, beta, x, t_x, T))
+    return _alive_from_log_odds(log_odds, threshold)
+
+
+def _alive_from_log_odds(log_odds, threshold):
+    # P(alive) = 1 / (1 + exp(log_odds)); churn aynı log oran üzerinden
+    p_alive = expit(-log_odds)
+    if threshold is None:
+        return p_alive
+    return p_alive, log_odds > np.log1p(-threshold) - np.log(threshold)
@@ -0,0 +1,198 @@
+"""
+CLTV Örneklemli Model Kurma (Sample-then-Score)
+Çok büyük müşteri tabanlarında BG-NBD/Gamma-Gamma modellerini
+tabakalı bir alt örneklem üzerinde kurup tüm popülasyonu dondurulmuş
+parametrelerle skorlamak için fonksiyonlar
+"""
+
+import time
+import numpy as np
+import pandas as pd
+
+from .btyd_models import fit_btyd
+from .config import CLTV_CONFIG
+from .cltv_core import fit_ggf, bgf_initial_params, score_cltv
+
+
+def _stratified_order(cltv_df, frequency_bins=5, tenure_bins=5, random_state=None):
+    """
+    Müşterileri (frequency, tenure) tabakasına ve tabaka içinde rastgele
+    bir anahtara göre sıralar
+
+    Aynı sıralamadan farklı büyüklükte örneklemler çekildiğinde küçük
+    örneklem büyüğün alt kümesi olur (iç içe örneklemler). Böylece
+    parametre değişimi örneklem gürültüsünden değil, büyüklükten gelir.
+    """
+    freq_bin = pd.qcut(cltv_df["frequency"].rank(method="first"), frequency_bins, labels=False)
+    tenure_bin = pd.qcut(cltv_df["T_weekly"].rank(method="first"), tenure_bins, labels=False)
+    strata = (freq_bin.to_numpy() * tenure_bins + tenure_bin.to_numpy()).astype(np.int64)
+
+    rng = np.random.default_rng(random_state)
+    order = np.lexsort((rng.random(len(strata)), strata))
+
+    counts = np.bincount(strata, minlength=frequency_bins * tenure_bins)
+    starts = np.cumsum(counts) - counts
+    sorted_strata = strata[order]
+    within = np.arange(len(order)) - starts[sorted_strata]
+    return order, sorted_strata, within, counts
+
+
+def _take(order, sorted_strata, within, counts, size):
+    # Orantılı dağıtım: her tabakadan payı kadar müşteri
+    quotas = np.round(counts * size / counts.sum()).astype(np.int64)
+    return np.sort(order[within < quotas[sorted_strata]])
+
+
+def stratified_sample(cltv_df, size, frequency_bins=5, tenure_bins=5, random_state=None):
+    """
+    frequency ve tenure (T_weekly) tabakalarına göre orantılı örneklem çeker
+
+    Parameters
+    ----------
+    cltv_df : DataFrame
+        build_cltv_summary çıktısı
+    size : int
+        Hedef örneklem büyüklüğü (yuvarlama nedeniyle ±tabaka sayısı sapabilir)
+    frequency_bins, tenure_bins : int, default 5
+        Tabaka sayıları
+    random_state : int, optional
+        Tekrarlanabilirlik için seed
+
+    Returns
+    -------
+    DataFrame
+        cltv_df'in örneklem satırları (orijinal sırayla)
+    """
+    if size >= len(cltv_df):
+        return cltv_df
+    parts = _stratified_order(cltv_df, frequency_bins, tenure_bins, random_state)
+    return cltv_df.iloc[_take(*parts, size)]
+
+
+def fit_on_sample(cltv_df, sample_sizes=None, tol=None,
+                  bgf_penalizer=None, ggf_penalizer=None, random_state=42):
+    """
+    Modelleri artan büyüklükte tabakalı örneklemlerde kurar,
+    parametreler yakınsayınca durur
+
+    Parameters
+    ----------
+    cltv_df : DataFrame
+        build_cltv_summary çıktısı
+    sample_sizes : sequence of int, optional
+        Denenecek örneklem büyüklükleri (varsayılan CLTV_CONFIG["sample_sizes"])
+    tol : float, optional
+        İki ardışık örneklem arasındaki en büyük göreli parametre
+        değişimi bu değerin altına inince durulur
+        (varsayılan CLTV_CONFIG["sample_tolerance"])
+    bgf_penalizer, ggf_penalizer : float, optional
+        Model penalizer katsayıları (varsayılan CLTV_CONFIG)
+    random_state : int
+        Örneklem seed'i
+
+    Returns
+    -------
+    bgf, ggf, report
+        Dondurulmuş modeller ve örneklem raporu (dict)
+
+    Not
+    ---
+    - Örneklemler iç içedir; her adım bir öncekinin parametreleriyle
+      warm start yapar
+    - Müşteri sayısı örneklem büyüklüğünü aşmıyorsa tam veriyle kurulur
+    """
+    if sample_sizes is None:
+        sample_sizes = CLTV_CONFIG["sample_sizes"]
+    if tol is None:
+        tol = CLTV_CONFIG["sample_tolerance"]
+
+    n_customers = len(cltv_df)
+    parts = _stratified_order(cltv_df, random_state=random_state)
+
+    history = []
+    prev_params = None
+    converged = False
+    started = time.perf_counter()
+
+    for size in sorted(sample_sizes):
+        size = min(size, n_customers)
+        sample = cltv_df.iloc[_take(*parts, size)]
+
+        fit_kwargs = {}
+        if prev_params is not None:
+            fit_kwargs["initial_params"] = bgf_initial_params(prev_params, sample["T_weekly"])
+
+        step_start = time.perf_counter()
+        bgf = fit_btyd(sample, "bgnbd", penalizer_coef=bgf_penalizer, **fit_kwargs)
+        params = bgf.params_
+
+        change = np.nan
+        if prev_params is not None:
+            change = float(np.max(np.abs(params / prev_params - 1)))
+
+        history.append({
+            "sample_size": len(sample),
+            "params": params.to_dict(),
+            "max_rel_change": change,
+            "seconds": time.perf_counter() - step_start
+        })
+
+        if change < tol:
+            converged = True
+            break
+        if size == n_customers:
+            break
+        prev_params = params
+
+    ggf = fit_ggf(sample, penalizer_coef=ggf_penalizer)
+
+    report = {
+        "strategy": "sample",
+        "n_customers": n_customers,
+        "sample_size": len(sample),
+        "converged": converged,
+        "tolerance": tol,
+        "history": history,
+        "fit_seconds": time.perf_counter() - started
+    }
+    return bgf, ggf, report
+
+
+def compare_with_full_fit(cltv_df, bgf, ggf, report, month=6, segment_count=4,
+                          bgf_penalizer=None, ggf_penalizer=None):
+    """
+    Örneklemli kurulumun tam veri kurulumuna göre doğruluk kaybını
+    ve zaman kazancını ölçer
+
+    Doğrulama amaçlıdır: tam veriyle bir kez daha kurulum yaptığı için
+    üretim akışında değil, strateji seçerken çalıştırılır.
+
+    Returns
+    -------
+    dict
+        Parametre farkları, toplam CLTV farkı, müşteri bazlı CLTV hatası,
+        segment uyumu ve hızlanma oranı
+    """
+    started = time.perf_counter()
+    bgf_full = fit_btyd(cltv_df, "bgnbd", penalizer_coef=bgf_penalizer)
+    ggf_full = fit_ggf(cltv_df, penalizer_coef=ggf_penalizer)
+    full_seconds = time.perf_counter() - started
+
+    sampled = score_cltv(cltv_df, bgf, ggf, month=month, segment_count=segment_count)
+    full = score_cltv(cltv_df, bgf_full, ggf_full, month=month, segment_count=segment_count)
+
+    params = pd.concat([bgf.params_, ggf.params_])
+    params_full = pd.concat([bgf_full.params_, ggf_full.params_])
+
+    positive = full["cltv"] > 0
+    abs_pct_error = (sampled["cltv"] - full["cltv"]).abs()[positive] / full["cltv"][positive]
+
+    return {
+        "param_rel_diff": (params / params_full - 1).to_dict(),
+        "total_cltv_rel_diff": sampled["cltv"].sum() / full["cltv"].sum() - 1,
+        "cltv_mape": float(abs_pct_error.mean()),
+        "segment_agreement": float((sampled["cltv_segment"] == full["cltv_segment"]).mean()),
+        "sample_fit_seconds": report["fit_seconds"],
+        "full_fit_seconds": full_seconds,
+        "speedup": full_seconds / report["fit_seconds"]
+    }
@@ -0,0 +1,203 @@
+"""
+CLTV Monte Carlo Simülasyonu
+Kurulmuş işlem modelinin (BG-NBD, MBG-NBD veya Pareto/NBD) ve
+Gamma-Gamma modelinin sonsal dağılımlarından müşteri bazında gelecekteki alışveriş sayısı ve harcama çeker;
+cltv_segment ve ufuk bazında P10/P50/P90 gelir bantları üretir.
+
+Çekilişler process pool üzerinde, her biri bağımsız tohumlanmış
+(SeedSequence.spawn) partiler halinde yapılır. İşçiler müşteri ×
+çekiliş matrisini küçük parçalar halinde kurar ve hemen segment
+toplamlarına indirger; dışarıya yalnızca çekiliş başına segment
+toplamları çıkar.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from .btyd_models import BTYD_MODELS
+from .config import CLTV_CONFIG
+from .shared_arrays import SharedColumnStore
+
+_SHARED = {}
+
+
+def _init_worker(spec):
+    store = SharedColumnStore.attach(spec)
+    _SHARED["store"] = store  # görünümler yaşadıkça bağlantı açık kalmalı
+    _SHARED.update(store.arrays)
+
+
+def _simulate_chunk(rng, x, T, m, p_alive, model, bgf_params, ggf_params, horizon_weeks,
+                    n_draws):
+    """
+    Bir müşteri parçası için (müşteri, çekiliş) matrisleri üzerinde
+    ufuk başına alışveriş ve gelir çeker
+
+    - Aktiflik: Bernoulli(P(alive)), P(alive) işlem modelinden
+    - Aktif müşteri için λ ~ Gamma(r + x, α + T)
+    - Kayıp süreci modele göre:
+      - BG-NBD: her alışverişten sonra p olasılıkla kayıp,
+        p ~ Beta(a, b + x); ufuktaki alışveriş min(Poisson(λt), Geometric(p))
+      - MBG-NBD: kayıp ilk alışverişten sonra da mümkün olduğundan
+        aktif müşteri x + 1 kayıp fırsatını atlatmıştır: p ~ Beta(a, b + x + 1)
+      - Pareto/NBD: üstel ömür, μ ~ Gamma(s, β + T); kalan ömür τ ~
+        Exponential(μ) (hafızasız), alışveriş Poisson(λ·min(t, τ))
+    - Ufuklar iç içe olduğundan Poisson artımları toplanır
+    - Harcama: ν ~ Gamma(p_gg·x + q, v + x·m), N alışverişin toplamı
+      ~ Gamma(N·p_gg, ν)
+    """
+    shape = (len(x), n_draws)
+    p_gg, q, v = (ggf_params[name] for name in ("p", "q", "v"))
+
+    alive = rng.random(shape) < p_alive[:, None]
+    lam = rng.gamma(bgf_params["r"] + x[:, None], 1.0 / (bgf_params["alpha"] + T[:, None]), shape)
+    if model == "pareto_nbd":
+        mu = rng.gamma(bgf_params["s"], 1.0 / (bgf_params["beta"] + T[:, None]), shape)
+        lifetime = rng.exponential(1.0 / mu)
+        dropout = np.iinfo(np.int64).max
+    else:
+        b = bgf_params["b"] + x[:, None] + (model == "mbgnbd")
+        lifetime = np.inf
+        dropout = rng.geometric(rng.beta(bgf_params["a"], b, shape))
+    nu = rng.gamma(p_gg * x[:, None] + q, 1.0 / (v + x[:, None] * m[:, None]), shape)
+
+    arrivals = np.zeros(shape, dtype=np.int64)
+    purchases_prev = np.zeros(shape, dtype=np.int64)
+    revenue = np.zeros(shape)
+    elapsed = 0.0
+    for weeks in horizon_weeks:
+        # Aralıkta aktif geçen süre (BG / MBG-NBD'de ömür sınırsız)
+        arrivals += rng.poisson(lam * np.clip(lifetime - elapsed, 0.0, weeks - elapsed))
+        elapsed = weeks
+        purchases = np.where(alive, np.minimum(arrivals, dropout), 0)
+        # Yeni alışverişlerin harcaması; shape=0 için gamma 0 döner
+        revenue += rng.gamma(p_gg * (purchases - purchases_prev), 1.0 / nu)
+        purchases_prev = purchases
+        yield purchases, revenue
+
+
+def _simulate_batch(batch, seed, n_draws, n_segments, model, bgf_params, ggf_params,
+                    horizon_weeks, chunk_size):
+    # İşçi süreçte çalışır; çekiliş başına segment toplamlarını döndürür
+    rng = np.random.default_rng(seed)
+    codes = _SHARED["segment"]
+    purchases_total = np.zeros((len(horizon_weeks), n_segments, n_draws))
+    revenue_total = np.zeros((len(horizon_weeks), n_segments, n_draws))
+
+    for start in range(0, len(codes), chunk_size):
+        part = slice(start, start + chunk_size)
+        # Segment toplamı = one-hot (segment × müşteri) @ (müşteri × çekiliş)
+        onehot = (codes[part][None, :] == np.arange(n_segments)[:, None]).astype(float)
+        draws = _simulate_chunk(rng, _SHARED["frequency"][part], _SHARED["T"][part],
+                                _SHARED["monetary"][part], _SHARED["p_alive"][part],
+                                model, bgf_params, ggf_params, horizon_weeks, n_draws)
+        for h, (purchases, revenue) in enumerate(draws):
+            purchases_total[h] += onehot @ purchases
+            revenue_total[h] += onehot @ revenue
+
+    return batch, purchases_total, revenue_total
+
+
+def simulate_cltv(cltv_df, bgf_params, ggf_params, horizons=None, n_draws=None,
+                  batch_draws=100, chunk_size=20_000, percentiles=(10, 50, 90),
+                  n_jobs=None, random_state=42, transaction_model=None):
+    """
+    Segment ve ufuk bazında gelecek alışveriş ve gelir dağılımını simüle eder
+
+    Parameters
+    ----------
+    cltv_df : DataFrame
+        score_cltv çıktısı (cltv_segment sütunu gerekli)
+    bgf_params, ggf_params : dict or Series
+        Kurulmuş işlem modeli ve Gamma-Gamma parametreleri (bgf.params_,
+        ggf.params_, fit_cltv_models çıktısı veya model kaydındaki sözlükler)
+    horizons : sequence of int, optional
+        Ufuklar (ay); predict_cltv gibi 1 ay = 4 hafta
+        (varsayılan CLTV_CONFIG["simulation_horizons"])
+    n_draws : int, optional
+        Toplam çekiliş sayısı (varsayılan CLTV_CONFIG["simulation_draws"])
+    batch_draws : int, default 100
+        Bir işçi görevindeki çekiliş sayısı; her parti kendi RNG akışını alır
+    chunk_size : int, default 20_000
+        İşçide aynı anda işlenen müşteri sayısı (bellek sınırı:
+        chunk_size × batch_draws)
+    percentiles : sequence of float, default (10, 50, 90)
+    n_jobs : int, optional
+        İşçi süreç sayısı
+    random_state : int
+        Kök seed; aynı seed ve batch_draws ile sonuçlar işçi sayısından
+        bağımsız olarak aynıdır
+    transaction_model : {"bgnbd", "mbgnbd", "pareto_nbd"}, optional
+        bgf_params'ın ait olduğu işlem modeli; P(alive) ve kayıp süreci
+        bu modelden gelir (varsayılan CLTV_CONFIG["transaction_model"])
+
+    Returns
+    -------
+    DataFrame
+        cltv_segment (ve toplam için "ALL"), horizon_month, metric
+        (purchases / revenue), mean ve p10/p50/p90 sütunları
+
+    Not
+    ---
+    - Gelir iskontosuzdur; ggf.customer_lifetime_value'nun nokta
+      tahminiyle karşılaştırırken iskonto farkı göz önünde tutulmalı
+    - Dışarıya müşteri bazlı çekiliş matrisi çıkmaz; yalnızca
+      (ufuk × segment × çekiliş) toplamları tutulur
+    """
+    if horizons is None:
+        horizons = CLTV_CONFIG["simulation_horizons"]
+    if n_draws is None:
+        n_draws = CLTV_CONFIG["simulation_draws"]
+    if transaction_model is None:
+        transaction_model = CLTV_CONFIG["transaction_model"]
+    if transaction_model not in BTYD_MODELS:
+        raise ValueError(f"Bilinmeyen işlem modeli: {transaction_model!r} "
+                         f"(seçenekler: {', '.join(BTYD_MODELS)})")
+    model = BTYD_MODELS[transaction_model]
+    horizon_weeks = [4 * month for month in sorted(horizons)]
+
+    segments = cltv_df["cltv_segment"].astype("category")
+    labels = list(segments.cat.categories)
+    arrays = {
+        "frequency": cltv_df["frequency"].to_numpy(dtype=float),
+        "T": cltv_df["T_weekly"].to_numpy(dtype=float),
+        "monetary": cltv_df["monetary_cltv"].to_numpy(dtype=float),
+        "p_alive": model.probability_alive_kernel(bgf_params, cltv_df["frequency"],
+                                                  cltv_df["recency_cltv_weekly"],
+                                                  cltv_df["T_weekly"]),
+        "segment": segments.cat.codes.to_numpy(dtype=np.int64)
+    }
+    bgf_params = {name: float(bgf_params[name]) for name in model.param_names}
+    ggf_params = {name: float(ggf_params[name]) for name in ("p", "q", "v")}
+
+    sizes = [min(batch_draws, n_draws - start) for start in range(0, n_draws, batch_draws)]
+    seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+    offsets = np.cumsum([0] + sizes)
+
+    shape = (len(horizon_weeks), len(labels), n_draws)
+    purchases, revenue = np.zeros(shape), np.zeros(shape)
+
+    with SharedColumnStore(arrays) as store:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(store.spec,)) as executor:
+            futures = [executor.submit(_simulate_batch, i, seed, size, len(labels),
+                                       transaction_model, bgf_params, ggf_params, horizon_weeks, chunk_size)
+                       for i, (seed, size) in enumerate(zip(seeds, sizes))]
+            for future in as_completed(futures):
+                i, batch_purchases, batch_revenue = future.result()
+                purchases[..., offsets[i]:offsets[i + 1]] = batch_purchases
+                revenue[..., offsets[i]:offsets[i + 1]] = batch_revenue
+
+    rows = []
+    for metric, totals in (("purchases", purchases), ("revenue", revenue)):
+        for h, month in enumerate(sorted(horizons)):
+            by_segment = [(label, totals[h, s]) for s, label in enumerate(labels)]
+            for label, values in by_segment + [("ALL", totals[h].sum(axis=0))]:
+                row = {"cltv_segment": label, "horizon_month": month, "metric": metric,
+                       "mean": float(values.mean())}
+                for pct, value in zip(percentiles, np.percentile(values, percentiles)):
+                    row[f"p{pct:g}"] = float(value)
+                rows.append(row)
+    return pd.DataFrame(rows)
@@ -0,0 +1,200 @@
+"""
+CLTV Penalizer Taraması
+BG-NBD ve Gamma-Gamma penalizer katsayılarını bir ızgara üzerinde,
+process pool ile paralel değerlendirir ve en iyi ayarı model kayıt
+defterine yazar.
+
+Hazırlanmış cltv_df sütunları paylaşımlı bellekte tutulur; işçiler
+her görevde veriyi pickle ile almak yerine başlangıçta bir kez aynı
+belleğe bağlanır.
+
+Elle çalıştırılan bir ayar aracıdır: pipeline ve artımlı güncelleme
+penalizer'ları her zaman CLTV_CONFIG'ten okur, kayıt defterindeki
+"penalizer_sweep" kaydını kullanmaz. Tarama sonunda yazdırılan
+bgf_penalizer_coef / ggf_penalizer_coef değerleri CLTV_CONFIG'e elle
+aktarılır; kayıt, hangi ızgara ve veriyle seçildiklerinin izidir.
+
+Kullanım:
+    python -m src.cltv_sweep                    # data/flo_data_20k.csv
+    python -m src.cltv_sweep --data veri.csv --jobs 4 --no-register
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from lifetimes.utils import ConvergenceError
+
+from .config import CLTV_CONFIG, DATA_DIR, DATA_FILES
+from .cltv_core import (build_cltv_summary, compress_sufficient_stats, fit_bgf, fit_ggf,
+                        prepare_cltv_data)
+from .cltv_kernels import bgnbd_log_likelihood, gamma_gamma_log_likelihood
+from .model_registry import register_model
+from .shared_arrays import SharedColumnStore
+
+# İşçi süreçteki paylaşımlı dizi görünümleri (_init_worker doldurur)
+_SHARED = {}
+
+
+def _init_worker(spec):
+    store = SharedColumnStore.attach(spec)
+    _SHARED["store"] = store  # görünümler yaşadıkça bağlantı açık kalmalı
+    _SHARED.update(store.arrays)
+
+
+def _split_frame(mask):
+    return pd.DataFrame({
+        "frequency": _SHARED["frequency"][mask],
+        "recency_cltv_weekly": _SHARED["recency"][mask],
+        "T_weekly": _SHARED["T"][mask],
+        "monetary_cltv": _SHARED["monetary"][mask]
+    })
+
+
+def _evaluate(model, penalizer):
+    train_mask = _SHARED["train"]
+    train, holdout = _split_frame(train_mask), _split_frame(~train_mask)
+    bgf_stats, ggf_stats = compress_sufficient_stats(train)
+
+    row = {"model": model, "penalizer": penalizer}
+    started = time.perf_counter()
+    try:
+        if model == "bgf":
+            fitter = fit_bgf(bgf_stats, penalizer_coef=penalizer, weights=bgf_stats["weights"])
+            params = fitter.params_.to_dict()
+            train_ll = bgnbd_log_likelihood(params, train["frequency"],
+                                            train["recency_cltv_weekly"], train["T_weekly"])
+            holdout_ll = bgnbd_log_likelihood(params, holdout["frequency"],
+                                              holdout["recency_cltv_weekly"], holdout["T_weekly"])
+        else:
+            fitter = fit_ggf(ggf_stats, penalizer_coef=penalizer, weights=ggf_stats["weights"])
+            params = fitter.params_.to_dict()
+            train_ll = gamma_gamma_log_likelihood(params, train["frequency"], train["monetary_cltv"])
+            holdout_ll = gamma_gamma_log_likelihood(params, holdout["frequency"],
+                                                    holdout["monetary_cltv"])
+    except ConvergenceError:
+        row.update({"fit_seconds": time.perf_counter() - started, "train_nll": np.nan,
+                    "holdout_nll": np.nan, "params": None, "converged": False})
+        return row
+
+    row.update({
+        "fit_seconds": time.perf_counter() - started,
+        "train_nll": float(-np.mean(train_ll)),
+        "holdout_nll": float(-np.mean(holdout_ll)),
+        "params": params,
+        "converged": True
+    })
+    return row
+
+
+def run_penalizer_sweep(cltv_df, bgf_grid=None, ggf_grid=None, holdout_fraction=None,
+                        n_jobs=None, random_state=42, register=True):
+    """
+    Penalizer ızgarasını paralel değerlendirir
+
+    Parameters
+    ----------
+    cltv_df : DataFrame
+        build_cltv_summary çıktısı
+    bgf_grid, ggf_grid : sequence of float, optional
+        Denenecek penalizer değerleri (varsayılan CLTV_CONFIG["penalizer_grid"])
+    holdout_fraction : float, optional
+        Değerlendirme için ayrılan müşteri oranı
+        (varsayılan CLTV_CONFIG["holdout_fraction"])
+    n_jobs : int, optional
+        İşçi süreç sayısı (None: CPU sayısı)
+    random_state : int
+        Eğitim/holdout ayrımı seed'i
+    register : bool, default True
+        En iyi ayarı model kayıt defterine yaz
+
+    Returns
+    -------
+    results : DataFrame
+        Izgara noktası başına model, penalizer, fit_seconds,
+        train_nll, holdout_nll (müşteri başına ortalama negatif
+        log-olabilirlik), params, converged
+    best_config : dict
+        {"bgf_penalizer_coef": ..., "ggf_penalizer_coef": ...}
+
+    Not
+    ---
+    - BG-NBD ve Gamma-Gamma birbirinden bağımsız kurulduğundan ızgara
+      iki modelin kartezyen çarpımı değil, model başına değerlerdir;
+      en iyi ayar her modelin en düşük holdout hatası ile birleştirilir
+    - Holdout müşterileri modele hiç girmez; hata, kurulan parametrelerin
+      görülmemiş müşterileri ne kadar iyi açıkladığını ölçer
+    """
+    grid = CLTV_CONFIG["penalizer_grid"]
+    bgf_grid = grid["bgf"] if bgf_grid is None else bgf_grid
+    ggf_grid = grid["ggf"] if ggf_grid is None else ggf_grid
+    if holdout_fraction is None:
+        holdout_fraction = CLTV_CONFIG["holdout_fraction"]
+
+    rng = np.random.default_rng(random_state)
+    arrays = {
+        "frequency": cltv_df["frequency"].to_numpy(dtype=float),
+        "recency": cltv_df["recency_cltv_weekly"].to_numpy(dtype=float),
+        "T": cltv_df["T_weekly"].to_numpy(dtype=float),
+        "monetary": cltv_df["monetary_cltv"].to_numpy(dtype=float),
+        "train": rng.random(len(cltv_df)) >= holdout_fraction
+    }
+
+    with SharedColumnStore(arrays) as store:
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                 initargs=(store.spec,)) as executor:
+            futures = [executor.submit(_evaluate, "bgf", pen) for pen in bgf_grid]
+            futures += [executor.submit(_evaluate, "ggf", pen) for pen in ggf_grid]
+            rows = [future.result() for future in futures]
+
+    results = pd.DataFrame(rows)
+    converged = results[results["converged"]]
+    if converged["model"].nunique() < 2:
+        raise ValueError("Izgaradaki hiçbir penalizer değeri için model yakınsamadı")
+
+    best = converged.loc[converged.groupby("model")["holdout_nll"].idxmin()].set_index("model")
+    best_config = {
+        "bgf_penalizer_coef": float(best.loc["bgf", "penalizer"]),
+        "ggf_penalizer_coef": float(best.loc["ggf", "penalizer"])
+    }
+
+    if register:
+        register_model(
+            "cltv",
+            params={"bgf": best.loc["bgf", "params"], "ggf": best.loc["ggf", "params"]},
+            config=best_config,
+            metrics={
+                "bgf_holdout_nll": best.loc["bgf", "holdout_nll"],
+                "ggf_holdout_nll": best.loc["ggf", "holdout_nll"],
+                "holdout_fraction": holdout_fraction,
+                "n_customers": len(cltv_df),
+                "grid": results.drop(columns="params").to_dict(orient="records")
+            },
+            source="penalizer_sweep"
+        )
+
+    return results, best_config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="BG-NBD / Gamma-Gamma penalizer taraması")
+    parser.add_argument("--data", default=DATA_DIR / DATA_FILES["flo_data"],
+                        help="Ham FLO verisi (CSV)")
+    parser.add_argument("--jobs", type=int, default=None, help="İşçi süreç sayısı")
+    parser.add_argument("--no-register", action="store_true",
+                        help="En iyi ayarı kayıt defterine yazma")
+    args = parser.parse_args(argv)
+
+    cltv_df = build_cltv_summary(prepare_cltv_data(pd.read_csv(args.data)))
+    results, best_config = run_penalizer_sweep(cltv_df, n_jobs=args.jobs,
+                                               register=not args.no_register)
+    print(results.drop(columns="params").to_string(index=False))
+    print("\nCLTV_CONFIG'e aktarılacak değerler:")
+    for key, value in best_config.items():
+        print(f'    "{key}": {value},')
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,8 @@ PROCESSED_DATA_DIR = DATA_DIR / "processed"
 OUTPUT_DIR = BASE_DIR / "outputs"
 REPORTS_DIR = OUTPUT_DIR / "reports"
 FIGURES_DIR = OUTPUT_DIR / "figures"
+MODELS_DIR = OUTPUT_DIR / "models"
+PIPELINE_CACHE_DIR = OUTPUT_DIR / "cache"
 
 # Model parametreleri
 RFM_CONFIG = {
@@ -34,16 +36,120 @@ RFM_CONFIG = {
         r'51': 'new_customers',
         r'[4-5][2-3]': 'potential_loyalists',
         r'5[4-5]': 'champions'
-    }
+    },
+    # Artımlı güncelleme: skor sınırlarındaki göreli kayma bu değeri
+    # aşarsa tüm müşteriler yeniden bölünür (incremental)
+    "rebin_threshold": 0.05
 }
 
 CLTV_CONFIG = {
     "bgf_penalizer_coef": 0.001,
+    # Pareto/NBD kendi penalizer'ını kullanır (btyd_models.ParetoNBDModel):
+    # bgf katsayısı bu modelin s ve beta parametrelerini belirgin büzer
+    "pareto_nbd_penalizer_coef": 0.0,
     "ggf_penalizer_coef": 0.01,
     "discount_rate": 0.01,
     "freq": "W",  # Weekly
-    "outlier_quantiles": (0.01, 0.99)
+    "outlier_quantiles": (0.01, 0.99),
+    # İşlem modeli: "bgnbd", "mbgnbd" veya "pareto_nbd" (src/btyd_models.py)
+    "transaction_model": "bgnbd",
+    # Hızlandırılmış çekirdekler: "auto" (Numba varsa), "numba" veya "numpy"
+    "kernel_backend": "auto",
+    # Model kurulum stratejisi (pipeline fit aşaması): "full" tüm müşterilerle,
+    # "sample" tabakalı örneklemlerle kurar (yalnızca bgnbd). "sample" iken
+    # score aşaması tam veri kurulumuyla karşılaştırma raporu da üretir
+    "fit_strategy": "full",
+    # Örneklemli kurulum (fit_strategy="sample")
+    "sample_sizes": (50_000, 100_000, 200_000, 400_000),
+    "sample_tolerance": 0.01,
+    # Gruplu model kurulumu (kanal / kohort bazında)
+    "min_group_size": 1_000,
+    "cohort_freq": "Y",
+    # Küçük / görülmemiş grupların yedek (global) modeli bu kadar müşterilik
+    # rastgele örneklemle kurulur; tüm veriyle kurulan tek görev havuzu beklettiği için
+    "global_sample_size": 50_000,
+    # Penalizer taraması (cltv_sweep)
+    "penalizer_grid": {
+        "bgf": (0.0, 0.0001, 0.001, 0.01, 0.1),
+        "ggf": (0.0, 0.001, 0.01, 0.1, 1.0)
+    },
+    "holdout_fraction": 0.2,
+    # Geriye dönük test: holdout pencereleri (hafta, 3-6-9 ay)
+    "backtest_holdout_weeks": (12, 24, 36),
+    # P(alive) bu değerin altındaki müşteriler churn riski taşır
+    "churn_threshold": 0.5,
+    # FLO verisinde her müşterinin en az 2 siparişi vardır; modellerin bu
+    # sayının altında dayanağı yoktur. Dondurulmuş skorlamada (artımlı
+    # güncelleme, arama servisi, canlı olaylar) daha az siparişli yeni
+    # müşteriler CLTV'siz bırakılır (NaN, cltv_segment boş)
+    "min_frequency": 2,
+    # Monte Carlo gelir bantları: ufuklar (ay) ve çekiliş sayısı
+    "simulation_horizons": (3, 6),
+    "simulation_draws": 1000,
+    # Bootstrap güven aralıkları: tekrar sayısı (0: main.py'de hesaplama) ve
+    # güven düzeyi. Süre ölçümü: benchmarks/bench_bootstrap.py
+    "bootstrap_replicates": 200,
+    "bootstrap_confidence": 0.95,
+    # Artımlı güncelleme: CLTV segment sınırlarındaki göreli kayma ve
+    # müşteri başına log-olabilirlikteki göreli kötüleşme eşikleri
+    "resegment_threshold": 0.05,
+    "refit_threshold": 0.02
+}
+
+# Model kayıt defteri (kurulmuş parametreler ve seçilen ayarlar)
+MODEL_REGISTRY_PATH = MODELS_DIR / "registry.json"
+
+# Segment özet raporu (summary_report; rapor okuyucuların tek kaynağı)
+SUMMARY_REPORT_PATH = REPORTS_DIR / "summary_report.json"
+
+# RFM × CLTV segmenti × kanal küpü (segment_cube)
+SEGMENT_CUBE_PATH = REPORTS_DIR / "segment_cube.npz"
+
+# Memory-mapped müşteri özellik deposu (feature_store)
+FEATURE_STORE_DIR = OUTPUT_DIR / "feature_store"
+
+# Önceki çalışmaya göre segmenti değişen müşteriler (change_feed)
+CHANGE_FEED_PATH = OUTPUT_DIR / "segment_changes.csv"
+
+# Müşteri arama servisi (lookup_service): adres, mikro-toplu skorlama
+# (en fazla max_batch satır veya max_delay_ms bekleme) ve depo kontrol aralığı
+LOOKUP_CONFIG = {
+    "host": "127.0.0.1",
+    "port": 8765,
+    "max_batch": 512,
+    "max_delay_ms": 2.0,
+    "refresh_seconds": 1.0
+}
+
+# Canlı sipariş olayları (event_stream): olaylar en fazla max_batch olay
+# veya max_delay_ms bekleme ile toplu uygulanır; izlenen dosya poll_seconds'ta
+# bir okunur. Değişen segmentler CHANGE_STREAM_PATH'in sonuna eklenir.
+# Skor sınırı kayması (tüm depo üzerinde kantil) her toplulukta değil, en az
+# drift_check_events olay veya drift_check_seconds saniye geçince denetlenir
+EVENT_STREAM_CONFIG = {
+    "max_batch": 5_000,
+    "max_delay_ms": 500.0,
+    "poll_seconds": 0.2,
+    "drift_check_events": 50_000,
+    "drift_check_seconds": 60.0
+}
+CHANGE_STREAM_PATH = OUTPUT_DIR / "segment_changes_stream.csv"
+
+# Klasör izleme (watch_folder): drop_dir'e bırakılan CSV'ler settle_seconds
+# boyunca değişmeyince alınır; delta_pattern'e uyanlar delta, diğerleri tam
+# veri sayılır. En fazla max_pending iş kuyrukta bekler, fazlası klasörde kalır
+WATCH_CONFIG = {
+    "drop_dir": DATA_DIR / "incoming",
+    "delta_pattern": "delta*.csv",
+    "poll_seconds": 2.0,
+    "settle_seconds": 2.0,
+    "max_pending": 4,
+    # İş başına değişim akışı dosyaları (segment_changes-<parmak izi>.csv)
+    "feed_dir": OUTPUT_DIR,
+    "month": 6,
+    "segment_count": 4
 }
+WATCH_LEDGER_PATH = OUTPUT_DIR / "watch_ledger.json"
 
 # Veri dosya isimleri
 DATA_FILES = {
@@ -53,7 +159,7 @@ DATA_FILES = {
 
 # Klasörleri oluştur
 for directory in [DATA_DIR, RAW_DATA_DIR, PROCESSED_DATA_DIR, 
-                  OUTPUT_DIR, REPORTS_DIR, FIGURES_DIR]:
+                  OUTPUT_DIR, REPORTS_DIR, FIGURES_DIR, MODELS_DIR, PIPELINE_CACHE_DIR]:
     directory.mkdir(parents=True, exist_ok=True)
 
 # Logging ayarları
@@ -0,0 +1,139 @@
+"""
+Müşteri Özellik Tablosu
+RFM skorları, CLTV tahminleri ve müşteri kategorileri için ortak,
+satır konumuyla hizalı tablo
+
+Müşteri kimlikleri bir kez "intern" edilir: master_id'ler sıralanır ve
+her müşteri sabit bir satır konumu alır. rfm_core ve build_cltv_summary
+çıktıları master_id'ye göre sıralı olduğundan aynı sırayı taşır; bu
+çıktılar tabloya UUID metinleri üzerinden hash join yapılmadan, sütun
+dizileri olarak eklenir. Birleşik görünüm (to_frame) sütunların
+kopyalanmadan yan yana konmasıdır.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Ham veriden tabloya taşınan kategorik sütunlar
+CUSTOMER_COLUMNS = ("order_channel", "last_order_channel", "interested_in_categories_12")
+
+
+class CustomerTable:
+    """
+    master_id sıralı, sütun bazlı müşteri tablosu
+
+    Parameters
+    ----------
+    ids : array-like
+        Benzersiz master_id'ler; sıralanarak satır konumlarını belirler
+    """
+
+    def __init__(self, ids):
+        ids = pd.Index(ids, name="master_id")
+        if not ids.is_unique:
+            raise ValueError("master_id değerleri benzersiz olmalı")
+        self.ids = ids.sort_values()
+        self.columns = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @classmethod
+    def from_frame(cls, dataframe, columns=CUSTOMER_COLUMNS):
+        """
+        Ham veriden tablo kurar; columns sütunları kategorik olarak eklenir
+
+        Veri müşteri başına tek satır içermelidir (FLO anlık görüntüsü).
+        """
+        table = cls(dataframe["master_id"])
+        order = table.positions(dataframe["master_id"])
+        # Ham satır i -> tablo konumu order[i]; ters permütasyonla sırala
+        source = np.empty(len(order), dtype=np.int64)
+        source[order] = np.arange(len(order))
+        for column in columns:
+            if column in dataframe.columns:
+                table.add(column, pd.Categorical(dataframe[column].to_numpy()[source]))
+        return table
+
+    def positions(self, ids):
+        """master_id'lerin satır konumları (tabloda olmayanlar -1)"""
+        return self.ids.get_indexer(ids)
+
+    def add(self, name, values):
+        """Satır konumuyla hizalı bir sütun ekler (veya değiştirir)"""
+        if len(values) != len(self):
+            raise ValueError(f"{name}: {len(values)} değer, tabloda {len(self)} müşteri var")
+        if isinstance(values, pd.Series):
+            values = values.array
+        self.columns[name] = values
+        return self
+
+    def attach(self, frame, columns=None, prefix=""):
+        """
+        master_id indeksli bir motor çıktısını (RFM, CLTV ...) ekler
+
+        İndeks tablonun sırasıyla aynıysa sütunlar konum bazında, kopya
+        olmadan eklenir. Değilse (alt küme, farklı sıra) konumlar bir kez
+        hesaplanır ve eksik müşteriler NaN olur.
+        """
+        columns = list(frame.columns) if columns is None else list(columns)
+        if frame.index.equals(self.ids):
+            for column in columns:
+                self.add(prefix + column, frame[column])
+            return self
+
+        positions = self.positions(frame.index)
+        found = positions >= 0
+        for column in columns:
+            values = frame[column].to_numpy()
+            if isinstance(frame[column].dtype, pd.CategoricalDtype):
+                codes = np.full(len(self), -1, dtype=frame[column].cat.codes.dtype)
+                codes[positions[found]] = frame[column].cat.codes.to_numpy()[found]
+                aligned = pd.Categorical.from_codes(codes, dtype=frame[column].dtype)
+            else:
+                dtype = values.dtype if values.dtype.kind in "fO" else float
+                aligned = np.full(len(self), np.nan if dtype != object else None, dtype=dtype)
+                aligned[positions[found]] = values[found]
+            self.add(prefix + column, aligned)
+        return self
+
+    def to_frame(self, columns=None):
+        """Seçili sütunlardan master_id indeksli DataFrame (sütunlar kopyalanmaz)"""
+        columns = list(self.columns) if columns is None else list(columns)
+        return pd.DataFrame({name: self.columns[name] for name in columns},
+                            index=self.ids, copy=False)
+
+
+def build_customer_table(dataframe, rfm=None, cltv=None, columns=CUSTOMER_COLUMNS):
+    """
+    Ham veri, RFM ve CLTV çıktılarını tek müşteri tablosunda toplar
+
+    Parameters
+    ----------
+    dataframe : DataFrame
+        Ham FLO verisi (master_id ve kategori sütunları)
+    rfm : DataFrame, optional
+        create_rfm / create_rfm_segments çıktısı
+    cltv : DataFrame, optional
+        create_cltv_prediction / score_cltv çıktısı; RFM ile çakışan
+        sütunlar (frequency) "cltv_" önekiyle eklenir
+
+    Returns
+    -------
+    CustomerTable
+    """
+    table = CustomerTable.from_frame(dataframe, columns)
+    if rfm is not None:
+        table.attach(rfm)
+    if cltv is not None:
+        clashing = [col for col in cltv.columns if col in table]
+        table.attach(cltv, [col for col in cltv.columns if col not in clashing])
+        if clashing:
+            table.attach(cltv, clashing, prefix="cltv_")
+    return table
@@ -0,0 +1,364 @@
+"""
+Canlı Sipariş Olayları (streaming)
+Gün içindeki siparişlerle özellik deposunu günceller ve segmenti
+değişen müşterileri yayar
+
+Olay tek bir siparişe karşılık gelir: master_id, timestamp, channel,
+amount. Kaynak yerel bir kuyruk (queue.Queue, queue_batches) veya sonuna
+satır eklenen bir CSV dosyasıdır (tail_batches; ilk satır başlık). Olaylar
+toplu uygulanır: en fazla max_batch olay veya ilk olaydan sonra
+max_delay_ms bekleme (EVENT_STREAM_CONFIG).
+
+Her toplu uygulamada:
+
+- Olaylar müşteri başına toplanır ("Offline" kanalı offline, diğerleri
+  online sayılır) ve depodaki ham kanal toplamlarına, ilk / son alışveriş
+  günlerine eklenir. Sonuç apply_delta'nın beklediği ham FLO satırlarıdır;
+  yalnızca olay gelen müşteriler dondurulmuş sınırlar ve model
+  parametreleriyle yeniden skorlanır. Sınır kayması tüm depo üzerinde
+  kantil gerektirdiğinden run_stream'de en az drift_check_events olay veya
+  drift_check_seconds saniyede bir denetlenir. İlk siparişini
+  veren yeni müşteri CLTV'siz kalır (CLTV_CONFIG["min_frequency"]);
+  ikinci siparişte skorlanır ve change feed'e "changed" olarak düşer
+- Olaylar analiz tarihine ulaştıysa tarih önce son olayın ertesi gününe
+  ilerletilir (advance_to; gün başına bir kez)
+- Segmenti değişen müşteriler store_changes ile bulunur ve emit'e verilir
+
+Kullanım:
+    python -m src.event_stream events.csv           # dosyayı izler (tail -f gibi)
+    python -m src.event_stream events.csv --once    # mevcut satırlar, sonra çıkar
+"""
+
+import argparse
+import io
+import os
+import queue
+import time
+
+import numpy as np
+import pandas as pd
+
+from .change_feed import snapshot_segments, store_changes, write_change_feed
+from .config import CHANGE_STREAM_PATH, EVENT_STREAM_CONFIG, FEATURE_STORE_DIR
+from .feature_store import DAY_COLUMNS, TOTAL_COLUMNS, FeatureStore
+from .incremental import advance_to, apply_delta
+
+EVENT_COLUMNS = ("master_id", "timestamp", "channel", "amount")
+
+# Bu kanaldaki siparişler offline toplamlara eklenir (büyük / küçük harf duyarsız)
+OFFLINE_CHANNEL = "offline"
+
+
+def events_frame(events):
+    """
+    Olayları doğrular
+
+    Parameters
+    ----------
+    events : list of dict or DataFrame
+        EVENT_COLUMNS alanlarıyla olaylar
+
+    Returns
+    -------
+    DataFrame
+        timestamp datetime, amount float; master_id'si, tarihi veya tutarı
+        okunamayan olaylar atılır
+    """
+    frame = pd.DataFrame(events, columns=list(EVENT_COLUMNS))
+    frame["timestamp"] = pd.to_datetime(frame["timestamp"], errors="coerce")
+    frame["amount"] = pd.to_numeric(frame["amount"], errors="coerce")
+    valid = frame["master_id"].notna() & frame["timestamp"].notna() & frame["amount"].notna()
+    return frame[valid.to_numpy()]
+
+
+def events_to_delta(events, store):
+    """
+    Olayları müşteri başına toplayıp depodaki toplamlara ekler
+
+    Parameters
+    ----------
+    events : DataFrame
+        events_frame çıktısı
+    store : FeatureStore
+        TOTAL_COLUMNS ve DAY_COLUMNS içeren depo
+
+    Returns
+    -------
+    DataFrame
+        Olay gelen her müşteri için güncel ham FLO satırı (apply_delta
+        girdisi); depoda olmayan müşteriler sıfırdan başlar
+
+    Not
+    ---
+    Toplama groupby olmadan yapılır: kimlikler np.unique ile kodlanır,
+    kanal toplamları np.bincount, ilk / son gün np.minimum.at /
+    np.maximum.at ile bulunur. last_order_channel son olayın (aynı anda
+    gelenlerde sonrakinin) kanalıdır; order_channel yalnızca yeni
+    müşterilerde ilk olayın kanalıdır.
+    """
+    ids, inverse = np.unique(events["master_id"].to_numpy(dtype=str), return_inverse=True)
+    n = len(ids)
+    day = events["timestamp"].to_numpy("datetime64[D]").astype(np.int64)
+    channel = events["channel"].to_numpy(dtype=object)
+    offline = events["channel"].astype(str).str.lower().eq(OFFLINE_CHANNEL).to_numpy()
+    amount = events["amount"].to_numpy(dtype=float)
+    weights = {
+        "order_num_total_ever_online": ~offline,
+        "order_num_total_ever_offline": offline,
+        "customer_value_total_ever_online": np.where(offline, 0.0, amount),
+        "customer_value_total_ever_offline": np.where(offline, amount, 0.0),
+    }
+    added = {column: np.bincount(inverse, weights=values, minlength=n)
+             for column, values in weights.items()}
+    first = np.full(n, np.iinfo(np.int64).max)
+    last = np.full(n, np.iinfo(np.int64).min)
+    np.minimum.at(first, inverse, day)
+    np.maximum.at(last, inverse, day)
+
+    # Müşteri başına ilk ve son olay (zamana, eşitlikte geliş sırasına göre)
+    order = np.lexsort((np.arange(len(events)), events["timestamp"].to_numpy()))
+    first_event = order[np.unique(inverse[order], return_index=True)[1]]
+    last_event = order[::-1][np.unique(inverse[order[::-1]], return_index=True)[1]]
+
+    positions = store.positions(ids)
+    existing = positions >= 0
+    at = positions[existing]
+    delta = pd.DataFrame({"master_id": ids})
+    for column, values in added.items():
+        base = np.zeros(n)
+        base[existing] = store[column][at]
+        delta[column] = base + values
+    first[existing] = np.minimum(first[existing], store["first_order_day"][at])
+    last[existing] = np.maximum(last[existing], store["last_order_day"][at])
+    delta["first_order_date"] = first.astype("datetime64[D]")
+    delta["last_order_date"] = last.astype("datetime64[D]")
+
+    order_channel = channel[first_event]
+    if "order_channel" in store:
+        order_channel[existing] = np.asarray(store.column("order_channel")[at], dtype=object)
+    delta["order_channel"] = order_channel
+    delta["last_order_channel"] = channel[last_event]
+    return delta
+
+
+def apply_events(events, store=None, advance=True, rebin_threshold=None,
+                 resegment_threshold=None, refit_threshold=None, check_drift=True):
+    """
+    Bir olay topluluğunu depoya uygular
+
+    Parameters
+    ----------
+    events : list of dict or DataFrame
+        EVENT_COLUMNS alanlarıyla olaylar
+    store : FeatureStore, optional
+        "r+" açılmış depo (varsayılan FEATURE_STORE_DIR)
+    advance : bool, default True
+        Analiz tarihine ulaşan olaylarda tarihi ilerlet; False ise hata
+    rebin_threshold, resegment_threshold, refit_threshold : float, optional
+        Kayma eşikleri (apply_delta / advance_to)
+    check_drift : bool, default True
+        apply_delta'ya iletilir; False ise sınır kayması ölçülmez
+
+    Returns
+    -------
+    dict
+        n_events, n_invalid, apply_delta raporu ve tarih ilerletildiyse
+        advance (advance_to raporu)
+    """
+    if store is None:
+        store = FeatureStore(mode="r+")
+    missing = [name for name in DAY_COLUMNS + TOTAL_COLUMNS if name not in store]
+    if missing:
+        raise KeyError(f"Depoda olay toplamları için gereken sütunlar yok "
+                       f"({', '.join(missing)}); depo pipeline ile yeniden yazılmalı")
+    thresholds = {"rebin_threshold": rebin_threshold, "resegment_threshold": resegment_threshold,
+                  "refit_threshold": refit_threshold}
+
+    n_received = len(events)
+    events = events_frame(events)
+    report = {"n_events": len(events), "n_invalid": n_received - len(events)}
+    if not len(events):
+        return report
+
+    last_day = events["timestamp"].max().normalize()
+    if last_day >= pd.Timestamp(store.attrs["analysis_date"]):
+        if not advance:
+            raise ValueError(f"Olaylar analiz tarihine ({store.attrs['analysis_date'][:10]}) "
+                             f"ulaştı; advance=True ile tarih ilerletilmeli")
+        report["advance"] = advance_to(last_day + pd.Timedelta(days=1), store, **thresholds)
+    report.update(apply_delta(events_to_delta(events, store), store, check_drift=check_drift,
+                              **thresholds))
+    return report
+
+
+def run_stream(batches, store=None, emit=None, advance=True, stats=None,
+               drift_check_events=None, drift_check_seconds=None):
+    """
+    Olay topluluklarını sırayla uygular
+
+    Parameters
+    ----------
+    batches : iterable
+        Olay toplulukları (tail_batches, queue_batches veya olay listeleri)
+    store : FeatureStore, optional
+        "r+" açılmış depo (varsayılan FEATURE_STORE_DIR)
+    emit : callable, optional
+        emit(changes, report); changes segmenti değişen müşteriler
+        (store_changes çıktısı), yalnızca değişim varsa çağrılır
+    advance : bool, default True
+        apply_events'e iletilir
+    stats : dict, optional
+        Yerinde güncellenen sayaçlar (akış kesilse de o ana kadarki değerler)
+    drift_check_events, drift_check_seconds : float, optional
+        Son denetimden bu yana bu kadar olay veya saniye geçince topluluk
+        sınır kayması denetimiyle uygulanır (EVENT_STREAM_CONFIG)
+
+    Returns
+    -------
+    dict
+        n_batches, n_events, n_changes, n_drift_checks ve seconds
+        (uygulama süresi; kaynağı bekleme hariç)
+    """
+    if store is None:
+        store = FeatureStore(mode="r+")
+    if stats is None:
+        stats = {}
+    drift_check_events = (EVENT_STREAM_CONFIG["drift_check_events"] if drift_check_events is None
+                          else drift_check_events)
+    drift_check_seconds = (EVENT_STREAM_CONFIG["drift_check_seconds"]
+                           if drift_check_seconds is None else drift_check_seconds)
+    for key in ("n_batches", "n_events", "n_changes", "n_drift_checks", "seconds"):
+        stats.setdefault(key, 0)
+    unchecked, checked_at = 0, time.monotonic()
+    for batch in batches:
+        started = time.perf_counter()
+        unchecked += len(batch)
+        check_drift = (unchecked >= drift_check_events
+                       or time.monotonic() - checked_at >= drift_check_seconds)
+        snapshot = snapshot_segments(store)
+        report = apply_events(batch, store, advance=advance, check_drift=check_drift)
+        changes = store_changes(snapshot, store)
+        if check_drift:
+            unchecked, checked_at = 0, time.monotonic()
+            stats["n_drift_checks"] += 1
+        stats["seconds"] += time.perf_counter() - started
+        stats["n_batches"] += 1
+        stats["n_events"] += report["n_events"]
+        stats["n_changes"] += len(changes)
+        if emit is not None and len(changes):
+            emit(changes, report)
+    return stats
+
+
+def queue_batches(events, max_batch=None, max_delay_ms=None):
+    """
+    Yerel kuyruktan olay toplulukları
+
+    İlk olaydan sonra max_delay_ms boyunca gelenler ve kuyrukta bekleyenler
+    (en fazla max_batch olay) bir topluluk olur. Kuyruğa None konunca kalan olaylar
+    verilir ve üretici biter.
+    """
+    max_batch = EVENT_STREAM_CONFIG["max_batch"] if max_batch is None else max_batch
+    max_delay = (EVENT_STREAM_CONFIG["max_delay_ms"] if max_delay_ms is None
+                 else max_delay_ms) / 1000
+    while (event := events.get()) is not None:
+        batch = [event]
+        deadline = time.monotonic() + max_delay
+        while len(batch) < max_batch:
+            # Kuyrukta bekleyenler süre dolsa da alınır
+            timeout = deadline - time.monotonic()
+            try:
+                event = events.get(timeout=timeout) if timeout > 0 else events.get_nowait()
+            except queue.Empty:
+                break
+            if event is None:
+                yield batch
+                return
+            batch.append(event)
+        yield batch
+
+
+def _parse_lines(columns, lines):
+    return pd.read_csv(io.StringIO("".join(lines)), names=columns, header=None,
+                       dtype={"master_id": str, "channel": str})
+
+
+def tail_batches(path, max_batch=None, max_delay_ms=None, poll_seconds=None, follow=True):
+    """
+    Sonuna satır eklenen CSV dosyasından olay toplulukları
+
+    Yalnızca tamamlanmış (satır sonu gelmiş) satırlar okunur. Dosya
+    kısalırsa (döndürüldüyse) baştan okunur. follow=False ile dosyanın
+    o anki sonunda biter.
+
+    Yields
+    ------
+    DataFrame
+        İlk satırdaki başlık sütunlarıyla olaylar
+    """
+    max_batch = EVENT_STREAM_CONFIG["max_batch"] if max_batch is None else max_batch
+    max_delay = (EVENT_STREAM_CONFIG["max_delay_ms"] if max_delay_ms is None
+                 else max_delay_ms) / 1000
+    poll_seconds = EVENT_STREAM_CONFIG["poll_seconds"] if poll_seconds is None else poll_seconds
+    with open(path, encoding="utf-8", newline="") as f:
+        columns = f.readline().strip().split(",")
+        pending, partial, deadline = [], "", None
+        while True:
+            if os.path.getsize(path) < f.tell():
+                f.seek(0)
+                f.readline()
+                partial = ""
+            lines = (partial + f.read()).splitlines(keepends=True)
+            partial = lines.pop() if lines and not lines[-1].endswith("\n") else ""
+            pending += [line for line in lines if line.strip()]
+            if pending and deadline is None:
+                deadline = time.monotonic() + max_delay
+            while len(pending) >= max_batch:
+                yield _parse_lines(columns, pending[:max_batch])
+                pending = pending[max_batch:]
+            if not follow:
+                if partial.strip():
+                    pending.append(partial)
+                if pending:
+                    yield _parse_lines(columns, pending)
+                return
+            if pending and time.monotonic() >= deadline:
+                yield _parse_lines(columns, pending)
+                pending = []
+            if not pending:
+                deadline = None
+            time.sleep(poll_seconds)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Canlı sipariş olaylarını özellik deposuna uygular")
+    parser.add_argument("events", help="Olay CSV dosyası (master_id,timestamp,channel,amount)")
+    parser.add_argument("--store", default=FEATURE_STORE_DIR, help="Özellik deposu klasörü")
+    parser.add_argument("--out", default=CHANGE_STREAM_PATH,
+                        help="Segmenti değişen müşterilerin eklendiği CSV")
+    parser.add_argument("--once", action="store_true",
+                        help="Dosyanın mevcut satırlarını uygula ve çık")
+    args = parser.parse_args(argv)
+
+    def emit(changes, report):
+        write_change_feed(changes, args.out, append=True)
+        advanced = (f", analiz tarihi +{report['advance']['days']} gün"
+                    if "advance" in report else "")
+        print(f"{report['n_events']:,} olay -> {len(changes):,} segment değişimi "
+              f"(RFM: {report['rfm']}, CLTV: {report['cltv']}{advanced})", flush=True)
+
+    stats = {}
+    started = time.perf_counter()
+    try:
+        run_stream(tail_batches(args.events, follow=not args.once),
+                   FeatureStore(args.store, mode="r+"), emit=emit, stats=stats)
+    except KeyboardInterrupt:
+        pass
+    if stats.get("n_events"):
+        print(f"Toplam: {stats['n_events']:,} olay, {stats['n_changes']:,} segment değişimi, "
+              f"{stats['n_events'] / stats['seconds']:,.0f} olay/sn "
+              f"(geçen süre {time.perf_counter() - started:.1f} sn)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,698 @@
+"""
+Müşteri Özellik Deposu (memory-mapped)
+RFM metrikleri/skorları, haftalık CLTV girdileri ve CLTV tahminleri için
+diskte, müşteri başına sabit genişlikli sütun dizileri
+
+Depo bir klasördür: her sütun ayrı bir .npy dosyası, müşteri kimlikleri
+sabit genişlikli master_id.npy, sütun türleri ve kategoriler meta.json
+içindedir. Satır konumu intern edilmiş müşteri kimliğidir: ilk yazımda
+CustomerTable ile aynı (sıralı) sıradır, sonradan eklenen müşteriler
+sona yazılır ve hiçbir müşterinin konumu değişmez. Kimlik araması
+sıralı kopya (master_id_sorted.npy) + konum dizisi (id_order.npy)
+üzerinde ikili aramadır. Sonradan eklenen kimlikler sıralı kopyaya hemen
+katılmaz: master_id.npy'nin sıralı kopyadan uzun kalan kuyruğu küçük,
+bellekte sıralanan bir taşma dizinidir ve belirli bir büyüklüğü aşınca
+sıralı kopyaya tek geçişte katılır. Dosyalar np.load(mmap_mode=...) ile
+açılır; açılış süresi müşteri sayısından bağımsızdır ve skorlama
+yalnızca dokunduğu sayfaları okur, CSV parse edilmez.
+
+Kategorik sütunlar (skorlar, CLTV segmenti, kanallar) ve metin sütunları
+(RFM segmenti, RF_SCORE) tamsayı kod olarak tutulur. İlk / son alışveriş
+tarihleri 1970-01-01'den beri gün sayısıdır (first_order_day,
+last_order_day); analiz tarihi ilerlediğinde recency ve T bu dizilerden
+tek bir skalerle yeniden hesaplanır. Kanal bazında sipariş sayısı ve
+değer toplamları ham (baskılanmamış) değerleriyle saklanır; canlı
+sipariş olayları bu toplamlara eklenir (event_stream). Değişen müşteriler update ile
+yerinde yazılır; bir sütunun sıralı konum dizini (sorted_positions)
+istenirse diskte saklanır ve update / append ile yerinde güncel tutulur.
+journal ile açılan yazım günlüğü, update'in izlenen sütunlarda üzerine
+yazdığı değerleri saklar (change_feed.store_changes).
+
+Kullanım:
+    store = build_feature_store(df, rfm=rfm, cltv=cltv)     # bir kez
+    store = FeatureStore(mode="r+")                         # sonraki çalışmalar
+    score_feature_store(store, bgf, ggf)                    # yerinde yeniden skorlama
+"""
+
+import io
+import json
+import os
+import shutil
+import uuid
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from .config import FEATURE_STORE_DIR
+from .customer_table import build_customer_table
+from .file_utils import atomic_write, to_builtin
+from .rfm_core import score_rfm
+
+META_FILE = "meta.json"
+IDS_FILE = "master_id.npy"
+SORTED_IDS_FILE = "master_id_sorted.npy"
+ORDER_FILE = "id_order.npy"
+
+RFM_INPUTS = ("recency", "frequency", "monetary")
+DAY_COLUMNS = ("first_order_day", "last_order_day")
+TOTAL_COLUMNS = ("order_num_total_ever_online", "order_num_total_ever_offline",
+                 "customer_value_total_ever_online", "customer_value_total_ever_offline")
+CLTV_INPUTS = ("frequency", "recency_cltv_weekly", "T_weekly", "monetary_cltv")
+
+# Taşma dizini (sıralı kopyaya katılmamış kimlikler) en az ID_OVERFLOW_MIN,
+# en fazla depo / ID_OVERFLOW_RATIO kimliğe kadar büyür; aşınca sıralı
+# kopya yeniden yazılır. Ekleme başına iş taşma dizini kadardır,
+# yeniden yazım ID_OVERFLOW_RATIO eklemenin bedeline yayılır
+ID_OVERFLOW_MIN = 4_096
+ID_OVERFLOW_RATIO = 256
+
+
+def _code_dtype(n_categories):
+    return np.int8 if n_categories < 127 else np.int16 if n_categories < 32767 else np.int32
+
+
+def _read_npy_header(f):
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        return version, np.lib.format.read_array_header_1_0(f)
+    return version, np.lib.format.read_array_header_2_0(f)
+
+
+def _npy_header(path, version, fortran_order, dtype, shape, offset):
+    # Başlık aynı uzunlukta yeni şekille (veri kaydırılmadan) yazılabilmeli
+    header = io.BytesIO()
+    writer = (np.lib.format.write_array_header_1_0 if version == (1, 0)
+              else np.lib.format.write_array_header_2_0)
+    writer(header, {"descr": np.lib.format.dtype_to_descr(dtype),
+                    "fortran_order": fortran_order, "shape": shape})
+    if header.tell() != offset:
+        raise ValueError(f"{path}: .npy başlığı yerinde büyütülemiyor")
+    return header.getvalue()
+
+
+def _append_npy(path, values):
+    # .npy başlığı uzunluk ekseninin büyümesi için boşlukla doldurulur;
+    # veriler dosya sonuna eklenir, ardından başlık aynı uzunlukta yeni
+    # şekille yeniden yazılır (yarıda kalırsa eski başlık geçerli kalır)
+    with open(path, "r+b") as f:
+        version, (shape, fortran_order, dtype) = _read_npy_header(f)
+        offset = f.tell()
+        header = _npy_header(path, version, fortran_order, dtype,
+                             (shape[0] + len(values),) + tuple(shape[1:]), offset)
+        f.seek(offset + int(np.prod(shape)) * dtype.itemsize)
+        f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        f.truncate()
+        f.seek(0)
+        f.write(header)
+
+
+def _truncate_npy(path, n_rows):
+    # _append_npy'nin geri alınması: ilk n_rows satır kalır
+    with open(path, "r+b") as f:
+        version, (shape, fortran_order, dtype) = _read_npy_header(f)
+        offset = f.tell()
+        shape = (n_rows,) + tuple(shape[1:])
+        header = _npy_header(path, version, fortran_order, dtype, shape, offset)
+        f.truncate(offset + int(np.prod(shape)) * dtype.itemsize)
+        f.seek(0)
+        f.write(header)
+
+
+def _npy_length(path):
+    with open(path, "rb") as f:
+        return _read_npy_header(f)[1][0][0]
+
+
+def _fill_value(dtype):
+    # Eklenen müşterilerin henüz hesaplanmamış sütunları
+    if dtype.kind == "f":
+        return np.nan
+    if dtype.kind == "M":
+        return np.datetime64("NaT")
+    return 0
+
+
+class WriteJournal:
+    """
+    İzlenen sütunlarda update'in üzerine yazdığı değerler
+
+    FeatureStore.journal ile açılır. Açık kaldığı sürece update, izlenen
+    bir sütuna yazdığı konumların önceki değerlerini kaydeder; günlük
+    açıldıktan sonra eklenen konumlar (n_customers ve sonrası) kaydedilmez.
+    Yalnızca bu FeatureStore nesnesinin update ile yaptığı yazımlar görülür.
+    """
+
+    def __init__(self, store, columns):
+        self.n_customers = len(store)
+        self.columns = [name for name in columns if name in store]
+        # Kategori listeleri yalnızca sona eklenerek büyür; eski kodlar bu listeye göredir
+        self.categories = {name: list(store.meta["columns"][name].get("categories", []))
+                           for name in self.columns}
+        self._written = {name: [] for name in self.columns}
+
+    def record(self, name, positions, values):
+        old = positions < self.n_customers
+        self._written[name].append((positions[old], np.array(values[old])))
+
+    def written(self, name):
+        """Yazılan konumlar (sıralı, tekil) ve ilk yazımdan önceki değerleri"""
+        if not self._written[name]:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        positions, values = (np.concatenate(parts) for parts in zip(*self._written[name]))
+        positions, first = np.unique(positions, return_index=True)
+        return positions, values[first]
+
+
+class FeatureStore:
+    """
+    Diskteki özellik deposunu açar
+
+    Parameters
+    ----------
+    path : Path, default FEATURE_STORE_DIR
+        write_feature_store / build_feature_store ile yazılmış klasör
+    mode : {"r", "r+"}, default "r"
+        "r+" ile update yerinde yazabilir
+
+    Not
+    ---
+    Sütunlar ilk erişimde eşlenir (mmap); __getitem__ diskteki diziyi,
+    column / to_frame pandas'a hazır görünümü döndürür.
+    """
+
+    def __init__(self, path=FEATURE_STORE_DIR, mode="r"):
+        if mode not in ("r", "r+"):
+            raise ValueError(f"mode 'r' veya 'r+' olmalı: {mode!r}")
+        self.path = path
+        self.mode = mode
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self._arrays = {}
+        self._dtypes = {}
+        self._sorted = {}
+        self._journals = weakref.WeakSet()
+        self._open_ids()
+
+    def _open_ids(self):
+        self.ids = np.load(os.path.join(self.path, IDS_FILE), mmap_mode="r")
+        self._sorted_ids = np.load(os.path.join(self.path, SORTED_IDS_FILE), mmap_mode="r")
+        self._order = np.load(os.path.join(self.path, ORDER_FILE), mmap_mode="r")
+        self._overflow = None
+        if len(self._sorted_ids) != len(self._order):
+            # İki arama dizisinin yazımı arasında kesilmiş birleştirme:
+            # dizin kimliklerden bellekte yeniden kurulur (sonraki birleştirme yazar)
+            self._order = np.argsort(self.ids, kind="stable")
+            self._sorted_ids = self.ids[self._order]
+
+    def _overflow_index(self):
+        # Sıralı kopyada olmayan (sonradan eklenen) kimlikler: sıralı kimlikler, konumlar
+        if self._overflow is None:
+            start = len(self._sorted_ids)
+            ids = np.asarray(self.ids[start:])
+            order = np.argsort(ids, kind="stable")
+            self._overflow = (ids[order], start + order)
+        return self._overflow
+
+    def _merge_ids(self):
+        # Taşma dizini sıralı kopyaya tek geçişte katılır
+        ids, positions = self._overflow_index()
+        insert_at = np.searchsorted(self._sorted_ids, ids)
+        sorted_ids = np.insert(self._sorted_ids, insert_at, ids)
+        id_order = np.insert(self._order, insert_at, positions)
+        for file, values in ((SORTED_IDS_FILE, sorted_ids), (ORDER_FILE, id_order)):
+            _save_atomic(os.path.join(self.path, file), values)
+        self._open_ids()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, name):
+        return name in self.meta["columns"]
+
+    def __getitem__(self, name):
+        if name not in self._arrays:
+            if name not in self:
+                raise KeyError(name)
+            self._arrays[name] = np.load(os.path.join(self.path, f"{name}.npy"),
+                                         mmap_mode=self.mode)
+        return self._arrays[name]
+
+    @property
+    def columns(self):
+        return list(self.meta["columns"])
+
+    @property
+    def attrs(self):
+        """Yazılırken eklenen bilgiler (analiz tarihi, model parametreleri ...)"""
+        return self.meta["attrs"]
+
+    def _dtype(self, name):
+        if name not in self._dtypes:
+            info = self.meta["columns"][name]
+            self._dtypes[name] = pd.CategoricalDtype(info["categories"],
+                                                     ordered=info.get("ordered", False))
+        return self._dtypes[name]
+
+    def positions(self, ids):
+        """master_id'lerin satır konumları (depoda olmayanlar -1)"""
+        ids = np.asarray(ids, dtype=str)
+        positions = np.full(len(ids), -1, dtype=np.int64)
+        for sorted_ids, order in ((self._sorted_ids, self._order), self._overflow_index()):
+            if len(sorted_ids):
+                index = np.searchsorted(sorted_ids, ids)
+                index[index == len(sorted_ids)] = 0
+                found = sorted_ids[index] == ids
+                positions[found] = order[index[found]]
+        return positions
+
+    def _order_path(self, name):
+        return os.path.join(self.path, f"{name}.order.npy")
+
+    def sorted_positions(self, name):
+        """
+        Satır konumları, name sütununun değerlerine göre sıralı
+
+        İlk çağrıda sıralanır ve ("r+" ise) {name}.order.npy olarak
+        saklanır. Sonraki update çağrıları dizini tüm sütunu yeniden
+        sıralamadan, değişen konumları çıkarıp yeni değerlerine göre araya
+        yerleştirerek dosyanın üzerinde günceller. append ile eklenen
+        konumlar dizine ilk update'te (veya bu çağrıda) katılır. Aralık
+        aramaları için np.searchsorted(store[name], ..., sorter=dizin) kullanılır.
+        """
+        order = self._load_order(name)
+        if len(order) < len(self):
+            if self.mode == "r+":
+                self._resort(name, np.empty(0, dtype=np.int64))
+            else:
+                self._sorted[name] = np.argsort(self[name], kind="stable")
+            order = self._load_order(name)
+        return order
+
+    def _load_order(self, name):
+        # Diskteki dizin (append sonrası eklenen konumlar henüz eksik olabilir)
+        if name not in self._sorted:
+            path = self._order_path(name)
+            if os.path.exists(path):
+                self._sorted[name] = np.load(path, mmap_mode="r")
+            else:
+                order = np.argsort(self[name], kind="stable")
+                if self.mode == "r+":
+                    _save_atomic(path, order)
+                self._sorted[name] = order
+        return self._sorted[name]
+
+    def _index_slots(self, name, positions):
+        # positions'ın sıralı dizindeki sıraları (değerler değişmeden önce):
+        # her konum kendi değerinin eşit değer aralığında aranır. Aralıklar
+        # toplamı uzunsa (az sayıda farklı değer) dizin bir kez taranır.
+        # Dizinde henüz olmayan (eklenen) konumlar _resort'ta katılır
+        order = self._load_order(name)
+        positions = np.unique(positions)
+        positions = positions[positions < len(order)]
+        values = self[name][:len(order)]
+        current = values[positions]
+        lo = np.searchsorted(values, current, side="left", sorter=order)
+        lengths = np.searchsorted(values, current, side="right", sorter=order) - lo
+        if lengths.sum() > len(order) // 8:
+            changed = np.zeros(len(self), dtype=bool)
+            changed[positions] = True
+            return np.flatnonzero(changed[order])
+        starts = np.cumsum(lengths) - lengths
+        flat = np.repeat(lo - starts, lengths) + np.arange(lengths.sum())
+        return np.sort(flat[order[flat] == np.repeat(positions, lengths)])
+
+    def _resort(self, name, slots):
+        # Sıralı dizinin slots sıralarındaki konumlar çıkarılıp güncel
+        # değerleriyle yeniden yerleştirilir; dizinde olmayan (eklenen)
+        # konumlar önce dosyanın sonuna eklenir. Dosya yerinde değişir:
+        # yalnızca ilk ve son etkilenen sıra arasındaki dilim yeniden
+        # yazılır. Yarıda kalırsa dizin silinir, sorted_positions yeniden sıralar
+        path = self._order_path(name)
+        self._sorted.pop(name, None)
+        try:
+            n_indexed = _npy_length(path)
+            if n_indexed < len(self):
+                _append_npy(path, np.arange(n_indexed, len(self)))
+            slots = np.union1d(slots, np.arange(n_indexed, len(self)))
+            if not len(slots):
+                return
+            order = np.load(path, mmap_mode="r+")
+            values = self[name]
+            if len(slots) == len(order):
+                order[:] = np.argsort(values, kind="stable")
+                order.flush()
+                return
+            moved = np.array(order[slots])
+
+            # Çıkarılan sıralara komşu bir sıradaki konum yazılır; dizi güncel
+            # değerlere göre sıralı kalır ve ikili arama doğrudan yapılabilir
+            starts = np.r_[True, np.diff(slots) > 1]
+            ends = np.r_[np.diff(slots) > 1, True]
+            group = np.cumsum(starts) - 1
+            left, right = slots[starts][group] - 1, slots[ends][group] + 1
+            order[slots] = order[np.where(left >= 0, left, right)]
+
+            moved = moved[np.argsort(values[moved], kind="stable")]
+            at = np.searchsorted(values, values[moved], side="right", sorter=order)
+            # Komşulu dizideki yer -> çıkarılmış dizideki yer
+            at -= np.searchsorted(slots, at, side="left")
+            lo = min(slots[0], at[0])
+            hi = max(slots[-1] + 1, at[-1] + len(moved))
+            window = np.array(order[lo:hi])
+            kept = np.ones(len(window), dtype=bool)
+            kept[slots - lo] = False
+            order[lo:hi] = np.insert(window[kept], at - lo, moved)
+            order.flush()
+        except BaseException:
+            os.remove(path)
+            raise
+
+    def journal(self, columns):
+        """
+        columns için yazım günlüğü açar (WriteJournal)
+
+        Günlük, döndürülen nesne yaşadıkça veya close_journal'a kadar tutulur.
+        """
+        journal = WriteJournal(self, columns)
+        self._journals.add(journal)
+        return journal
+
+    def close_journal(self, journal):
+        self._journals.discard(journal)
+
+    def column(self, name):
+        """
+        Sütunun pandas'a hazır değerleri: sayısal sütunlar diskteki dizinin
+        kendisi, kategorik sütunlar kodlardan kurulmuş Categorical, metin
+        sütunları koddan çözülmüş "string" dizisi (-1 kodu: eksik değer, NA)
+        """
+        values = self[name]
+        kind = self.meta["columns"][name]["kind"]
+        if kind == "category":
+            return pd.Categorical.from_codes(values, dtype=self._dtype(name))
+        if kind == "text":
+            text = np.asarray(self.meta["columns"][name]["categories"] + [None], dtype=object)
+            return pd.array(text[values], dtype="string")
+        return values.view(np.ndarray)
+
+    def to_frame(self, columns=None, rename=None, index=True):
+        """
+        Seçili sütunlardan DataFrame (sayısal sütunlar kopyalanmaz)
+
+        rename {depo adı: çerçeve adı} ile sütunlar yeniden adlandırılır;
+        index=False ile master_id yerine satır konumları indeks olur
+        (kimlik dizisinin okunmasına gerek kalmaz).
+        """
+        columns = self.columns if columns is None else list(columns)
+        rename = rename or {}
+        index = pd.Index(self.ids, name="master_id") if index else None
+        return pd.DataFrame({rename.get(name, name): self.column(name) for name in columns},
+                            index=index, copy=False)
+
+    def update(self, frame, positions=None):
+        """
+        Değişen müşterilerin sütunlarını yerinde yazar ("r+" gerekir)
+
+        Parameters
+        ----------
+        frame : DataFrame
+            master_id indeksli (positions verilmezse); sütunları depoda olmalı
+        positions : array-like, optional
+            Satır konumları (frame ile aynı sırada)
+
+        Returns
+        -------
+        ndarray
+            Yazılan satır konumları
+        """
+        if self.mode != "r+":
+            raise PermissionError("Depo salt okunur açıldı; update için mode='r+'")
+        unknown = [name for name in frame.columns if name not in self]
+        if unknown:
+            raise KeyError(f"Depoda olmayan sütunlar: {', '.join(unknown)}")
+        if positions is None:
+            positions = self.positions(frame.index)
+            if (positions < 0).any():
+                raise KeyError(f"{int((positions < 0).sum())} müşteri depoda yok; "
+                               f"yeni müşteriler önce append ile eklenmeli")
+        positions = np.asarray(positions)
+        indexed = {name: self._index_slots(name, positions) for name in frame.columns
+                   if os.path.exists(self._order_path(name))}
+
+        for name in frame.columns:
+            for journal in self._journals:
+                if name in journal.columns:
+                    journal.record(name, positions, self[name][positions])
+            info = self.meta["columns"][name]
+            if info["kind"] == "values":
+                self[name][positions] = frame[name].to_numpy()
+                continue
+            values = frame[name]
+            codes = self._dtype(name).categories.get_indexer(values.astype(object))
+            unseen = (codes < 0) & values.notna().to_numpy()
+            extendable = info["kind"] == "text" or not info["ordered"]
+            if unseen.any() and extendable:
+                # Metin ve sırasız kategorik sütunlarda (kanal ...) yeni
+                # değerler listeye eklenir; skor ve segment sınıfları sabittir
+                added = sorted({str(v) for v in values[unseen]})
+                if len(info["categories"]) + len(added) > np.iinfo(self[name].dtype).max:
+                    raise ValueError(f"{name}: kategori sayısı kod tipini aşıyor; "
+                                     f"depo yeniden yazılmalı")
+                info["categories"] += added
+                self._dtypes.pop(name, None)
+                _write_meta(self.path, self.meta)
+                codes = self._dtype(name).categories.get_indexer(values.astype(object))
+            elif unseen.any():
+                raise ValueError(f"{name}: depoda olmayan kategori {values[unseen].iloc[0]!r}")
+            self[name][positions] = codes
+        self.flush()
+        for name, slots in indexed.items():
+            self._resort(name, slots)
+        return positions
+
+    def append(self, ids):
+        """
+        Yeni müşterileri deponun sonuna ekler ("r+" gerekir)
+
+        Mevcut müşterilerin konumları değişmez. Sütun dosyaları yeniden
+        yazılmaz, sona büyütülür; yeni satırlar NaN (sayısal), 0 veya -1
+        (kategori kodu) ile başlar ve update ile doldurulur. Yeni
+        kimlikler taşma dizinine girer; sıralı kimlik kopyası yalnızca
+        taşma dizini sınırı aştığında yeniden yazılır. Sıralı konum
+        dizinlerine yeni konumlar ilk update'te, değerleri yazıldıktan
+        sonra katılır (sorted_positions). Yarıda kalan bir ekleme geri
+        alınır: sütun dosyaları master_id.npy'den uzun kalmaz.
+
+        Returns
+        -------
+        ndarray
+            Yeni müşterilerin konumları (ids sırasıyla)
+        """
+        if self.mode != "r+":
+            raise PermissionError("Depo salt okunur açıldı; append için mode='r+'")
+        ids = np.asarray(ids, dtype=str)
+        if len(np.unique(ids)) != len(ids) or (self.positions(ids) >= 0).any():
+            raise ValueError("Eklenecek master_id'ler benzersiz olmalı ve depoda bulunmamalı")
+        if ids.dtype.itemsize > self.ids.dtype.itemsize:
+            raise ValueError(f"master_id genişliği depodakini ({self.ids.dtype}) aşıyor; "
+                             f"depo yeniden yazılmalı")
+        start = len(self)
+        positions = np.arange(start, start + len(ids))
+
+        overflow = self._overflow_index()
+        self.flush()
+        self._arrays = {}
+        self._sorted = {}
+
+        appended = []
+        try:
+            for name, info in self.meta["columns"].items():
+                path = os.path.join(self.path, f"{name}.npy")
+                with open(path, "rb") as f:
+                    dtype = _read_npy_header(f)[1][2]
+                fill = -1 if info["kind"] != "values" else _fill_value(dtype)
+                appended.append(path)
+                _append_npy(path, np.full(len(ids), fill, dtype=dtype))
+            appended.append(os.path.join(self.path, IDS_FILE))
+            _append_npy(appended[-1], ids.astype(self.ids.dtype))
+        except BaseException:
+            for path in appended:
+                _truncate_npy(path, start)
+            raise
+
+        self.meta["n_customers"] = start + len(ids)
+        _write_meta(self.path, self.meta)
+        self.ids = np.load(os.path.join(self.path, IDS_FILE), mmap_mode="r")
+        # Yeni kimlikler taşma dizinine araya yerleştirilir
+        order = np.argsort(ids, kind="stable")
+        insert_at = np.searchsorted(overflow[0], ids[order])
+        self._overflow = (np.insert(overflow[0], insert_at, ids[order].astype(self.ids.dtype)),
+                          np.insert(overflow[1], insert_at, positions[order]))
+        if len(self) - len(self._sorted_ids) > max(ID_OVERFLOW_MIN, len(self) // ID_OVERFLOW_RATIO):
+            self._merge_ids()
+        return positions
+
+    def flush(self):
+        """Yazılmış sayfaları diske aktarır"""
+        for values in self._arrays.values():
+            if isinstance(values, np.memmap):
+                values.flush()
+
+    def set_attrs(self, **attrs):
+        """meta.json'daki attrs'ı günceller (atomik yazım)"""
+        self.meta["attrs"].update(to_builtin(attrs))
+        _write_meta(self.path, self.meta)
+
+
+def _save_atomic(path, values):
+    with atomic_write(path, "wb") as f:
+        np.save(f, values)
+
+
+def _write_meta(path, meta):
+    with atomic_write(os.path.join(path, META_FILE)) as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+def write_feature_store(table, path=FEATURE_STORE_DIR, attrs=None):
+    """
+    CustomerTable'ı özellik deposu olarak yazar (varsa yerine geçer)
+
+    Sayısal sütunlar olduğu gibi, kategorik sütunlar kod + kategori,
+    diğer metin sütunları (RF_SCORE, segment) intern edilerek kod +
+    değer listesi olarak yazılır.
+    Depo önce geçici klasöre yazılır; okuyucular yarım depo görmez.
+
+    Returns
+    -------
+    FeatureStore
+        "r+" kipinde açılmış depo
+    """
+    path = os.fspath(path)
+    tmp_path = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+    os.makedirs(tmp_path)
+    try:
+        ids = table.ids.to_numpy(dtype=str)
+        np.save(os.path.join(tmp_path, IDS_FILE), ids)
+        # CustomerTable kimlikleri sıralıdır: sıralı kopya aynısı, konumlar 0..n-1
+        np.save(os.path.join(tmp_path, SORTED_IDS_FILE), ids)
+        np.save(os.path.join(tmp_path, ORDER_FILE), np.arange(len(ids), dtype=np.int64))
+        columns = {}
+        for name, values in table.columns.items():
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                categories = values.categories
+                np.save(os.path.join(tmp_path, f"{name}.npy"),
+                        np.asarray(values.codes, dtype=_code_dtype(len(categories))))
+                columns[name] = {"kind": "category", "categories": to_builtin(list(categories)),
+                                 "ordered": bool(values.ordered)}
+            elif values.dtype.kind in "biufmM":
+                values = np.asarray(values)
+                np.save(os.path.join(tmp_path, f"{name}.npy"), values)
+                columns[name] = {"kind": "values", "dtype": values.dtype.str}
+            else:
+                # Serbest metin (RF_SCORE, segment): yeni değerler update'te
+                # kategori listesine eklenebilsin diye kodlar int32
+                codes, categories = pd.factorize(np.asarray(values, dtype=object), sort=True)
+                np.save(os.path.join(tmp_path, f"{name}.npy"), codes.astype(np.int32))
+                columns[name] = {"kind": "text", "categories": [str(c) for c in categories]}
+        _write_meta(tmp_path, {"n_customers": len(table), "columns": columns,
+                               "attrs": to_builtin(attrs or {})})
+
+        old_path = f"{path}.old-{uuid.uuid4().hex[:8]}"
+        if os.path.exists(path):
+            os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    return FeatureStore(path, mode="r+")
+
+
+def order_days(dataframe):
+    """
+    Müşteri başına ilk ve son alışveriş günleri
+
+    Returns
+    -------
+    DataFrame
+        master_id indeksli (sıralı); first_order_day, last_order_day
+        (1970-01-01'den beri gün, int32)
+    """
+    frame = pd.DataFrame({"master_id": dataframe["master_id"]})
+    for name, column in zip(DAY_COLUMNS, ("first_order_date", "last_order_date")):
+        days = pd.to_datetime(dataframe[column]).to_numpy("datetime64[D]")
+        frame[name] = days.astype(np.int64).astype(np.int32)
+    return frame.groupby("master_id", sort=True).agg(first_order_day=("first_order_day", "min"),
+                                                     last_order_day=("last_order_day", "max"))
+
+
+def order_totals(dataframe):
+    """
+    Müşteri başına kanal bazında sipariş sayısı ve değer toplamları
+
+    Returns
+    -------
+    DataFrame
+        master_id indeksli (sıralı); TOTAL_COLUMNS (float)
+    """
+    return dataframe.groupby("master_id", sort=True)[list(TOTAL_COLUMNS)].sum().astype(float)
+
+
+def build_feature_store(dataframe, rfm=None, cltv=None, path=FEATURE_STORE_DIR, attrs=None):
+    """
+    Ham veri, RFM ve CLTV çıktılarından özellik deposunu yazar
+
+    Sütunlar build_customer_table ile hizalanır; CLTV'nin RFM ile
+    çakışan sütunları (frequency) "cltv_" önekini alır. Gün sütunları
+    (order_days) ve kanal toplamları (order_totals) eklenir;
+    dataframe aykırı değerleri baskılanmamış veri olmalıdır. Sıralı
+    konum dizini last_order_day için kurulur (analiz tarihini
+    ilerletirken recency sınırını geçenler).
+    """
+    table = (build_customer_table(dataframe, rfm=rfm, cltv=cltv)
+             .attach(order_days(dataframe)).attach(order_totals(dataframe)))
+    store = write_feature_store(table, path=path, attrs=attrs)
+    store.sorted_positions("last_order_day")
+    return store
+
+
+def cltv_inputs(store):
+    """Depodaki CLTV girdileri -> score_cltv sütun adları eşlemesi"""
+    return {("cltv_" + name if "cltv_" + name in store else name): name for name in CLTV_INPUTS}
+
+
+def score_feature_store(store, bgf, ggf, month=6, segment_count=4, churn_threshold=None,
+                        min_frequency=None):
+    """
+    Depodaki tüm müşterileri yeniden skorlar ve sonuçları yerinde yazar
+
+    RFM skorlayıcı ve CLTV çekirdekleri girdileri doğrudan eşlenmiş
+    dizilerden okur (kopya yok); depo "r+" açılmış olmalıdır. Depoda
+    bulunan skor sütunları güncellenir. min_frequency score_cltv'deki
+    gibidir.
+
+    Returns
+    -------
+    rfm, cltv : DataFrame
+        Satır konumu indeksli skorlar
+    """
+    from .cltv_core import score_cltv
+
+    rfm = score_rfm(store.to_frame(RFM_INPUTS, index=False))
+    cltv = score_cltv(store.to_frame(list(cltv_inputs(store)), rename=cltv_inputs(store),
+                                     index=False),
+                      bgf, ggf, month=month, segment_count=segment_count,
+                      churn_threshold=churn_threshold, min_frequency=min_frequency)
+
+    positions = np.arange(len(store))
+    write_scores(store, rfm, RFM_INPUTS, positions)
+    write_scores(store, cltv, CLTV_INPUTS, positions)
+    return rfm, cltv
+
+
+def write_scores(store, frame, inputs, positions):
+    """Skorlayıcı çıktısının girdi olmayan ve depoda bulunan sütunlarını yazar"""
+    outputs = [name for name in frame.columns if name not in inputs and name in store]
+    return store.update(frame[outputs], positions)
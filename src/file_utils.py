@@ -0,0 +1,107 @@
+"""
+Dosya Yardımcıları
+Birden çok modülün (model kayıt defteri, pipeline önbelleği, özellik
+deposu, özet rapor, klasör izleme defteri) paylaştığı dosya işlemleri:
+
+- atomic_write: okuyucular yarım yazılmış dosya görmez. Aynı hedefe
+  aynı anda yazan süreçler ayrı geçici dosyalar kullanır; son os.replace
+  kazanır
+- file_lock: oku-değiştir-yaz döngüleri için süreçler arası kilit
+  (POSIX flock; Windows'ta msvcrt.locking)
+- file_digest: içeriğin SHA-256 parmak izi (pipeline önbellek anahtarı,
+  klasör izlemede tekrar eden dosyalar)
+- to_builtin: JSON'a yazılacak değerlerin Python tiplerine çevrilmesi
+"""
+
+import contextlib
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Geçici dosyalar 0600 açılır; yerine konan dosya open() ile yazılmış gibi
+# umask'a göre izin alır (süreç başında bir kez okunur)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode="w"):
+    """
+    Geçici dosyaya yazıp os.replace ile yerine koyan open()
+
+    Geçici dosya hedefle aynı klasörde, benzersiz adla açılır; hata olursa
+    silinir ve hedef dosya değişmez.
+    """
+    path = os.fspath(path)
+    binary = "b" in mode
+    f = tempfile.NamedTemporaryFile(mode, dir=os.path.dirname(path) or ".",
+                                    prefix=f"{os.path.basename(path)}.", suffix=".tmp",
+                                    encoding=None if binary else "utf-8", delete=False)
+    try:
+        with f:
+            yield f
+        os.chmod(f.name, 0o666 & ~_UMASK)
+        os.replace(f.name, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(f.name)
+        raise
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    path için süreçler (ve iş parçacıkları) arası özel kilit
+
+    Kilit path + ".lock" dosyasında tutulur; dosya silinmez (silinirse
+    bekleyen süreç başka bir dosyayı kilitleyebilir).
+    """
+    with open(f"{os.fspath(path)}.lock", "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def file_digest(path, block_size=1 << 20):
+    """Dosya içeriğinin SHA-256 parmak izi (hex)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def to_builtin(value):
+    """
+    JSON'a yazılabilir hale getirir (numpy sayıları, Series, tuple ...);
+    sonlu olmayan sayılar None olur
+    """
+    if isinstance(value, dict):
+        return {str(k): to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_builtin(v) for v in value]
+    if hasattr(value, "to_dict"):
+        return to_builtin(value.to_dict())
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
@@ -50,12 +50,28 @@ DEĞİŞKENLER:
 ###############################################################
 
 import datetime as dt
+import sys
+from pathlib import Path
+
 import pandas as pd
 import matplotlib.pyplot as plt
 from lifetimes import BetaGeoFitter
 from lifetimes import GammaGammaFitter
 from lifetimes.plotting import plot_period_transactions
 
+# Betik olarak çalıştırıldığında (python flo_cltv_prediction.py) proje
+# modülleri src paketinden içe aktarılır
+if not __package__:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = "src"
+
+from .config import CLTV_CONFIG
+from .cltv_core import (prepare_cltv_data, build_cltv_summary,
+                        fit_ggf, score_cltv, cap_outliers)
+from .cltv_sampling import fit_on_sample
+from .btyd_models import fit_btyd
+from .topk import top_k
+
 # Pandas görüntüleme ayarları
 pd.set_option('display.max_columns', None)
 pd.set_option('display.width', 500)
@@ -103,48 +119,23 @@ df_raw = pd.read_csv(...)  # Ham veri
 df = df_raw.copy()         # Çalışma kopyası
 """
 
-# 2. AYKIRI DEĞER FONKSİYONLARI
-print("\n2) Aykırı Değer Fonksiyonları")
+# 2. AYKIRI DEĞER BASKILAMA ADIMI
+print("\n2) Aykırı Değer Baskılama Adımı")
 print("-" * 70)
 
-def outlier_thresholds(dataframe, variable):
-    """
-    Aykırı değer eşiklerini hesaplar (IQR yöntemi)
-    
-    Parameters
-    ----------
-    dataframe : DataFrame
-        Veri seti
-    variable : str
-        Değişken adı
-    
-    Returns
-    -------
-    low_limit : float
-        Alt eşik değer
-    up_limit : float
-        Üst eşik değer
-    
-    Not
-    ---
-    - %1 ve %99 quantile kullanılıyor (çok uç değerleri yakalamak için)
-    - round() ile yuvarlanıyor (frequency integer olmalı)
-    - IQR (Interquartile Range) = Q3 - Q1
-    - Outlier: Q3 + 1.5*IQR veya Q1 - 1.5*IQR dışındakiler
-    """
-    # %1 ve %99 quantile'ları (normalde %25 ve %75 kullanılır)
-    quartile1 = dataframe[variable].quantile(0.01)
-    quartile3 = dataframe[variable].quantile(0.99)
-    
-    # Çeyrekler arası fark
-    interquantile_range = quartile3 - quartile1
-    
-    # Eşik değerler
-    up_limit = quartile3 + 1.5 * interquantile_range
-    low_limit = quartile1 - 1.5 * interquantile_range
-    
-    # Yuvarlama (frequency değerleri integer olmalı)
-    return round(low_limit), round(up_limit)
+"""
+AYKIRI DEĞER BASKILAMA: cap_outliers (src/cltv_core.py)
+
+Tek aşamada çalışır:
+1. Dört sütunun %1 ve %99 kantilleri tek np.nanquantile çağrısıyla
+   2-D dizi üzerinden bulunur (sütun başına ayrı quantile() yok)
+2. Üst eşik = round(q99 + 1.5 * (q99 - q01))
+3. np.minimum ile tüm sütunlar birlikte baskılanır (.loc yok)
+4. Uygulanan eşikler döndürülür; yeni veri aynı eşiklerle
+   baskılanabilir: cap_outliers(yeni_df, thresholds=esikler)
+
+Kantiller CLTV_CONFIG["outlier_quantiles"] ayarından okunur.
+"""
 
 """
 NEDEN %1 VE %99?
@@ -172,36 +163,6 @@ Q1 = 2, Q3 = 4, IQR = 2
 100 > 7 → Aykırı değer! (7 ile değiştirilecek)
 """
 
-def replace_with_thresholds(dataframe, variable):
-    """
-    Aykırı değerleri eşik değerlerle değiştirir (baskılama/capping)
-    
-    Parameters
-    ----------
-    dataframe : DataFrame
-        Veri seti
-    variable : str
-        Değişken adı
-    
-    Returns
-    -------
-    None
-        DataFrame'i yerinde (inplace) değiştirir
-    
-    Not
-    ---
-    - Aykırı değerler SİLİNMEZ, BASTIRILIR
-    - Üst limiti aşanlar → üst limit değeri
-    - Alt limiti aşanlar → alt limit değeri (opsiyonel)
-    """
-    low_limit, up_limit = outlier_thresholds(dataframe, variable)
-    
-    # Üst limiti aşanları baskılama
-    dataframe.loc[(dataframe[variable] > up_limit), variable] = up_limit
-    
-    # Alt limiti aşanları baskılama (opsiyonel, burada yorum satırı)
-    # dataframe.loc[(dataframe[variable] < low_limit), variable] = low_limit
-
 """
 NEDEN SİLMİYOR DA BASKILIYORUZ?
 1. Veri kaybını önlemek
@@ -221,18 +182,18 @@ NEDEN SİLMİYOR DA BASKILIYORUZ?
    - Ama çok aşırı değerler modeli bozabilir
    - Makul bir üst sınır koymak mantıklı
 
-LOC KULLANIMI:
-dataframe.loc[KOŞUL, SÜTUN] = YENİ_DEĞER
-- KOŞUL: Hangi satırlar?
-- SÜTUN: Hangi sütun değişecek?
-- YENİ_DEĞER: Ne ile değişecek?
+NEDEN TEK AŞAMA?
+- Sütun başına iki quantile() çağrısı + .loc ataması yerine
+  tek kantil hesabı ve tek np.minimum
+- Boolean maske ve indeks hizalaması gerekmez
+- Büyük veride sütun sayısı arttıkça fark büyür
 
 ÖRNEK:
-df.loc[(df['age'] > 100), 'age'] = 100
-→ Yaşı 100'den büyük olanların yaşını 100 yap
+esikler = cap_outliers(df)
+→ {'order_num_total_ever_online': <üst eşik>, ...}
 """
 
-print("✓ Aykırı değer fonksiyonları tanımlandı!")
+print("✓ Aykırı değer baskılama adımı hazır (cap_outliers)!")
 
 # 3. AYKIRI DEĞERLERİ BASKILAMA
 print("\n3) Aykırı Değerleri Baskılama")
@@ -249,9 +210,9 @@ outlier_columns = [
 print("Baskılama öncesi istatistikler:")
 print(df[outlier_columns].describe().T)
 
-# Her değişken için aykırı değerleri baskılama
-for col in outlier_columns:
-    replace_with_thresholds(df, col)
+# Tüm değişkenler için aykırı değerleri tek aşamada baskılama
+outlier_limits = cap_outliers(df, outlier_columns)
+print(f"\nUygulanan üst eşikler: {outlier_limits}")
 
 print("\nBaskılama sonrası istatistikler:")
 print(df[outlier_columns].describe().T)
@@ -419,59 +380,55 @@ print("\n2) CLTV DataFrame Oluşturma")
 print("-" * 70)
 
 cltv_df = df.groupby('master_id').agg({
-    'last_order_date': [
-        lambda date: (date.max() - date.min()).days,        # recency (gün)
-        lambda date: (analysis_date - date.min()).days       # T (gün)
-    ],
+    'first_order_date': 'min',                               # ilk alışveriş
+    'last_order_date': 'max',                                # son alışveriş
     'order_num_total': lambda num: num.sum(),                # frequency (ham)
     'customer_value_total': lambda value: value.sum()        # monetary (ham)
 })
 
-# Sütun isimlerini düzenleme
-cltv_df.columns = cltv_df.columns.droplevel(0)
-cltv_df.columns = ['recency_cltv', 'T', 'frequency', 'monetary_cltv']
+# recency: ilk-son alışveriş arası, T: analiz tarihi - ilk alışveriş (gün)
+cltv_df['recency_cltv'] = (cltv_df['last_order_date'] - cltv_df['first_order_date']).dt.days
+cltv_df['T'] = (analysis_date - cltv_df['first_order_date']).dt.days
+cltv_df = cltv_df.rename(columns={'order_num_total': 'frequency',
+                                  'customer_value_total': 'monetary_cltv'})
 
 print("✓ CLTV DataFrame oluşturuldu!")
 print("\nİlk 5 satır:")
 print(cltv_df.head())
 
 """
-LAMBDA FONKSİYONLARI AÇIKLAMASI:
+AGREGASYON AÇIKLAMASI:
 
-1. lambda date: (date.max() - date.min()).days
-   - date.max(): En son alışveriş tarihi
-   - date.min(): En eski (ilk) alışveriş tarihi
-   - .max() - .min(): Aralarındaki fark
-   - .days: Gün cinsinden
+1. recency_cltv = last_order_date - first_order_date
+   - first_order_date: İlk alışveriş tarihi
+   - last_order_date: En son alışveriş tarihi
+   - Aralarındaki fark (gün cinsinden)
 
    ÖRNEK:
    İlk alışveriş: 2020-01-01
    Son alışveriş: 2021-06-01
-   Recency: (2021-06-01) - (2020-01-01) = 516 gün
+   Recency: (2021-06-01) - (2020-01-01) = 517 gün
 
-2. lambda date: (analysis_date - date.min()).days
+2. T = analysis_date - first_order_date
    - analysis_date: Analiz tarihi (bugün)
-   - date.min(): İlk alışveriş tarihi
+   - first_order_date: İlk alışveriş tarihi
    - Aralarındaki fark = Müşteri yaşı
 
    ÖRNEK:
    İlk alışveriş: 2020-01-01
    Analiz tarihi: 2021-06-03
-   T: (2021-06-03) - (2020-01-01) = 518 gün
+   T: (2021-06-03) - (2020-01-01) = 519 gün
+
+DİKKAT:
+Her ikisini de last_order_date üzerinden (date.max() - date.min())
+hesaplamak, müşteri başına tek satır olduğu için recency'yi hep 0 yapar.
+Bu yüzden ilk ve son alışveriş tarihlerini ayrı sütunlardan alıyoruz.
 
 3. lambda num: num.sum()
    - Toplam alışveriş sayısı
 
 4. lambda value: value.sum()
    - Toplam harcama
-
-COLUMNS.DROPLEVEL(0):
-groupby().agg() ile MultiIndex oluşur:
-                last_order_date              order_num_total  ...
-                <lambda_0>  <lambda_1>      <lambda_0>       ...
-
-droplevel(0) ile üst seviye kaldırılır:
-                recency     T               frequency        ...
 """
 
 # Monetary: İşlem başına ortalama
@@ -645,7 +602,7 @@ cltv_df["exp_sales_3_month"] = bgf.predict(
 
 print("✓ 3 aylık tahminler eklendi!")
 print("\nEn çok alışveriş yapması beklenen 10 müşteri:")
-print(cltv_df.sort_values("exp_sales_3_month", ascending=False).head(10))
+print(top_k(cltv_df, "exp_sales_3_month", 10))
 
 """
 BGF.PREDICT() METODU:
@@ -723,11 +680,15 @@ STRATEJİK KARAR:
 print("\n3 ve 6 Ayda En Çok Satın Alım Yapacak 10 Müşteri")
 print("-" * 70)
 
+# İki sıralama tek geçişte: sütun başına 10 satırlık heap
+top_sales = top_k(cltv_df, ["exp_sales_3_month", "exp_sales_6_month"], 10,
+                  keep=["exp_sales_3_month", "exp_sales_6_month", "frequency"])
+
 print("\n3 Ay:")
-print(cltv_df.sort_values("exp_sales_3_month", ascending=False)[["exp_sales_3_month", "frequency"]].head(10))
+print(top_sales["exp_sales_3_month"][["exp_sales_3_month", "frequency"]])
 
 print("\n6 Ay:")
-print(cltv_df.sort_values("exp_sales_6_month", ascending=False)[["exp_sales_6_month", "frequency"]].head(10))
+print(top_sales["exp_sales_6_month"][["exp_sales_6_month", "frequency"]])
 
 """
 EN ÇOK ALIŞVERIS YAPACAK MÜŞTERİLER:
@@ -800,7 +761,7 @@ cltv_df["exp_average_value"] = ggf.conditional_expected_average_profit(
 
 print("✓ Beklenen ortalama değer hesaplandı!")
 print("\nEn yüksek ortalama değere sahip 10 müşteri:")
-print(cltv_df.sort_values("exp_average_value", ascending=False)[["exp_average_value", "monetary_cltv", "frequency"]].head(10))
+print(top_k(cltv_df, "exp_average_value", 10, keep=["exp_average_value", "monetary_cltv", "frequency"]))
 
 """
 CONDITIONAL_EXPECTED_AVERAGE_PROFIT():
@@ -907,7 +868,7 @@ Düşük CLTV = Az değerli müşteri
 
 # CLTV değeri en yüksek 20 müşteri
 print("\nCLTV Değeri En Yüksek 20 Müşteri:")
-print(cltv_df.sort_values("cltv", ascending=False).head(20))
+print(top_k(cltv_df, "cltv", 20))
 
 """
 EN DEĞERLİ 20 MÜŞTERİ:
@@ -1168,7 +1129,8 @@ print("\n" + "=" * 70)
 print("BONUS: TÜM SÜRECİ FONKSİYONLAŞTIRMA")
 print("=" * 70)
 
-def create_cltv_prediction(dataframe, month=6, segment_count=4):
+def create_cltv_prediction(dataframe, month=6, segment_count=4, fit_strategy="full",
+                           transaction_model=None):
     """
     FLO veri seti için BG-NBD ve Gamma-Gamma ile CLTV tahmini yapan fonksiyon
     
@@ -1180,11 +1142,23 @@ def create_cltv_prediction(dataframe, month=6, segment_count=4):
         Kaç ay ileriye CLTV tahmini yapılacak?
     segment_count : int, default 4
         Kaç segmente bölünecek?
+    fit_strategy : {"full", "sample"}, default "full"
+        "full": modeller tüm müşterilerle kurulur.
+        "sample": modeller frequency/tenure tabakalı artan örneklemlerle
+        kurulur, parametreler yakınsayınca durulur ve tüm müşteriler
+        dondurulmuş parametrelerle skorlanır. Örneklem raporu
+        cltv_df.attrs["fit_report"] içindedir.
+    transaction_model : {"bgnbd", "mbgnbd", "pareto_nbd"}, optional
+        İşlem modeli (varsayılan CLTV_CONFIG["transaction_model"]).
+        Tüm modeller src/btyd_models.py içindeki vektörel modellerle,
+        sıkıştırılmış yeterli istatistikler üzerinde kurulur.
     
     Returns
     -------
     cltv_df : DataFrame
-        CLTV tahminleri ve segmentleri
+        CLTV tahminleri ve segmentleri; p_alive (BG-NBD'ye göre aktif
+        olma olasılığı) ve churn_risk (p_alive < churn_threshold)
+        sütunları dahil
     
     İşlem Adımları
     --------------
@@ -1204,131 +1178,48 @@ def create_cltv_prediction(dataframe, month=6, segment_count=4):
     Not
     ---
     - Haftalık hesaplama kullanılır
-    - Discount rate: %1
-    - Outlier threshold: %1-%99
+    - Discount rate, penalizer katsayıları ve churn eşiği: CLTV_CONFIG (src/config.py)
+    - Outlier threshold: CLTV_CONFIG["outlier_quantiles"] (%1-%99), cap_outliers
+    - Adımların kendisi src/cltv_core.py içindedir
     """
     
+    if fit_strategy not in ("full", "sample"):
+        raise ValueError(f"Bilinmeyen fit_strategy: {fit_strategy!r}")
+    if transaction_model is None:
+        transaction_model = CLTV_CONFIG["transaction_model"]
+    if transaction_model != "bgnbd" and fit_strategy == "sample":
+        raise ValueError("fit_strategy='sample' yalnızca bgnbd modeliyle kullanılabilir")
+    
     # ============================================================
     # 1. VERİ HAZIRLAMA
     # ============================================================
     
-    # Aykırı değer fonksiyonları (fonksiyon içinde tanımlı)
-    def outlier_thresholds(df, variable):
-        q1 = df[variable].quantile(0.01)
-        q3 = df[variable].quantile(0.99)
-        iqr = q3 - q1
-        up_limit = q3 + 1.5 * iqr
-        low_limit = q1 - 1.5 * iqr
-        return round(low_limit), round(up_limit)
-    
-    def replace_with_thresholds(df, variable):
-        low, up = outlier_thresholds(df, variable)
-        df.loc[(df[variable] > up), variable] = up
-    
-    # Aykırı değerleri baskılama
-    outlier_cols = [
-        "order_num_total_ever_online",
-        "order_num_total_ever_offline",
-        "customer_value_total_ever_offline",
-        "customer_value_total_ever_online"
-    ]
-    
-    for col in outlier_cols:
-        replace_with_thresholds(dataframe, col)
-    
-    # Omnichannel toplam değişkenler
-    dataframe["order_num_total"] = (
-        dataframe["order_num_total_ever_online"] + 
-        dataframe["order_num_total_ever_offline"]
-    )
-    dataframe["customer_value_total"] = (
-        dataframe["customer_value_total_ever_online"] + 
-        dataframe["customer_value_total_ever_offline"]
-    )
-    
-    # Tarih dönüşümleri
-    date_cols = [col for col in dataframe.columns if "date" in col]
-    for col in date_cols:
-        dataframe[col] = pd.to_datetime(dataframe[col])
+    prepare_cltv_data(dataframe)
     
     # ============================================================
     # 2. CLTV VERİ YAPISI OLUŞTURMA
     # ============================================================
     
-    # Analiz tarihi
-    analysis_date = dataframe["last_order_date"].max() + dt.timedelta(days=2)
-    
-    # CLTV dataframe
-    cltv_df = dataframe.groupby('master_id').agg({
-        'last_order_date': [
-            lambda date: (date.max() - date.min()).days,
-            lambda date: (analysis_date - date.min()).days
-        ],
-        'order_num_total': lambda num: num.sum(),
-        'customer_value_total': lambda value: value.sum()
-    })
-    
-    cltv_df.columns = cltv_df.columns.droplevel(0)
-    cltv_df.columns = ['recency_cltv', 'T', 'frequency', 'monetary_cltv']
-    
-    # Monetary düzeltme
-    cltv_df["monetary_cltv"] = cltv_df["monetary_cltv"] / cltv_df["frequency"]
-    
-    # Haftalık değerler
-    cltv_df["recency_cltv_weekly"] = cltv_df["recency_cltv"] / 7
-    cltv_df["T_weekly"] = cltv_df["T"] / 7
-    
-    # Final dataframe
-    cltv_df = cltv_df[["recency_cltv_weekly", "T_weekly", "frequency", "monetary_cltv"]]
-    
-    # ============================================================
-    # 3. BG-NBD MODELİ
-    # ============================================================
-    
-    bgf = BetaGeoFitter(penalizer_coef=0.001)
-    bgf.fit(cltv_df['frequency'], cltv_df['recency_cltv_weekly'], cltv_df['T_weekly'])
-    
-    # Tahminler
-    cltv_df["exp_sales_3_month"] = bgf.predict(
-        4 * 3, cltv_df['frequency'], cltv_df['recency_cltv_weekly'], cltv_df['T_weekly']
-    )
-    cltv_df["exp_sales_6_month"] = bgf.predict(
-        4 * 6, cltv_df['frequency'], cltv_df['recency_cltv_weekly'], cltv_df['T_weekly']
-    )
-    
-    # ============================================================
-    # 4. GAMMA-GAMMA MODELİ
-    # ============================================================
-    
-    ggf = GammaGammaFitter(penalizer_coef=0.01)
-    ggf.fit(cltv_df['frequency'], cltv_df['monetary_cltv'])
-    
-    cltv_df["exp_average_value"] = ggf.conditional_expected_average_profit(
-        cltv_df['frequency'], cltv_df['monetary_cltv']
-    )
+    cltv_df = build_cltv_summary(dataframe)
     
     # ============================================================
-    # 5. CLTV HESAPLAMA
+    # 3-4. BG-NBD VE GAMMA-GAMMA MODELLERİ
     # ============================================================
     
-    cltv_df["cltv"] = ggf.customer_lifetime_value(
-        bgf,
-        cltv_df['frequency'],
-        cltv_df['recency_cltv_weekly'],
-        cltv_df['T_weekly'],
-        cltv_df['monetary_cltv'],
-        time=month,
-        freq="W",
-        discount_rate=0.01
-    )
+    if fit_strategy == "sample":
+        bgf, ggf, fit_report = fit_on_sample(cltv_df)
+    else:
+        bgf = fit_btyd(cltv_df, transaction_model)
+        ggf = fit_ggf(cltv_df)
+        fit_report = {"strategy": "full", "n_customers": len(cltv_df)}
+    fit_report["transaction_model"] = transaction_model
     
     # ============================================================
-    # 6. SEGMENTASYON
+    # 5-6. CLTV HESAPLAMA VE SEGMENTASYON
     # ============================================================
     
-    # Segment labels oluşturma (A, B, C, D)
-    labels = [chr(68 - i) for i in range(segment_count)]  # D, C, B, A
-    cltv_df["cltv_segment"] = pd.qcut(cltv_df["cltv"], segment_count, labels=labels)
+    cltv_df = score_cltv(cltv_df, bgf, ggf, month=month, segment_count=segment_count)
+    cltv_df.attrs["fit_report"] = fit_report
     
     return cltv_df
 
@@ -1350,9 +1241,9 @@ FONKSİYON TASARIMI DETAYLARI:
    - Başlıklar ve ayırıcılar
    - Okunabilir kod
 
-4. İÇ FONKSİYONLAR:
-   - outlier_thresholds ve replace_with_thresholds
-   - Fonksiyon içinde tanımlı (dışarıya bağımlılık yok)
+4. ORTAK ADIMLAR (src/cltv_core.py):
+   - prepare_cltv_data, build_cltv_summary, fit_bgf, fit_ggf, score_cltv
+   - Yan etkisiz modül; örneklemli/paralel özellikler de aynı adımları kullanır
 
 5. ESNEKLIK:
    - Farklı ay sayıları için kullanılabilir
@@ -1373,6 +1264,10 @@ cltv = create_cltv_prediction(df, segment_count=5)
 # 3 aylık, 3 segment
 cltv = create_cltv_prediction(df, month=3, segment_count=3)
 
+# Çok büyük tabanlarda: tabakalı örneklemle kur, herkesi skorla
+cltv = create_cltv_prediction(df, fit_strategy="sample")
+print(cltv.attrs["fit_report"])
+
 OTOMATİZASYON:
 Bu fonksiyon bir Python script'i olarak kaydedilip
 düzenli olarak (günlük/haftalık) çalıştırılabilir:
@@ -43,8 +43,19 @@ DEĞİŞKENLER:
 ###############################################################
 
 import datetime as dt
+import sys
+from pathlib import Path
+
 import pandas as pd
 
+# Betik olarak çalıştırıldığında (python flo_rfm_analysis.py) proje
+# modülleri src paketinden içe aktarılır
+if not __package__:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    __package__ = "src"
+
+from .customer_table import build_customer_table
+
 # Pandas görüntüleme ayarları
 pd.set_option('display.max_columns', None)  # Tüm sütunları göster
 pd.set_option('display.max_rows', 20)       # İlk 20 satır
@@ -674,10 +685,10 @@ Bu profildeki müşterilere özel tanıtım ve ilk alım indirimi
 """
 
 # Dataframe'i birleştirme (rfm + df)
-rfm_df = rfm.merge(df[['master_id', 'interested_in_categories_12']], 
-                   left_index=True, 
-                   right_on='master_id', 
-                   how='left')
+# Müşteri tablosu master_id'leri bir kez sıralar; groupby çıktısı olan rfm
+# aynı sırada olduğundan UUID metinleri üzerinden merge yapılmaz, sütunlar
+# satır konumuyla yan yana konur
+rfm_df = build_customer_table(df, rfm=rfm).to_frame().reset_index()
 
 # Hedef müşterileri filtreleme
 target_customers_a = rfm_df[
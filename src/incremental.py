@@ -0,0 +1,412 @@
+"""
+Artımlı RFM / CLTV Güncellemesi
+Değişen müşterilerin anlık görüntü satırlarından (delta dosyası)
+özellik deposunu günceller
+
+FLO verisi yaşam boyu toplamların anlık görüntüsüdür; delta dosyası aynı
+sütunlarla yalnızca sipariş vermiş (veya yeni) müşterilerin güncel
+satırlarını içerir. Bu müşterilerin toplamları depoda yerinde
+değiştirilir ve yalnızca onlar yeniden skorlanır:
+
+- RFM skorları dondurulmuş kantil sınırlarıyla (score_rfm_frozen)
+- CLTV dondurulmuş model parametreleri ve segment sınırlarıyla
+- Aykırı değer eşikleri de kurulumdaki değerlerdir
+- CLTV_CONFIG["min_frequency"]'den az siparişli (tek siparişli yeni)
+  müşteriler CLTV'siz kalır: tahminler NaN, cltv_segment boş; sipariş
+  sayısı eşiğe ulaşınca sonraki delta'da skorlanırlar
+
+Dondurulmuş durum, pipeline'ın feature_store aşamasında depo attrs'ına
+yazılır (incremental_attrs). Her güncellemede kayma ölçülür:
+
+- Skor sınırları: güncel tabanın kantilleri ile dondurulmuş sınırlar
+  arasındaki en büyük fark / iç sınır aralığı. RFM_CONFIG["rebin_threshold"]
+  aşılırsa tüm müşteriler yeniden bölünür; CLTV segmentleri için
+  CLTV_CONFIG["resegment_threshold"]
+- Log-olabilirlik: müşteri başına ortalama log-olabilirliğin kurulum
+  anındakine göre göreli kötüleşmesi. Toplam, değişen müşterilerin eski
+  ve yeni katkıları farkıyla artımlı tutulur; CLTV_CONFIG["refit_threshold"]
+  aşılırsa modeller tüm depo üzerinde yeniden kurulur
+
+Sınır kayması tüm depo üzerinde kantil gerektirir; sık ve küçük
+güncellemeler (event_stream) apply_delta(check_drift=False) ile yalnızca
+değişen müşterileri skorlar ve kaymayı aralıklı denetler.
+
+Analiz tarihi advance_to ile ilerletilir: recency ve T depodaki gün
+dizilerinden tek bir skalerle yeniden hesaplanır, RFM yalnızca recency
+sınırını geçen müşteriler için (son alışveriş gününe göre sıralı dizinde
+ikili arama) yeniden skorlanır. Analiz tarihinden sonraki siparişleri
+içeren delta'lar önce tarihin ilerletilmesini gerektirir.
+"""
+
+import datetime as dt
+
+import numpy as np
+import pandas as pd
+
+from .btyd_models import cltv_log_likelihood, fit_cltv_models, frozen_cltv_models
+from .config import CLTV_CONFIG, RFM_CONFIG
+from .cltv_core import CLTV_COLUMNS, assign_cltv_segments, cltv_bins, score_cltv
+from .customer_table import CUSTOMER_COLUMNS
+from .feature_store import (CLTV_INPUTS, DAY_COLUMNS, RFM_INPUTS, TOTAL_COLUMNS, FeatureStore,
+                            cltv_inputs, score_feature_store, write_scores)
+from .model_registry import register_model
+from .rfm_core import rfm_bins, score_rfm, score_rfm_frozen
+
+
+def _log_likelihood(fit, cltv_df):
+    return cltv_log_likelihood(fit, *(cltv_df[name].to_numpy() for name in
+                                      ("frequency", "recency_cltv_weekly", "T_weekly",
+                                       "monetary_cltv")))
+
+
+def incremental_attrs(dataframe, rfm, cltv, fit, month=6, segment_count=4):
+    """
+    Artımlı güncellemenin dondurduğu durum (özellik deposu attrs'ı)
+
+    Parameters
+    ----------
+    dataframe : DataFrame
+        Aykırı değerleri baskılanmış veri (attrs["outlier_thresholds"] ile)
+    rfm : DataFrame
+        score_rfm çıktısı
+    cltv : DataFrame
+        score_cltv çıktısı
+    fit : dict
+        fit_cltv_models çıktısı
+
+    Returns
+    -------
+    dict
+        analysis_date, month, segment_count, fit, outlier_thresholds,
+        rfm_bins, cltv_bins ve loglik ({fit_mean, sum, n})
+    """
+    analysis_date = pd.Timestamp(dataframe["last_order_date"].max()) + dt.timedelta(days=2)
+    log_lik = _log_likelihood(fit, cltv)
+    return {
+        "analysis_date": analysis_date.isoformat(),
+        "month": month,
+        "segment_count": segment_count,
+        "fit": fit,
+        "outlier_thresholds": dataframe.attrs["outlier_thresholds"],
+        "rfm_bins": rfm_bins(rfm),
+        "cltv_bins": cltv_bins(cltv, segment_count),
+        "loglik": {"fit_mean": float(log_lik.mean()), "sum": float(log_lik.sum()),
+                   "n": int(len(log_lik))},
+    }
+
+
+def edge_drift(old, new):
+    """
+    İki sınır listesi arasındaki kayma: iç sınırlardaki en büyük mutlak
+    fark / dondurulmuş iç sınır aralığı
+    """
+    old, new = np.asarray(old, dtype=float), np.asarray(new, dtype=float)
+    span = old[-2] - old[1]
+    if span <= 0:
+        span = max(abs(old[-2]), 1.0)
+    return float(np.max(np.abs(new[1:-1] - old[1:-1])) / span)
+
+
+def _day(date):
+    # 1970-01-01'den beri gün
+    return int(np.datetime64(pd.Timestamp(date).date(), "D").astype(np.int64))
+
+
+def _loglik_drift(loglik):
+    return (loglik["fit_mean"] - loglik["sum"] / loglik["n"]) / abs(loglik["fit_mean"])
+
+
+def _thresholds(rebin_threshold, resegment_threshold, refit_threshold):
+    return (RFM_CONFIG["rebin_threshold"] if rebin_threshold is None else rebin_threshold,
+            CLTV_CONFIG["resegment_threshold"] if resegment_threshold is None
+            else resegment_threshold,
+            CLTV_CONFIG["refit_threshold"] if refit_threshold is None else refit_threshold)
+
+
+def _refit(store, attrs, report):
+    # Modeller tüm depo üzerinde yeniden kurulur; skorlar ve sınırlar tazelenir
+    mapping = cltv_inputs(store)
+    fit = fit_cltv_models(store.to_frame(list(mapping), rename=mapping, index=False))
+    register_model("cltv", fit, metrics={"loglik_drift": report["loglik_drift"]},
+                   source="incremental_refit")
+    rfm_all, cltv_all = score_feature_store(store, *frozen_cltv_models(fit),
+                                            month=attrs["month"],
+                                            segment_count=attrs["segment_count"],
+                                            min_frequency=CLTV_CONFIG["min_frequency"])
+    log_lik = _log_likelihood(fit, cltv_all)
+    attrs.update(fit=fit, rfm_bins=rfm_bins(rfm_all),
+                 cltv_bins=cltv_bins(cltv_all, attrs["segment_count"]),
+                 loglik={"fit_mean": float(log_lik.mean()), "sum": float(log_lik.sum()),
+                         "n": int(len(log_lik))})
+    report.update(rfm="rebin", cltv="refit")
+
+
+def _rescore_rfm(store, attrs, rfm, positions, threshold, report, columns=None,
+                 check_drift=True):
+    # Sınırlar kaymadıysa (veya kayma denetlenmiyorsa) yalnızca verilen
+    # müşteriler dondurulmuş sınırlarla (columns: skorlanacak metrikler,
+    # score_rfm_frozen)
+    if check_drift:
+        current = store.to_frame(RFM_INPUTS, index=False)
+        report["rfm_drift"] = max(edge_drift(attrs["rfm_bins"][column], bins)
+                                  for column, bins in rfm_bins(current).items())
+        if report["rfm_drift"] > threshold:
+            rfm_all = score_rfm(current)
+            write_scores(store, rfm_all, RFM_INPUTS, np.arange(len(store)))
+            attrs["rfm_bins"] = rfm_bins(rfm_all)
+            report["rfm"] = "rebin"
+            return
+    write_scores(store, score_rfm_frozen(rfm, attrs["rfm_bins"], columns=columns),
+                 RFM_INPUTS, positions)
+    report["rfm"] = "frozen"
+
+
+def _rescore_cltv(store, attrs, cltv, positions, threshold, report, check_drift=True):
+    # Dondurulmuş parametrelerle verilen müşteriler, ardından segment kayması
+    bgf, ggf = frozen_cltv_models(attrs["fit"])
+    segment_count = attrs["segment_count"]
+    scored = score_cltv(cltv, bgf, ggf, month=attrs["month"], segment_count=segment_count,
+                        bins=attrs["cltv_bins"], min_frequency=CLTV_CONFIG["min_frequency"])
+    write_scores(store, scored, CLTV_INPUTS, positions)
+    report["cltv"] = "frozen"
+    if not check_drift:
+        return
+    values = store.to_frame(["cltv"], index=False)
+    new_bins = cltv_bins(values, segment_count)
+    report["cltv_drift"] = edge_drift(attrs["cltv_bins"], new_bins)
+    if report["cltv_drift"] > threshold:
+        store.update(assign_cltv_segments(values, segment_count)[["cltv_segment"]],
+                     np.arange(len(store)))
+        attrs["cltv_bins"] = new_bins
+        report["cltv"] = "resegment"
+
+
+def _delta_frames(delta, attrs):
+    # Delta satırlarından depo sütun adlarıyla RFM ve CLTV girdileri.
+    # Müşteri başına tek satır kaldığından compute_rfm_metrics ve
+    # prepare_cltv_data + build_cltv_summary ile aynı sonuç groupby ve tüm
+    # tarih sütunlarının dönüşümü olmadan, dizi işlemleriyle bulunur
+    # (küçük toplu skorlamada sabit maliyeti belirleyen bu adımlardır)
+    analysis_day = _day(attrs["analysis_date"])
+    delta = delta.drop_duplicates("master_id", keep="last").sort_values("master_id")
+    customers = delta.set_index("master_id")
+    for name, column in zip(DAY_COLUMNS, ("first_order_date", "last_order_date")):
+        days = pd.to_datetime(delta[column]).to_numpy("datetime64[D]").astype(np.int64)
+        customers[name] = days.astype(np.int32)
+    first_day = customers["first_order_day"].to_numpy(dtype=np.int64)
+    last_day = customers["last_order_day"].to_numpy(dtype=np.int64)
+    if (last_day >= analysis_day).any():
+        raise ValueError(f"Delta'da analiz tarihinden ({attrs['analysis_date'][:10]}) sonra "
+                         f"sipariş var; önce analiz tarihi ilerletilmeli (advance_to)")
+
+    rfm = pd.DataFrame({
+        "recency": analysis_day - last_day,
+        "frequency": customers["order_num_total_ever_online"]
+                     + customers["order_num_total_ever_offline"],
+        "monetary": customers["customer_value_total_ever_online"]
+                    + customers["customer_value_total_ever_offline"]
+    }, index=customers.index)
+
+    # CLTV: kurulumdaki eşiklerle baskılanmış toplamlar (cap_outliers)
+    thresholds = attrs["outlier_thresholds"]
+    capped = {column: np.minimum(customers[column].to_numpy(dtype=float), limit)
+              for column, limit in thresholds.items()}
+    orders = capped["order_num_total_ever_online"] + capped["order_num_total_ever_offline"]
+    value = capped["customer_value_total_ever_online"] + capped["customer_value_total_ever_offline"]
+    cltv = pd.DataFrame({
+        "recency_cltv_weekly": (last_day - first_day) / 7,
+        "T_weekly": (analysis_day - first_day) / 7,
+        "frequency": orders,
+        "monetary_cltv": value / orders
+    }, index=customers.index)
+    return rfm, cltv[CLTV_COLUMNS], customers
+
+
+def score_frozen(rows, attrs, models=None):
+    """
+    Ham satırları depoya yazmadan dondurulmuş durumla skorlar
+
+    Parameters
+    ----------
+    rows : DataFrame
+        Ham FLO sütunlarıyla müşteri satırları (tarihler analiz tarihinden önce)
+    attrs : dict
+        Özellik deposu attrs'ı (incremental_attrs)
+    models : tuple, optional
+        frozen_cltv_models(attrs["fit"]) çıktısı; tekrar tekrar skorlayan
+        çağıranlar bir kez kurup verir
+
+    Returns
+    -------
+    rfm, cltv : DataFrame
+        master_id indeksli skorlar (score_rfm_frozen, score_cltv); tek
+        siparişli yeni müşterilerin CLTV sütunları NaN (min_frequency)
+    """
+    rfm, cltv, _ = _delta_frames(rows, attrs)
+    bgf, ggf = models if models is not None else frozen_cltv_models(attrs["fit"])
+    return (score_rfm_frozen(rfm, attrs["rfm_bins"]),
+            score_cltv(cltv, bgf, ggf, month=attrs["month"], segment_count=attrs["segment_count"],
+                       bins=attrs["cltv_bins"], min_frequency=CLTV_CONFIG["min_frequency"]))
+
+
+def warmup_rows(attrs):
+    """
+    score_frozen için tek satırlık sentetik girdi (analiz tarihinden önce)
+
+    Uzun çalışan süreçler (arama servisi, klasör izleme) model kurulumunu
+    ve çekirdek derlemesini ilk gerçek işten önce yapmak için kullanır.
+    """
+    day = (pd.Timestamp(attrs["analysis_date"]) - pd.Timedelta(days=30)).strftime("%Y-%m-%d")
+    return [{"master_id": "warmup", "first_order_date": day, "last_order_date": day,
+             "order_num_total_ever_online": 1.0, "order_num_total_ever_offline": 1.0,
+             "customer_value_total_ever_online": 100.0,
+             "customer_value_total_ever_offline": 100.0}]
+
+
+def apply_delta(delta, store=None, rebin_threshold=None, resegment_threshold=None,
+                refit_threshold=None, check_drift=True):
+    """
+    Delta dosyasındaki müşterileri depoda günceller ve yeniden skorlar
+
+    Parameters
+    ----------
+    delta : DataFrame
+        Ham FLO sütunlarıyla değişen / yeni müşterilerin güncel satırları
+    store : FeatureStore, optional
+        "r+" açılmış depo (varsayılan FEATURE_STORE_DIR)
+    rebin_threshold, resegment_threshold, refit_threshold : float, optional
+        Kayma eşikleri (varsayılanlar RFM_CONFIG / CLTV_CONFIG)
+    check_drift : bool, default True
+        False ise skor / segment sınırlarının kayması ölçülmez (tüm depo
+        üzerinde kantil); yalnızca delta müşterileri dondurulmuş sınırlarla
+        skorlanır. Log-olabilirlik kayması artımlı olduğundan her çağrıda
+        denetlenir
+
+    Returns
+    -------
+    dict
+        n_changed, n_new, kayma ölçüleri (rfm_drift / cltv_drift yalnızca
+        check_drift ile) ve uygulanan işlemler
+        (rfm: "frozen" | "rebin", cltv: "frozen" | "resegment" | "refit")
+    """
+    if store is None:
+        store = FeatureStore(mode="r+")
+    rebin_threshold, resegment_threshold, refit_threshold = _thresholds(
+        rebin_threshold, resegment_threshold, refit_threshold)
+
+    attrs = store.attrs
+    rfm, cltv, customers = _delta_frames(delta, attrs)
+    mapping = cltv_inputs(store)
+    to_store = {name: stored for stored, name in mapping.items()}
+
+    positions = store.positions(rfm.index)
+    existing = positions >= 0
+    stored = store.to_frame(list(mapping), rename=mapping, index=False)
+    removed = _log_likelihood(attrs["fit"], stored.iloc[positions[existing]]).sum()
+    if not existing.all():
+        positions[~existing] = store.append(rfm.index[~existing])
+
+    # Toplamlar, alışveriş günleri ve müşteri kategorileri yerinde yazılır
+    updates = rfm[list(RFM_INPUTS)].join(cltv.rename(columns=to_store)[list(to_store.values())])
+    for column in DAY_COLUMNS + TOTAL_COLUMNS + CUSTOMER_COLUMNS:
+        if column in store and column in customers:
+            updates[column] = customers[column]
+    store.update(updates, positions)
+
+    loglik = attrs["loglik"]
+    loglik["sum"] += float(_log_likelihood(attrs["fit"], cltv).sum() - removed)
+    loglik["n"] += int((~existing).sum())
+    report = {
+        "n_changed": int(existing.sum()),
+        "n_new": int((~existing).sum()),
+        "loglik_drift": _loglik_drift(loglik),
+    }
+
+    if report["loglik_drift"] > refit_threshold:
+        _refit(store, attrs, report)
+    else:
+        _rescore_rfm(store, attrs, rfm, positions, rebin_threshold, report,
+                     check_drift=check_drift)
+        _rescore_cltv(store, attrs, cltv, positions, resegment_threshold, report,
+                      check_drift=check_drift)
+    store.set_attrs(**attrs)
+    return report
+
+
+def advance_to(analysis_date, store=None, rebin_threshold=None, resegment_threshold=None,
+               refit_threshold=None):
+    """
+    Depodaki analiz tarihini ilerletir ve skorları yaşlandırır
+
+    Parameters
+    ----------
+    analysis_date : datetime or str
+        Yeni analiz tarihi (depodakinden önce olamaz)
+    store : FeatureStore, optional
+        "r+" açılmış depo (varsayılan FEATURE_STORE_DIR)
+    rebin_threshold, resegment_threshold, refit_threshold : float, optional
+        Kayma eşikleri (varsayılanlar RFM_CONFIG / CLTV_CONFIG)
+
+    Returns
+    -------
+    dict
+        days, n_crossed (recency sınırını geçen müşteri), kayma ölçüleri
+        ve uygulanan işlemler (apply_delta ile aynı)
+
+    Not
+    ---
+    Tarih d gün ilerlediğinde her müşterinin recency'si ve T'si d gün
+    artar; ikisi de gün dizilerinden tek çıkarmayla yeniden yazılır,
+    veri okunmaz. Dondurulmuş bir recency sınırı e'yi geçen müşteriler,
+    son alışveriş günü [A0 - e, A1 - e) aralığında olanlardır; sıralı
+    dizinde iki ikili aramayla bulunur; yalnızca onların recency skoru,
+    RF skoru ve segmenti yeniden hesaplanır. CLTV tahminleri T'ye bağlı olduğundan tüm müşteriler
+    dondurulmuş parametrelerle depodan yeniden skorlanır.
+    """
+    if store is None:
+        store = FeatureStore(mode="r+")
+    if store.mode != "r+":
+        raise PermissionError("Depo salt okunur açıldı; advance_to için mode='r+'")
+    missing = [name for name in DAY_COLUMNS if name not in store]
+    if missing:
+        raise KeyError(f"Depoda gün sütunları yok ({', '.join(missing)}); "
+                       f"depo pipeline ile yeniden yazılmalı")
+    rebin_threshold, resegment_threshold, refit_threshold = _thresholds(
+        rebin_threshold, resegment_threshold, refit_threshold)
+
+    attrs = store.attrs
+    old_day, new_day = _day(attrs["analysis_date"]), _day(analysis_date)
+    if new_day < old_day:
+        raise ValueError(f"Analiz tarihi geri alınamaz: {attrs['analysis_date'][:10]} -> "
+                         f"{pd.Timestamp(analysis_date).date()}")
+
+    # Recency sınırını geçenler: eski recency <= e < yeni recency
+    last_day = store["last_order_day"]
+    order = store.sorted_positions("last_order_day")
+    inner = np.asarray(attrs["rfm_bins"]["recency"], dtype=float)[1:-1]
+    lo = np.searchsorted(last_day, old_day - inner, side="left", sorter=order)
+    hi = np.searchsorted(last_day, new_day - inner, side="left", sorter=order)
+    crossed = np.unique(np.concatenate([order[a:b] for a, b in zip(lo, hi)]))
+
+    store["recency"][:] = new_day - last_day
+    store["T_weekly"][:] = (new_day - store["first_order_day"]) / 7
+    store.flush()
+    attrs["analysis_date"] = pd.Timestamp(np.datetime64(new_day, "D")).isoformat()
+
+    mapping = cltv_inputs(store)
+    cltv = store.to_frame(list(mapping), rename=mapping, index=False)
+    log_lik = _log_likelihood(attrs["fit"], cltv)
+    attrs["loglik"].update(sum=float(log_lik.sum()), n=int(len(log_lik)))
+    report = {"days": new_day - old_day, "n_crossed": int(len(crossed)),
+              "loglik_drift": _loglik_drift(attrs["loglik"])}
+
+    if report["loglik_drift"] > refit_threshold:
+        _refit(store, attrs, report)
+    else:
+        # Yalnızca recency değişti: frequency / monetary skorları depodaki gibi kalır
+        rfm = store.to_frame(RFM_INPUTS + ("frequency_score", "monetary_score"),
+                             index=False).iloc[crossed]
+        _rescore_rfm(store, attrs, rfm, crossed, rebin_threshold, report, columns=("recency",))
+        _rescore_cltv(store, attrs, cltv, np.arange(len(store)), resegment_threshold, report)
+    store.set_attrs(**attrs)
+    return report
@@ -0,0 +1,412 @@
+"""
+Müşteri Arama Servisi (asyncio, HTTP/1.1)
+Tek müşterinin RFM segmenti, cltv_segment'i ve tahmini CLTV'si için
+düşük gecikmeli yerel servis
+
+Servis memory-mapped özellik deposunu okur; CSV okunmaz, main.py
+çalıştırılmaz. master_id -> satır konumu sözlüğü açılışta bir kez
+kurulur (O(1) arama). Sütunlar eşlenmiş dizilerden konumla okunur;
+kategorik / metin sütunlarının kodları etiket dizileriyle çözülür.
+Toplu okuma tek seferde, sütun başına bir indeksleme ile yapılır.
+
+Depoda olmayan müşteriler ham FLO satırlarından dondurulmuş RFM
+sınırları ve model parametreleriyle (depo attrs'ı) skorlanır; tek
+siparişli yeni müşterilerin CLTV alanları null döner
+(CLTV_CONFIG["min_frequency"]). Skorlama istekleri kuyrukta toplanır:
+en fazla max_batch satır veya max_delay_ms beklendikten sonra tek bir
+vektörel çağrıyla skorlanır (mikro-toplu),
+böylece aynı anda gelen tek satırlık istekler pandas yükünü paylaşır.
+Skorlama ayrı bir işçi süreçte çalışır; olay döngüsündeki aramalar
+skorlamanın tuttuğu GIL'i beklemez. İşçi süreç ölürse (örn. bellek
+yetmedi) o topluluğun istekleri 503 döner ve yeni işçi açılır; satırdan
+kaynaklanmayan skorlama hataları 500, hatalı satırlar 400 döner.
+
+Depo artımlı güncellendiğinde (apply_delta, advance_to) değerler eşlenmiş
+dosyalardan doğrudan görünür; meta.json değişince depo yeniden açılır ve
+eklenen müşteriler sözlüğe eklenir, depo yeniden yazıldıysa sözlük baştan
+kurulur (en fazla refresh_seconds'ta bir kontrol).
+
+Uç noktalar (gövdeler JSON):
+    GET  /customers/<master_id>          tek müşteri (yoksa 404)
+    POST /customers  {"ids": [...]}      toplu okuma (olmayanlar null)
+    POST /score      {"rows": [...]}     ham FLO satırlarını skorlar (her satır
+                                         master_id içeren nesne; değilse 400)
+    GET  /health                         müşteri sayısı, analiz tarihi
+
+Kullanım:
+    python -m src.lookup_service                        # LOOKUP_CONFIG adresi
+    python -m src.lookup_service --unix /tmp/crm.sock   # UNIX soketi
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+
+from .config import FEATURE_STORE_DIR, LOOKUP_CONFIG
+from .feature_store import META_FILE, FeatureStore
+from .file_utils import to_builtin
+
+# Servisin döndürdüğü sütunlar (depoda olanlar)
+SERVED_COLUMNS = ("segment", "RF_SCORE", "recency_score", "frequency_score", "monetary_score",
+                  "cltv", "cltv_segment", "p_alive", "churn_risk", "exp_average_value")
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           500: "Internal Server Error", 503: "Service Unavailable"}
+
+# Skorlama işçisindeki CustomerLookup (_init_worker doldurur)
+_SHARED = {}
+
+
+class CustomerLookup:
+    """
+    Özellik deposu üzerinde master_id aramaları ve dondurulmuş skorlama
+
+    Parameters
+    ----------
+    path : Path, default FEATURE_STORE_DIR
+        Özellik deposu
+    columns : tuple, default SERVED_COLUMNS
+        Döndürülen sütunlar
+    refresh_seconds : float, optional
+        Deponun değişip değişmediğinin en sık kontrol aralığı
+        (varsayılan LOOKUP_CONFIG["refresh_seconds"])
+    index : bool, default True
+        master_id sözlüğünü kur (yalnızca skorlayan işçi için False)
+    """
+
+    def __init__(self, path=FEATURE_STORE_DIR, columns=SERVED_COLUMNS, refresh_seconds=None,
+                 index=True):
+        self.path = os.fspath(path)
+        self.indexed = index
+        self.requested = tuple(columns)
+        self.refresh_seconds = (LOOKUP_CONFIG["refresh_seconds"] if refresh_seconds is None
+                                else refresh_seconds)
+        self.store = None
+        self.index = {}
+        self._version = None
+        self._checked = 0.0
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        """
+        meta.json değiştiyse depoyu yeniden açar
+
+        Returns
+        -------
+        bool
+            Depo yeniden açıldıysa True
+        """
+        now = time.monotonic()
+        if not force and now - self._checked < self.refresh_seconds:
+            return False
+        self._checked = now
+        version = (os.stat(self.path).st_ino,
+                   os.stat(os.path.join(self.path, META_FILE)).st_mtime_ns)
+        if version == self._version:
+            return False
+
+        store = FeatureStore(self.path)
+        if self._version is None or version[0] != self._version[0]:
+            # Depo yeniden yazıldı: konumlar değişmiş olabilir
+            self.index = {}
+        # Artımlı güncellemede konumlar sabit; yalnızca eklenenler sözlüğe girer
+        if self.indexed:
+            start = len(self.index)
+            self.index.update(zip(store.ids[start:].tolist(), range(start, len(store))))
+        self.store = store
+        self.columns = {}
+        for name in self.requested:
+            if name not in store:
+                continue
+            info = store.meta["columns"][name]
+            labels = None
+            if info["kind"] != "values":
+                labels = np.asarray(info["categories"] + [None], dtype=object)
+            self.columns[name] = (store[name], labels)
+        self.attrs = store.attrs
+        self.models = None
+        self._version = version
+        return True
+
+    def get_many(self, ids):
+        """
+        master_id listesinin kayıtları (depoda olmayanlar None)
+
+        Sütun başına tek bir indeksleme yapılır; kayıtlar JSON'a hazır
+        Python değerleridir (NaN -> None).
+        """
+        positions = np.fromiter((self.index.get(i, -1) for i in ids), dtype=np.int64,
+                                count=len(ids))
+        found = np.flatnonzero(positions >= 0)
+        take = positions[found]
+        values = {}
+        for name, (column, labels) in self.columns.items():
+            picked = column[take]
+            values[name] = (labels[picked] if labels is not None else picked).tolist()
+
+        records = [None] * len(ids)
+        for row, slot in enumerate(found.tolist()):
+            record = {"master_id": ids[slot], "source": "store"}
+            for name, column in values.items():
+                value = column[row]
+                record[name] = None if value != value else value
+            records[slot] = record
+        return records
+
+    def score(self, rows):
+        """
+        Ham FLO satırlarını dondurulmuş sınırlar ve parametrelerle skorlar
+
+        Returns
+        -------
+        dict
+            master_id -> kayıt (source="scored")
+        """
+        from .btyd_models import frozen_cltv_models
+        from .incremental import score_frozen
+
+        self.refresh()
+        if self.models is None:
+            self.models = frozen_cltv_models(self.attrs["fit"])
+        rfm, cltv = score_frozen(pd.DataFrame(rows), self.attrs, models=self.models)
+        frame = rfm.join(cltv, rsuffix="_cltv")
+        frame = frame[[name for name in self.requested if name in frame]].astype(object)
+        frame.insert(0, "source", "scored")
+        return {master_id: to_builtin(record)
+                for master_id, record in frame.to_dict(orient="index").items()}
+
+
+def _init_worker(path, warmup):
+    # Ctrl+C ana sürece gelir; işçiyi ana süreç kapatır
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    lookup = CustomerLookup(path, index=False)
+    _SHARED["lookup"] = lookup
+    if warmup:
+        # Model kurulumu ve çekirdek derlemesi ilk istekten önce yapılır
+        lookup.score(warmup)
+
+
+def _score_rows(rows):
+    return _SHARED["lookup"].score(rows)
+
+
+class LookupService:
+    """
+    CustomerLookup için asyncio HTTP/1.1 sunucusu (keep-alive)
+
+    Parameters
+    ----------
+    lookup : CustomerLookup
+    max_batch : int, optional
+        Bir skorlama çağrısındaki en fazla satır (LOOKUP_CONFIG)
+    max_delay_ms : float, optional
+        İlk isteğin toplu skorlama için en fazla bekleme süresi (LOOKUP_CONFIG)
+    """
+
+    def __init__(self, lookup, max_batch=None, max_delay_ms=None):
+        self.lookup = lookup
+        self.max_batch = LOOKUP_CONFIG["max_batch"] if max_batch is None else max_batch
+        self.max_delay = (LOOKUP_CONFIG["max_delay_ms"] if max_delay_ms is None
+                          else max_delay_ms) / 1000
+        self._queue = None
+        self._batcher = None
+        self._executor = None
+        self._warmup = None
+
+    async def start(self, host=None, port=None, unix_path=None):
+        """Sunucuyu ve skorlama işçisini başlatır (unix_path verilirse UNIX soketi)"""
+        from .incremental import warmup_rows
+
+        self._warmup = warmup_rows(self.lookup.attrs) if "fit" in self.lookup.attrs else None
+        self._start_executor()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, len, ())  # işçi hazır olana kadar bekle
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._score_batches())
+        if unix_path:
+            return await asyncio.start_unix_server(self._handle, unix_path)
+        return await asyncio.start_server(self._handle, host or LOOKUP_CONFIG["host"],
+                                          LOOKUP_CONFIG["port"] if port is None else port)
+
+    def _start_executor(self):
+        if self._executor is not None:
+            # İşçi süreç öldü; havuz kullanılamaz, yenisi açılır
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        # spawn: yeniden açılan işçi, olay döngüsü ve eski havuzun iş
+        # parçacıklarının tuttuğu kilitlerle çatallanıp kilitlenmez
+        self._executor = ProcessPoolExecutor(max_workers=1, initializer=_init_worker,
+                                             initargs=(self.lookup.path, self._warmup),
+                                             mp_context=multiprocessing.get_context("spawn"))
+
+    def close(self):
+        """Skorlama görevini ve işçi süreci kapatır"""
+        if self._batcher is not None:
+            self._batcher.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, payload = await self._dispatch(method, target, body)
+                data = json.dumps(payload, ensure_ascii=False).encode()
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                             f"Content-Type: application/json\r\n"
+                             f"Content-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, target, body):
+        self.lookup.refresh()
+        path = target.split("?", 1)[0]
+        try:
+            if path.startswith("/customers/") and method == "GET":
+                record = self.lookup.get_many([unquote(path[len("/customers/"):])])[0]
+                return (200, record) if record else (404, {"error": "müşteri depoda yok"})
+            if path == "/customers" and method == "POST":
+                ids = [str(i) for i in json.loads(body)["ids"]]
+                return 200, {"customers": dict(zip(ids, self.lookup.get_many(ids)))}
+            if path == "/score" and method == "POST":
+                rows = json.loads(body)["rows"]
+                # Hatalı satırlar kuyruğa girmeden reddedilir
+                if not isinstance(rows, list) or not all(
+                        isinstance(row, dict) and "master_id" in row for row in rows):
+                    raise TypeError("rows, master_id içeren nesnelerin listesi olmalı")
+                future = asyncio.get_running_loop().create_future()
+                await self._queue.put((rows, future))
+                try:
+                    return 200, {"customers": await future}
+                except BrokenProcessPool as e:
+                    return 503, {"error": f"skorlama işçisi yeniden başlatılıyor: {e}"}
+                except RuntimeError as e:
+                    return 500, {"error": f"{type(e).__name__}: {e}"}
+            if path == "/health":
+                return 200, {"n_customers": len(self.lookup.store),
+                             "analysis_date": self.lookup.attrs.get("analysis_date")}
+        except (KeyError, TypeError, ValueError) as e:
+            return 400, {"error": f"{type(e).__name__}: {e}"}
+        if path in ("/customers", "/score") or path.startswith("/customers/"):
+            return 405, {"error": f"{method} desteklenmiyor"}
+        return 404, {"error": f"bilinmeyen yol: {path}"}
+
+    async def _score_batches(self):
+        # İlk istekten sonra max_delay boyunca veya max_batch satıra kadar
+        # gelen skorlama istekleri tek çağrıda skorlanır
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                n_rows = len(batch[0][0])
+                deadline = loop.time() + self.max_delay
+                while n_rows < self.max_batch and (timeout := deadline - loop.time()) > 0:
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                    n_rows += len(batch[-1][0])
+                await self._score_batch(batch)
+            except Exception as e:
+                # Beklenmeyen hata yalnızca bu topluluğun isteklerini düşürür;
+                # skorlama görevi sonraki isteklerle devam eder
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError(f"{type(e).__name__}: {e}"))
+
+    async def _score_batch(self, batch):
+        loop = asyncio.get_running_loop()
+        rows = [row for request_rows, _ in batch for row in request_rows]
+        try:
+            scored = await loop.run_in_executor(self._executor, _score_rows, rows)
+        except BrokenProcessPool as e:
+            # İşçi öldü: topluluk 503 ile düşer, sonraki istekler yeni işçide skorlanır
+            self._start_executor()
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except Exception:
+            # Hatalı bir istek topluluğu bozmasın: istekler tek tek skorlanır
+            for request_rows, future in batch:
+                try:
+                    result = await loop.run_in_executor(self._executor, _score_rows,
+                                                        request_rows)
+                except BrokenProcessPool as e:
+                    self._start_executor()
+                    result = e
+                except (KeyError, TypeError, ValueError) as e:
+                    # Satırdan kaynaklanan hata: istemciye 400
+                    result = ValueError(str(e))
+                except Exception as e:
+                    result = RuntimeError(f"{type(e).__name__}: {e}")
+                # Bağlantısı kopan isteğin future'ı iptal edilmiş olabilir
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            return
+        for request_rows, future in batch:
+            if not future.done():
+                future.set_result({str(row["master_id"]): scored.get(str(row["master_id"]))
+                                   for row in request_rows})
+
+
+async def serve(path=FEATURE_STORE_DIR, host=None, port=None, unix_path=None):
+    """Servisi açar ve kapatılana kadar çalıştırır"""
+    service = LookupService(CustomerLookup(path))
+    server = await service.start(host=host, port=port, unix_path=unix_path)
+    address = unix_path or "{}:{}".format(*server.sockets[0].getsockname()[:2])
+    print(f"Müşteri arama servisi: {address} ({len(service.lookup.store):,} müşteri)",
+          flush=True)
+    # SIGTERM / SIGINT sunucuyu durdurur; işçi süreç de kapatılır (öksüz kalmaz)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        service.close()
+        if unix_path and os.path.exists(unix_path):
+            os.unlink(unix_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Müşteri arama servisi")
+    parser.add_argument("--store", default=FEATURE_STORE_DIR, help="Özellik deposu klasörü")
+    parser.add_argument("--host", default=LOOKUP_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=LOOKUP_CONFIG["port"])
+    parser.add_argument("--unix", metavar="PATH", help="TCP yerine UNIX soketi")
+    args = parser.parse_args(argv)
+    asyncio.run(serve(args.store, host=args.host, port=args.port, unix_path=args.unix))
+
+
+if __name__ == "__main__":
+    main()
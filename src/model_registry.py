@@ -0,0 +1,76 @@
+"""
+Model Kayıt Defteri
+Kurulmuş CLTV model parametrelerini, kullanılan ayarları ve ölçülen
+metrikleri tek bir JSON dosyasında (outputs/models/registry.json) tutar.
+
+Kayıtlar yalnızca eklenir; "en iyi" veya "son" kayıt sorgu ile bulunur.
+Aynı anda kayıt ekleyen süreçler (pipeline, klasör izleme işçisi, artımlı
+yeniden kurulum) dosya kilidiyle sıraya girer; hiçbir kayıt kaybolmaz.
+Dondurulmuş parametrelerle skorlama yapan özellikler (artımlı güncelleme,
+sorgu servisi ...) parametreleri buradan okur.
+"""
+
+import json
+import os
+import uuid
+from datetime import datetime
+
+from .config import MODEL_REGISTRY_PATH
+from .file_utils import atomic_write, file_lock, to_builtin
+
+
+def load_registry(path=MODEL_REGISTRY_PATH):
+    """Kayıt defterindeki tüm kayıtları (eskiden yeniye) döndürür"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def register_model(kind, params, config=None, metrics=None, source=None,
+                   path=MODEL_REGISTRY_PATH):
+    """
+    Yeni bir model kaydı ekler
+
+    Parameters
+    ----------
+    kind : str
+        Model türü (örn. "cltv", "rfm_bins")
+    params : dict
+        Model parametreleri (örn. {"bgf": {...}, "ggf": {...}})
+    config : dict, optional
+        Kurulumda kullanılan ayarlar (penalizer vb.)
+    metrics : dict, optional
+        Ölçülen metrikler (holdout hatası, süre ...)
+    source : str, optional
+        Kaydı üreten adım (örn. "penalizer_sweep")
+
+    Returns
+    -------
+    dict
+        Eklenen kayıt (id ve created_at dahil)
+    """
+    record = {
+        "id": uuid.uuid4().hex,
+        "kind": kind,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "source": source,
+        "params": to_builtin(params),
+        "config": to_builtin(config or {}),
+        "metrics": to_builtin(metrics or {})
+    }
+    # Oku-ekle-yaz kilit altında: eşzamanlı kayıtlar birbirini ezmez
+    with file_lock(path):
+        records = load_registry(path)
+        records.append(record)
+        with atomic_write(path) as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+    return record
+
+
+def latest_model(kind, source=None, path=MODEL_REGISTRY_PATH):
+    """Verilen türdeki (ve kaynaktaki) en son kaydı döndürür; yoksa None"""
+    for record in reversed(load_registry(path)):
+        if record["kind"] == kind and (source is None or record["source"] == source):
+            return record
+    return None
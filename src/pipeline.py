@@ -0,0 +1,514 @@
+"""
+Aşamalı Pipeline
+RFM ve CLTV akışını açık aşamalara bölen, aşama çıktılarını önbelleğe
+alan çalıştırıcı
+
+Aşamalar: ingest → prepare → cap_outliers → rfm_metrics → rfm_scoring
+→ cltv_summary → fit → score → bootstrap → reports → exports → change_feed
+→ feature_store
+
+Her aşamanın parmak izi; aşamanın adı, kaynak kodu, işi yapan src
+modüllerinin (ve onların içe aktardığı src modüllerinin) kaynak kodu,
+ilgili ayarları ve girdi aşamalarının parmak izlerinden üretilir (ingest
+için veri dosyasının içeriği). Parmak izi değişmeyen aşamalar çalıştırılmaz,
+çıktıları önbellekten (PIPELINE_CACHE_DIR) okunur. Böylece örneğin CLTV
+aşaması hata verdiğinde yeniden çalıştırma CSV okumasından değil, son
+başarılı aşamadan devam eder.
+
+Kullanım:
+    python main.py                      # değişen aşamalar çalışır
+    python main.py --from fit           # fit ve sonrası yeniden çalışır
+    python main.py --only rfm_scoring   # yalnızca bir aşama (girdiler önbellekten)
+    python main.py --concurrent         # RFM ve CLTV dalları ayrı süreçlerde
+"""
+
+import ast
+import functools
+import hashlib
+import inspect
+import json
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from .config import CLTV_CONFIG, RFM_CONFIG, FEATURE_STORE_DIR, OUTPUT_DIR, PIPELINE_CACHE_DIR
+from .cltv_core import (OUTLIER_COLUMNS, CLTV_COLUMNS, cap_outliers, add_omnichannel_totals,
+                        parse_dates, build_cltv_summary, score_cltv)
+from .file_utils import atomic_write, file_digest
+from .rfm_core import compute_rfm_metrics, score_rfm
+from .shared_arrays import SharedColumnStore
+
+# İşçi süreçteki paylaşımlı hazırlanmış veri (_init_worker doldurur)
+_SHARED = {}
+
+
+###############################################################
+# AŞAMALAR
+###############################################################
+
+def _ingest(inputs, params):
+    return pd.read_csv(params["data_path"])
+
+
+def _prepare(inputs, params):
+    dataframe = inputs["ingest"].copy()
+    parse_dates(dataframe)
+    return add_omnichannel_totals(dataframe)
+
+
+def _cap_outliers(inputs, params):
+    # Toplamlar baskılanmış kanal değerlerinden yeniden hesaplanır
+    # (prepare_cltv_data ile aynı sonuç)
+    dataframe = inputs["prepare"].copy()
+    dataframe.attrs["outlier_thresholds"] = cap_outliers(dataframe)
+    return add_omnichannel_totals(dataframe)
+
+
+def _rfm_metrics(inputs, params):
+    return compute_rfm_metrics(inputs["prepare"])
+
+
+def _rfm_scoring(inputs, params):
+    return score_rfm(inputs["rfm_metrics"].copy())
+
+
+def _cltv_summary(inputs, params):
+    return build_cltv_summary(inputs["cap_outliers"])
+
+
+def _fit(inputs, params):
+    # Kurulmuş lifetimes nesneleri yerine parametreler saklanır;
+    # score aşaması modelleri frozen_cltv_models ile yeniden kurar
+    from .btyd_models import fit_cltv_models
+    from .cltv_sampling import fit_on_sample
+
+    cltv_df, strategy = inputs["cltv_summary"], CLTV_CONFIG["fit_strategy"]
+    if strategy not in ("full", "sample"):
+        raise ValueError(f"Bilinmeyen fit_strategy: {strategy!r}")
+    if strategy == "full":
+        fit = fit_cltv_models(cltv_df)
+        fit["fit_report"] = {"strategy": "full", "n_customers": len(cltv_df)}
+        return fit
+    if CLTV_CONFIG["transaction_model"] != "bgnbd":
+        raise ValueError("fit_strategy='sample' yalnızca bgnbd modeliyle kullanılabilir")
+    bgf, ggf, report = fit_on_sample(cltv_df)
+    return {"transaction_model": "bgnbd", "bgf": bgf.params_.to_dict(),
+            "ggf": ggf.params_.to_dict(), "fit_report": report}
+
+
+def _models(fit):
+    from .btyd_models import frozen_cltv_models
+
+    return frozen_cltv_models(fit)
+
+
+def _score(inputs, params):
+    from .cltv_sampling import compare_with_full_fit
+
+    fit = inputs["fit"]
+    bgf, ggf = _models(fit)
+    cltv = score_cltv(inputs["cltv_summary"], bgf, ggf, month=params["month"],
+                      segment_count=params["segment_count"])
+    report = dict(fit["fit_report"], transaction_model=fit["transaction_model"])
+    # Örneklemli kurulumun doğruluk kaybı ve zaman kazancı özet rapora girer
+    if report["strategy"] == "sample":
+        report["full_fit_comparison"] = compare_with_full_fit(
+            inputs["cltv_summary"], bgf, ggf, report, month=params["month"],
+            segment_count=params["segment_count"])
+    cltv.attrs["fit_report"] = report
+    return cltv
+
+
+def _bootstrap(inputs, params):
+    from .cltv_bootstrap import bootstrap_cltv
+
+    if not CLTV_CONFIG["bootstrap_replicates"]:
+        return None
+    # Nokta tahmini ve tekrarlar fit aşamasında seçilen işlem modeliyle
+    fit = inputs["fit"]
+    summary, _ = bootstrap_cltv(inputs["cltv_summary"], CLTV_CONFIG["bootstrap_replicates"],
+                                month=params["month"], segment_count=params["segment_count"],
+                                transaction_model=fit["transaction_model"],
+                                bgf_params=fit["bgf"], ggf_params=fit["ggf"])
+    return summary
+
+
+def _reports(inputs, params):
+    from .segment_cube import build_segment_cube
+    from .summary_report import build_summary_report, save_summary_report
+    from .topk import top_k
+
+    rfm, cltv = inputs["rfm_scoring"], inputs["score"]
+    report = build_summary_report(rfm=rfm, cltv=cltv)
+    report["fit"] = cltv.attrs.get("fit_report")
+    if inputs["bootstrap"] is not None:
+        report["bootstrap"] = {
+            "confidence": CLTV_CONFIG["bootstrap_confidence"],
+            "n_replicates": inputs["bootstrap"].attrs["n_replicates"],
+            "quantities": inputs["bootstrap"].to_dict(orient="index")
+        }
+    report["top_customers"] = top_k(
+        cltv, "cltv", 10, keep=["cltv", "frequency", "monetary_cltv", "cltv_segment"]
+    ).astype({"cltv_segment": str}).to_dict(orient="index")
+    return {
+        "summary_report": save_summary_report(report),
+        "segment_cube": build_segment_cube(rfm, cltv, inputs["ingest"]).save()
+    }
+
+
+def _exports(inputs, params):
+    rfm_path = OUTPUT_DIR / "rfm_segments.csv"
+    cltv_path = OUTPUT_DIR / "cltv_prediction.csv"
+    inputs["rfm_scoring"].to_csv(rfm_path)
+    inputs["score"].to_csv(cltv_path)
+    return {"rfm_segments": rfm_path, "cltv_prediction": cltv_path}
+
+
+def _change_feed(inputs, params):
+    # Depo henüz önceki çalışmanın atamalarını taşır; feature_store
+    # aşamasından önce çalışmalıdır
+    from .change_feed import segment_changes, write_change_feed
+
+    changes = segment_changes(inputs["rfm_scoring"], inputs["score"], path=params["store_path"])
+    return {"change_feed": write_change_feed(changes)}
+
+
+def _feature_store(inputs, params):
+    # Sonraki skorlama çalışmaları CSV yerine bu depoyu açar; artımlı
+    # güncelleme için model parametreleri ve skor sınırları depoyla saklanır
+    from .feature_store import build_feature_store
+    from .incremental import incremental_attrs
+
+    # Toplamlar ham veriden (canlı olaylar bunlara eklenir); eşikler baskılanmış veriden
+    rfm, cltv = inputs["rfm_scoring"], inputs["score"]
+    fit = {key: value for key, value in inputs["fit"].items() if key != "fit_report"}
+    attrs = incremental_attrs(inputs["cap_outliers"], rfm, cltv, fit,
+                              month=params["month"], segment_count=params["segment_count"])
+    store = build_feature_store(inputs["prepare"], rfm=rfm, cltv=cltv, attrs=attrs,
+                                path=params["store_path"])
+    return {"feature_store": store.path}
+
+
+class Stage:
+    """
+    Pipeline aşaması
+
+    Parameters
+    ----------
+    name : str
+    func : callable
+        func(inputs, params) -> çıktı; inputs girdi aşamalarının çıktıları
+    inputs : tuple
+        Girdi aşamalarının adları
+    config : callable, optional
+        params -> parmak izine girecek ayarlar (dict)
+    artifacts : bool, default False
+        Çıktı {ad: dosya yolu} sözlüğüdür; dosyalardan biri silinmişse
+        önbellek geçersiz sayılır
+    modules : tuple
+        İşi yapan src modülleri (örn. "cltv_core"); bunların ve içe
+        aktardıkları src modüllerinin kaynak kodu parmak izine girer
+    """
+
+    def __init__(self, name, func, inputs=(), config=None, artifacts=False, modules=()):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.config = config or (lambda params: {})
+        self.artifacts = artifacts
+        self.modules = tuple(modules)
+
+
+STAGES = [
+    Stage("ingest", _ingest, config=lambda p: {"data_sha256": file_digest(p["data_path"])}),
+    Stage("prepare", _prepare, ("ingest",), modules=("cltv_core",)),
+    Stage("cap_outliers", _cap_outliers, ("prepare",),
+          config=lambda p: {"columns": OUTLIER_COLUMNS,
+                            "quantiles": CLTV_CONFIG["outlier_quantiles"]},
+          modules=("cltv_core",)),
+    Stage("rfm_metrics", _rfm_metrics, ("prepare",), modules=("rfm_core",)),
+    Stage("rfm_scoring", _rfm_scoring, ("rfm_metrics",),
+          config=lambda p: {"segment_map": RFM_CONFIG["segment_map"]},
+          modules=("rfm_core",)),
+    Stage("cltv_summary", _cltv_summary, ("cap_outliers",),
+          config=lambda p: {"columns": CLTV_COLUMNS},
+          modules=("cltv_core",)),
+    Stage("fit", _fit, ("cltv_summary",),
+          config=lambda p: {key: CLTV_CONFIG[key] for key in
+                            ("transaction_model", "bgf_penalizer_coef",
+                             "pareto_nbd_penalizer_coef", "ggf_penalizer_coef",
+                             "fit_strategy", "sample_sizes", "sample_tolerance")},
+          modules=("btyd_models", "cltv_sampling")),
+    Stage("score", _score, ("cltv_summary", "fit"),
+          config=lambda p: {"month": p["month"], "segment_count": p["segment_count"],
+                            **{key: CLTV_CONFIG[key] for key in
+                               ("discount_rate", "freq", "churn_threshold")}},
+          modules=("btyd_models", "cltv_core", "cltv_sampling")),
+    Stage("bootstrap", _bootstrap, ("cltv_summary", "fit"),
+          config=lambda p: {"month": p["month"], "segment_count": p["segment_count"],
+                            **{key: CLTV_CONFIG[key] for key in
+                               ("bootstrap_replicates", "bootstrap_confidence",
+                                "discount_rate", "freq")}},
+          modules=("cltv_bootstrap",)),
+    Stage("reports", _reports, ("ingest", "rfm_scoring", "score", "bootstrap"), artifacts=True,
+          modules=("summary_report", "segment_cube", "topk")),
+    Stage("exports", _exports, ("rfm_scoring", "score"), artifacts=True),
+    Stage("change_feed", _change_feed, ("rfm_scoring", "score"),
+          config=lambda p: {"store_path": p["store_path"]}, artifacts=True,
+          modules=("change_feed",)),
+    Stage("feature_store", _feature_store,
+          ("prepare", "cap_outliers", "rfm_scoring", "score", "fit"),
+          config=lambda p: {"month": p["month"], "segment_count": p["segment_count"],
+                            "store_path": p["store_path"]},
+          artifacts=True, modules=("feature_store", "incremental")),
+]
+
+STAGE_NAMES = [stage.name for stage in STAGES]
+STAGES_BY_NAME = {stage.name: stage for stage in STAGES}
+
+# prepare'den sonra birbirinden bağımsız dallar (concurrent=True ile
+# ayrı süreçlerde çalışır)
+BRANCHES = {
+    "rfm": ("rfm_metrics", "rfm_scoring"),
+    "cltv": ("cap_outliers", "cltv_summary", "fit", "score"),
+}
+
+
+###############################################################
+# ÇALIŞTIRICI
+###############################################################
+
+def _module_source(name):
+    return (Path(__file__).parent / f"{name}.py").read_text(encoding="utf-8")
+
+
+@functools.lru_cache(maxsize=None)
+def _module_imports(name):
+    # Modülün içe aktardığı src modülleri (fonksiyon içi tembel içe aktarmalar dahil)
+    return tuple(sorted({node.module.split(".")[0]
+                         for node in ast.walk(ast.parse(_module_source(name)))
+                         if isinstance(node, ast.ImportFrom) and node.level == 1 and node.module}))
+
+
+def _code_digest(stage):
+    # Aşama fonksiyonu + işi yapan modüllerin kapanışı. config hariç: ilgili
+    # ayarlar aşamanın config'iyle parmak izine girer
+    seen, pending = set(), list(stage.modules)
+    while pending:
+        name = pending.pop()
+        if name not in seen and name != "config":
+            seen.add(name)
+            pending.extend(_module_imports(name))
+    digest = hashlib.sha256(inspect.getsource(stage.func).encode())
+    for name in sorted(seen):
+        digest.update(f"\0{name}\0".encode())
+        digest.update(_module_source(name).encode())
+    return digest.hexdigest()
+
+
+def _fingerprint(stage, params, input_fingerprints):
+    payload = {
+        "stage": stage.name,
+        "code": _code_digest(stage),
+        "config": stage.config(params),
+        "inputs": input_fingerprints
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _fingerprints(params):
+    fingerprints = {}
+    for stage in STAGES:
+        fingerprints[stage.name] = _fingerprint(
+            stage, params, [fingerprints[name] for name in stage.inputs])
+    return fingerprints
+
+
+def _artifacts_exist(value):
+    return all(Path(path).exists() for path in value.values())
+
+
+class PipelineResult:
+    """
+    Aşama çıktıları; önbellekten gelen çıktılar ilk erişimde okunur
+
+    status : dict
+        Aşama -> "run", "cached" veya "skipped"
+    fingerprints : dict
+        Aşama -> parmak izi
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        self.status = {}
+        self.fingerprints = {}
+        self.seconds = {}
+        self._values = {}
+
+    def _path(self, name):
+        return self.cache_dir / f"{name}-{self.fingerprints[name][:16]}.pkl"
+
+    def __contains__(self, name):
+        return name in self._values or (name in self.fingerprints and self._path(name).exists())
+
+    def __getitem__(self, name):
+        if name not in self._values:
+            if name not in self:
+                raise KeyError(f"{name} aşamasının çıktısı yok")
+            with open(self._path(name), "rb") as f:
+                self._values[name] = pickle.load(f)
+        return self._values[name]
+
+    def _store(self, name, value):
+        self._values[name] = value
+        path = self._path(name)
+        # Aşamanın eski önbellek dosyalarını sil, yenisini atomik yaz
+        for old in self.cache_dir.glob(f"{name}-*.pkl"):
+            if old != path:
+                old.unlink()
+        with atomic_write(path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _downstream(start):
+    selected = {start}
+    for stage in STAGES:
+        if any(name in selected for name in stage.inputs):
+            selected.add(stage.name)
+    return selected
+
+
+def _needs_run(stage, result, forced):
+    if stage.name in forced or stage.name not in result:
+        return True
+    return stage.artifacts and not _artifacts_exist(result[stage.name])
+
+
+def _run_stage(stage, result, params, forced, log):
+    if not _needs_run(stage, result, forced):
+        result.status[stage.name] = "cached"
+        if log:
+            log(f"  ⏭️  {stage.name:<14} önbellekten")
+        return
+
+    missing = [name for name in stage.inputs if name not in result]
+    if missing:
+        raise RuntimeError(f"{stage.name} için girdi aşamaları önbellekte yok: "
+                           f"{', '.join(missing)} (önce tüm pipeline'ı çalıştırın)")
+    started = time.perf_counter()
+    value = stage.func({name: result[name] for name in stage.inputs}, params)
+    result.seconds[stage.name] = time.perf_counter() - started
+    result._store(stage.name, value)
+    result.status[stage.name] = "run"
+    if log:
+        log(f"  ▶️  {stage.name:<14} {result.seconds[stage.name]:.2f} sn")
+
+
+def _init_worker(spec):
+    store = SharedColumnStore.attach(spec)
+    _SHARED["store"] = store
+    _SHARED["prepare"] = store.frame()
+
+
+def _run_branch(names, params, forced, cache_dir, fingerprints):
+    # İşçi süreçte çalışır; çıktılar önbelleğe yazılır, ana sürece yalnızca
+    # durum, süre ve log satırları döner
+    result = PipelineResult(cache_dir)
+    result.fingerprints = fingerprints
+    result._values["prepare"] = _SHARED["prepare"]
+    lines = []
+    for name in names:
+        _run_stage(STAGES_BY_NAME[name], result, params, forced, lines.append)
+    return result.status, result.seconds, lines
+
+
+def _run_branches(result, params, forced, log):
+    # Yalnızca çalışması gereken aşaması olan dallar süreçlere dağıtılır
+    pending = [names for names in BRANCHES.values()
+               if any(_needs_run(STAGES_BY_NAME[name], result, forced) for name in names)]
+    if len(pending) < 2:
+        return False
+
+    with SharedColumnStore.from_frame(result["prepare"]) as store:
+        with ProcessPoolExecutor(max_workers=len(pending), initializer=_init_worker,
+                                 initargs=(store.spec,)) as executor:
+            futures = [executor.submit(_run_branch, names, params, forced, result.cache_dir,
+                                       result.fingerprints)
+                       for names in BRANCHES.values()]
+            for future in futures:
+                status, seconds, lines = future.result()
+                result.status.update(status)
+                result.seconds.update(seconds)
+                for line in lines if log else ():
+                    log(line)
+    return True
+
+
+def run_pipeline(data_path, month=6, segment_count=4, only=None, start=None,
+                 concurrent=False, cache_dir=PIPELINE_CACHE_DIR, store_path=FEATURE_STORE_DIR,
+                 log=print):
+    """
+    Pipeline'ı çalıştırır
+
+    Parameters
+    ----------
+    data_path : str veya Path
+        FLO veri dosyası (CSV)
+    month : int, default 6
+        CLTV ufku (ay)
+    segment_count : int, default 4
+        CLTV segment sayısı
+    only : list, optional
+        Yalnızca bu aşamalar çalışır; girdileri önbellekte olmalıdır
+    start : str, optional
+        Bu aşama ve ona bağlı tüm aşamalar önbellekten bağımsız yeniden
+        çalışır; öncekiler her zamanki gibi (önbellek / çalıştırma)
+    concurrent : bool, default False
+        RFM ve CLTV dallarını (BRANCHES) ayrı süreçlerde aynı anda
+        çalıştırır. Hazırlanmış veri işçilere pickle ile değil paylaşımlı
+        bellekle (SharedColumnStore) verilir; toplam süre yaklaşık uzun dalın
+        süresine iner. only ile birlikte yok sayılır.
+    cache_dir : Path
+        Önbellek klasörü
+    store_path : Path
+        Özellik deposu klasörü (change_feed önceki atamaları buradan
+        okur, feature_store buraya yazar)
+    log : callable, optional
+        Aşama durum satırları için (None: sessiz)
+
+    Returns
+    -------
+    PipelineResult
+        result["score"] gibi aşama çıktıları ve status / fingerprints
+    """
+    for name in (only or []) + ([start] if start else []):
+        if name not in STAGE_NAMES:
+            raise ValueError(f"Bilinmeyen aşama: {name!r} (aşamalar: {', '.join(STAGE_NAMES)})")
+    if only and start:
+        raise ValueError("only ve start birlikte kullanılamaz")
+
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    params = {"data_path": str(data_path), "month": month, "segment_count": segment_count,
+              "store_path": str(store_path)}
+    forced = set(only or []) | (_downstream(start) if start else set())
+    result = PipelineResult(cache_dir)
+    result.fingerprints = _fingerprints(params)
+
+    branch_stages = {name for names in BRANCHES.values() for name in names}
+    branches_done = False
+    for stage in STAGES:
+        if only and stage.name not in forced:
+            result.status[stage.name] = "skipped"
+            continue
+        if stage.name in branch_stages and concurrent and not only:
+            if not branches_done:
+                branches_done = True
+                if _run_branches(result, params, forced, log):
+                    continue
+            elif stage.name in result.status:
+                continue
+        _run_stage(stage, result, params, forced, log)
+    return result
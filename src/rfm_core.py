@@ -0,0 +1,177 @@
+"""
+RFM Çekirdek Fonksiyonları
+RFM metrikleri, skorları ve segmentleri
+
+Bu modül yan etkisizdir (import edildiğinde veri okumaz, çıktı basmaz);
+flo_rfm_analysis'teki create_rfm_segments ile aynı sonucu üretir.
+Çıktılar master_id'ye göre sıralıdır; böylece CustomerTable'ın
+(customer_table) satır sırasıyla konum bazında hizalanır.
+"""
+
+import datetime as dt
+import re
+
+import numpy as np
+import pandas as pd
+
+from .config import RFM_CONFIG
+
+# qcut etiketleri: düşük recency ve yüksek frequency/monetary yüksek skor
+SCORE_LABELS = {
+    "recency": [5, 4, 3, 2, 1],
+    "frequency": [1, 2, 3, 4, 5],
+    "monetary": [1, 2, 3, 4, 5],
+}
+
+
+def compute_rfm_metrics(dataframe, analysis_date=None):
+    """
+    Müşteri başına recency, frequency ve monetary
+
+    Parameters
+    ----------
+    dataframe : DataFrame
+        Ham FLO verisi (tarih sütunları metin veya datetime olabilir)
+    analysis_date : datetime, optional
+        Varsayılan en son alışveriş + 2 gün
+
+    Returns
+    -------
+    rfm : DataFrame
+        master_id indeksli (sıralı); recency, frequency, monetary
+    """
+    last_order = pd.to_datetime(dataframe["last_order_date"])
+    if analysis_date is None:
+        analysis_date = last_order.max() + dt.timedelta(days=2)
+
+    frame = pd.DataFrame({
+        "master_id": dataframe["master_id"],
+        "last_order_date": last_order,
+        "frequency": dataframe["order_num_total_ever_online"] + dataframe["order_num_total_ever_offline"],
+        "monetary": (dataframe["customer_value_total_ever_online"]
+                     + dataframe["customer_value_total_ever_offline"])
+    })
+    rfm = frame.groupby("master_id", sort=True).agg(
+        last_order_date=("last_order_date", "max"),
+        frequency=("frequency", "sum"),
+        monetary=("monetary", "sum")
+    )
+    rfm.insert(0, "recency", (analysis_date - rfm.pop("last_order_date")).dt.days)
+    return rfm
+
+
+def _segment_lookup(segment_map):
+    # 5 × 5 RF skoru -> segment tablosu (regex eşleme 25 kez yapılır)
+    lookup = np.empty((5, 5), dtype=object)
+    for recency in range(1, 6):
+        for frequency in range(1, 6):
+            score = f"{recency}{frequency}"
+            lookup[recency - 1, frequency - 1] = score
+            for pattern, segment in segment_map.items():
+                if re.match(pattern, score):
+                    lookup[recency - 1, frequency - 1] = segment
+                    break
+    return lookup
+
+
+def _assign_segments(rfm, segment_map):
+    rfm["RF_SCORE"] = rfm["recency_score"].astype(str) + rfm["frequency_score"].astype(str)
+
+    # Regex her müşteri için değil, 25 olası RF skoru için bir kez çalışır
+    r = rfm["recency_score"].to_numpy(dtype=int) - 1
+    f = rfm["frequency_score"].to_numpy(dtype=int) - 1
+    rfm["segment"] = _segment_lookup(segment_map)[r, f]
+    return rfm
+
+
+def score_rfm(rfm, segment_map=None):
+    """
+    RFM skorlarını ve segmentleri ekler (yerinde)
+
+    create_rfm_segments ile aynı: recency/monetary için qcut, frequency
+    için sıra numarası üzerinden qcut; RF skoru segment_map ile eşlenir
+    (varsayılan RFM_CONFIG["segment_map"]). Kantil sınırları tekrarlıysa
+    (bir değer tabanın beşte birinden fazlası) qcut bölemez; skorlar
+    o zaman tabanın rfm_bins sınırlarıyla verilir (score_rfm_frozen).
+    """
+    if segment_map is None:
+        segment_map = RFM_CONFIG["segment_map"]
+    try:
+        recency = pd.qcut(rfm["recency"], 5, labels=SCORE_LABELS["recency"])
+        monetary = pd.qcut(rfm["monetary"], 5, labels=SCORE_LABELS["monetary"])
+    except ValueError:
+        return score_rfm_frozen(rfm, rfm_bins(rfm), segment_map)
+    rfm["recency_score"] = recency
+    rfm["frequency_score"] = pd.qcut(rfm["frequency"].rank(method="first"), 5,
+                                     labels=SCORE_LABELS["frequency"])
+    rfm["monetary_score"] = monetary
+    return _assign_segments(rfm, segment_map)
+
+
+def rfm_bins(rfm):
+    """
+    score_rfm'in kullandığı kantil sınırları (dondurulmuş skorlama için)
+
+    Returns
+    -------
+    dict
+        {"recency" | "frequency" | "monetary": 6 sınır}
+
+    Not
+    ---
+    Frequency sıra numarası üzerinden bölündüğünden eşit değerler
+    score_rfm'de satır sırasına göre iki skora bölünebilir. Dondurulmuş
+    sınırlar her değere, eşit değerli grubun orta sırasının düştüğü
+    skoru verir; sınırlar ardışık farklı değerlerin orta noktalarıdır.
+    Recency / monetary'de bir değer tabanın beşte birinden fazlasını
+    tutuyorsa (ör. aynı gün sipariş veren çok müşteri) qcut sınırları
+    tekrarlar; o zaman aynı kantiller tekrarlı olarak döndürülür.
+    """
+    bins = {}
+    for column in ("recency", "monetary"):
+        try:
+            bins[column] = pd.qcut(rfm[column], 5, retbins=True)[1].tolist()
+        except ValueError:
+            bins[column] = np.nanquantile(rfm[column].to_numpy(dtype=float),
+                                          np.linspace(0, 1, 6)).tolist()
+
+    values, counts = np.unique(rfm["frequency"].to_numpy(dtype=float), return_counts=True)
+    mid_rank = (np.cumsum(counts) - counts / 2) / counts.sum()
+    scores = np.clip(np.ceil(mid_rank * 5), 1, 5)
+    edges = [values[0]]
+    for score in range(1, 5):
+        below = np.flatnonzero(scores <= score)
+        if not len(below):
+            edges.append(values[0] - 0.5)
+        elif below[-1] == len(values) - 1:
+            edges.append(values[-1] + 0.5)
+        else:
+            edges.append((values[below[-1]] + values[below[-1] + 1]) / 2)
+    bins["frequency"] = [float(edge) for edge in edges + [values[-1]]]
+    return bins
+
+
+def score_rfm_frozen(rfm, bins, segment_map=None, columns=None):
+    """
+    RFM skorlarını sabit (rfm_bins) sınırlarla ekler (yerinde)
+
+    Müşteriler birbirinden bağımsız skorlanır; tek müşteri veya değişen
+    müşteriler, tüm tabanı yeniden bölmeden skorlanabilir. Sınırların
+    dışındaki değerler uçtaki skoru alır. columns ile yalnızca bazı
+    metrikler skorlanır (ör. yalnızca recency); diğer skor sütunları
+    rfm'de bulunmalıdır.
+    """
+    if segment_map is None:
+        segment_map = RFM_CONFIG["segment_map"]
+    for column in (SCORE_LABELS if columns is None else columns):
+        labels = SCORE_LABELS[column]
+        inner = np.asarray(bins[column], dtype=float)[1:-1]
+        codes = np.searchsorted(inner, rfm[column].to_numpy(dtype=float), side="left")
+        rfm[f"{column}_score"] = pd.Categorical.from_codes(
+            codes, dtype=pd.CategoricalDtype(labels, ordered=True))
+    return _assign_segments(rfm, segment_map)
+
+
+def create_rfm(dataframe, analysis_date=None, segment_map=None):
+    """RFM metrikleri + skorlar + segmentler (master_id'ye göre sıralı)"""
+    return score_rfm(compute_rfm_metrics(dataframe, analysis_date), segment_map)
@@ -0,0 +1,197 @@
+"""
+Segment Küpü (OLAP)
+RFM segmenti × CLTV segmenti × kanal × son kanal kombinasyonlarında
+müşteri sayısı, monetary, CLTV ve beklenen satış toplamları
+
+Küp yoğun bir dizi olarak tutulur; her boyutun sonunda tüm değerlerin
+toplamı olan "ALL" hücresi bulunur. Böylece tüm roll-up'lar kurulumda
+bir kez hesaplanır ve "A segmentindeki iOS champions" gibi bir sorgu
+müşteri tablosuna dokunmadan tek dizi indekslemesiyle yanıtlanır.
+Küp .npz olarak (SEGMENT_CUBE_PATH) saklanır.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .config import SEGMENT_CUBE_PATH
+from .customer_table import build_customer_table
+
+ALL = "ALL"
+
+CUBE_DIMENSIONS = ("segment", "cltv_segment", "order_channel", "last_order_channel")
+
+# Ölçü adı -> kaynak sütun (count satır sayısıdır)
+CUBE_MEASURES = {
+    "count": None,
+    "monetary": "monetary",
+    "cltv": "cltv",
+    "exp_sales_3_month": "exp_sales_3_month",
+    "exp_sales_6_month": "exp_sales_6_month",
+}
+
+
+class SegmentCube:
+    """
+    Roll-up hücreleri önceden hesaplanmış segment küpü
+
+    Parameters
+    ----------
+    dimensions : list
+        Boyut adları
+    labels : dict
+        Boyut -> etiket listesi ("ALL" hariç)
+    measures : list
+        Ölçü adları (toplamlar; ilk ölçü "count")
+    values : ndarray
+        (len(labels[d]) + 1, ..., len(measures)) boyutlu toplamlar
+    """
+
+    def __init__(self, dimensions, labels, measures, values):
+        self.dimensions = list(dimensions)
+        self.labels = {dim: list(labels[dim]) for dim in self.dimensions}
+        self.measures = list(measures)
+        self.values = values
+        self._positions = {dim: {label: i for i, label in enumerate(self.labels[dim] + [ALL])}
+                           for dim in self.dimensions}
+
+    def _index(self, filters):
+        unknown = set(filters) - set(self.dimensions)
+        if unknown:
+            raise ValueError(f"Bilinmeyen boyut: {', '.join(sorted(unknown))} "
+                             f"(boyutlar: {', '.join(self.dimensions)})")
+        index = []
+        for dim in self.dimensions:
+            label = filters.get(dim, ALL)
+            if label not in self._positions[dim]:
+                raise KeyError(f"{dim} boyutunda {label!r} etiketi yok")
+            index.append(self._positions[dim][label])
+        return tuple(index)
+
+    def query(self, **filters):
+        """
+        Tek hücre: verilmeyen boyutlar "ALL" (roll-up) kabul edilir
+
+        Returns
+        -------
+        dict
+            Her ölçünün toplamı ve count dışındaki ölçüler için
+            <ölçü>_mean (hücre boşsa NaN)
+
+        Örnek
+        -----
+        >>> cube.query(segment="champions", cltv_segment="A", order_channel="Ios App")
+        """
+        cell = self.values[self._index(filters)]
+        result = dict(zip(self.measures, cell.tolist()))
+        count = result["count"]
+        for measure in self.measures[1:]:
+            result[f"{measure}_mean"] = result[measure] / count if count else np.nan
+        return result
+
+    def slice(self, rows, columns=None, measure="count", include_all=False, **filters):
+        """
+        Drill-down tablosu: rows (ve columns) boyutları üzerinde bir ölçü
+
+        Diğer boyutlar filters ile sabitlenir, verilmeyenler "ALL" olur.
+        include_all=True ise satır/sütun toplamları da ("ALL") eklenir.
+        """
+        dims = [rows] if columns is None else [rows, columns]
+        index = list(self._index({k: v for k, v in filters.items() if k not in dims}))
+        for dim in dims:
+            count = len(self.labels[dim]) + (1 if include_all else 0)
+            index[self.dimensions.index(dim)] = slice(0, count)
+        table = self.values[tuple(index) + (self.measures.index(measure),)]
+        if rows in self.dimensions and columns in self.dimensions \
+                and self.dimensions.index(rows) > self.dimensions.index(columns):
+            table = table.T
+
+        def _labels(dim):
+            return self.labels[dim] + ([ALL] if include_all else [])
+
+        if columns is None:
+            return pd.Series(table, index=pd.Index(_labels(rows), name=rows), name=measure)
+        return pd.DataFrame(table, index=pd.Index(_labels(rows), name=rows),
+                            columns=pd.Index(_labels(columns), name=columns))
+
+    def save(self, path=SEGMENT_CUBE_PATH):
+        """Küpü sıkıştırılmış .npz olarak yazar"""
+        arrays = {f"labels_{dim}": np.array(self.labels[dim], dtype=str) for dim in self.dimensions}
+        np.savez_compressed(path, values=self.values, dimensions=np.array(self.dimensions),
+                            measures=np.array(self.measures), **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path=SEGMENT_CUBE_PATH):
+        """save ile yazılmış küpü okur"""
+        with np.load(path) as data:
+            dimensions = data["dimensions"].tolist()
+            labels = {dim: data[f"labels_{dim}"].tolist() for dim in dimensions}
+            return cls(dimensions, labels, data["measures"].tolist(), data["values"])
+
+
+def build_segment_cube(rfm, cltv, customers, dimensions=CUBE_DIMENSIONS, measures=None):
+    """
+    RFM ve CLTV çıktılarından segment küpünü kurar
+
+    Parameters
+    ----------
+    rfm : DataFrame
+        create_rfm_segments çıktısı (master_id indeksli; segment, monetary)
+    cltv : DataFrame
+        create_cltv_prediction çıktısı (master_id indeksli; cltv_segment,
+        cltv, exp_sales_*)
+    customers : DataFrame
+        master_id sütunlu ham veri (order_channel, last_order_channel)
+    dimensions : tuple
+        Küp boyutları (üç tablodan birinde bulunan sütunlar)
+    measures : dict, optional
+        Ölçü adı -> kaynak sütun (varsayılan CUBE_MEASURES)
+
+    Returns
+    -------
+    SegmentCube
+
+    Not
+    ---
+    Tablolar CustomerTable ile satır konumunda hizalanır; herhangi bir
+    boyutu eksik olan müşteriler küpe girmez. Tüm ölçüler tek bincount
+    ile hücrelere toplanır, ardından her boyut boyunca "ALL" hücreleri
+    doldurulur.
+    """
+    if measures is None:
+        measures = CUBE_MEASURES
+    frame = build_customer_table(customers, rfm=rfm, cltv=cltv).to_frame()
+
+    codes, labels = [], {}
+    for dim in dimensions:
+        column = frame[dim]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            dim_codes, dim_labels = column.cat.codes.to_numpy(), column.cat.categories
+        else:
+            dim_codes, dim_labels = pd.factorize(column, sort=True)
+        codes.append(dim_codes)
+        labels[dim] = [str(label) for label in dim_labels]
+
+    # Her boyutta son konum "ALL" için ayrılır
+    shape = tuple(len(labels[dim]) + 1 for dim in dimensions)
+    names = list(measures)
+    valid = np.all(np.column_stack(codes) >= 0, axis=1)
+    cells = np.ravel_multi_index([dim_codes[valid] for dim_codes in codes], shape)
+
+    values = np.ones((int(valid.sum()), len(names)))
+    for j, name in enumerate(names):
+        if measures[name] is not None:
+            values[:, j] = frame[measures[name]].to_numpy(dtype=float)[valid]
+    flat = (cells[:, None] * len(names) + np.arange(len(names))).ravel()
+    cube = np.bincount(flat, weights=values.ravel(),
+                       minlength=int(np.prod(shape)) * len(names)).reshape(shape + (len(names),))
+
+    # Roll-up: boyutlar sırayla toplandığından tüm ALL kombinasyonları dolar
+    for axis in range(len(dimensions)):
+        head = [slice(None)] * cube.ndim
+        head[axis] = slice(0, -1)
+        tail = [slice(None)] * cube.ndim
+        tail[axis] = -1
+        cube[tuple(tail)] = cube[tuple(head)].sum(axis=axis)
+
+    return SegmentCube(dimensions, labels, names, cube)
@@ -0,0 +1,288 @@
+"""
+Paylaşımlı Bellek Sütun Deposu
+Hazırlanmış NumPy sütunlarını (sayaçlar, değerler, gün ofsetleri,
+intern edilmiş kimlikler) multiprocessing.shared_memory üzerinde tek
+bir blokta tutar; işçi süreçler diziyi pickle ile kopyalamak yerine
+aynı belleğe bağlanır (zero-copy).
+
+Süreç havuzu kullanan tüm modüller (sweep, backtest, simülasyon,
+bootstrap, gruplu model, pipeline dalları) aynı kalıbı izler: sahip
+süreç deposu `with SharedColumnStore(...) as store` ile kurar, havuza
+yalnızca store.spec gider, işçinin _init_worker'ı SharedColumnStore.attach
+ile bağlanır.
+
+Temizlik
+--------
+Bloğu yalnızca onu kuran süreç siler (unlink):
+- with bloğundan çıkışta (hata, KeyboardInterrupt, BrokenProcessPool dahil)
+- depo çöp toplandığında veya yorumlayıcı kapanırken (weakref.finalize)
+- SIGTERM / SIGHUP ile sonlandırmada: sahip depo açıkken varsayılan
+  işleyici yerine SystemExit fırlatılır, böylece yukarıdaki iki yol
+  çalışır. İşleyiciler ilk sahip depo kurulurken takılır, son sahip depo
+  kapanınca önceki işleyiciler geri yüklenir; uygulamanın kendi
+  işleyicisine dokunulmaz
+- SIGKILL / çökme durumunda multiprocessing'in resource_tracker süreci
+  sahipsiz kalan bloğu siler. Bunun için sahipsiz kalan havuz işçileri
+  de kapanmalıdır: bağlanan işçi sahibin ölümünü izler ve kendini sonlandırır
+fork ile depoyu miras alan işçiler bloğu silmez (sahip PID kontrolü).
+"""
+
+import os
+import signal
+import sys
+import threading
+import time
+import weakref
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Sütunlar blok içinde önbellek satırı sınırına hizalanır
+_ALIGN = 64
+
+_EPOCH = np.datetime64("1970-01-01", "D")
+
+# Açık sahip depo sayısı ve takılmadan önceki sinyal işleyicileri
+_OWNED_STORES = 0
+_PREVIOUS_HANDLERS = {}
+_SIGNAL_LOCK = threading.Lock()
+
+# Sahip süreç ölçüm aralığı (sn)
+_WATCH_INTERVAL = 0.5
+
+
+def _exit_on_signal(signum, frame):
+    # Varsayılan SIGTERM/SIGHUP işleyicisi süreci temizlik yapmadan
+    # öldürür; SystemExit finally / with / atexit yollarını çalıştırır
+    raise SystemExit(128 + signum)
+
+
+def _install_signal_handlers():
+    global _OWNED_STORES
+    with _SIGNAL_LOCK:
+        _OWNED_STORES += 1
+        if _PREVIOUS_HANDLERS or threading.current_thread() is not threading.main_thread():
+            return
+        for name in ("SIGTERM", "SIGHUP"):
+            signum = getattr(signal, name, None)
+            # Uygulamanın kendi işleyicisi varsa ona dokunulmaz
+            if signum is not None and signal.getsignal(signum) is signal.SIG_DFL:
+                _PREVIOUS_HANDLERS[signum] = signal.SIG_DFL
+                signal.signal(signum, _exit_on_signal)
+
+
+def _restore_signal_handlers():
+    # Son sahip depo kapanınca; ana iş parçacığı dışında (örn. çöp toplama
+    # başka iş parçacığında) sinyal işleyicisi değiştirilemez, sonraki
+    # kapanışa kalır
+    global _OWNED_STORES
+    with _SIGNAL_LOCK:
+        _OWNED_STORES = max(_OWNED_STORES - 1, 0)
+        if _OWNED_STORES or threading.current_thread() is not threading.main_thread():
+            return
+        for signum, previous in _PREVIOUS_HANDLERS.items():
+            # Arada uygulama kendi işleyicisini taktıysa o kalır
+            if signal.getsignal(signum) is _exit_on_signal:
+                signal.signal(signum, previous)
+        _PREVIOUS_HANDLERS.clear()
+
+
+def _release(block, owner_pid):
+    try:
+        block.close()
+    except BufferError:
+        # Dışarıda hâlâ görünüm var; eşleme son görünümle birlikte kapanır
+        pass
+    if owner_pid == os.getpid():
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+        _restore_signal_handlers()
+
+
+def _watch_owner(owner_pid):
+    # ProcessPoolExecutor işçileri sahip öldüğünde görev kuyruğunda sonsuza
+    # dek bekler ve resource_tracker'ı açık tutar; sahip değişince çıkılır
+    while os.getppid() == owner_pid:
+        time.sleep(_WATCH_INTERVAL)
+    os._exit(1)
+
+
+def _attach_block(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _views(block, layout, writeable):
+    arrays = {}
+    for name, (offset, shape, dtype) in layout.items():
+        array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+        array.flags.writeable = writeable
+        arrays[name] = array
+    return arrays
+
+
+class SharedColumnStore:
+    """
+    Paylaşımlı bellekte, adlı NumPy sütunlarından oluşan depo
+
+    Parameters
+    ----------
+    arrays : dict
+        {ad: array_like}; tek bir paylaşımlı bloğa kopyalanır
+    columns : list, optional
+        frame() için sütun tanımı [(sütun, tür)]; from_frame doldurur
+
+    Örnek
+    -----
+    >>> with SharedColumnStore({"frequency": f, "monetary": m}) as store:
+    ...     with ProcessPoolExecutor(initializer=_init_worker,
+    ...                              initargs=(store.spec,)) as executor:
+    ...         ...
+    """
+
+    def __init__(self, arrays, columns=None):
+        arrays = {name: np.ascontiguousarray(values) for name, values in arrays.items()}
+        layout, size = {}, 0
+        for name, values in arrays.items():
+            layout[name] = (size, values.shape, values.dtype.str)
+            size += -(-values.nbytes // _ALIGN) * _ALIGN
+
+        self._block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.owner_pid = os.getpid()
+        self._finalizer = weakref.finalize(self, _release, self._block, self.owner_pid)
+        _install_signal_handlers()
+        try:
+            self._arrays = _views(self._block, layout, writeable=True)
+            for name, values in arrays.items():
+                self._arrays[name][...] = values
+        except BaseException:
+            self.close()
+            raise
+        self.spec = {"block": self._block.name, "layout": layout, "columns": columns,
+                     "owner_pid": self.owner_pid}
+
+    @classmethod
+    def attach(cls, spec):
+        """
+        İşçi süreçte spec ile tanımlanan depoya bağlanır
+
+        Diziler salt okunur görünümlerdir; bağlanan süreç bloğu silmez.
+        Süreç sahibin doğrudan çocuğuysa (havuz işçisi) sahip öldüğünde
+        kendini sonlandırır.
+        """
+        if os.getppid() == spec["owner_pid"]:
+            threading.Thread(target=_watch_owner, args=(spec["owner_pid"],),
+                             name="shared-store-owner", daemon=True).start()
+        store = cls.__new__(cls)
+        store._block = _attach_block(spec["block"])
+        store.owner_pid = None
+        store._finalizer = weakref.finalize(store, _release, store._block, None)
+        store._arrays = _views(store._block, spec["layout"], writeable=False)
+        store.spec = spec
+        return store
+
+    @classmethod
+    def from_frame(cls, dataframe, sort_text=True):
+        """
+        DataFrame sütunlarını depoya koyar
+
+        - Sayısal sütunlar olduğu gibi
+        - Gün çözünürlüklü tarihler int32 gün ofseti (1970-01-01'den)
+        - Metin sütunları intern edilir: int32 kod + unicode kategori dizisi
+          (eksik değer kodu -1). sort_text=True ile kategoriler sıralıdır;
+          master_id kodları böylece CustomerTable satır konumlarıyla aynıdır
+        - Tamsayı olmayan indeks 0..n-1 konumlarıyla değiştirilir
+        """
+        arrays, columns = {}, []
+        for i, column in enumerate(dataframe.columns):
+            values = dataframe[column].to_numpy()
+            if values.dtype.kind == "M":
+                days = values.astype("datetime64[D]")
+                if (days == values).all():
+                    arrays[f"{i}"] = (days - _EPOCH).astype(np.int32)
+                    columns.append((column, "days", str(values.dtype)))
+                    continue
+            if values.dtype.kind in "biufcmM":
+                arrays[f"{i}"] = values
+                columns.append((column, "values", None))
+            else:
+                codes, categories = pd.factorize(dataframe[column], sort=sort_text)
+                arrays[f"{i}"] = codes.astype(np.int32)
+                arrays[f"{i}:categories"] = np.asarray(categories, dtype=str)
+                columns.append((column, "text", None))
+        arrays["index"] = np.arange(len(dataframe)) if dataframe.index.dtype.kind not in "iu" \
+            else dataframe.index.to_numpy()
+        return cls(arrays, columns)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getitem__(self, name):
+        return self._arrays[name]
+
+    def __contains__(self, name):
+        return name in self._arrays
+
+    def keys(self):
+        return self._arrays.keys()
+
+    @property
+    def arrays(self):
+        """{ad: ndarray} görünümleri"""
+        return dict(self._arrays)
+
+    @property
+    def nbytes(self):
+        return self._block.size
+
+    @property
+    def closed(self):
+        return not self._finalizer.alive
+
+    def column(self, name):
+        """
+        from_frame ile konmuş bir sütun: sayısal sütun ve gün ofsetleri
+        (zero-copy) ya da metin sütunu için (kodlar, kategoriler)
+        """
+        for i, (column, kind, _) in enumerate(self.spec["columns"] or ()):
+            if column == name:
+                if kind == "text":
+                    return self._arrays[f"{i}"], self._arrays[f"{i}:categories"]
+                return self._arrays[f"{i}"]
+        raise KeyError(name)
+
+    def frame(self):
+        """
+        from_frame ile konmuş DataFrame'i kurar
+
+        Sayısal sütunlar paylaşımlı belleğin görünümleridir; tarihler gün
+        ofsetlerinden, metin sütunları kodlardan süreç içinde yeniden kurulur
+        (pandas "string"; eksik değerler NA kalır).
+        """
+        data = {}
+        for i, (column, kind, dtype) in enumerate(self.spec["columns"]):
+            values = self._arrays[f"{i}"]
+            if kind == "values":
+                data[column] = values
+            elif kind == "days":
+                data[column] = (values + _EPOCH).astype(dtype)
+            else:
+                text = self._arrays[f"{i}:categories"].astype(object)[values]
+                text[values < 0] = None
+                data[column] = pd.array(text, dtype="string")
+        return pd.DataFrame(data, index=pd.Index(self._arrays["index"]), copy=False)
+
+    def close(self):
+        """
+        Bağlantıyı kapatır; sahip süreçte blok da silinir (tekrar
+        çağrılabilir). Depodan alınmış görünümler bundan sonra kullanılmamalı.
+        """
+        self._arrays = {}
+        self._finalizer()
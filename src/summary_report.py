@@ -0,0 +1,136 @@
+"""
+Özet Rapor
+RFM ve CLTV segmentlerinin sayı, pay, ortalama ve toplamlarını tek
+gruplu toplamayla üretir ve küçük bir JSON dosyası olarak saklar.
+
+Segmentler tamsayı kodlara çevrilir; tüm değer sütunlarının segment
+toplamları tek bir bincount çağrısıyla hesaplanır. Sayılar, paylar,
+ortalamalar ve genel toplamlar bu segment toplamlarından türetildiği
+için müşteri tablosu bir kez dolaşılır. Rapor okuyucular
+(main.py özeti, dashboard ...) yalnızca bu dosyayı kullanır.
+"""
+
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .config import SUMMARY_REPORT_PATH
+from .file_utils import atomic_write, to_builtin
+
+RFM_REPORT_COLUMNS = ("recency", "frequency", "monetary")
+CLTV_REPORT_COLUMNS = ("cltv", "frequency", "monetary_cltv", "exp_sales_6_month")
+
+
+def summarize_segments(dataframe, segment_col, value_cols):
+    """
+    Segment başına count, share ve her değer sütunu için sum / mean
+
+    Parameters
+    ----------
+    dataframe : DataFrame
+        Müşteri düzeyinde tablo
+    segment_col : str
+        Segment sütunu (kategorik veya metin)
+    value_cols : list
+        Özetlenecek sayısal sütunlar (tabloda olmayanlar atlanır)
+
+    Returns
+    -------
+    dict
+        {"n_customers", "columns", "segments": {segment: {...}},
+        "total": {...}}; segmentler kategori sırasındadır
+    """
+    value_cols = [col for col in value_cols if col in dataframe.columns]
+    segments = dataframe[segment_col]
+    if isinstance(segments.dtype, pd.CategoricalDtype):
+        codes, labels = segments.cat.codes.to_numpy(), list(segments.cat.categories)
+    else:
+        codes, labels = pd.factorize(segments, sort=True)
+        labels = list(labels)
+    n_segments, n_values = len(labels), len(value_cols)
+
+    # Sayı sütunu + değer sütunları: (satır, 1 + sütun) -> tek bincount
+    values = np.ones((len(dataframe), n_values + 1))
+    if n_values:
+        values[:, 1:] = dataframe[value_cols].to_numpy(dtype=float)
+    valid = codes >= 0
+    flat = (codes[valid, None] * (n_values + 1) + np.arange(n_values + 1)).ravel()
+    sums = np.bincount(flat, weights=values[valid].ravel(),
+                       minlength=n_segments * (n_values + 1)).reshape(n_segments, n_values + 1)
+
+    counts, totals = sums[:, 0], sums.sum(axis=0)
+    n_customers = totals[0]
+
+    def _stats(count, row):
+        stats = {"count": int(count), "share": count / n_customers if n_customers else np.nan}
+        for col, total in zip(value_cols, row):
+            stats[f"{col}_sum"] = total
+            stats[f"{col}_mean"] = total / count if count else np.nan
+        return stats
+
+    return {
+        "n_customers": int(n_customers),
+        "columns": value_cols,
+        "segments": {str(label): _stats(counts[i], sums[i, 1:]) for i, label in enumerate(labels)},
+        "total": _stats(n_customers, totals[1:])
+    }
+
+
+def build_summary_report(rfm=None, cltv=None, rfm_columns=RFM_REPORT_COLUMNS,
+                         cltv_columns=CLTV_REPORT_COLUMNS):
+    """
+    RFM ("segment") ve CLTV ("cltv_segment") özetlerini tek raporda toplar
+
+    Returns
+    -------
+    dict
+        {"created_at", "rfm", "cltv"}; verilmeyen bölümler None
+    """
+    return {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "rfm": None if rfm is None else summarize_segments(rfm, "segment", rfm_columns),
+        "cltv": None if cltv is None else summarize_segments(cltv, "cltv_segment", cltv_columns)
+    }
+
+
+def save_summary_report(report, path=SUMMARY_REPORT_PATH):
+    """Raporu JSON olarak yazar (atomik yazım)"""
+    with atomic_write(path) as f:
+        json.dump(to_builtin(report), f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load_summary_report(path=SUMMARY_REPORT_PATH):
+    """Kaydedilmiş raporu okur; yoksa None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def segment_count(report, section, segment):
+    """Segmentteki müşteri sayısı (raporda yoksa 0)"""
+    return report[section]["segments"].get(segment, {}).get("count", 0)
+
+
+def segment_table(report, section, stats=("count", "share", "mean")):
+    """
+    Rapor bölümünü ("rfm" / "cltv") segment indeksli tabloya çevirir
+
+    stats içindeki "mean" / "sum" her değer sütunu için
+    <sütun>_mean / <sütun>_sum sütunlarını seçer.
+    """
+    part = report[section]
+    table = pd.DataFrame.from_dict(part["segments"], orient="index")
+    selected = []
+    for stat in stats:
+        if stat in ("mean", "sum"):
+            selected += [f"{col}_{stat}" for col in part["columns"]]
+        else:
+            selected.append(stat)
+    table = table[selected]
+    table.index.name = "segment" if section == "rfm" else "cltv_segment"
+    return table
@@ -0,0 +1,127 @@
+"""
+Akışlı Top-K Çıkarımı
+Birden çok sıralama sütunu için sınırlı heap'lerle en büyük K müşteri
+
+Tablo parça parça (skorlama chunk'ları veya shard çıktıları) geldikçe
+her sütun için en fazla K satır tutulur; tüm tablonun sıralanmasına ya
+da bellekte birleştirilmesine gerek kalmaz. Shard'lar ayrı TopK
+nesneleriyle işlenip merge ile birleştirilebilir.
+"""
+
+import heapq
+
+import numpy as np
+import pandas as pd
+
+
+class TopK:
+    """
+    Sütun başına en büyük K satırı tutan akışlı toplayıcı
+
+    Parameters
+    ----------
+    columns : str veya list
+        Sıralama sütunları
+    k : int, default 10
+        Sütun başına tutulacak satır sayısı
+    keep : list, optional
+        Sonuçta taşınacak sütunlar (varsayılan tüm sütunlar)
+
+    Not
+    ---
+    Eşit değerlerde önce görülen satır kalır; tek parça için sonuç
+    sort_values(column, ascending=False, kind="stable").head(k) ile
+    aynıdır. NaN değerler atlanır.
+    """
+
+    def __init__(self, columns, k=10, keep=None):
+        self.columns = [columns] if isinstance(columns, str) else list(columns)
+        self.k = k
+        self.keep = keep
+        self._heaps = {column: [] for column in self.columns}
+        self._seen = 0
+
+    def update(self, frame):
+        """Bir parçayı (DataFrame) heap'lere işler; self döner"""
+        n = len(frame)
+        for column in self.columns:
+            values = frame[column].to_numpy(dtype=float)
+            # Parça içinde yalnızca ilk K aday heap'e girer: eşik değerden
+            # büyükler ve eşitlerden önce gelenler
+            candidates = np.flatnonzero(~np.isnan(values))
+            if len(candidates) > self.k:
+                threshold = -np.partition(-values[candidates], self.k - 1)[self.k - 1]
+                above = candidates[values[candidates] > threshold]
+                equal = candidates[values[candidates] == threshold][:self.k - len(above)]
+                candidates = np.sort(np.concatenate([above, equal]))
+            heap = self._heaps[column]
+            rows = frame if self.keep is None else frame[self.keep]
+            for position in candidates:
+                # Min-heap; eşitlikte sonra gelen (büyük sıra no.) önce atılır
+                item = (values[position], -(self._seen + position), rows.iloc[[position]])
+                if len(heap) < self.k:
+                    heapq.heappush(heap, item)
+                elif item[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, item)
+        self._seen += n
+        return self
+
+    def merge(self, other):
+        """Başka bir TopK'nın (örn. başka shard) heap'lerini birleştirir; self döner"""
+        for column in self.columns:
+            heap = self._heaps[column]
+            for value, order, row in other._heaps[column]:
+                item = (value, order - self._seen, row)
+                if len(heap) < self.k:
+                    heapq.heappush(heap, item)
+                elif item[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, item)
+        self._seen += other._seen
+        return self
+
+    def result(self, column=None):
+        """
+        Sütunun en büyük K satırını azalan sırada DataFrame olarak döndürür
+        (column verilmezse ilk sıralama sütunu)
+        """
+        column = self.columns[0] if column is None else column
+        items = sorted(self._heaps[column], key=lambda item: item[:2], reverse=True)
+        if not items:
+            return pd.DataFrame(columns=self.keep)
+        return pd.concat([row for *_, row in items])
+
+    def results(self):
+        """Sütun adı -> result(column) sözlüğü"""
+        return {column: self.result(column) for column in self.columns}
+
+
+def top_k(frame, columns, k=10, keep=None, chunk_size=None):
+    """
+    Tablonun bir veya birden çok sütunu için en büyük K satırı
+
+    Parameters
+    ----------
+    frame : DataFrame veya DataFrame iterable'ı
+        Tek tablo ya da sırayla gelen parçalar (chunk / shard çıktıları)
+    columns : str veya list
+        Sıralama sütunları
+    k : int, default 10
+    keep : list, optional
+        Sonuçta taşınacak sütunlar
+    chunk_size : int, optional
+        Tek tablo verildiğinde parça büyüklüğü
+
+    Returns
+    -------
+    DataFrame veya dict
+        columns tek sütunsa DataFrame, listeyse sütun -> DataFrame
+    """
+    collector = TopK(columns, k=k, keep=keep)
+    if isinstance(frame, pd.DataFrame):
+        chunk_size = chunk_size or max(len(frame), 1)
+        chunks = (frame.iloc[start:start + chunk_size] for start in range(0, len(frame), chunk_size))
+    else:
+        chunks = frame
+    for chunk in chunks:
+        collector.update(chunk)
+    return collector.result() if isinstance(columns, str) else collector.results()
@@ -0,0 +1,334 @@
+"""
+Klasör İzleme (daemon)
+Bırakma klasörüne gelen FLO verilerini ve delta dosyalarını işler
+
+Klasör WATCH_CONFIG["poll_seconds"]'ta bir taranır (yalnızca standart
+kütüphane; inotify gerekmez). Boyutu ve değişiklik zamanı settle_seconds
+boyunca değişmeyen *.csv dosyaları yazımı bitmiş sayılır ve değişiklik
+zamanı sırasıyla alınır:
+
+- Dosyanın SHA-256 parmak izi alınır; defterde (WATCH_LEDGER_PATH) başarıyla
+  işlenmiş görünen veya o an işlenmekte olan içerik tekrar çalıştırılmaz
+- delta_pattern'e uyan dosyalar delta'dır: özellik deposuna apply_delta ile
+  uygulanır (gerekirse önce analiz tarihi ilerletilir). Diğerleri tam
+  veridir: run_pipeline aynı depoyla (değişmeyen aşamalar önbellekten)
+- Segmenti değişen müşteriler her iş için ayrı bir dosyaya yazılır
+  (feed_dir/segment_changes-<parmak izi>.csv); önceki işlerin akışı
+  ezilmez, dosya yolu defterdeki özete girer
+- İşler tek bir kalıcı işçi sürece verilir. Kütüphaneler, Numba çekirdekleri
+  ve modeller işçi açılırken bir kez yüklenir; sonraki işler başlangıç
+  maliyeti ödemez. Tüm işler aynı özellik deposuna yazdığından sırayla
+  (geliş sırasına göre) çalışır
+- Kuyrukta max_pending iş varken yeni dosya alınmaz (geri basınç); dosyalar
+  klasörde bekler ve sıra gelince alınır
+- Biten dosyalar processed/, hata verenler failed/ alt klasörüne parmak izi
+  önekiyle taşınır; sonuç deftere yazılır
+
+SIGTERM / Ctrl+C ile yeni dosya alınmaz, çalışan iş bitirilir; başlamamış
+işlerin dosyaları klasörde kalır ve sonraki açılışta işlenir. Delta
+satırları yaşam boyu toplamlar olduğundan yarıda kalan bir delta'nın
+yeniden uygulanması aynı sonucu verir.
+
+Kullanım:
+    python -m src.watch_folder                  # WATCH_CONFIG["drop_dir"]
+    python -m src.watch_folder --drop /veri/gelen
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import shutil
+import signal
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from .config import FEATURE_STORE_DIR, WATCH_CONFIG, WATCH_LEDGER_PATH
+from .file_utils import atomic_write, file_digest
+
+_SHARED = {}
+
+
+###############################################################
+# İŞÇİ
+###############################################################
+
+def _init_worker(store_path):
+    # Ctrl+C ana sürece gelir; işçiyi ana süreç kapatır. SIGTERM işleyicisi
+    # ana süreçten miras kalmasın
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    from .btyd_models import frozen_cltv_models
+    from .feature_store import META_FILE, FeatureStore
+    from .incremental import score_frozen, warmup_rows
+
+    _SHARED["store_path"] = store_path
+    if (Path(store_path) / META_FILE).exists():
+        attrs = FeatureStore(store_path).attrs
+        if "fit" in attrs:
+            # Model kurulumu ve çekirdek derlemesi ilk işten önce yapılır
+            score_frozen(pd.DataFrame(warmup_rows(attrs)), attrs,
+                         models=frozen_cltv_models(attrs["fit"]))
+
+
+def _feed_path(params):
+    # İşin değişim akışı: dosya içeriğinin parmak iziyle adlandırılır
+    return Path(params["feed_dir"]) / f"segment_changes-{params['digest'][:12]}.csv"
+
+
+def _run_delta(path, params):
+    from .change_feed import snapshot_segments, store_changes, write_change_feed
+    from .feature_store import META_FILE, FeatureStore
+    from .incremental import advance_to, apply_delta
+
+    store_path = _SHARED["store_path"]
+    if not (Path(store_path) / META_FILE).exists():
+        raise FileNotFoundError(f"Özellik deposu yok: {store_path}; "
+                                f"önce tam veri bırakılmalı")
+    store = FeatureStore(store_path, mode="r+")
+    delta = pd.read_csv(path)
+    snapshot = snapshot_segments(store)
+    report = {}
+    # Analiz tarihi son alışverişten 2 gün sonrasıdır (incremental_attrs)
+    last = pd.to_datetime(delta["last_order_date"]).max()
+    if last >= pd.Timestamp(store.attrs["analysis_date"]):
+        report["advance"] = advance_to(last + pd.Timedelta(days=2), store)
+    report.update(apply_delta(delta, store))
+    changes = store_changes(snapshot, store)
+    report["n_segment_changes"] = len(changes)
+    report["change_feed"] = str(write_change_feed(changes, _feed_path(params)))
+    return report
+
+
+def _run_extract(path, params):
+    from .pipeline import run_pipeline
+
+    result = run_pipeline(path, month=params["month"], segment_count=params["segment_count"],
+                          store_path=_SHARED["store_path"], log=None)
+    # Pipeline'ın akışı her tam çalışmada yeniden yazılır; işin kopyası saklanır
+    feed = shutil.copyfile(result["change_feed"]["change_feed"], _feed_path(params))
+    return {"stages": dict(Counter(result.status.values())), "change_feed": str(feed)}
+
+
+def _run_job(kind, path, params):
+    started = time.perf_counter()
+    run = _run_delta if kind == "delta" else _run_extract
+    summary = run(path, params)
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    return summary
+
+
+###############################################################
+# DEFTER
+###############################################################
+
+def load_ledger(path=WATCH_LEDGER_PATH):
+    """Parmak izi -> işlem kaydı sözlüğünü döndürür"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_ledger(ledger, path):
+    with atomic_write(path) as f:
+        json.dump(ledger, f, ensure_ascii=False, indent=2, default=str)
+
+
+###############################################################
+# İZLEYİCİ
+###############################################################
+
+class FolderWatcher:
+    """
+    Bırakma klasörünü izler ve işleri kalıcı bir işçi sürece verir
+
+    Parameters
+    ----------
+    drop_dir : str or Path, optional
+        İzlenen klasör (WATCH_CONFIG["drop_dir"])
+    store_path : str or Path
+        Özellik deposu klasörü
+    ledger_path : str or Path
+        İşlenen dosyaların defteri
+    log : callable, optional
+        Durum satırları için (None: sessiz)
+    **config
+        WATCH_CONFIG anahtarlarını geçersiz kılar
+    """
+
+    def __init__(self, drop_dir=None, store_path=FEATURE_STORE_DIR,
+                 ledger_path=WATCH_LEDGER_PATH, log=print, **config):
+        self.config = {**WATCH_CONFIG, **config}
+        self.drop_dir = Path(drop_dir or self.config["drop_dir"])
+        self.store_path = Path(store_path)
+        self.ledger_path = Path(ledger_path)
+        self.ledger = load_ledger(self.ledger_path)
+        self.log = log or (lambda message: None)
+        self._params = {"month": self.config["month"],
+                        "segment_count": self.config["segment_count"],
+                        "feed_dir": str(self.config["feed_dir"])}
+        self._sizes = {}
+        self._pending = {}
+        self._saturated = False
+        self._executor = None
+
+    def start(self):
+        """İşçi süreci açar ve ısınmasını bekler"""
+        for name in ("processed", "failed"):
+            (self.drop_dir / name).mkdir(parents=True, exist_ok=True)
+        Path(self.config["feed_dir"]).mkdir(parents=True, exist_ok=True)
+        self._executor = ProcessPoolExecutor(max_workers=1, initializer=_init_worker,
+                                             initargs=(str(self.store_path),))
+        self._executor.submit(len, ()).result()  # işçi hazır olana kadar bekle
+
+    def close(self):
+        """Başlamamış işleri iptal eder, çalışanı bitirip işçiyi kapatır"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self.collect()
+
+    def ready_files(self):
+        """
+        Yazımı bitmiş, henüz alınmamış dosyalar (değişiklik zamanı sırasıyla)
+
+        Boyutu önceki taramadakiyle aynı ve değişiklik zamanı settle_seconds
+        kadar eski olan dosyalar hazır sayılır.
+        """
+        sizes, ready = {}, []
+        now = time.time()
+        for path in self.drop_dir.glob("*.csv"):
+            if path in self._pending:
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            sizes[path] = (stat.st_size, stat.st_mtime_ns)
+            if (self._sizes.get(path) == sizes[path]
+                    and now - stat.st_mtime >= self.config["settle_seconds"]):
+                ready.append((stat.st_mtime_ns, path))
+        self._sizes = sizes
+        return [path for _, path in sorted(ready)]
+
+    def kind(self, path):
+        """Dosya türü: delta_pattern'e uyanlar "delta", diğerleri "extract" """
+        pattern = self.config["delta_pattern"].lower()
+        return "delta" if fnmatch.fnmatch(path.name.lower(), pattern) else "extract"
+
+    def claim(self, path):
+        """
+        Dosyayı parmak iziyle denetler ve işçiye verir
+
+        Returns
+        -------
+        bool
+            İş kuyruğa alındıysa True (tekrar eden içerik: False)
+        """
+        digest = file_digest(path)
+        in_flight = any(job["digest"] == digest for job in self._pending.values())
+        if in_flight or self.ledger.get(digest, {}).get("status") == "ok":
+            self.log(f"⏭️  Tekrar eden dosya atlandı: {path.name} ({digest[:12]})")
+            self._move(path, "processed", digest)
+            return False
+        kind = self.kind(path)
+        future = self._executor.submit(_run_job, kind, str(path),
+                                       {**self._params, "digest": digest})
+        self._pending[path] = {"digest": digest, "kind": kind, "future": future}
+        self.log(f"📥 {path.name}: {kind} kuyruğa alındı ({len(self._pending)} bekleyen)")
+        return True
+
+    def collect(self):
+        """Biten işlerin dosyalarını taşır ve deftere yazar"""
+        broken = False
+        for path, job in list(self._pending.items()):
+            future = job["future"]
+            if not future.done():
+                continue
+            del self._pending[path]
+            if future.cancelled():
+                continue  # dosya klasörde kalır, sonraki açılışta işlenir
+            record = {"file": path.name, "kind": job["kind"],
+                      "finished_at": datetime.now().isoformat(timespec="seconds")}
+            error = future.exception()
+            if error is None:
+                record.update(status="ok", summary=future.result())
+                self.log(f"✅ {path.name}: {job['kind']} tamamlandı "
+                         f"({record['summary']['seconds']:.1f} sn)")
+            else:
+                record.update(status="failed", error=f"{type(error).__name__}: {error}")
+                self.log(f"❌ {path.name}: {record['error']}")
+                broken |= isinstance(error, BrokenProcessPool)
+            self._move(path, "processed" if error is None else "failed", job["digest"])
+            self.ledger[job["digest"]] = record
+            _save_ledger(self.ledger, self.ledger_path)
+        if broken and self._executor is not None:
+            # İşçi süreç öldü (örn. bellek yetmedi); yenisi açılır
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self.start()
+
+    def _move(self, path, folder, digest):
+        try:
+            os.replace(path, self.drop_dir / folder / f"{digest[:12]}-{path.name}")
+        except FileNotFoundError:
+            pass
+
+    def poll(self):
+        """Tek tarama: biten işleri topla, kuyrukta yer varsa yeni dosyaları al"""
+        self.collect()
+        for path in self.ready_files():
+            if len(self._pending) >= self.config["max_pending"]:
+                if not self._saturated:
+                    self.log(f"⏸️  Kuyruk dolu ({len(self._pending)} iş); "
+                             f"yeni dosyalar klasörde bekliyor")
+                self._saturated = True
+                return
+            self.claim(path)
+        self._saturated = False
+
+    def run(self, stop=None):
+        """
+        Durdurulana kadar klasörü izler
+
+        Parameters
+        ----------
+        stop : threading.Event, optional
+            Kurulursa izleme biter (SIGTERM / SIGINT de kurar)
+        """
+        stop = stop or threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+        self.start()
+        self.log(f"👀 İzleniyor: {self.drop_dir} (depo: {self.store_path})")
+        try:
+            while not stop.is_set():
+                self.poll()
+                stop.wait(self.config["poll_seconds"])
+        finally:
+            self.log("🛑 Durduruluyor; çalışan iş bitiriliyor")
+            self.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bırakma klasörünü izler ve yeni verileri işler")
+    parser.add_argument("--drop", default=None, help="İzlenen klasör (WATCH_CONFIG)")
+    parser.add_argument("--store", default=FEATURE_STORE_DIR, help="Özellik deposu klasörü")
+    parser.add_argument("--ledger", default=WATCH_LEDGER_PATH, help="İşlenen dosyaların defteri")
+    args = parser.parse_args(argv)
+
+    def log(message):
+        print(f"[{datetime.now():%H:%M:%S}] {message}", flush=True)
+
+    FolderWatcher(args.drop, args.store, args.ledger, log=log).run()
+
+
+if __name__ == "__main__":
+    main()
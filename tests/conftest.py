@@ -0,0 +1,53 @@
+"""
+Testler için ortak ayarlar
+
+Proje kökü Python path'ine eklenir (benchmarks ile aynı). Özellik deposu
+fixture'ları da burada: depo modül başına bir kez kurulur, her test kendi
+kopyası üzerinde çalışır.
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Sentetik depo varsayılanları; test modülleri
+# @pytest.mark.parametrize("built_store", [{"n_customers": ...}], indirect=True)
+# ile değiştirebilir
+STORE_DEFAULTS = {"n_customers": 200, "seed": 0}
+
+
+@pytest.fixture(scope="module")
+def built_store(request, tmp_path_factory):
+    """Modül başına kurulan sentetik özellik deposu: (yol, ham müşteri çerçevesi)"""
+    from benchmarks.synthetic import make_feature_store
+
+    params = {**STORE_DEFAULTS, **getattr(request, "param", {})}
+    path = tmp_path_factory.mktemp("store") / "feature_store"
+    raw = make_feature_store(params["n_customers"], path, seed=params["seed"])
+    return path, raw
+
+
+@pytest.fixture
+def store_path(built_store, tmp_path):
+    """Teste özel depo kopyasının yolu (yazma testleri ortak depoyu bozmaz)"""
+    path = tmp_path / "feature_store"
+    shutil.copytree(built_store[0], path)
+    return path
+
+
+@pytest.fixture
+def store(store_path):
+    """Teste özel kopya, yazılabilir kipte açık"""
+    from src.feature_store import FeatureStore
+
+    return FeatureStore(store_path, mode="r+")
+
+
+@pytest.fixture
+def raw(built_store):
+    """Depoyu kuran ham müşteri çerçevesinin kopyası"""
+    return built_store[1].copy()
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from lifetimes import ModifiedBetaGeoFitter, ParetoNBDFitter
+
+from benchmarks.synthetic import make_flo_frame
+from src.btyd_models import fit_btyd, fit_cltv_models, frozen_model, get_model
+from src.cltv_core import build_cltv_summary, fit_bgf, prepare_cltv_data
+from src.config import CLTV_CONFIG
+
+
+@pytest.fixture(scope="module")
+def cltv_df():
+    return build_cltv_summary(prepare_cltv_data(make_flo_frame(2_000, seed=6)))
+
+
+def test_bgnbd_matches_lifetimes_fit(cltv_df):
+    fit = fit_cltv_models(cltv_df, "bgnbd")
+    expected = fit_bgf(cltv_df).params_
+    np.testing.assert_allclose([fit["bgf"][name] for name in expected.index], expected,
+                               rtol=1e-2)
+
+
+def test_pareto_nbd_uses_its_own_penalizer():
+    assert get_model("pareto_nbd").penalizer_coef == CLTV_CONFIG["pareto_nbd_penalizer_coef"]
+    assert get_model("bgnbd").penalizer_coef == CLTV_CONFIG["bgf_penalizer_coef"]
+
+
+def test_pareto_nbd_default_matches_lifetimes(cltv_df):
+    model = fit_btyd(cltv_df, "pareto_nbd")
+    reference = ParetoNBDFitter(penalizer_coef=CLTV_CONFIG["pareto_nbd_penalizer_coef"]).fit(
+        cltv_df["frequency"], cltv_df["recency_cltv_weekly"], cltv_df["T_weekly"])
+    np.testing.assert_allclose(model.params_[list(reference.params_.index)],
+                               reference.params_, rtol=1e-2)
+
+
+def test_mbgnbd_matches_lifetimes(cltv_df):
+    x, t_x, T = cltv_df["frequency"], cltv_df["recency_cltv_weekly"], cltv_df["T_weekly"]
+    model = fit_btyd(cltv_df, "mbgnbd")
+    reference = ModifiedBetaGeoFitter(
+        penalizer_coef=CLTV_CONFIG["bgf_penalizer_coef"]).fit(x, t_x, T)
+    names = list(reference.params_.index)
+    np.testing.assert_allclose(model.params_[names], reference.params_, rtol=1e-2)
+
+    # Aynı parametrelerle tahminler lifetimes ile birebir
+    frozen = frozen_model("mbgnbd", reference.params_.to_dict())
+    np.testing.assert_allclose(
+        frozen.predict(24, x, t_x, T),
+        reference.conditional_expected_number_of_purchases_up_to_time(24, x, t_x, T),
+        rtol=1e-8)
+    np.testing.assert_allclose(frozen.conditional_probability_alive(x, t_x, T),
+                               reference.conditional_probability_alive(x, t_x, T), rtol=1e-8)
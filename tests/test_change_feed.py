@@ -0,0 +1,86 @@
+import pandas as pd
+
+from src.change_feed import segment_changes, snapshot_segments, store_changes, write_change_feed
+
+
+def _other(value, choices):
+    return next(choice for choice in choices if choice != value)
+
+
+def test_segment_changes_old_new_removed(store):
+    rfm = store.to_frame(["segment"])
+    cltv = store.to_frame(["cltv_segment"])
+    ids = rfm.index
+    removed, changed = list(ids[:2]), list(ids[2:5])
+    rfm["segment"] = rfm["segment"].astype(object)
+    for master_id in changed:
+        rfm.loc[master_id, "segment"] = _other(rfm.loc[master_id, "segment"],
+                                               ["champions", "hibernating"])
+    new = pd.DataFrame({"segment": ["champions", "yeni_segment"]},
+                       index=pd.Index(["zz-1", "zz-2"], name="master_id"))
+    rfm = pd.concat([rfm.drop(removed), new]).sort_index()
+    cltv = cltv.drop(removed).reindex(rfm.index)
+    cltv.loc[new.index, "cltv_segment"] = "A"
+
+    changes = segment_changes(rfm, cltv, store=store)
+    assert changes["change"].to_dict() == {**{i: "removed" for i in removed},
+                                           **{i: "changed" for i in changed},
+                                           "zz-1": "new", "zz-2": "new"}
+    assert changes.loc[changed, "segment_old"].tolist() == store.to_frame(
+        ["segment"]).loc[changed, "segment"].tolist()
+    assert changes.loc[changed, "segment_new"].tolist() == rfm.loc[changed, "segment"].tolist()
+    assert changes.loc[removed, "segment_new"].isna().all()
+    assert changes.loc["zz-2", "segment_new"] == "yeni_segment"
+    assert changes.loc[["zz-1", "zz-2"], "segment_old"].isna().all()
+
+
+def test_unchanged_run_has_no_changes(store):
+    assert segment_changes(store.to_frame(["segment"]), store.to_frame(["cltv_segment"]),
+                           store=store).empty
+
+
+def test_first_run_marks_everyone_new(store, tmp_path):
+    changes = segment_changes(store.to_frame(["segment"]), store.to_frame(["cltv_segment"]),
+                              path=tmp_path / "yok")
+    assert len(changes) == len(store) and (changes["change"] == "new").all()
+
+
+def test_store_changes_after_in_place_update(store):
+    snapshot = snapshot_segments(store)
+    moved = store.ids[:3]
+    current = store.to_frame(["cltv_segment"]).loc[moved, "cltv_segment"].astype(str)
+    store.update(pd.DataFrame({"cltv_segment": [_other(v, "ABCD") for v in current]},
+                              index=pd.Index(moved, name="master_id")))
+    store.append(["zz-new"])
+
+    changes = store_changes(snapshot, store)
+    assert changes["change"].to_dict() == {**{i: "changed" for i in moved}, "zz-new": "new"}
+    assert changes.loc[moved, "cltv_segment_old"].astype(str).tolist() == current.tolist()
+
+
+def test_write_change_feed_append_keeps_one_header(tmp_path):
+    frame = pd.DataFrame({"change": ["new"]}, index=pd.Index(["a"], name="master_id"))
+    path = tmp_path / "feed.csv"
+    write_change_feed(frame, path)
+    write_change_feed(frame.rename(index={"a": "b"}), path, append=True)
+    written = pd.read_csv(path)
+    assert written.columns.tolist() == ["master_id", "change"]
+    assert written["master_id"].tolist() == ["a", "b"]
+
+
+def test_store_changes_compares_against_first_written_code(store):
+    snapshot = snapshot_segments(store)
+    first, second = store.ids[:2]
+    current = store.to_frame(["cltv_segment"]).loc[[first, second], "cltv_segment"].astype(str)
+    other = [_other(v, "ABCD") for v in current]
+    index = pd.Index([first, second], name="master_id")
+    # İlki değişip geri döner, ikincisi iki kez değişir
+    store.update(pd.DataFrame({"cltv_segment": other}, index=index))
+    store.update(pd.DataFrame({"cltv_segment": [current.iloc[0], _other(other[1], "ABCD")]},
+                              index=index))
+
+    changes = store_changes(snapshot, store)
+    assert changes.index.tolist() == [second]
+    assert changes.loc[second, "cltv_segment_old"] == current.iloc[1]
+    # Günlük kapandı: sonraki yazımlar kaydedilmez
+    assert not store._journals
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_flo_frame
+from src.cltv_backtest import (evaluate_backtest, run_backtest, split_snapshot,
+                               summary_from_transactions)
+from src.cltv_core import prepare_cltv_data
+
+
+def test_split_snapshot_keeps_holdout_orders_out_of_calibration():
+    rng = np.random.default_rng(0)
+    n = 2_000
+    first = rng.integers(0, 600, n)
+    orders = rng.integers(1, 30, n)
+    last = np.where(orders > 1, first + rng.integers(0, 400, n), first)
+    value = rng.gamma(3.0, 100.0, n)
+    cutoff, end = 500, 700
+
+    active, calibration, holdout = split_snapshot(first, last, orders.astype(float), value,
+                                                  cutoff, end)
+    assert (active == (first < cutoff)).all()
+    # Siparişler ilk ve son alışveriş arasına eşit aralıklı: t_k = first + k * gap.
+    # k. sipariş kesimden sonra değilse kalibrasyondadır (tam sayılarla karşılaştırma)
+    for i, j in enumerate(np.flatnonzero(active)):
+        k = np.arange(orders[j])
+        span, steps = last[j] - first[j], max(orders[j] - 1, 1)
+        in_calibration = k * span <= (cutoff - first[j]) * steps
+        assert calibration["frequency"].iloc[i] == in_calibration.sum()
+        assert holdout["holdout_purchases"].iloc[i] == (~in_calibration).sum()
+        assert calibration["recency_cltv_weekly"].iloc[i] == pytest.approx(
+            k[in_calibration].max() * span / steps / 7)
+    np.testing.assert_allclose(calibration["T_weekly"], (cutoff - first[active]) / 7)
+    assert (holdout["holdout_weeks"] == (end - cutoff) / 7).all()
+
+
+def test_summary_from_transactions_splits_on_cutoff_and_end():
+    day = pd.Timestamp("2021-01-01")
+    transactions = pd.DataFrame({
+        "master_id": ["a", "a", "a", "a", "b", "c"],
+        "order_date": day + pd.to_timedelta([0, 14, 28, 70, 7, 35], unit="D"),
+        "value": [10.0, 20.0, 30.0, 40.0, 5.0, 50.0],
+    })
+    cutoff, end = day + pd.Timedelta(days=14), day + pd.Timedelta(days=42)
+    calibration, holdout = summary_from_transactions(transactions, cutoff, end)
+
+    # c kesimden sonra ilk alışverişini yapar; a'nın 70. gün siparişi ufkun dışındadır
+    assert calibration.index.tolist() == ["a", "b"]
+    assert calibration["frequency"].tolist() == [2.0, 1.0]
+    assert calibration["recency_cltv_weekly"].tolist() == [2.0, 0.0]
+    assert calibration["T_weekly"].tolist() == [2.0, 1.0]
+    assert calibration["monetary_cltv"].tolist() == [15.0, 5.0]
+    assert holdout["holdout_purchases"].tolist() == [1.0, 0.0]
+    assert holdout["holdout_spend"].tolist() == [30.0, 0.0]
+    assert (holdout["holdout_weeks"] == 4.0).all()
+
+
+def test_run_backtest_respects_holdout_horizons():
+    dataframe = prepare_cltv_data(make_flo_frame(1_000, seed=2))
+    results = run_backtest(dataframe, holdout_weeks=(6, 20), n_jobs=2)
+
+    end = dataframe["last_order_date"].max() + pd.Timedelta(days=2)
+    overall = results[results["cltv_segment"] == "ALL"]
+    assert sorted(set(overall["holdout_weeks"])) == [6.0, 20.0]
+    for weeks, part in overall.groupby("holdout_weeks"):
+        cutoff = end - pd.Timedelta(weeks=weeks)
+        assert (part["cutoff"] == str(cutoff.date())).all()
+        assert (part["n_customers"] == (dataframe["first_order_date"] < cutoff).sum()).all()
+    # Ufuk uzadıkça holdout'ta daha çok alışveriş birikir
+    purchases = overall[overall["target"] == "purchases"].set_index("holdout_weeks")
+    assert purchases.loc[20.0, "actual_mean"] > purchases.loc[6.0, "actual_mean"]
+
+
+def _simulate_bgnbd(n, seed, r=0.8, alpha=6.0, a=0.6, b=3.0, weeks=104):
+    # BG-NBD süreci: Poisson alışverişler, her tekrar alışverişten sonra p olasılıkla kayıp
+    rng = np.random.default_rng(seed)
+    lam, p = rng.gamma(r, 1 / alpha, n), rng.beta(a, b, n)
+    t = rng.uniform(0, 52, n)
+    alive, ids, times = np.ones(n, dtype=bool), [], []
+    while alive.any():
+        ids.append(np.flatnonzero(alive))
+        times.append(t[alive])
+        if len(ids) > 1:  # ilk alışverişten sonra kayıp yok
+            alive &= rng.random(n) >= p
+        t = t + rng.exponential(1 / lam)
+        alive &= t < weeks
+    times = np.concatenate(times)
+    return pd.DataFrame({
+        "master_id": np.concatenate(ids),
+        "order_date": pd.Timestamp("2020-01-01") + pd.to_timedelta(times * 7, unit="D"),
+        "value": rng.gamma(4.0, 50.0, len(times)),
+    })
+
+
+def test_evaluate_backtest_on_bgnbd_data_is_roughly_unbiased():
+    transactions = _simulate_bgnbd(5_000, seed=0)
+    start = pd.Timestamp("2020-01-01")
+    calibration, holdout = summary_from_transactions(
+        transactions, start + pd.Timedelta(weeks=78), start + pd.Timedelta(weeks=104))
+    rows = pd.DataFrame(evaluate_backtest(calibration, holdout)).set_index(
+        ["target", "cltv_segment"])
+
+    for target in ("purchases", "spend"):
+        assert abs(rows.loc[(target, "ALL"), "bias"]) < 0.15
+        # Segmentler holdout davranışını sıralar
+        assert rows.loc[(target, "A"), "actual_mean"] > rows.loc[(target, "D"), "actual_mean"]
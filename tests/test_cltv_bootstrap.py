@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_flo_frame
+from src.btyd_models import fit_cltv_models, frozen_cltv_models
+from src.cltv_bootstrap import _fit_ggf, _pattern_table, _score, bootstrap_cltv
+from src.cltv_core import build_cltv_summary, fit_ggf, prepare_cltv_data, score_cltv
+
+
+@pytest.fixture(scope="module")
+def cltv_df():
+    return build_cltv_summary(prepare_cltv_data(make_flo_frame(2_000, seed=4)))
+
+
+@pytest.mark.parametrize("model", ["bgnbd", "mbgnbd", "pareto_nbd"])
+def test_bootstrap_refits_selected_transaction_model(cltv_df, model):
+    fit = fit_cltv_models(cltv_df, model)
+    summary, replicates = bootstrap_cltv(cltv_df, n_replicates=4, transaction_model=model,
+                                         bgf_params=fit["bgf"], ggf_params=fit["ggf"], n_jobs=1)
+
+    names = [f"bgf_{name}" for name in fit["bgf"]]
+    # Nokta tahmini seçilen modelin parametreleri; tekrarlar da aynı modelden
+    np.testing.assert_allclose(summary.loc[names, "estimate"], list(fit["bgf"].values()))
+    assert {name for name in replicates if name.startswith("bgf_")} == set(names)
+    lower, upper = summary.loc["total_cltv", ["lower", "upper"]]
+    assert lower <= upper
+
+
+def test_bootstrap_rejects_unknown_model(cltv_df):
+    with pytest.raises(ValueError, match="Bilinmeyen işlem modeli"):
+        bootstrap_cltv(cltv_df, n_replicates=2, transaction_model="bgf")
+
+
+def test_pattern_scoring_matches_customer_scoring(cltv_df):
+    bgf, ggf = frozen_cltv_models(fit_cltv_models(cltv_df))
+    total, cuts = _score(_pattern_table(cltv_df), bgf, ggf, month=6, segment_count=4)
+
+    cltv = score_cltv(cltv_df, bgf, ggf, month=6)["cltv"].to_numpy()
+    np.testing.assert_allclose(total, cltv.sum(), rtol=1e-10)
+    np.testing.assert_allclose(cuts, np.quantile(cltv, [0.25, 0.5, 0.75], method="inverted_cdf"))
+
+
+def test_replicate_gamma_gamma_fit_matches_lifetimes(cltv_df):
+    stats = cltv_df.assign(weights=np.random.default_rng(0).integers(0, 3, len(cltv_df)))
+    stats = stats[stats["weights"] > 0]
+    expected = fit_ggf(stats, weights=stats["weights"]).params_
+    # Tekrarlardaki gibi tam veri parametrelerinden warm start
+    ggf = _fit_ggf(stats, None, fit_ggf(cltv_df).params_)
+    np.testing.assert_allclose(ggf.params_[expected.index], expected, rtol=1e-3)
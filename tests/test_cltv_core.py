@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_flo_frame
+from src.btyd_models import frozen_model
+from src.cltv_core import (OUTLIER_COLUMNS, build_cltv_summary, cap_outliers, discounted_cltv,
+                           fit_bgf, fit_ggf, predict_cltv, prepare_cltv_data)
+from src.config import CLTV_CONFIG
+from src.incremental import score_frozen
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    cltv_df = build_cltv_summary(prepare_cltv_data(make_flo_frame(2_000, seed=7)))
+    return cltv_df, fit_bgf(cltv_df), fit_ggf(cltv_df)
+
+
+@pytest.mark.parametrize("month", [6, 36])
+def test_discounted_cltv_matches_lifetimes(fitted, month):
+    cltv_df, bgf, ggf = fitted
+    x, t_x, T = cltv_df["frequency"], cltv_df["recency_cltv_weekly"], cltv_df["T_weekly"]
+    monetary = cltv_df["monetary_cltv"]
+    expected = ggf.customer_lifetime_value(bgf, x, t_x, T, monetary, time=month, freq="W",
+                                           discount_rate=0.01)
+    value = ggf.conditional_expected_average_profit(x, monetary)
+    np.testing.assert_allclose(discounted_cltv(bgf, x, t_x, T, value, month=month, freq="W",
+                                               discount_rate=0.01),
+                               expected, rtol=1e-9)
+
+
+def test_p_alive_matches_lifetimes_and_flags_churn(fitted):
+    cltv_df, bgf, ggf = fitted
+    expected = bgf.conditional_probability_alive(
+        cltv_df["frequency"], cltv_df["recency_cltv_weekly"], cltv_df["T_weekly"])
+    # lifetimes fitter'ı ve btyd_models'in BG-NBD modeli aynı çekirdeği kullanır
+    for model in (bgf, frozen_model("bgnbd", bgf.params_.to_dict())):
+        scored = predict_cltv(cltv_df, model, ggf)
+        np.testing.assert_allclose(scored["p_alive"], expected, rtol=1e-12)
+        # churn_risk bir bayraktır: P(alive) eşiğin altında (churn olasılığı
+        # 1 - p_alive, 1 - churn_threshold'un üstünde)
+        assert scored["churn_risk"].dtype == bool
+        assert (scored["churn_risk"]
+                == (scored["p_alive"] < CLTV_CONFIG["churn_threshold"])).all()
+
+    flagged = predict_cltv(cltv_df, bgf, ggf, churn_threshold=0.9)
+    assert (flagged["churn_risk"] == (expected < 0.9)).all() and flagged["churn_risk"].any()
+
+
+def _legacy_cap(dataframe, variable):
+    # Eski outlier_thresholds + replace_with_thresholds (sütun başına)
+    q1 = dataframe[variable].quantile(0.01)
+    q3 = dataframe[variable].quantile(0.99)
+    up_limit = round(q3 + 1.5 * (q3 - q1))
+    dataframe.loc[dataframe[variable] > up_limit, variable] = up_limit
+    return up_limit
+
+
+def test_cap_outliers_matches_per_column_helpers():
+    raw = make_flo_frame(3_000, seed=8)
+    legacy = raw.copy()
+    expected = {column: _legacy_cap(legacy, column) for column in OUTLIER_COLUMNS}
+    capped = raw.copy()
+    thresholds = cap_outliers(capped)
+    assert thresholds == expected
+    pd.testing.assert_frame_equal(capped[OUTLIER_COLUMNS], legacy[OUTLIER_COLUMNS],
+                                  check_dtype=False)
+
+
+def test_incremental_scoring_reuses_stored_thresholds(store, raw):
+    attrs = store.attrs
+    assert attrs["outlier_thresholds"] == prepare_cltv_data(raw.copy()).attrs["outlier_thresholds"]
+
+    rows = raw.head(20).copy()
+    rows[OUTLIER_COLUMNS] *= 1_000
+    capped = rows.copy()
+    cap_outliers(capped, thresholds=attrs["outlier_thresholds"])
+    # Kurulumdaki eşiklerle baskılanmış satırlarla aynı skorlar; eşikler
+    # kaldırılınca farklı
+    _, scored = score_frozen(rows, attrs)
+    _, expected = score_frozen(capped, attrs)
+    pd.testing.assert_frame_equal(scored, expected)
+    uncapped = dict(attrs, outlier_thresholds={column: np.inf for column in OUTLIER_COLUMNS})
+    assert not np.allclose(score_frozen(rows, uncapped)[1]["cltv"], expected["cltv"])
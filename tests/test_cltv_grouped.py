@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_flo_frame
+from src.btyd_models import fit_btyd
+from src.cltv_core import (build_cltv_summary, fit_ggf, frozen_bgf, frozen_ggf, predict_cltv,
+                           prepare_cltv_data)
+from src.cltv_grouped import GLOBAL_GROUP, fit_grouped_models, group_labels, score_grouped
+
+# Offline (302 müşteri) dışındaki kanallar 400'den büyük
+MIN_GROUP_SIZE = 400
+
+
+@pytest.fixture(scope="module")
+def grouped():
+    dataframe = prepare_cltv_data(make_flo_frame(3_000, seed=1))
+    cltv_df = build_cltv_summary(dataframe)
+    groups = group_labels(dataframe)
+    models = fit_grouped_models(cltv_df, groups, min_group_size=MIN_GROUP_SIZE, n_jobs=2,
+                                global_sample_size=1_000)
+    return cltv_df, groups, models
+
+
+def test_group_params_match_direct_fit(grouped):
+    cltv_df, groups, models = grouped
+    sizes = groups.value_counts()
+    assert set(models) == {GLOBAL_GROUP} | set(sizes.index[sizes >= MIN_GROUP_SIZE])
+
+    for name in set(models) - {GLOBAL_GROUP}:
+        part = cltv_df[groups.reindex(cltv_df.index) == name]
+        assert models[name]["n_customers"] == len(part)
+        np.testing.assert_allclose(pd.Series(models[name]["bgf"]),
+                                   fit_btyd(part, "bgnbd").params_, rtol=1e-8)
+        np.testing.assert_allclose(pd.Series(models[name]["ggf"]),
+                                   fit_ggf(part).params_, rtol=1e-4)
+
+
+def test_undersized_groups_fall_back_to_sampled_global_model(grouped):
+    cltv_df, groups, models = grouped
+    assert models[GLOBAL_GROUP]["n_customers"] == 1_000
+
+    scored = score_grouped(cltv_df, groups, models)
+    small = groups.reindex(cltv_df.index) == "Offline"
+    assert (scored.loc[small, "model_group"] == GLOBAL_GROUP).all()
+    assert (scored.loc[~small, "model_group"] != GLOBAL_GROUP).all()
+
+    expected = predict_cltv(cltv_df[small], frozen_bgf(models[GLOBAL_GROUP]["bgf"]),
+                            frozen_ggf(models[GLOBAL_GROUP]["ggf"]))
+    np.testing.assert_allclose(scored.loc[small, "cltv"], expected["cltv"])
+
+
+def test_group_fits_without_global_model(grouped):
+    cltv_df, groups, models = grouped
+    group_only = fit_grouped_models(cltv_df, groups, min_group_size=MIN_GROUP_SIZE, n_jobs=2,
+                                    fit_global=False)
+    assert set(group_only) == set(models) - {GLOBAL_GROUP}
+    for name, model in group_only.items():
+        assert model["bgf"] == models[name]["bgf"]
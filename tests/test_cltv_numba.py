@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from lifetimes import GammaGammaFitter
+from scipy.optimize import approx_fprime
+
+from src.cltv_numba import (NUMBA_AVAILABLE, bgnbd_expected_purchases, bgnbd_nll_and_grad,
+                            gamma_gamma_nll_and_grad)
+
+BACKENDS = ["numpy"] + (["numba"] if NUMBA_AVAILABLE else [])
+PARAMS = {"r": 0.8, "alpha": 3.0, "a": 0.6, "b": 2.5}
+GGF_LOG_PARAMS = np.log([4.0, 0.5, 4.0])
+
+
+def _customers(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    T = rng.uniform(5, 300, n)
+    x = rng.integers(1, 30, n).astype(float)
+    return x, T * rng.uniform(0, 1, n), T
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_nll_gradient_matches_finite_differences(backend):
+    x, t_x, T = _customers()
+    weights = np.random.default_rng(1).integers(1, 5, len(x)).astype(float)
+    log_params = np.log([PARAMS[name] for name in ("r", "alpha", "a", "b")])
+
+    def nll(values):
+        return bgnbd_nll_and_grad(values, x, t_x, T, weights, 0.001, backend=backend)[0]
+
+    _, grad = bgnbd_nll_and_grad(log_params, x, t_x, T, weights, 0.001, backend=backend)
+    np.testing.assert_allclose(grad, approx_fprime(log_params, nll, 1e-7), rtol=1e-4, atol=1e-6)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_gamma_gamma_gradient_matches_finite_differences(backend):
+    x, _, T = _customers()
+    m = T * 3  # pozitif ortalama değerler
+    weights = np.random.default_rng(1).integers(1, 5, len(x)).astype(float)
+
+    def nll(values):
+        return gamma_gamma_nll_and_grad(values, x, m, weights, 0.01, backend=backend)[0]
+
+    _, grad = gamma_gamma_nll_and_grad(GGF_LOG_PARAMS, x, m, weights, 0.01, backend=backend)
+    np.testing.assert_allclose(grad, approx_fprime(GGF_LOG_PARAMS, nll, 1e-7),
+                               rtol=1e-4, atol=1e-6)
+
+
+def test_gamma_gamma_nll_matches_lifetimes():
+    x, _, T = _customers()
+    m, weights = T * 3, np.ones_like(x)
+    expected = GammaGammaFitter._negative_log_likelihood(GGF_LOG_PARAMS, x, m, weights, 0.01)
+    for backend in BACKENDS:
+        nll, _ = gamma_gamma_nll_and_grad(GGF_LOG_PARAMS, x, m, weights, 0.01, backend=backend)
+        np.testing.assert_allclose(nll, expected, rtol=1e-10)
+
+
+@pytest.mark.skipif(not NUMBA_AVAILABLE, reason="numba kurulu değil")
+def test_numba_nll_matches_numpy():
+    x, t_x, T = _customers()
+    weights = np.ones_like(x)
+    log_params = np.log([PARAMS[name] for name in ("r", "alpha", "a", "b")])
+    numpy_result = bgnbd_nll_and_grad(log_params, x, t_x, T, weights, 0.001, backend="numpy")
+    numba_result = bgnbd_nll_and_grad(log_params, x, t_x, T, weights, 0.001, backend="numba")
+    np.testing.assert_allclose(numba_result[0], numpy_result[0], rtol=1e-10)
+    np.testing.assert_allclose(numba_result[1], numpy_result[1], rtol=1e-8, atol=1e-12)
+
+
+@pytest.mark.skipif(not NUMBA_AVAILABLE, reason="numba kurulu değil")
+@pytest.mark.parametrize("horizon", [24.0, 1_000.0, 100_000.0])
+def test_numba_expected_purchases_matches_numpy_for_large_frequency(horizon):
+    # Büyük frequency ve z → 1'de Gauss serisi taşar; Euler dönüşümüne geçilmeli
+    x = np.array([1.0, 5, 50, 200, 500, 1_000, 3_000, 10_000])
+    T = np.full_like(x, 60.0)
+    t = np.array([horizon])
+    numpy_result = bgnbd_expected_purchases(PARAMS, t, x, T - 1, T, backend="numpy")
+    numba_result = bgnbd_expected_purchases(PARAMS, t, x, T - 1, T, backend="numba")
+    assert np.isfinite(numba_result).all()
+    np.testing.assert_allclose(numba_result, numpy_result, rtol=1e-8)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import make_flo_frame
+from src.btyd_models import fit_cltv_models, frozen_cltv_models
+from src.cltv_core import build_cltv_summary, prepare_cltv_data, score_cltv
+from src.cltv_simulation import simulate_cltv
+
+N_DRAWS = 400
+
+
+@pytest.fixture(scope="module")
+def cltv_df():
+    return build_cltv_summary(prepare_cltv_data(make_flo_frame(2_000, seed=5)))
+
+
+@pytest.mark.parametrize("model", ["bgnbd", "mbgnbd", "pareto_nbd"])
+def test_simulated_means_match_point_predictions(cltv_df, model):
+    fit = fit_cltv_models(cltv_df, model=model)
+    scored = score_cltv(cltv_df, *frozen_cltv_models(fit))
+    result = simulate_cltv(scored, fit["bgf"], fit["ggf"], horizons=(3, 6), n_draws=N_DRAWS,
+                           n_jobs=2, random_state=0, transaction_model=model)
+
+    # Segmentsiz (skorlanmamış) müşteriler simülasyona girmez
+    segmented = scored[scored["cltv_segment"].notna()]
+    overall = result[result["cltv_segment"] == "ALL"].set_index(["metric", "horizon_month"])
+    for month in (3, 6):
+        purchases = segmented[f"exp_sales_{month}_month"]
+        expected = {"purchases": purchases.sum(),
+                    "revenue": (purchases * segmented["exp_average_value"]).sum()}
+        for metric, value in expected.items():
+            row = overall.loc[(metric, month)]
+            # Toplam çok müşterinin toplamı, yaklaşık normal: σ ≈ (P90 - P10) / 2.563
+            standard_error = (row["p90"] - row["p10"]) / 2.563 / np.sqrt(N_DRAWS)
+            assert abs(row["mean"] - value) < 4 * standard_error, (metric, month)
+
+
+def test_draws_are_reproducible_for_a_seed(cltv_df):
+    fit = fit_cltv_models(cltv_df, model="pareto_nbd")
+    scored = score_cltv(cltv_df, *frozen_cltv_models(fit))
+
+    def run(n_jobs, seed):
+        return simulate_cltv(scored, fit["bgf"], fit["ggf"], n_draws=150, batch_draws=50,
+                             n_jobs=n_jobs, random_state=seed, transaction_model="pareto_nbd")
+
+    first = run(1, seed=11)
+    pd.testing.assert_frame_equal(first, run(3, seed=11))
+    assert not np.allclose(first["mean"], run(1, seed=12)["mean"])
+
+
+def test_unknown_transaction_model_is_rejected(cltv_df):
+    with pytest.raises(ValueError, match="Bilinmeyen işlem modeli"):
+        simulate_cltv(cltv_df, {}, {}, transaction_model="nbd")
@@ -0,0 +1,33 @@
+import functools
+
+import numpy as np
+
+from benchmarks.synthetic import make_flo_frame
+from src import cltv_sweep
+from src.cltv_core import build_cltv_summary, prepare_cltv_data
+from src.model_registry import latest_model, register_model
+
+
+def test_sweep_picks_lowest_holdout_penalizer_and_registers_it(monkeypatch, tmp_path):
+    registry = tmp_path / "registry.json"
+    monkeypatch.setattr(cltv_sweep, "register_model",
+                        functools.partial(register_model, path=registry))
+    cltv_df = build_cltv_summary(prepare_cltv_data(make_flo_frame(2_000, seed=3)))
+
+    results, best_config = cltv_sweep.run_penalizer_sweep(
+        cltv_df, bgf_grid=(0.0, 0.01, 1.0), ggf_grid=(0.0, 0.1, 10.0), n_jobs=2)
+
+    assert len(results) == 6
+    converged = results[results["converged"]]
+    for model in ("bgf", "ggf"):
+        rows = converged[converged["model"] == model]
+        expected = rows["penalizer"].iloc[np.argmin(rows["holdout_nll"].to_numpy())]
+        assert best_config[f"{model}_penalizer_coef"] == expected
+
+    record = latest_model("cltv", source="penalizer_sweep", path=registry)
+    assert record["config"] == best_config
+    for model in ("bgf", "ggf"):
+        best = converged[(converged["model"] == model)
+                         & (converged["penalizer"] == best_config[f"{model}_penalizer_coef"])]
+        assert record["params"][model] == best["params"].iloc[0]
+        assert record["metrics"][f"{model}_holdout_nll"] == best["holdout_nll"].iloc[0]
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.customer_table import CustomerTable, build_customer_table
+
+IDS = ["c", "a", "d", "b"]
+
+
+def _raw():
+    return pd.DataFrame({"master_id": IDS, "order_channel": ["Mobile", "Desktop", None, "Mobile"]})
+
+
+def test_from_frame_sorts_ids_and_aligns_categories():
+    table = CustomerTable.from_frame(_raw())
+    assert table.ids.tolist() == ["a", "b", "c", "d"]
+    assert list(table["order_channel"].astype(object)) == ["Desktop", "Mobile", "Mobile", np.nan]
+    assert table.positions(["d", "yok"]).tolist() == [3, -1]
+    with pytest.raises(ValueError, match="benzersiz"):
+        CustomerTable(["a", "a"])
+
+
+def test_attach_same_order_is_positional_without_copy():
+    table = CustomerTable(IDS)
+    frame = pd.DataFrame({"monetary": [1.0, 2.0, 3.0, 4.0]},
+                         index=pd.Index(["a", "b", "c", "d"], name="master_id"))
+    table.attach(frame)
+    assert np.shares_memory(np.asarray(table["monetary"]), frame["monetary"].to_numpy())
+
+
+def test_attach_subset_out_of_order_reindexes():
+    table = CustomerTable(IDS)
+    frame = pd.DataFrame({
+        "score": [30, 10],
+        "value": [3.5, 1.5],
+        "label": ["z", "x"],
+        "segment": pd.Categorical(["hibernating", "champions"]),
+    }, index=pd.Index(["c", "a"], name="master_id"))
+    table.attach(frame)
+    # Sıra tablonunki; eksik müşteriler NaN / None / -1 kodu
+    np.testing.assert_array_equal(table["score"], [10.0, np.nan, 30.0, np.nan])
+    np.testing.assert_array_equal(table["value"], [1.5, np.nan, 3.5, np.nan])
+    assert list(table["label"]) == ["x", None, "z", None]
+    assert table["segment"].codes.tolist() == [0, -1, 1, -1]
+    assert list(table["segment"].categories) == ["champions", "hibernating"]
+
+
+def test_build_customer_table_prefixes_clashing_cltv_columns():
+    index = pd.Index(["a", "b", "c", "d"], name="master_id")
+    rfm = pd.DataFrame({"frequency": [1, 2, 3, 4], "segment": ["s"] * 4}, index=index)
+    cltv = pd.DataFrame({"frequency": [0.0, 1.0, 2.0, 3.0], "cltv": [5.0, 6.0, 7.0, 8.0]},
+                        index=index)
+    frame = build_customer_table(_raw(), rfm=rfm, cltv=cltv).to_frame()
+    assert list(frame.columns) == ["order_channel", "frequency", "segment", "cltv",
+                                   "cltv_frequency"]
+    assert frame["frequency"].tolist() == [1, 2, 3, 4]
+    assert frame["cltv_frequency"].tolist() == [0.0, 1.0, 2.0, 3.0]
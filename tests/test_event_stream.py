@@ -0,0 +1,154 @@
+import copy
+import queue
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import CHANNELS
+from src.event_stream import events_frame, events_to_delta, queue_batches, run_stream, tail_batches
+from src.feature_store import TOTAL_COLUMNS, FeatureStore
+from src.incremental import apply_delta
+
+FROZEN = {"rebin_threshold": np.inf, "resegment_threshold": np.inf, "refit_threshold": np.inf}
+
+
+def _events(store, raw, n_events=300, seed=0):
+    # Az sayıda farklı zaman damgası: aynı anda gelen olaylar geliş sırasıyla ayrılır
+    rng = np.random.default_rng(seed)
+    ids = np.concatenate([raw["master_id"].sample(25, random_state=seed).to_numpy(),
+                          ["new-1", "new-2", "new-3"]])
+    day = pd.Timestamp(store.attrs["analysis_date"]) - pd.Timedelta(days=3)
+    stamps = day + pd.to_timedelta(rng.integers(0, 6, n_events) * 12, unit="h")
+    channels = np.asarray(CHANNELS + ["offline"])
+    return events_frame(pd.DataFrame({
+        "master_id": ids[rng.integers(len(ids), size=n_events)],
+        "timestamp": stamps,
+        "channel": channels[rng.integers(len(channels), size=n_events)],
+        "amount": rng.gamma(3.0, 60.0, n_events).round(2),
+    }))
+
+
+def _groupby_delta(events, store):
+    # Aynı toplama pandas groupby ile: kararlı sıralama sonrası ilk / son kanal
+    frame = events.assign(arrival=np.arange(len(events)))
+    frame = frame.sort_values(["timestamp", "arrival"], kind="stable")
+    offline = frame["channel"].str.lower().eq("offline")
+    frame = frame.assign(
+        order_num_total_ever_online=(~offline).astype(float),
+        order_num_total_ever_offline=offline.astype(float),
+        customer_value_total_ever_online=frame["amount"].where(~offline, 0.0),
+        customer_value_total_ever_offline=frame["amount"].where(offline, 0.0),
+        day=frame["timestamp"].dt.normalize())
+    grouped = frame.groupby("master_id")
+    expected = grouped[list(TOTAL_COLUMNS)].sum()
+    expected["first_order_date"] = grouped["day"].min()
+    expected["last_order_date"] = grouped["day"].max()
+    expected["order_channel"] = grouped["channel"].first()
+    expected["last_order_channel"] = grouped["channel"].last()
+
+    known = expected.index[store.positions(expected.index) >= 0]
+    stored = store.to_frame(list(TOTAL_COLUMNS) + ["first_order_day", "last_order_day",
+                                                   "order_channel"]).loc[known]
+    expected.loc[known, list(TOTAL_COLUMNS)] += stored[list(TOTAL_COLUMNS)]
+    for column, day_column, pick in (("first_order_date", "first_order_day", np.minimum),
+                                     ("last_order_date", "last_order_day", np.maximum)):
+        days = pd.to_datetime(stored[day_column].to_numpy().astype("datetime64[D]"))
+        expected.loc[known, column] = pick(expected.loc[known, column].to_numpy(), days)
+    expected.loc[known, "order_channel"] = stored["order_channel"].astype(str)
+    return expected
+
+
+def test_events_to_delta_matches_groupby(store, raw):
+    events = _events(store, raw)
+    delta = events_to_delta(events, store).set_index("master_id")
+    expected = _groupby_delta(events, store)
+
+    assert delta.index.tolist() == expected.index.tolist()
+    np.testing.assert_allclose(delta[list(TOTAL_COLUMNS)].to_numpy(),
+                               expected[list(TOTAL_COLUMNS)].to_numpy(dtype=float))
+    for column in ("first_order_date", "last_order_date"):
+        assert (delta[column].to_numpy("datetime64[D]")
+                == expected[column].to_numpy("datetime64[D]")).all()
+    for column in ("order_channel", "last_order_channel"):
+        assert delta[column].astype(str).tolist() == expected[column].astype(str).tolist()
+
+
+def test_unchecked_drift_scores_like_frozen_rescore(store, store_path, raw, tmp_path):
+    # Kayma eşikleri kapalıyken denetimsiz uygulama denetimli olanla aynı depoyu verir
+    shutil.copytree(store_path, tmp_path / "checked")
+    checked = FeatureStore(tmp_path / "checked", mode="r+")
+    delta = events_to_delta(_events(store, raw), store)
+    report = apply_delta(delta, store, check_drift=False, **FROZEN)
+    apply_delta(copy.deepcopy(delta), checked, **FROZEN)
+
+    assert "rfm_drift" not in report and "cltv_drift" not in report
+    assert (report["rfm"], report["cltv"]) == ("frozen", "frozen")
+    columns = ["segment", "RF_SCORE", "cltv", "cltv_segment"]
+    pd.testing.assert_frame_equal(store.to_frame(columns), checked.to_frame(columns))
+
+
+def test_run_stream_checks_drift_on_cadence(store, raw):
+    events = _events(store, raw, n_events=250)
+    batches = [events.iloc[start:start + 50] for start in range(0, len(events), 50)]
+    stats = run_stream(batches, store, drift_check_events=100, drift_check_seconds=np.inf)
+    assert stats["n_batches"] == 5 and stats["n_events"] == 250
+    # 2. ve 4. toplulukta 100 olay birikir
+    assert stats["n_drift_checks"] == 2
+
+
+def _write(path, text, mode="a"):
+    with open(path, mode, encoding="utf-8", newline="") as f:
+        f.write(text)
+
+
+def test_tail_batches_waits_for_partial_line_and_follows_truncation(tmp_path):
+    path = tmp_path / "events.csv"
+    _write(path, "master_id,timestamp,channel,amount\n"
+                 "a,2021-05-01,Desktop,10\nb,2021-05-01,Offline,20\nc,2021-05-0", mode="w")
+    batches = tail_batches(path, max_batch=100, max_delay_ms=0, poll_seconds=0.01)
+
+    first = next(batches)
+    assert first["master_id"].tolist() == ["a", "b"]
+    # Yarım satır satır sonu gelince okunur
+    _write(path, "2,Mobile,30\n")
+    second = next(batches)
+    assert second.to_dict(orient="records") == [
+        {"master_id": "c", "timestamp": "2021-05-02", "channel": "Mobile", "amount": 30}]
+    # Kısalan (döndürülen) dosya baştan okunur; başlık atlanır
+    _write(path, "master_id,timestamp,channel,amount\nd,2021-05-03,Ios App,5\n", mode="w")
+    assert next(batches)["master_id"].tolist() == ["d"]
+    batches.close()
+
+
+def test_tail_batches_without_follow_splits_and_flushes(tmp_path):
+    path = tmp_path / "events.csv"
+    # Boş satır atlanır; son satırın satır sonu yoksa dosya sonunda yine verilir
+    lines = "".join(f"m{i},2021-05-01,Desktop,{i}\n" for i in range(5))
+    _write(path, f"master_id,timestamp,channel,amount\n{lines}\nm5,2021-05-01,Desktop,5",
+           mode="w")
+    batches = list(tail_batches(path, max_batch=2, follow=False))
+    assert [batch["master_id"].tolist() for batch in batches] == [
+        ["m0", "m1"], ["m2", "m3"], ["m4", "m5"]]
+
+
+def test_queue_batches_sizes_and_sentinel():
+    events = queue.Queue()
+    for i in range(5):
+        events.put({"master_id": f"m{i}"})
+    events.put(None)
+    batches = list(queue_batches(events, max_batch=2, max_delay_ms=0))
+    assert [[event["master_id"] for event in batch] for batch in batches] == [
+        ["m0", "m1"], ["m2", "m3"], ["m4"]]
+
+
+def test_queue_batches_takes_waiting_events_after_deadline():
+    events = queue.Queue()
+    for i in range(3):
+        events.put({"master_id": f"m{i}"})
+    batches = queue_batches(events, max_batch=10, max_delay_ms=0)
+    assert len(next(batches)) == 3
+    events.put(None)
+    with pytest.raises(StopIteration):
+        next(batches)
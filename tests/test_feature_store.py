@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import feature_store
+from src.feature_store import FeatureStore
+
+NEW_IDS = ["zz-new-1", "aa-new-2"]
+
+
+def _row_counts(path):
+    store = FeatureStore(path)
+    return {name: len(store[name]) for name in store.columns}, len(store)
+
+
+def test_append_then_update_round_trip(store_path):
+    store = FeatureStore(store_path, mode="r+")
+    n = len(store)
+    positions = store.append(NEW_IDS)
+    assert positions.tolist() == [n, n + 1]
+    assert np.isnan(store["monetary"][positions]).all()
+
+    store.update(pd.DataFrame({"monetary": [10.0, 20.0], "segment": ["champions", "new_one"]},
+                              index=pd.Index(NEW_IDS, name="master_id")))
+    reopened = FeatureStore(store_path)
+    assert reopened.positions(NEW_IDS + ["yok"]).tolist() == [n, n + 1, -1]
+    assert reopened["monetary"][[n, n + 1]].tolist() == [10.0, 20.0]
+    assert list(reopened.column("segment")[[n, n + 1]]) == ["champions", "new_one"]
+    # Değer yazılmamış metin hücreleri "None" metni değil, NA olarak çözülür
+    assert reopened.column("RF_SCORE")[[n, n + 1]].isna().all()
+    # Mevcut müşterilerin konumları değişmez
+    assert reopened.positions(reopened.ids[:n]).tolist() == list(range(n))
+
+
+def test_sorted_positions_follow_update_and_append(store_path):
+    store = FeatureStore(store_path, mode="r+")
+    store.sorted_positions("monetary")
+    changed = store.ids[:5]
+    store.update(pd.DataFrame({"monetary": np.linspace(1e6, 1, 5)},
+                              index=pd.Index(changed, name="master_id")))
+    positions = store.append(NEW_IDS)
+    store.update(pd.DataFrame({"monetary": [-1.0, 5e6]}), positions=positions)
+
+    reopened = FeatureStore(store_path)
+    order = np.asarray(reopened.sorted_positions("monetary"))
+    assert sorted(order.tolist()) == list(range(len(reopened)))
+    assert (np.diff(reopened["monetary"][order]) >= 0).all()
+
+
+@pytest.mark.parametrize("name", ["monetary", "last_order_day", "recency_score"])
+def test_sorted_positions_stay_sorted_over_random_batches(store_path, name):
+    # Sürekli değerler, çok bağlı (gün) değerler ve az sayıda kod: eşit değer
+    # aralığında arama ve dizin taraması yolları
+    store = FeatureStore(store_path, mode="r+")
+    store.sorted_positions(name)
+    rng = np.random.default_rng(0)
+    values = np.asarray(store[name])
+    for batch in range(20):
+        positions = rng.choice(len(store), size=rng.integers(1, 30), replace=False)
+        if batch % 4 == 3:
+            positions = np.r_[positions, store.append([f"zz-{batch}-{i}" for i in range(3)])]
+        new = rng.choice(values, size=len(positions))
+        if name == "recency_score":
+            new = pd.Categorical.from_codes(new, dtype=store._dtype(name))
+        store.update(pd.DataFrame({name: new}), positions=positions)
+
+        order = np.asarray(FeatureStore(store_path).sorted_positions(name))
+        assert np.array_equal(np.sort(order), np.arange(len(store)))
+        assert (np.diff(store[name][order]) >= 0).all()
+
+
+def test_sorted_positions_include_appended_rows_before_update(store_path):
+    store = FeatureStore(store_path, mode="r+")
+    store.sorted_positions("last_order_day")
+    positions = store.append(NEW_IDS)
+    for opened in (FeatureStore(store_path), store):
+        order = np.asarray(opened.sorted_positions("last_order_day"))
+        assert np.array_equal(np.sort(order), np.arange(len(store)))
+        assert (np.diff(store["last_order_day"][order]) >= 0).all()
+        # Eklenen satırların gün değeri 0: dizinin başında
+        assert set(order[:2]) == set(positions)
+
+
+def test_appended_ids_are_found_before_and_after_merge(store_path, monkeypatch):
+    monkeypatch.setattr(feature_store, "ID_OVERFLOW_MIN", 7)
+    store = FeatureStore(store_path, mode="r+")
+    n = len(store)
+    batches = [[f"zz-{b}-{i}" for i in range(3)] for b in range(3)]
+
+    for ids in batches[:2]:
+        store.append(ids[::-1])
+    # 6 kimlik taşma dizininde: sıralı kopya yeniden yazılmadı
+    assert len(FeatureStore(store_path)._sorted_ids) == n
+    store.append(batches[2])
+    # Sınır aşıldı: taşma dizini sıralı kopyaya katıldı
+    assert len(FeatureStore(store_path)._sorted_ids) == n + 9
+
+    ids = [master_id for batch in batches for master_id in batch]
+    expected = [n + 2, n + 1, n, n + 5, n + 4, n + 3, n + 6, n + 7, n + 8]
+    for opened in (store, FeatureStore(store_path)):
+        assert opened.positions(ids + ["yok"]).tolist() == expected + [-1]
+        assert opened.positions(opened.ids[:n]).tolist() == list(range(n))
+
+
+def test_failed_append_is_rolled_back(store_path, monkeypatch):
+    columns_before, n = _row_counts(store_path)
+    append_npy, calls = feature_store._append_npy, []
+
+    def failing_append(path, values):
+        calls.append(path)
+        if len(calls) == 5:
+            raise OSError("disk dolu")
+        append_npy(path, values)
+
+    monkeypatch.setattr(feature_store, "_append_npy", failing_append)
+    with pytest.raises(OSError):
+        FeatureStore(store_path, mode="r+").append(NEW_IDS)
+    assert _row_counts(store_path) == (columns_before, n)
+    assert set(columns_before.values()) == {n}
+
+    # Arama dizileri geri alındığı için aynı kimlikler yeniden eklenebilir
+    monkeypatch.setattr(feature_store, "_append_npy", append_npy)
+    store = FeatureStore(store_path, mode="r+")
+    assert store.append(NEW_IDS).tolist() == [n, n + 1]
+    assert set(_row_counts(store_path)[0].values()) == {n + 2}
@@ -0,0 +1,43 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.file_utils import atomic_write, file_digest, to_builtin
+
+
+def test_atomic_write_keeps_old_file_on_error(tmp_path):
+    path = tmp_path / "rapor.json"
+    path.write_text('{"eski": true}', encoding="utf-8")
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as f:
+            f.write('{"yeni"')
+            raise RuntimeError("yarıda kaldı")
+    assert json.loads(path.read_text(encoding="utf-8")) == {"eski": True}
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_concurrent_atomic_writes_use_separate_temp_files(tmp_path):
+    path = tmp_path / "defter.json"
+    with atomic_write(path) as first, atomic_write(path) as second:
+        assert first.name != second.name
+        first.write("1")
+        second.write("2")
+    # İçteki önce yerine konur, dıştaki sonra; yarım dosya veya artık kalmaz
+    assert path.read_text(encoding="utf-8") == "1"
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_file_digest_matches_hashlib(tmp_path):
+    path = tmp_path / "veri.bin"
+    data = bytes(range(256)) * 1000
+    path.write_bytes(data)
+    assert file_digest(path, block_size=1000) == hashlib.sha256(data).hexdigest()
+
+
+def test_to_builtin_makes_json_ready_values():
+    value = to_builtin({1: (np.int64(2), np.float64("nan")), "s": pd.Series({"a": np.float32(0.5)})})
+    assert value == {"1": [2, None], "s": {"a": 0.5}}
+    assert json.loads(json.dumps(value)) == value
@@ -0,0 +1,98 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.incremental import advance_to, apply_delta, score_frozen
+
+# Kayma eşikleri kapalı: yalnızca dondurulmuş yol
+FROZEN = {"rebin_threshold": np.inf, "resegment_threshold": np.inf, "refit_threshold": np.inf}
+CLTV_OUTPUTS = ["exp_sales_6_month", "p_alive", "cltv"]
+
+
+def _delta(raw, attrs, seed=0):
+    # 30 müşteriye yeni sipariş, 5 yeni müşteri (iki siparişli)
+    rng = np.random.default_rng(seed)
+    day = (pd.Timestamp(attrs["analysis_date"]) - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+    changed = raw.sample(30, random_state=seed).copy()
+    changed["order_num_total_ever_online"] += 1
+    changed["customer_value_total_ever_online"] += rng.gamma(3, 60, len(changed)).round(2)
+    changed["last_order_date"] = day
+    new = raw.sample(5, random_state=seed + 1).copy()
+    new["master_id"] = [f"new-{i}" for i in range(len(new))]
+    new["first_order_date"] = (pd.Timestamp(day) - pd.Timedelta(days=40)).strftime("%Y-%m-%d")
+    new["last_order_date"] = day
+    new["order_num_total_ever_online"], new["order_num_total_ever_offline"] = 1.0, 1.0
+    return pd.concat([changed, new])
+
+
+def _updated(raw, delta):
+    return pd.concat([raw[~raw["master_id"].isin(delta["master_id"])], delta])
+
+
+def _assert_cltv_parity(store, cltv):
+    frame = store.to_frame(CLTV_OUTPUTS + ["cltv_segment"]).loc[cltv.index]
+    np.testing.assert_allclose(frame[CLTV_OUTPUTS].to_numpy(), cltv[CLTV_OUTPUTS].to_numpy(),
+                               rtol=1e-9)
+    assert (frame["cltv_segment"].astype(str) == cltv["cltv_segment"].astype(str)).all()
+
+
+def test_delta_matches_full_frozen_rescore(store, raw):
+    attrs = copy.deepcopy(store.attrs)
+    delta = _delta(raw, attrs)
+    report = apply_delta(delta, store, **FROZEN)
+    assert (report["n_changed"], report["n_new"]) == (30, 5)
+
+    rfm, cltv = score_frozen(_updated(raw, delta), attrs)
+    _assert_cltv_parity(store, cltv)
+    stored = store.to_frame(["recency", "frequency", "monetary", "segment"]).loc[rfm.index]
+    np.testing.assert_allclose(stored[["recency", "frequency", "monetary"]].to_numpy(),
+                               rfm[["recency", "frequency", "monetary"]].to_numpy())
+    # Delta müşterileri dondurulmuş sınırlarla skorlanır (diğerleri kurulumdaki qcut skorunda)
+    ids = delta["master_id"]
+    assert (stored.loc[ids, "segment"].astype(str) == rfm.loc[ids, "segment"].astype(str)).all()
+
+
+def test_advance_matches_full_frozen_rescore(store, raw):
+    attrs = copy.deepcopy(store.attrs)
+    new_date = pd.Timestamp(attrs["analysis_date"]) + pd.Timedelta(days=45)
+    report = advance_to(new_date, store, **FROZEN)
+    assert report["days"] == 45 and report["n_crossed"] > 0
+
+    attrs["analysis_date"] = new_date.isoformat()
+    rfm, cltv = score_frozen(raw, attrs)
+    _assert_cltv_parity(store, cltv)
+    stored = store.to_frame(["recency", "recency_score"]).loc[rfm.index]
+    assert (stored["recency"] == rfm["recency"]).all()
+    # Recency sınırları qcut sınırlarıyla aynı: tüm müşteriler eşleşir
+    assert (stored["recency_score"].astype(str) == rfm["recency_score"].astype(str)).all()
+
+
+def test_delta_after_analysis_date_is_rejected(store, raw):
+    delta = raw.head(3).copy()
+    delta["last_order_date"] = store.attrs["analysis_date"][:10]
+    with pytest.raises(ValueError, match="advance_to"):
+        apply_delta(delta, store)
+
+
+def test_single_order_customers_stay_unscored(store, raw):
+    attrs = copy.deepcopy(store.attrs)
+    delta = _delta(raw, attrs)
+    single = delta["master_id"].str.startswith("new-")
+    delta.loc[single, ["order_num_total_ever_online", "order_num_total_ever_offline"]] = [1.0, 0.0]
+    apply_delta(delta, store, **FROZEN)
+
+    ids = delta.loc[single, "master_id"]
+    frame = store.to_frame(["cltv", "exp_sales_6_month", "cltv_segment", "segment"]).loc[ids]
+    assert frame["cltv"].isna().all() and frame["exp_sales_6_month"].isna().all()
+    assert frame["cltv_segment"].isna().all()
+    # RFM skorlanır; yalnızca CLTV boş kalır
+    assert frame["segment"].notna().all()
+    _, cltv = score_frozen(delta.loc[single], attrs)
+    assert cltv["cltv"].isna().all() and cltv["cltv_segment"].isna().all()
+
+    # İkinci sipariş gelince müşteri dondurulmuş modellerle skorlanır
+    delta.loc[single, "order_num_total_ever_online"] = 2.0
+    apply_delta(delta.loc[single], store, **FROZEN)
+    assert store.to_frame(["cltv"]).loc[ids, "cltv"].notna().all()
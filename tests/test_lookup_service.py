@@ -0,0 +1,101 @@
+import asyncio
+import json
+import os
+import signal
+
+from src.incremental import warmup_rows
+from src.lookup_service import CustomerLookup, LookupService
+
+
+async def _request(socket_path, method, target, payload=None):
+    reader, writer = await asyncio.open_unix_connection(socket_path)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {target} HTTP/1.1\r\nContent-Length: {len(body)}\r\n"
+                 f"Connection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    response = await reader.read()
+    writer.close()
+    return status, json.loads(response.split(b"\r\n\r\n", 1)[1])
+
+
+def _run_service(store_path, socket_path, scenario, **service_kwargs):
+    async def run():
+        service = LookupService(CustomerLookup(store_path), max_delay_ms=1, **service_kwargs)
+        server = await service.start(unix_path=str(socket_path))
+        try:
+            async with server:
+                # Skorlama görevi ölürse istekler takılı kalır; test süreyle düşer
+                return await asyncio.wait_for(scenario(service), 60)
+        finally:
+            service.close()
+
+    return asyncio.run(run())
+
+
+def test_invalid_score_requests_do_not_stop_batcher(store_path, tmp_path):
+    socket_path = tmp_path / "lookup.sock"
+    row = warmup_rows(CustomerLookup(store_path).attrs)[0] | {"master_id": "yeni"}
+
+    async def scenario(service):
+        results = [await _request(socket_path, "POST", "/score", payload)
+                   for payload in ({"rows": 5}, {"rows": [5]}, {"rows": [{"x": 1}]},
+                                   {"rows": [{"master_id": "eksik"}]}, {"rows": [row]})]
+        assert not service._batcher.done()
+        return results
+
+    results = _run_service(store_path, socket_path, scenario)
+    # Biçimsiz gövdeler kuyruğa girmez; eksik sütunlu satır yalnızca kendi isteğini düşürür
+    assert [status for status, _ in results] == [400, 400, 400, 400, 200]
+    assert results[-1][1]["customers"]["yeni"]["source"] == "scored"
+
+
+def test_batcher_failure_fails_only_its_batch(store_path, tmp_path, monkeypatch):
+    socket_path = tmp_path / "lookup.sock"
+    row = warmup_rows(CustomerLookup(store_path).attrs)[0]
+    score_batch, calls = LookupService._score_batch, []
+
+    async def failing_once(self, batch):
+        calls.append(len(batch))
+        if len(calls) == 1:
+            raise RuntimeError("beklenmeyen")
+        await score_batch(self, batch)
+
+    monkeypatch.setattr(LookupService, "_score_batch", failing_once)
+
+    async def scenario(service):
+        return [await _request(socket_path, "POST", "/score", {"rows": [row]})
+                for _ in range(2)]
+
+    first, second = _run_service(store_path, socket_path, scenario)
+    assert first[0] == 500 and "beklenmeyen" in first[1]["error"]
+    assert second[0] == 200
+
+
+def test_dead_worker_returns_503_and_is_replaced(store_path, tmp_path):
+    socket_path = tmp_path / "lookup.sock"
+    row = warmup_rows(CustomerLookup(store_path).attrs)[0]
+
+    async def scenario(service):
+        executor = service._executor
+        for pid in list(executor._processes):
+            os.kill(pid, signal.SIGKILL)
+        dead = await _request(socket_path, "POST", "/score", {"rows": [row]})
+        assert service._executor is not executor
+        return dead, await _request(socket_path, "POST", "/score", {"rows": [row]})
+
+    dead, replaced = _run_service(store_path, socket_path, scenario)
+    assert dead[0] == 503
+    assert replaced[0] == 200 and replaced[1]["customers"][row["master_id"]]["source"] == "scored"
+
+
+def test_unknown_customer_and_path(store_path, tmp_path):
+    socket_path = tmp_path / "lookup.sock"
+
+    async def scenario(service):
+        return (await _request(socket_path, "GET", "/customers/yok"),
+                await _request(socket_path, "GET", "/bilinmeyen"),
+                await _request(socket_path, "GET", "/score"))
+
+    missing, unknown, wrong_method = _run_service(store_path, socket_path, scenario)
+    assert (missing[0], unknown[0], wrong_method[0]) == (404, 404, 405)
@@ -0,0 +1,25 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from src.model_registry import latest_model, load_registry, register_model
+
+
+def test_register_model_appends(tmp_path):
+    path = tmp_path / "registry.json"
+    register_model("cltv", {"r": 1.0}, source="a", path=path)
+    register_model("cltv", {"r": 2.0}, source="b", path=path)
+    assert latest_model("cltv", path=path)["params"] == {"r": 2.0}
+    assert latest_model("cltv", source="a", path=path)["params"] == {"r": 1.0}
+
+
+def _register_many(path, worker, n):
+    for i in range(n):
+        register_model("cltv", {"worker": worker, "i": i}, path=path)
+
+
+def test_concurrent_registrations_are_not_lost(tmp_path):
+    path = tmp_path / "registry.json"
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_register_many, [path] * 4, range(4), [25] * 4))
+    records = load_registry(path)
+    assert sorted((r["params"]["worker"], r["params"]["i"]) for r in records) == [
+        (worker, i) for worker in range(4) for i in range(25)]
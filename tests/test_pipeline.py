@@ -0,0 +1,101 @@
+import pytest
+
+from benchmarks.synthetic import make_flo_frame
+from src import pipeline
+from src.cltv_core import build_cltv_summary, prepare_cltv_data
+from src.config import FEATURE_STORE_DIR
+from src.pipeline import PipelineResult, run_pipeline
+
+RFM_CHAIN = ["ingest", "prepare", "rfm_metrics", "rfm_scoring"]
+
+
+@pytest.fixture
+def cached_rfm(tmp_path):
+    data_path = tmp_path / "flo.csv"
+    make_flo_frame(500, seed=2).to_csv(data_path, index=False)
+    cache_dir = tmp_path / "cache"
+    run_pipeline(data_path, only=RFM_CHAIN, cache_dir=cache_dir, log=None)
+    params = {"data_path": str(data_path), "month": 6, "segment_count": 4,
+              "store_path": str(FEATURE_STORE_DIR)}
+    return data_path, cache_dir, params
+
+
+def _current(cache_dir, params):
+    result = PipelineResult(cache_dir)
+    result.fingerprints = pipeline._fingerprints(params)
+    return {name for name in pipeline.STAGE_NAMES if name in result}
+
+
+def test_unchanged_stages_are_current(cached_rfm):
+    _, cache_dir, params = cached_rfm
+    assert _current(cache_dir, params) == set(RFM_CHAIN)
+
+
+def test_helper_module_change_invalidates_dependent_stages(cached_rfm, monkeypatch):
+    _, cache_dir, params = cached_rfm
+    source = pipeline._module_source
+    monkeypatch.setattr(pipeline, "_module_source",
+                        lambda name: source(name) + ("\n# değişti\n" if name == "rfm_core" else ""))
+    assert _current(cache_dir, params) == {"ingest", "prepare"}
+
+
+def test_transitive_module_change_invalidates_stage(monkeypatch):
+    fit, rfm_scoring = pipeline.STAGES_BY_NAME["fit"], pipeline.STAGES_BY_NAME["rfm_scoring"]
+    before = {stage.name: pipeline._code_digest(stage) for stage in (fit, rfm_scoring)}
+    source = pipeline._module_source
+    monkeypatch.setattr(pipeline, "_module_source",
+                        lambda name: source(name) + ("#" if name == "cltv_kernels" else ""))
+    # fit: btyd_models → cltv_kernels; rfm_core cltv_kernels'e bağlı değil
+    assert pipeline._code_digest(fit) != before["fit"]
+    assert pipeline._code_digest(rfm_scoring) == before["rfm_scoring"]
+
+
+def test_config_change_invalidates_stage(cached_rfm, monkeypatch):
+    _, cache_dir, params = cached_rfm
+    segment_map = dict(pipeline.RFM_CONFIG["segment_map"])
+    segment_map[r"5[4-5]"] = "champions_2"
+    monkeypatch.setitem(pipeline.RFM_CONFIG, "segment_map", segment_map)
+    assert _current(cache_dir, params) == {"ingest", "prepare", "rfm_metrics"}
+
+
+def test_data_change_invalidates_everything(cached_rfm):
+    data_path, cache_dir, params = cached_rfm
+    make_flo_frame(500, seed=3).to_csv(data_path, index=False)
+    assert _current(cache_dir, params) == set()
+
+
+def test_only_requires_cached_inputs(tmp_path):
+    data_path = tmp_path / "flo.csv"
+    make_flo_frame(200, seed=2).to_csv(data_path, index=False)
+    with pytest.raises(RuntimeError, match="önbellekte yok"):
+        run_pipeline(data_path, only=["rfm_scoring"], cache_dir=tmp_path / "cache", log=None)
+
+
+def test_store_path_invalidates_only_store_stages(cached_rfm):
+    _, _, params = cached_rfm
+    before = pipeline._fingerprints(params)
+    moved = pipeline._fingerprints({**params, "store_path": "/baska/depo"})
+    assert {name for name in pipeline.STAGE_NAMES
+            if moved[name] != before[name]} == {"change_feed", "feature_store"}
+
+
+def test_sample_strategy_reports_full_fit_comparison(monkeypatch):
+    monkeypatch.setitem(pipeline.CLTV_CONFIG, "fit_strategy", "sample")
+    monkeypatch.setitem(pipeline.CLTV_CONFIG, "sample_sizes", (500, 1_000))
+    cltv_df = build_cltv_summary(prepare_cltv_data(make_flo_frame(2_000, seed=5)))
+
+    fit = pipeline._fit({"cltv_summary": cltv_df}, {})
+    cltv = pipeline._score({"cltv_summary": cltv_df, "fit": fit}, {"month": 6, "segment_count": 4})
+
+    report = cltv.attrs["fit_report"]
+    assert report["strategy"] == "sample" and report["sample_size"] < len(cltv_df)
+    comparison = report["full_fit_comparison"]
+    assert set(comparison["param_rel_diff"]) == {"r", "alpha", "a", "b", "p", "q", "v"}
+    assert 0 <= comparison["segment_agreement"] <= 1
+    assert comparison["speedup"] > 0
+
+
+def test_unknown_fit_strategy_is_rejected(monkeypatch):
+    monkeypatch.setitem(pipeline.CLTV_CONFIG, "fit_strategy", "fast")
+    with pytest.raises(ValueError, match="fit_strategy"):
+        pipeline._fit({"cltv_summary": None}, {})
@@ -0,0 +1,90 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_flo_frame
+from src.btyd_models import fit_cltv_models, frozen_cltv_models
+from src.cltv_core import build_cltv_summary, prepare_cltv_data, score_cltv
+from src.rfm_core import create_rfm
+from src.segment_cube import ALL, CUBE_DIMENSIONS, CUBE_MEASURES, SegmentCube, build_segment_cube
+
+
+@pytest.fixture(scope="module")
+def tables():
+    raw = make_flo_frame(1_500, seed=8)
+    cltv_df = build_cltv_summary(prepare_cltv_data(raw.copy()))
+    cltv = score_cltv(cltv_df, *frozen_cltv_models(fit_cltv_models(cltv_df)))
+    rfm = create_rfm(raw)
+    # Küp dışında kalması gereken müşteri: CLTV'si yok
+    cltv = cltv.drop(cltv.index[:10])
+    joined = (raw.set_index("master_id")[["order_channel", "last_order_channel"]]
+              .join(rfm[["segment", "monetary"]]).join(cltv, how="inner"))
+    return build_segment_cube(rfm, cltv, raw), joined
+
+
+def _brute_force(joined, **filters):
+    rows = joined
+    for dim, label in filters.items():
+        rows = rows[rows[dim].astype(str) == label]
+    expected = {"count": len(rows)}
+    for measure, column in CUBE_MEASURES.items():
+        if column is not None:
+            expected[measure] = rows[column].sum()
+    return expected
+
+
+def test_every_roll_up_matches_groupby(tables):
+    cube, joined = tables
+    # Her boyut alt kümesi için tüm hücreler (diğer boyutlar ALL)
+    for size in range(len(CUBE_DIMENSIONS) + 1):
+        for dims in itertools.combinations(CUBE_DIMENSIONS, size):
+            grouped = joined.groupby([joined[dim].astype(str) for dim in dims]) if dims else None
+            groups = [((), joined)] if not dims else grouped
+            for key, rows in groups:
+                key = key if isinstance(key, tuple) else (key,)
+                cell = cube.query(**dict(zip(dims, key)))
+                assert cell["count"] == len(rows)
+                for measure, column in CUBE_MEASURES.items():
+                    if column is not None:
+                        assert cell[measure] == pytest.approx(rows[column].sum())
+                        assert cell[f"{measure}_mean"] == pytest.approx(rows[column].mean())
+
+
+def test_query_and_slice_match_brute_force(tables):
+    cube, joined = tables
+    filters = {"segment": "champions", "cltv_segment": "A", "order_channel": "Ios App"}
+    cell = cube.query(**filters)
+    for measure, value in _brute_force(joined, **filters).items():
+        assert cell[measure] == pytest.approx(value)
+
+    table = cube.slice("order_channel", "cltv_segment", measure="cltv", include_all=True,
+                       segment="champions")
+    champions = joined[joined["segment"] == "champions"]
+    expected = champions.pivot_table(index="order_channel", columns="cltv_segment", values="cltv",
+                                     aggfunc="sum", observed=False, fill_value=0.0)
+    expected.columns = expected.columns.astype(str)
+    expected = expected.reindex(index=cube.labels["order_channel"],
+                                columns=cube.labels["cltv_segment"], fill_value=0.0)
+    np.testing.assert_allclose(table.loc[expected.index, expected.columns], expected)
+    np.testing.assert_allclose(table.loc[ALL, ALL], champions["cltv"].sum())
+
+    # Boyut sırasının tersi (columns önce) de aynı tabloyu vermeli
+    flipped = cube.slice("cltv_segment", "order_channel", measure="cltv", segment="champions")
+    np.testing.assert_allclose(flipped.T, table.loc[expected.index, expected.columns])
+
+
+def test_save_load_round_trip(tables, tmp_path):
+    cube, _ = tables
+    loaded = SegmentCube.load(cube.save(tmp_path / "cube.npz"))
+    assert loaded.labels == cube.labels
+    assert loaded.query(segment="at_risk") == pytest.approx(cube.query(segment="at_risk"),
+                                                            nan_ok=True)
+
+
+def test_unknown_dimension_and_label(tables):
+    cube, _ = tables
+    with pytest.raises(ValueError, match="Bilinmeyen boyut"):
+        cube.query(channel="Ios App")
+    with pytest.raises(KeyError):
+        cube.query(segment="yok")
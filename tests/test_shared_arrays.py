@@ -0,0 +1,61 @@
+import gc
+import signal
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.shared_arrays import SharedColumnStore, _exit_on_signal
+
+
+@pytest.fixture
+def default_sigterm():
+    previous = signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    yield
+    signal.signal(signal.SIGTERM, previous)
+
+
+def _store():
+    return SharedColumnStore({"x": np.arange(10, dtype=np.float64)})
+
+
+def test_handlers_restored_after_last_store_closes(default_sigterm):
+    first, second = _store(), _store()
+    assert signal.getsignal(signal.SIGTERM) is _exit_on_signal
+    first.close()
+    # Açık bir sahip depo kaldıkça işleyici yerinde kalır
+    assert signal.getsignal(signal.SIGTERM) is _exit_on_signal
+    second.close()
+    assert signal.getsignal(signal.SIGTERM) is signal.SIG_DFL
+
+
+def test_handlers_restored_on_finalize(default_sigterm):
+    store = _store()
+    del store
+    gc.collect()
+    assert signal.getsignal(signal.SIGTERM) is signal.SIG_DFL
+
+
+def test_application_handler_left_untouched(default_sigterm):
+    def handler(signum, frame):
+        pass
+
+    signal.signal(signal.SIGTERM, handler)
+    with _store() as store:
+        assert store["x"].sum() == 45
+        assert signal.getsignal(signal.SIGTERM) is handler
+    assert signal.getsignal(signal.SIGTERM) is handler
+
+
+def test_frame_round_trip_keeps_missing_text():
+    frame = pd.DataFrame({
+        "channel": ["Mobile", None, "Desktop"],
+        "day": pd.to_datetime(["2021-01-01", "2021-03-05", "2020-12-31"]),
+        "value": [1.5, 2.0, 3.25],
+    })
+    with SharedColumnStore.from_frame(frame) as store:
+        restored = store.frame()
+        assert restored["channel"].isna().tolist() == [False, True, False]
+        assert restored["channel"].iloc[[0, 2]].tolist() == ["Mobile", "Desktop"]
+        assert (restored["day"] == frame["day"]).all()
+        assert restored["value"].tolist() == frame["value"].tolist()
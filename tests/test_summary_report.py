@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.summary_report import (build_summary_report, load_summary_report, save_summary_report,
+                                segment_table, summarize_segments)
+
+VALUES = ["cltv", "frequency"]
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 1_000
+    segment = pd.Categorical(rng.choice(["D", "C", "B", "A", None], n, p=[.3, .3, .2, .1, .1]),
+                             categories=["D", "C", "B", "A", "E"], ordered=True)
+    return pd.DataFrame({"cltv_segment": segment, "segment": rng.choice(["x", "y", "z"], n),
+                         "cltv": rng.gamma(2.0, 50.0, n), "frequency": rng.integers(1, 9, n)})
+
+
+@pytest.mark.parametrize("segment_col", ["cltv_segment", "segment"])
+def test_summary_matches_groupby(frame, segment_col):
+    summary = summarize_segments(frame, segment_col, VALUES + ["missing"])
+    expected = frame.groupby(segment_col, observed=False)[VALUES].agg(["count", "sum", "mean"])
+    n_customers = int(frame[segment_col].notna().sum())
+
+    assert summary["columns"] == VALUES
+    assert summary["n_customers"] == n_customers
+    assert list(summary["segments"]) == [str(label) for label in expected.index]
+    for label, row in expected.iterrows():
+        stats = summary["segments"][str(label)]
+        assert stats["count"] == row[("cltv", "count")]
+        assert stats["share"] == pytest.approx(row[("cltv", "count")] / n_customers)
+        for col in VALUES:
+            assert stats[f"{col}_sum"] == pytest.approx(row[(col, "sum")])
+            np.testing.assert_allclose(stats[f"{col}_mean"], row[(col, "mean")])
+
+    valid = frame[frame[segment_col].notna()]
+    assert summary["total"]["count"] == n_customers
+    for col in VALUES:
+        assert summary["total"][f"{col}_sum"] == pytest.approx(valid[col].sum())
+        assert summary["total"][f"{col}_mean"] == pytest.approx(valid[col].mean())
+
+
+def test_report_round_trip(frame, tmp_path):
+    report = build_summary_report(rfm=frame, cltv=frame, rfm_columns=VALUES, cltv_columns=VALUES)
+    path = save_summary_report(report, tmp_path / "summary.json")
+    loaded = load_summary_report(path)
+
+    table = segment_table(loaded, "cltv", stats=("count", "mean"))
+    expected = frame.groupby("cltv_segment", observed=False)[VALUES].mean()
+    assert list(table.columns) == ["count", "cltv_mean", "frequency_mean"]
+    np.testing.assert_allclose(table[["cltv_mean", "frequency_mean"]].to_numpy(dtype=float),
+                               expected.to_numpy())
+    assert load_summary_report(tmp_path / "yok.json") is None
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.topk import TopK, top_k
+
+
+@pytest.fixture
+def frame():
+    # Çok sayıda eşit değer: eşitlikte önce gelen satır kalmalı
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 20, 500).astype(float)
+    values[rng.choice(500, 25, replace=False)] = np.nan
+    return pd.DataFrame({"cltv": values, "frequency": rng.integers(1, 5, 500).astype(float),
+                         "segment": rng.choice(list("ABCD"), 500)},
+                        index=pd.Index([f"c{i}" for i in range(500)], name="master_id"))
+
+
+def _expected(frame, column, k):
+    return frame.dropna(subset=[column]).sort_values(column, ascending=False, kind="stable").head(k)
+
+
+@pytest.mark.parametrize("chunk_size", [None, 7, 64])
+def test_top_k_matches_stable_sort(frame, chunk_size):
+    result = top_k(frame, "cltv", k=15, chunk_size=chunk_size)
+    pd.testing.assert_frame_equal(result, _expected(frame, "cltv", 15))
+
+
+def test_top_k_multiple_columns(frame):
+    results = top_k(frame, ["cltv", "frequency"], k=5, keep=["cltv", "frequency"])
+    for column in ("cltv", "frequency"):
+        pd.testing.assert_frame_equal(results[column],
+                                      _expected(frame, column, 5)[["cltv", "frequency"]])
+
+
+def test_merge_keeps_shard_order_on_ties(frame):
+    shards = [frame.iloc[:130], frame.iloc[130:300], frame.iloc[300:]]
+    collectors = [TopK("cltv", k=12).update(shard) for shard in shards]
+    merged = collectors[0].merge(collectors[1]).merge(collectors[2])
+    pd.testing.assert_frame_equal(merged.result(), _expected(frame, "cltv", 12))
+
+
+def test_fewer_rows_than_k(frame):
+    result = top_k(frame.iloc[:3], "cltv", k=10)
+    pd.testing.assert_frame_equal(result, _expected(frame.iloc[:3], "cltv", 10))
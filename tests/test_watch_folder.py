@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pandas as pd
+
+from src.watch_folder import FolderWatcher
+
+
+def _watcher(tmp_path, store_path):
+    return FolderWatcher(tmp_path / "incoming", store_path, tmp_path / "ledger.json", log=None,
+                         settle_seconds=0, feed_dir=tmp_path / "feeds")
+
+
+def _process(watcher, name, frame):
+    # Dosyayı bırakır, işin bitmesini bekler ve defter kaydını döndürür
+    path = watcher.drop_dir / name
+    frame.to_csv(path, index=False)
+    assert watcher.claim(path)
+    job = watcher._pending[path]
+    job["future"].exception()
+    watcher.collect()
+    return watcher.ledger[job["digest"]]
+
+
+def _delta(raw, store_path, seed):
+    from src.feature_store import FeatureStore
+
+    day = pd.Timestamp(FeatureStore(store_path).attrs["analysis_date"]) - pd.Timedelta(days=1)
+    delta = raw.sample(10, random_state=seed).copy()
+    delta["order_num_total_ever_online"] += 1
+    delta["last_order_date"] = day.strftime("%Y-%m-%d")
+    return delta
+
+
+def test_delta_without_store_fails(raw, tmp_path):
+    watcher = _watcher(tmp_path, tmp_path / "yok")
+    watcher.start()
+    try:
+        record = _process(watcher, "delta_1.csv", raw.head(5))
+    finally:
+        watcher.close()
+    assert record["status"] == "failed" and record["error"].startswith("FileNotFoundError")
+    assert len(list((watcher.drop_dir / "failed").glob("*delta_1.csv"))) == 1
+
+
+def test_each_delta_gets_its_own_change_feed(store_path, raw, tmp_path):
+    watcher = _watcher(tmp_path, store_path)
+    watcher.start()
+    try:
+        malformed = _process(watcher, "delta_0.csv", raw[["master_id"]].head(3))
+        first = _process(watcher, "delta_1.csv", _delta(raw, watcher.store_path, seed=1))
+        second = _process(watcher, "delta_2.csv", _delta(raw, watcher.store_path, seed=2))
+    finally:
+        watcher.close()
+
+    # Hatalı dosya yalnızca kendi işini düşürür
+    assert malformed["status"] == "failed"
+    assert (first["status"], second["status"]) == ("ok", "ok")
+    feeds = {Path(record["summary"]["change_feed"]) for record in (first, second)}
+    assert len(feeds) == 2 and set((tmp_path / "feeds").iterdir()) == feeds